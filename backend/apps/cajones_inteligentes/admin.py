@@ -2,18 +2,29 @@
 Configuración del admin para Cajones Inteligentes.
 """
 from django.contrib import admin
+from django.db.models import BooleanField, ExpressionWrapper, F, IntegerField, Q
+from django.db.models.functions import Cast
+from core.admin import AllObjectsAdminMixin, LargeTableAdminMixin
 from .models import Cajon, Objeto, Historial, Recomendacion
+from .signals import invalidar_dashboard_usuario
 
 
 @admin.register(Cajon)
-class CajonAdmin(admin.ModelAdmin):
+class CajonAdmin(AllObjectsAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
     """
     Configuración del admin para Cajón.
+
+    Las columnas calculadas salen de anotaciones sobre el contador
+    `ocupados` (una sola consulta por página, ordenables), y el usuario de
+    cada fila llega con select_related.
     """
     list_display = ['nombre', 'usuario', 'capacidad_maxima', 'get_objetos_count', 'get_capacidad_disponible', 'get_esta_lleno', 'is_active']
-    list_filter = ['usuario', 'capacidad_maxima', 'is_active', 'created_at']
+    list_select_related = ['usuario']
+    # Un filtro por usuario listaría la tabla de usuarios completa en la barra lateral
+    list_filter = ['capacidad_maxima', 'is_active', 'created_at']
     search_fields = ['nombre', 'descripcion', 'usuario__username']
     readonly_fields = ['id', 'created_at', 'updated_at', 'created_by', 'updated_by']
+    autocomplete_fields = ['usuario']
     filter_horizontal = []
     
     fieldsets = (
@@ -32,38 +43,52 @@ class CajonAdmin(admin.ModelAdmin):
         })
     )
 
+    def get_queryset(self, request):
+        # Las columnas son sin signo: se restan como enteros con signo
+        return super().get_queryset(request).annotate(
+            disponibles=Cast('capacidad_maxima', IntegerField()) - Cast('ocupados', IntegerField()),
+            lleno=ExpressionWrapper(Q(ocupados__gte=F('capacidad_maxima')), output_field=BooleanField()),
+        )
+
     def get_objetos_count(self, obj):
         """Mostrar cantidad de objetos."""
         if not obj.pk:  # Si es un objeto nuevo
             return "Guarde primero para ver estadísticas"
         return obj.objetos_count
     get_objetos_count.short_description = 'Objetos'
+    get_objetos_count.admin_order_field = 'ocupados'
 
     def get_capacidad_disponible(self, obj):
         """Mostrar capacidad disponible."""
         if not obj.pk:  # Si es un objeto nuevo
             return "Guarde primero para ver estadísticas"
-        return obj.capacidad_disponible
+        return getattr(obj, 'disponibles', obj.capacidad_disponible)
     get_capacidad_disponible.short_description = 'Capacidad Disponible'
+    get_capacidad_disponible.admin_order_field = 'disponibles'
     
     def get_esta_lleno(self, obj):
         """Mostrar si el cajón está lleno."""
         if not obj.pk:  # Si es un objeto nuevo
             return None
-        return obj.esta_lleno
+        return getattr(obj, 'lleno', obj.esta_lleno)
     get_esta_lleno.short_description = 'Lleno'
     get_esta_lleno.boolean = True
+    get_esta_lleno.admin_order_field = 'lleno'
 
 
 @admin.register(Objeto)
-class ObjetoAdmin(admin.ModelAdmin):
+class ObjetoAdmin(AllObjectsAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
     """
     Configuración del admin para Objeto.
     """
     list_display = ['nombre', 'tipo_objeto', 'tamanio', 'get_porcentaje_espacio', 'cajon', 'fecha_ingreso', 'is_active']
-    list_filter = ['tipo_objeto', 'tamanio', 'cajon', 'is_active', 'fecha_ingreso']
+    # El cajón se muestra con su usuario (Cajon.__str__)
+    list_select_related = ['cajon__usuario']
+    # Sin filtro por cajón: listaría todos los cajones; se busca por nombre
+    list_filter = ['tipo_objeto', 'tamanio', 'is_active', 'fecha_ingreso']
     search_fields = ['nombre', 'descripcion', 'cajon__nombre']
     readonly_fields = ['id', 'created_at', 'updated_at', 'fecha_ingreso', 'created_by', 'updated_by']
+    autocomplete_fields = ['cajon']
     
     fieldsets = (
         ('Información Básica', {
@@ -94,15 +119,20 @@ class ObjetoAdmin(admin.ModelAdmin):
 
 
 @admin.register(Historial)
-class HistorialAdmin(admin.ModelAdmin):
+class HistorialAdmin(AllObjectsAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
     """
     Configuración del admin para Historial.
+
+    Es la tabla que más crece: sin date_hierarchy (agrupa las fechas de toda
+    la tabla en cada carga) ni filtro por usuario; el rango de fechas queda
+    en el filtro de created_at.
     """
     list_display = ['nombre', 'tipo_accion', 'usuario', 'objeto', 'cajon', 'created_at']
-    list_filter = ['tipo_accion', 'usuario', 'created_at']
+    list_select_related = ['usuario', 'objeto', 'cajon__usuario']
+    list_filter = ['tipo_accion', 'created_at']
     search_fields = ['nombre', 'motivo', 'usuario__username']
     readonly_fields = ['id', 'created_at', 'updated_at']
-    date_hierarchy = 'created_at'
+    raw_id_fields = ['usuario', 'objeto', 'cajon']
     
     fieldsets = (
         ('Información Básica', {
@@ -119,7 +149,7 @@ class HistorialAdmin(admin.ModelAdmin):
 
 
 @admin.register(Recomendacion)
-class RecomendacionAdmin(admin.ModelAdmin):
+class RecomendacionAdmin(AllObjectsAdminMixin, admin.ModelAdmin):
     """
     Configuración del admin para Recomendación.
     """
@@ -127,12 +157,14 @@ class RecomendacionAdmin(admin.ModelAdmin):
         'nombre', 'tipo_recomendacion', 'prioridad', 'usuario', 
         'implementada', 'fecha_creacion'
     ]
+    list_select_related = ['usuario']
     list_filter = [
         'tipo_recomendacion', 'prioridad', 'implementada', 
-        'fecha_creacion', 'usuario'
+        'fecha_creacion'
     ]
     search_fields = ['nombre', 'descripcion', 'usuario__username']
     readonly_fields = ['id', 'fecha_creacion', 'created_at', 'updated_at']
+    autocomplete_fields = ['usuario']
     date_hierarchy = 'fecha_creacion'
     
     fieldsets = (
@@ -153,13 +185,21 @@ class RecomendacionAdmin(admin.ModelAdmin):
 
     actions = ['marcar_como_implementada', 'desmarcar_implementacion']
 
+    def _actualizar(self, queryset, accion):
+        """
+        Aplica la acción a las recomendaciones seleccionadas con un solo
+        UPDATE e invalida el dashboard de cada usuario afectado.
+        """
+        usuarios = set(queryset.values_list('usuario_id', flat=True).distinct())
+        count = Recomendacion.actualizar_en_lote(queryset, accion)
+        if count:
+            for usuario_id in usuarios:
+                invalidar_dashboard_usuario(usuario_id)
+        return count
+
     def marcar_como_implementada(self, request, queryset):
         """Acción para marcar recomendaciones como implementadas."""
-        count = 0
-        for recomendacion in queryset:
-            if not recomendacion.implementada:
-                recomendacion.marcar_como_implementada()
-                count += 1
+        count = self._actualizar(queryset, 'implementar')
         
         self.message_user(
             request,
@@ -169,14 +209,10 @@ class RecomendacionAdmin(admin.ModelAdmin):
 
     def desmarcar_implementacion(self, request, queryset):
         """Acción para desmarcar recomendaciones como implementadas."""
-        count = 0
-        for recomendacion in queryset:
-            if recomendacion.implementada:
-                recomendacion.desmarcar_implementacion()
-                count += 1
+        count = self._actualizar(queryset, 'desmarcar')
         
         self.message_user(
             request,
             f"{count} recomendaciones desmarcadas como implementadas."
         )
-    desmarcar_implementacion.short_description = "Desmarcar implementación"
\ No newline at end of file
+    desmarcar_implementacion.short_description = "Desmarcar implementación"
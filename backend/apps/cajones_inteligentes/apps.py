@@ -13,4 +13,4 @@ class CajonesInteligentesConfig(AppConfig):
         """
         Configuración que se ejecuta cuando la aplicación está lista.
         """
-        pass
+        from . import signals, tareas  # noqa: F401
@@ -0,0 +1,303 @@
+"""
+Analiza los planes de ejecución de las consultas que emite cada acción de la API.
+
+Crea un conjunto de datos de prueba, ejecuta todas las acciones de los viewsets
+registrados en el router (incluidas las escrituras), captura el SQL de cada una
+y le aplica EXPLAIN para detectar escaneos completos, ordenamientos externos
+(filesort) y tablas temporales. Propone índices compuestos para las tablas
+afectadas y genera un reporte JSON comparable entre versiones.
+
+Todos los cambios (datos de prueba y escrituras) se revierten al terminar.
+
+Uso:
+    python manage.py analizar_consultas
+    python manage.py analizar_consultas --cajones 50 --objetos 40 --salida reporte.json
+    python manage.py analizar_consultas --comparar reporte_anterior.json
+"""
+import json
+from datetime import datetime, timezone
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.explain import AnalizadorConsultas, es_analizable
+from cajones_inteligentes.models import (
+    Cajon, Objeto, Historial, Recomendacion, TipoObjeto, Tamanio
+)
+from cajones_inteligentes.urls import router
+
+USUARIO_ANALISIS = 'analisis_consultas'
+
+
+def sembrar_datos(cajones, objetos_por_cajon):
+    """
+    Crea un usuario con cajones, objetos, historial y recomendaciones.
+    Retorna un diccionario con instancias de referencia para las acciones.
+    """
+    usuario = User.objects.create_user(username=USUARIO_ANALISIS, password=None)
+    tipos = [choice[0] for choice in TipoObjeto.choices]
+    tamanios = [choice[0] for choice in Tamanio.choices]
+
+    lista_cajones = Cajon.objects.bulk_create([
+        Cajon(
+            nombre=f'Cajon Analisis {i}',
+            capacidad_maxima=objetos_por_cajon + 5,
+            usuario=usuario,
+            created_by=usuario,
+        )
+        for i in range(cajones)
+    ])
+    lista_objetos = Objeto.objects.bulk_create([
+        Objeto(
+            nombre=f'Objeto {j}',
+            tipo_objeto=tipos[j % len(tipos)],
+            tamanio=tamanios[j % len(tamanios)],
+            cajon=cajon,
+            created_by=usuario,
+        )
+        for cajon in lista_cajones
+        for j in range(objetos_por_cajon)
+    ])
+    Cajon.recalcular_ocupacion(Cajon.objects.filter(usuario=usuario))
+
+    acciones = [choice[0] for choice in Historial._meta.get_field('tipo_accion').choices]
+    Historial.objects.bulk_create([
+        Historial(
+            nombre=f'Accion {i}',
+            motivo='Datos de análisis',
+            usuario=usuario,
+            objeto=objeto,
+            cajon_id=objeto.cajon_id,
+            tipo_accion=acciones[i % len(acciones)],
+        )
+        for i, objeto in enumerate(lista_objetos)
+    ])
+    recomendaciones = Recomendacion.objects.bulk_create([
+        Recomendacion(
+            nombre=f'Recomendacion {i}',
+            descripcion='Datos de análisis',
+            usuario=usuario,
+            implementada=i % 3 == 0,
+        )
+        for i in range(max(cajones, 1))
+    ])
+
+    inactivo = Objeto.objects.create(nombre='Objeto Inactivo', cajon=lista_cajones[-1])
+    inactivo.soft_delete()
+
+    return {
+        'usuario': usuario,
+        'cajon': lista_cajones[0],
+        'cajon_destino': lista_cajones[-1],
+        'objeto': lista_objetos[0],
+        'objeto_inactivo': inactivo,
+        'historial': Historial.objects.filter(usuario=usuario).first(),
+        'recomendacion': recomendaciones[0],
+        'totales': {
+            'cajones': len(lista_cajones),
+            'objetos': len(lista_objetos),
+            'historial': len(lista_objetos),
+            'recomendaciones': len(recomendaciones),
+        },
+    }
+
+
+def version_motor(connection):
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version
+    return '.'.join(map(str, connection.mysql_version))
+
+
+def escenarios(basename, accion, datos):
+    """
+    Retorna las variantes a ejecutar para una acción como lista de
+    diccionarios con 'pk', 'parametros' (query string) y 'cuerpo'.
+    """
+    cajon, destino, objeto = datos['cajon'], datos['cajon_destino'], datos['objeto']
+    nuevo_objeto = {
+        'nombre': 'Objeto Analisis', 'tipo_objeto': TipoObjeto.ROPA,
+        'tamanio': Tamanio.PEQUENO, 'cajon': str(destino.pk),
+    }
+    recomendacion = {
+        'nombre': 'Recomendacion Analisis', 'usuario': datos['usuario'].pk,
+        'descripcion': 'Recomendación generada durante el análisis',
+    }
+    especificos = {
+        ('cajon', 'list'): [{}, {'parametros': {'search': 'Analisis'}},
+                            {'parametros': {'ordering': '-created_at'}}],
+        ('cajon', 'create'): [{'cuerpo': {'nombre': 'Cajon Analisis Nuevo', 'capacidad_maxima': 10}}],
+        ('cajon', 'update'): [{'cuerpo': {'nombre': cajon.nombre, 'capacidad_maxima': 500}}],
+        ('cajon', 'partial_update'): [{'cuerpo': {'descripcion': 'Actualizado'}}],
+        ('objeto', 'list'): [{}, {'parametros': {'tipo_objeto': TipoObjeto.ROPA}},
+                             {'parametros': {'cajon': str(cajon.pk)}},
+                             {'parametros': {'search': 'Objeto 1'}}],
+        ('objeto', 'create'): [{'cuerpo': nuevo_objeto}],
+        ('objeto', 'nuevo_objeto'): [{'cuerpo': nuevo_objeto}],
+        ('objeto', 'update'): [{'cuerpo': {**nuevo_objeto, 'nombre': objeto.nombre}}],
+        ('objeto', 'partial_update'): [{'cuerpo': {'descripcion': 'Actualizado'}}],
+        ('objeto', 'modificar_objeto'): [{'cuerpo': {'descripcion': 'Actualizado'}}],
+        ('objeto', 'consultar_objeto'): [{'parametros': {'nombre': objeto.nombre}}],
+        ('objeto', 'mover'): [{'cuerpo': {'objetos': [str(objeto.pk)], 'cajon_destino': str(destino.pk)}}],
+        ('objeto', 'restore'): [{'pk': datos['objeto_inactivo'].pk}],
+        ('historial', 'list'): [{}, {'parametros': {'tipo_accion': 'CREAR'}},
+                                {'parametros': {'cajon': str(cajon.pk)}}],
+        ('recomendacion', 'list'): [{}, {'parametros': {'implementada': 'false'}}],
+        ('recomendacion', 'create'): [{'cuerpo': recomendacion}],
+        ('recomendacion', 'update'): [{'cuerpo': recomendacion}],
+        ('recomendacion', 'partial_update'): [{'cuerpo': {'prioridad': 'ALTA'}}],
+        ('gestion-cajones', 'eliminar_duplicados'): [{'cuerpo': {'cajon_id': str(cajon.pk)}}],
+        ('gestion-cajones', 'ordenar_objetos'): [{'cuerpo': {'cajon_id': str(cajon.pk), 'criterio': 'nombre'}}],
+    }
+    variantes = especificos.get((basename, accion), [{}])
+    instancia = datos.get(basename)
+    return [
+        {'pk': instancia.pk if instancia is not None else None, 'parametros': {}, 'cuerpo': {}, **variante}
+        for variante in variantes
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Captura los planes de ejecución de cada acción de la API y sugiere índices'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cajones', type=int, default=20, help='Cajones del conjunto de prueba')
+        parser.add_argument('--objetos', type=int, default=15, help='Objetos por cajón')
+        parser.add_argument('--salida', help='Archivo JSON donde guardar el reporte (por defecto stdout)')
+        parser.add_argument('--comparar', help='Reporte JSON anterior contra el cual comparar')
+
+    def handle(self, *args, **options):
+        if options['cajones'] < 2 or options['objetos'] < 1:
+            raise CommandError('Se necesitan al menos 2 cajones y 1 objeto por cajón')
+
+        if connection.vendor not in ('sqlite', 'mysql'):
+            raise CommandError(f'EXPLAIN no soportado para {connection.vendor}')
+        if User.objects.filter(username=USUARIO_ANALISIS).exists():
+            raise CommandError(f'Ya existe el usuario {USUARIO_ANALISIS}; elimínelo antes de analizar')
+
+        self.connection = connection
+        self.analizador = AnalizadorConsultas(connection)
+        self.factory = APIRequestFactory()
+
+        with transaction.atomic():
+            datos = sembrar_datos(options['cajones'], options['objetos'])
+            acciones = self.ejecutar_acciones(datos)
+            transaction.set_rollback(True)
+
+        reporte = self.construir_reporte(datos['totales'], acciones)
+        contenido = json.dumps(reporte, indent=2, ensure_ascii=False, default=str)
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                archivo.write(contenido)
+            self.stdout.write(self.style.SUCCESS(f"Reporte guardado en {options['salida']}"))
+        else:
+            self.stdout.write(contenido)
+
+        self.mostrar_resumen(reporte)
+        if options['comparar']:
+            with open(options['comparar'], encoding='utf-8') as archivo:
+                self.mostrar_diferencias(json.load(archivo), reporte)
+
+    def ejecutar_acciones(self, datos):
+        resultados = []
+        for prefijo, viewset, basename in router.registry:
+            for ruta in router.get_routes(viewset):
+                for metodo, accion in ruta.mapping.items():
+                    if not hasattr(viewset, accion):
+                        continue
+                    for escenario in escenarios(basename, accion, datos):
+                        if ruta.detail and escenario['pk'] is None:
+                            continue
+                        resultados.append(self.ejecutar(
+                            viewset, ruta, metodo, accion, basename, escenario, datos['usuario']
+                        ))
+        return resultados
+
+    def ejecutar(self, viewset, ruta, metodo, accion, basename, escenario, usuario):
+        """Ejecuta una acción dentro de un savepoint y explica sus consultas."""
+        origen = f'{basename}.{accion}'
+        if escenario['parametros']:
+            origen += '?' + '&'.join(f'{k}={v}' for k, v in escenario['parametros'].items())
+
+        if metodo == 'get':
+            request = self.factory.get('/', escenario['parametros'])
+        else:
+            request = getattr(self.factory, metodo)('/', escenario['cuerpo'], format='json')
+        force_authenticate(request, user=usuario)
+        vista = viewset.as_view({metodo: accion}, **ruta.initkwargs)
+        kwargs = {'pk': str(escenario['pk'])} if ruta.detail else {}
+
+        resultado = {'origen': origen, 'metodo': metodo.upper()}
+        punto = transaction.savepoint()
+        try:
+            with CaptureQueriesContext(self.connection) as capturadas:
+                try:
+                    response = vista(request, **kwargs)
+                    resultado['estado'] = response.status_code
+                except Exception as exc:
+                    resultado['error'] = f'{type(exc).__name__}: {exc}'
+
+            consultas = [c['sql'] for c in capturadas.captured_queries if es_analizable(c['sql'])]
+            resultado['consultas'] = len(capturadas.captured_queries)
+            resultado['planes'] = [self.analizador.analizar(sql, origen) for sql in dict.fromkeys(consultas)]
+        finally:
+            transaction.savepoint_rollback(punto)
+        return resultado
+
+    def construir_reporte(self, totales, acciones):
+        resumen = {'acciones': len(acciones), 'consultas': 0, 'errores': 0}
+        for accion in acciones:
+            resumen['consultas'] += accion.get('consultas', 0)
+            resumen['errores'] += 'error' in accion
+            for plan in accion.get('planes', []):
+                for alerta in plan['alertas']:
+                    resumen[alerta['tipo']] = resumen.get(alerta['tipo'], 0) + 1
+
+        return {
+            'motor': self.connection.vendor,
+            'version_motor': version_motor(self.connection),
+            'generado': datetime.now(timezone.utc).isoformat(),
+            'datos': totales,
+            'resumen': resumen,
+            'acciones': acciones,
+            'sugerencias': self.analizador.lista_sugerencias(),
+        }
+
+    def mostrar_resumen(self, reporte):
+        resumen = ', '.join(f'{clave}={valor}' for clave, valor in reporte['resumen'].items())
+        self.stderr.write(f'Resumen: {resumen}')
+        for sugerencia in reporte['sugerencias']:
+            self.stderr.write(self.style.WARNING(
+                f"{sugerencia['modelo'] or sugerencia['tabla']}: {sugerencia['definicion']} "
+                f"({len(sugerencia['origenes'])} acciones)"
+            ))
+
+    def mostrar_diferencias(self, anterior, actual):
+        """Muestra las acciones con más consultas o alertas nuevas respecto al reporte anterior."""
+        def indexar(reporte):
+            return {
+                accion['origen']: (
+                    accion.get('consultas', 0),
+                    {(a['tipo'], a['tabla']) for plan in accion.get('planes', []) for a in plan['alertas']},
+                )
+                for accion in reporte['acciones']
+            }
+
+        previas = indexar(anterior)
+        regresiones = 0
+        for origen, (consultas, alertas) in indexar(actual).items():
+            if origen not in previas:
+                continue
+            consultas_previas, alertas_previas = previas[origen]
+            nuevas = sorted(alertas - alertas_previas)
+            if consultas > consultas_previas or nuevas:
+                regresiones += 1
+                detalle = ', '.join(f'{tipo} en {tabla}' for tipo, tabla in nuevas)
+                self.stderr.write(self.style.ERROR(
+                    f'{origen}: {consultas_previas} -> {consultas} consultas'
+                    + (f'; nuevas alertas: {detalle}' if detalle else '')
+                ))
+        if not regresiones:
+            self.stderr.write(self.style.SUCCESS('Sin regresiones respecto al reporte anterior'))
@@ -0,0 +1,410 @@
+"""
+Genera un conjunto de datos sintético a escala de producción.
+
+Crea usuarios con cajones, objetos y filas de historial con nombres en
+español, distribuciones realistas de tipos y tamaños y sin superar la
+`capacidad_maxima` de ningún cajón. Escribe con `bulk_create` en lotes
+grandes y reparte los usuarios entre varios procesos.
+
+El contenido es determinista: los datos de cada usuario (claves primarias
+según PRIMARY_KEY_STRATEGY, fechas, nombres) dependen solo de la semilla y del índice del usuario, así
+que la misma semilla produce las mismas filas con cualquier número de
+procesos. Sobre una base vacía también coinciden los ids de los usuarios.
+
+Uso:
+    python manage.py generar_datos --usuarios 100 --cajones-por-usuario 8 --objetos 120 --historial 1000
+    python manage.py generar_datos --usuarios 1000 --historial 10000 --procesos 8 --seed 42
+"""
+import math
+import multiprocessing
+import random
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta, timezone
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from cajones_inteligentes.models import Cajon, Historial, Objeto, Tamanio, TipoObjeto
+
+PREFIJO_USUARIO = 'usuario'
+
+# Catálogo de nombres por tipo y peso relativo de cada tipo
+CATALOGO = {
+    TipoObjeto.ROPA: (22, [
+        'Camiseta', 'Pantalón', 'Calcetines', 'Bufanda', 'Chaqueta', 'Gorro',
+        'Guantes', 'Cinturón', 'Corbata', 'Pañuelo', 'Jersey', 'Pijama',
+    ]),
+    TipoObjeto.PAPELERIA: (15, [
+        'Cuaderno', 'Bolígrafo', 'Lápiz', 'Grapadora', 'Carpeta', 'Tijeras',
+        'Regla', 'Goma de borrar', 'Rotulador', 'Clips', 'Agenda', 'Sobres',
+    ]),
+    TipoObjeto.CABLES: (12, [
+        'Cable USB', 'Cable HDMI', 'Cargador', 'Alargador', 'Cable de red',
+        'Adaptador', 'Cable de audio', 'Regleta',
+    ]),
+    TipoObjeto.ELECTRONICA: (10, [
+        'Auriculares', 'Ratón', 'Teclado', 'Batería externa', 'Mando a distancia',
+        'Memoria USB', 'Calculadora', 'Altavoz', 'Linterna',
+    ]),
+    TipoObjeto.LIBROS: (11, [
+        'Novela', 'Diccionario', 'Libro de recetas', 'Enciclopedia', 'Cómic',
+        'Manual', 'Libro de poesía', 'Atlas', 'Revista',
+    ]),
+    TipoObjeto.HERRAMIENTAS: (9, [
+        'Destornillador', 'Martillo', 'Alicates', 'Llave inglesa', 'Cinta métrica',
+        'Nivel', 'Taladro', 'Sierra', 'Juego de llaves Allen',
+    ]),
+    TipoObjeto.COCINA: (13, [
+        'Cuchara de madera', 'Espátula', 'Abrelatas', 'Pelador', 'Batidor',
+        'Sacacorchos', 'Rallador', 'Cucharón', 'Tenedores', 'Cuchillo',
+    ]),
+    TipoObjeto.OTROS: (8, [
+        'Pilas', 'Velas', 'Llaves', 'Gafas de sol', 'Paraguas', 'Cinta adhesiva',
+        'Mechero', 'Costurero',
+    ]),
+}
+
+# Complementos invariables (concuerdan con cualquier nombre)
+CALIFICATIVOS = [
+    'de repuesto', 'de viaje', 'de colores', 'de casa', 'de regalo', 'sin usar',
+    'de segunda mano', 'de la oficina', 'del abuelo', 'de emergencia',
+]
+
+# Distribución de tamaños (pequeño, mediano, grande) por tipo
+TAMANIOS = {
+    TipoObjeto.ROPA: (30, 55, 15),
+    TipoObjeto.PAPELERIA: (70, 25, 5),
+    TipoObjeto.CABLES: (75, 20, 5),
+    TipoObjeto.ELECTRONICA: (50, 40, 10),
+    TipoObjeto.LIBROS: (15, 65, 20),
+    TipoObjeto.HERRAMIENTAS: (25, 45, 30),
+    TipoObjeto.COCINA: (35, 50, 15),
+    TipoObjeto.OTROS: (55, 35, 10),
+}
+
+# Temas de cajón y tipo predominante. Cajon.nombre solo admite letras, dígitos
+# y espacios: el nombre final es "<tema> <usuario> <cajón>"
+TEMAS = [
+    ('Oficina', TipoObjeto.PAPELERIA), ('Cocina', TipoObjeto.COCINA),
+    ('Herramientas', TipoObjeto.HERRAMIENTAS), ('Ropa', TipoObjeto.ROPA),
+    ('Electronica', TipoObjeto.ELECTRONICA), ('Cables', TipoObjeto.CABLES),
+    ('Libros', TipoObjeto.LIBROS), ('Varios', TipoObjeto.OTROS),
+    ('Armario', TipoObjeto.ROPA), ('Escritorio', TipoObjeto.PAPELERIA),
+]
+# Proporción de objetos del tipo predominante del cajón
+AFINIDAD_TEMA = 0.6
+
+CAPACIDADES = ([10, 15, 20, 25, 30, 40, 50, 75, 100], [8, 12, 18, 18, 15, 12, 9, 5, 3])
+
+ACCIONES = (
+    ['CONSULTAR', 'MODIFICAR', 'MOVER', 'CREAR', 'ELIMINAR'],
+    [40, 20, 15, 20, 5],
+)
+MOTIVOS = {
+    'CONSULTAR': 'Consulta de la ubicación de {objeto}',
+    'MODIFICAR': 'Actualización de los datos de {objeto}',
+    'MOVER': 'Reorganización: {objeto} cambia a {cajon}',
+    'CREAR': 'Registro de {objeto} en {cajon}',
+    'ELIMINAR': 'Baja de {objeto}',
+}
+
+
+def uuid7_determinista(momento, aleatorio):
+    """UUIDv7 con el timestamp de `momento` y bits aleatorios de `aleatorio`."""
+    milisegundos = int(momento.timestamp() * 1000)
+    return uuid.UUID(int=(
+        (milisegundos & ((1 << 48) - 1)) << 80
+        | 0x7 << 76
+        | aleatorio.getrandbits(12) << 64
+        | 0b10 << 62
+        | aleatorio.getrandbits(62)
+    ))
+
+
+def uuid4_determinista(momento, aleatorio):
+    """UUIDv4 con los bits de `aleatorio` (`momento` no interviene)."""
+    return uuid.UUID(int=aleatorio.getrandbits(128), version=4)
+
+
+# PRIMARY_KEY_STRATEGY -> generador reproducible (ver core.fields.PRIMARY_KEY_GENERATORS)
+CLAVES_DETERMINISTAS = {
+    'uuid4': uuid4_determinista,
+    'uuid7': uuid7_determinista,
+}
+
+
+@contextmanager
+def fechas_explicitas():
+    """
+    Desactiva auto_now/auto_now_add de los modelos generados para que
+    bulk_create guarde las fechas deterministas en lugar de la hora actual.
+    """
+    campos = [
+        (campo, campo.auto_now, campo.auto_now_add)
+        for modelo in (Cajon, Objeto, Historial)
+        for campo in modelo._meta.concrete_fields
+        if getattr(campo, 'auto_now', False) or getattr(campo, 'auto_now_add', False)
+    ]
+    for campo, _, _ in campos:
+        campo.auto_now = campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, auto_now, auto_now_add in campos:
+            campo.auto_now, campo.auto_now_add = auto_now, auto_now_add
+
+
+class GeneradorUsuario:
+    """
+    Genera las filas de un usuario a partir de (semilla, índice).
+    """
+
+    def __init__(self, opciones, desde):
+        self.cajones = opciones['cajones_por_usuario']
+        self.objetos = opciones['objetos']
+        self.historial = opciones['historial']
+        self.seed = opciones['seed']
+        self.desde = desde
+        self.periodo = timedelta(days=opciones['dias'])
+        self.tipos = list(CATALOGO)
+        self.pesos_tipos = [CATALOGO[tipo][0] for tipo in self.tipos]
+        self.tamanios = [Tamanio.PEQUENO, Tamanio.MEDIANO, Tamanio.GRANDE]
+        self.clave = CLAVES_DETERMINISTAS[settings.PRIMARY_KEY_STRATEGY]
+
+    def capacidades(self, aleatorio):
+        """Capacidades de los cajones; su suma siempre alcanza para los objetos."""
+        capacidades = aleatorio.choices(*CAPACIDADES, k=self.cajones)
+        minima = math.ceil(self.objetos / self.cajones)
+        return [min(max(capacidad, minima), 1000) for capacidad in capacidades]
+
+    def tipo_objeto(self, aleatorio, tema):
+        if aleatorio.random() < AFINIDAD_TEMA:
+            return tema
+        return aleatorio.choices(self.tipos, self.pesos_tipos)[0]
+
+    def nombre_objeto(self, aleatorio, tipo):
+        base = aleatorio.choice(CATALOGO[tipo][1])
+        if aleatorio.random() < 0.7:
+            return f'{base} {aleatorio.choice(CALIFICATIVOS)}'
+        return base
+
+    def filas(self, indice, usuario_id):
+        """Retorna (cajones, objetos, historial) del usuario como instancias sin guardar."""
+        aleatorio = random.Random(f'{self.seed}:{indice}')
+        alta_usuario = self.desde + timedelta(seconds=aleatorio.randrange(86400 * 7))
+
+        cajones, temas, libres = [], [], []
+        for c, capacidad in enumerate(self.capacidades(aleatorio)):
+            nombre, tema = TEMAS[(indice + c) % len(TEMAS)]
+            creado = alta_usuario + timedelta(seconds=aleatorio.randrange(3600), milliseconds=c)
+            cajones.append(Cajon(
+                id=self.clave(creado, aleatorio),
+                nombre=f'{nombre} {indice} {c}',
+                descripcion=f'Cajón de {nombre.lower()}',
+                capacidad_maxima=capacidad,
+                ocupados=0,
+                usuario_id=usuario_id,
+                created_by_id=usuario_id,
+                created_at=creado,
+                updated_at=creado,
+            ))
+            temas.append(tema)
+            libres.append(capacidad)
+
+        objetos = []
+        paso = self.periodo / max(self.objetos, 1) / 4
+        for o in range(self.objetos):
+            # Cajón al azar; si está lleno, el siguiente con espacio
+            posicion = aleatorio.randrange(self.cajones)
+            while not libres[posicion]:
+                posicion = (posicion + 1) % self.cajones
+            libres[posicion] -= 1
+            cajon = cajones[posicion]
+            cajon.ocupados += 1
+            tipo = self.tipo_objeto(aleatorio, temas[posicion])
+            creado = alta_usuario + timedelta(hours=1) + paso * o
+            objetos.append(Objeto(
+                id=self.clave(creado, aleatorio),
+                nombre=self.nombre_objeto(aleatorio, tipo),
+                tipo_objeto=tipo,
+                tamanio=aleatorio.choices(self.tamanios, TAMANIOS[tipo])[0],
+                cajon_id=cajon.id,
+                created_by_id=usuario_id,
+                created_at=creado,
+                updated_at=creado,
+                fecha_ingreso=creado,
+            ))
+
+        historial = []
+        if objetos:
+            nombres_cajones = {cajon.id: cajon.nombre for cajon in cajones}
+            inicio = alta_usuario + timedelta(hours=2)
+            paso = (self.desde + self.periodo - inicio) / max(self.historial, 1)
+            acciones = aleatorio.choices(*ACCIONES, k=self.historial)
+            for h, accion in enumerate(acciones):
+                objeto = aleatorio.choice(objetos)
+                creado = inicio + paso * h + paso * aleatorio.random()
+                historial.append(Historial(
+                    id=self.clave(creado, aleatorio),
+                    nombre=f'{accion.capitalize()} {objeto.nombre}',
+                    motivo=MOTIVOS[accion].format(objeto=objeto.nombre, cajon=nombres_cajones[objeto.cajon_id]),
+                    usuario_id=usuario_id,
+                    objeto_id=objeto.id,
+                    cajon_id=objeto.cajon_id,
+                    tipo_accion=accion,
+                    created_at=creado,
+                    updated_at=creado,
+                ))
+        return cajones, objetos, historial
+
+
+def generar_rango(usuarios, opciones, desde):
+    """
+    Genera y escribe los usuarios [(índice, id)] de una tarea.
+    Retorna los totales {'cajones', 'objetos', 'historial'}.
+    """
+    generador = GeneradorUsuario(opciones, desde)
+    lote = opciones['lote']
+    pendientes = {Cajon: [], Objeto: [], Historial: []}
+    totales = {'cajones': 0, 'objetos': 0, 'historial': 0}
+
+    def escribir():
+        # SQLite admite un solo escritor: los procesos generan en paralelo y escriben por turnos
+        with _bloqueo_escritura or nullcontext():
+            # Orden de dependencias de las claves foráneas
+            for modelo, filas in pendientes.items():
+                if filas:
+                    modelo.all_objects.bulk_create(filas, batch_size=lote)
+                    filas.clear()
+
+    with fechas_explicitas():
+        for indice, usuario_id in usuarios:
+            cajones, objetos, historial = generador.filas(indice, usuario_id)
+            pendientes[Cajon] += cajones
+            pendientes[Objeto] += objetos
+            pendientes[Historial] += historial
+            totales['cajones'] += len(cajones)
+            totales['objetos'] += len(objetos)
+            totales['historial'] += len(historial)
+            if sum(map(len, pendientes.values())) >= lote:
+                escribir()
+        escribir()
+    return totales
+
+
+_bloqueo_escritura = None
+
+
+def _iniciar_proceso(bloqueo_escritura):
+    global _bloqueo_escritura
+    django.setup()
+    connections.close_all()
+    _bloqueo_escritura = bloqueo_escritura
+
+
+def _generar_tarea(argumentos):
+    return generar_rango(*argumentos)
+
+
+class Command(BaseCommand):
+    help = 'Genera un conjunto de datos sintético y determinista a escala de producción'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=10)
+        parser.add_argument('--cajones-por-usuario', type=int, default=6)
+        parser.add_argument('--objetos', type=int, default=40, help='Objetos por usuario')
+        parser.add_argument('--historial', type=int, default=200, help='Filas de historial por usuario')
+        parser.add_argument('--seed', '--semilla', type=int, default=1, dest='seed')
+        parser.add_argument('--procesos', type=int, default=multiprocessing.cpu_count(),
+                            help='Procesos que generan y escriben en paralelo (1: en este proceso)')
+        parser.add_argument('--lote', type=int, default=5000, help='Filas por bulk_create')
+        parser.add_argument('--desde', default='2024-01-01', help='Fecha inicial (AAAA-MM-DD)')
+        parser.add_argument('--dias', type=int, default=365, help='Días cubiertos por el historial')
+        parser.add_argument('--password', default='demo123', help='Contraseña de los usuarios generados')
+
+    def handle(self, *args, **options):
+        if min(options['usuarios'], options['cajones_por_usuario'], options['procesos'], options['lote']) < 1:
+            raise CommandError('--usuarios, --cajones-por-usuario, --procesos y --lote deben ser al menos 1')
+        if min(options['objetos'], options['historial']) < 0 or options['dias'] < 1:
+            raise CommandError('--objetos y --historial no pueden ser negativos y --dias debe ser al menos 1')
+        if options['objetos'] > options['cajones_por_usuario'] * 1000:
+            raise CommandError('Los objetos de un usuario no caben en sus cajones (capacidad máxima 1000)')
+        try:
+            desde = datetime.strptime(options['desde'], '%Y-%m-%d').replace(tzinfo=timezone.utc)
+        except ValueError:
+            raise CommandError(f"Fecha inválida: {options['desde']!r}")
+        if settings.PRIMARY_KEY_STRATEGY not in CLAVES_DETERMINISTAS:
+            raise CommandError(f'PRIMARY_KEY_STRATEGY sin generador determinista: {settings.PRIMARY_KEY_STRATEGY!r}')
+        if User.objects.filter(username__startswith=PREFIJO_USUARIO).exists():
+            raise CommandError(f"Ya existen usuarios '{PREFIJO_USUARIO}*'; use una base vacía")
+
+        inicio = time.perf_counter()
+        usuarios = self.crear_usuarios(options, desde)
+        totales = self.generar(usuarios, options, desde)
+        segundos = time.perf_counter() - inicio
+
+        filas = sum(totales.values()) + len(usuarios)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(usuarios)} usuarios, {totales['cajones']} cajones, {totales['objetos']} objetos y "
+            f"{totales['historial']} filas de historial en {segundos:.1f} s ({filas / segundos:,.0f} filas/s)"
+        ))
+
+    def crear_usuarios(self, options, desde):
+        """Crea los usuarios en orden de índice y retorna [(índice, id)]."""
+        # Un solo hash con sal fija: mismo contenido para la misma semilla
+        password = make_password(options['password'], salt=f"generardatos{options['seed']}")
+        ancho = len(str(options['usuarios'] - 1))
+        nombres = [f'{PREFIJO_USUARIO}{indice:0{ancho}d}' for indice in range(options['usuarios'])]
+        User.objects.bulk_create([
+            User(
+                username=nombre,
+                email=f'{nombre}@example.com',
+                password=password,
+                first_name='Usuario',
+                last_name=str(indice),
+                date_joined=desde,
+            )
+            for indice, nombre in enumerate(nombres)
+        ], batch_size=options['lote'])
+        ids = dict(User.objects.filter(username__in=nombres).values_list('username', 'id'))
+        return [(indice, ids[nombre]) for indice, nombre in enumerate(nombres)]
+
+    def generar(self, usuarios, options, desde):
+        procesos = min(options['procesos'], len(usuarios))
+        # Solo las opciones que usan los procesos (deben poder serializarse)
+        opciones = {
+            clave: options[clave]
+            for clave in ('cajones_por_usuario', 'objetos', 'historial', 'seed', 'dias', 'lote')
+        }
+        # Varias tareas por proceso para repartir la carga
+        tamanio_tarea = max(1, math.ceil(len(usuarios) / (procesos * 4)))
+        tareas = [
+            (usuarios[posicion:posicion + tamanio_tarea], opciones, desde)
+            for posicion in range(0, len(usuarios), tamanio_tarea)
+        ]
+        totales = {'cajones': 0, 'objetos': 0, 'historial': 0}
+        if procesos == 1:
+            resultados = map(_generar_tarea, tareas)
+        else:
+            bloqueo = multiprocessing.Lock() if connection.vendor == 'sqlite' else None
+            # Los procesos hijos abren sus propias conexiones
+            connections.close_all()
+            pool = multiprocessing.Pool(procesos, initializer=_iniciar_proceso, initargs=(bloqueo,))
+            resultados = pool.imap_unordered(_generar_tarea, tareas)
+        try:
+            for completadas, parcial in enumerate(resultados, start=1):
+                for clave, valor in parcial.items():
+                    totales[clave] += valor
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'Tarea {completadas}/{len(tareas)} completada')
+        finally:
+            if procesos > 1:
+                pool.close()
+                pool.join()
+        return totales
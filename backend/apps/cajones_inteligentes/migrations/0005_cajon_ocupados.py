@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-18 23:25
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def calcular_ocupados(apps, schema_editor):
+    """Inicializa el contador con la cantidad de objetos activos por cajón."""
+    Cajon = apps.get_model('cajones_inteligentes', 'Cajon')
+    Objeto = apps.get_model('cajones_inteligentes', 'Objeto')
+    conteo = Objeto.objects.filter(
+        cajon=models.OuterRef('pk'), is_active=True
+    ).order_by().values('cajon').annotate(total=models.Count('pk')).values('total')
+    Cajon.objects.update(ocupados=Coalesce(models.Subquery(conteo), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cajones_inteligentes', '0004_alter_objeto_cajon'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cajon',
+            name='ocupados',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Cantidad de objetos activos (contador mantenido por reservas atómicas)'),
+        ),
+        migrations.RunPython(calcular_ocupados, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-18 23:28
+
+import core.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Con UUID_BINARY_STORAGE desactivado el tipo de columna no cambia y esta
+    # migración solo actualiza el estado. En bases MySQL existentes la
+    # conversión a BINARY(16) se hace en línea con `migrar_claves_binarias`.
+
+    dependencies = [
+        ('cajones_inteligentes', '0005_cajon_ocupados'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cajon',
+            name='id',
+            field=core.fields.CompactUUIDField(default=core.fields.generate_primary_key, editable=False, help_text='Identificador único universal (ordenado por tiempo con UUIDv7)', primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='historial',
+            name='id',
+            field=core.fields.CompactUUIDField(default=core.fields.generate_primary_key, editable=False, help_text='Identificador único universal (ordenado por tiempo con UUIDv7)', primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='objeto',
+            name='id',
+            field=core.fields.CompactUUIDField(default=core.fields.generate_primary_key, editable=False, help_text='Identificador único universal (ordenado por tiempo con UUIDv7)', primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='recomendacion',
+            name='id',
+            field=core.fields.CompactUUIDField(default=core.fields.generate_primary_key, editable=False, help_text='Identificador único universal (ordenado por tiempo con UUIDv7)', primary_key=True, serialize=False),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.4 on 2026-10-18 23:32
+
+import core.indexes
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cajones_inteligentes', '0006_claves_primarias_uuid7'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    # Los índices nuevos se crean antes de eliminar los anteriores para que las
+    # consultas no queden sin índice durante la migración. En motores sin
+    # índices parciales ActiveIndex crea un índice completo con is_active.
+    operations = [
+        migrations.AddIndex(
+            model_name='cajon',
+            index=core.indexes.ActiveIndex(condition=models.Q(('is_active', True)), fields=['usuario', 'nombre'], name='cajon_usuario_nombre_activo'),
+        ),
+        migrations.AddIndex(
+            model_name='historial',
+            index=core.indexes.ActiveIndex(condition=models.Q(('is_active', True)), fields=['usuario', '-created_at'], name='historial_usuario_fecha_activo'),
+        ),
+        migrations.AddIndex(
+            model_name='objeto',
+            index=core.indexes.ActiveIndex(condition=models.Q(('is_active', True)), fields=['cajon', 'tipo_objeto'], name='objeto_cajon_tipo_activo'),
+        ),
+        migrations.AddIndex(
+            model_name='recomendacion',
+            index=core.indexes.ActiveIndex(condition=models.Q(('is_active', True)), fields=['usuario', '-fecha_creacion'], name='recomendacion_usuario_activo'),
+        ),
+        migrations.RemoveIndex(
+            model_name='cajon',
+            name='cajones_int_usuario_0284b4_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='historial',
+            name='cajones_int_usuario_58954c_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='objeto',
+            name='cajones_int_cajon_i_e1201c_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='recomendacion',
+            name='cajones_int_usuario_41250f_idx',
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-19 00:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cajones_inteligentes', '0007_indices_parciales_activos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cajon',
+            index=models.Index(fields=['usuario', 'updated_at', 'id'], name='cajon_usuario_cambios'),
+        ),
+        migrations.AddIndex(
+            model_name='objeto',
+            index=models.Index(fields=['cajon', 'updated_at', 'id'], name='objeto_cajon_cambios'),
+        ),
+        migrations.AddIndex(
+            model_name='recomendacion',
+            index=models.Index(fields=['usuario', 'updated_at', 'id'], name='recomendacion_usuario_cambios'),
+        ),
+    ]
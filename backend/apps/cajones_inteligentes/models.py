@@ -1,8 +1,13 @@
 
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator, RegexValidator
+from django.db import transaction
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from core.events import publish_on_commit
+from core.indexes import ActiveIndex
 from core.models import BaseModel, AuditableModel
 import uuid
 
@@ -68,13 +73,21 @@ class Cajon(AuditableModel):
         null=True,
         help_text="Descripción adicional del cajón"
     )
+    
+    ocupados = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Cantidad de objetos activos (contador mantenido por reservas atómicas)"
+    )
 
     class Meta:
         verbose_name = "Cajón"
         verbose_name_plural = "Cajones"
         ordering = ['nombre']
         indexes = [
-            models.Index(fields=['usuario', 'nombre']),
+            ActiveIndex(fields=['usuario', 'nombre'], name='cajon_usuario_nombre_activo'),
+            # Feed de cambios: incluye las lápidas (is_active=False)
+            models.Index(fields=['usuario', 'updated_at', 'id'], name='cajon_usuario_cambios'),
             models.Index(fields=['capacidad_maxima']),
         ]
 
@@ -84,9 +97,7 @@ class Cajon(AuditableModel):
     @property
     def objetos_count(self):
         """Cantidad actual de objetos en el cajón."""
-        if not self.pk:  # Si el cajón no está guardado aún
-            return 0
-        return self.objetos.filter(is_active=True).count()
+        return self.ocupados
     
     @property
     def capacidad_disponible(self):
@@ -110,11 +121,74 @@ class Cajon(AuditableModel):
             return 0
         return (self.objetos_count / self.capacidad_maxima) * 100
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Recordar la capacidad guardada para detectar cambios (evento SSE)."""
+        instance = super().from_db(db, field_names, values)
+        instance._capacidad_guardada = instance.__dict__.get('capacidad_maxima')
+        return instance
+    
     def clean(self):
         """Validaciones personalizadas del modelo."""
         super().clean()
         if self.capacidad_maxima and self.capacidad_maxima <= 0:
-            raise models.ValidationError("La capacidad máxima debe ser mayor que 0")
+            raise ValidationError("La capacidad máxima debe ser mayor que 0")
+    
+    def save(self, *args, **kwargs):
+        """
+        Override save para no sobrescribir el contador de ocupación.
+        El contador solo se modifica con reservas atómicas; guardar una copia
+        en memoria desactualizada perdería las reservas concurrentes.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'ocupados'
+            ]
+        super().save(*args, **kwargs)
+        if 'capacidad_maxima' in (kwargs.get('update_fields') or ['capacidad_maxima']):
+            self._capacidad_guardada = self.capacidad_maxima
+    
+    @classmethod
+    def reservar_espacio(cls, cajon_id, cantidad=1):
+        """
+        Reserva espacio con un único UPDATE condicional:
+        ocupados = ocupados + cantidad WHERE ocupados + cantidad <= capacidad_maxima.
+        
+        Debe ejecutarse dentro de la misma transacción que la escritura de los
+        objetos; si la transacción se revierte, la reserva se libera con ella.
+        Actualiza `updated_at`: el feed de cambios reenvía la ocupación.
+        
+        Raises:
+            ValidationError: Si el cajón no existe, está inactivo o no tiene espacio
+        """
+        reservados = cls.objects.filter(
+            pk=cajon_id,
+            capacidad_maxima__gte=models.F('ocupados') + cantidad
+        ).update(ocupados=models.F('ocupados') + cantidad, updated_at=timezone.now())
+        if not reservados:
+            raise ValidationError("El cajón seleccionado está lleno")
+    
+    @classmethod
+    def liberar_espacio(cls, cajon_id, cantidad=1):
+        """Libera espacio previamente reservado en el cajón (actualiza `updated_at`)."""
+        cls.all_objects.filter(pk=cajon_id, ocupados__gte=cantidad).update(
+            ocupados=models.F('ocupados') - cantidad, updated_at=timezone.now()
+        )
+    
+    @classmethod
+    def recalcular_ocupacion(cls, queryset=None):
+        """
+        Recalcula el contador de ocupación a partir de los objetos activos.
+        Útil tras escrituras que no pasan por el modelo (SQL directo, cargas masivas).
+        Solo toca (y pasa al feed de cambios) los cajones cuyo contador difería.
+        """
+        queryset = cls.all_objects.all() if queryset is None else queryset
+        conteo = Objeto.objects.filter(
+            cajon=models.OuterRef('pk'), is_active=True
+        ).order_by().values('cajon').annotate(total=models.Count('pk')).values('total')
+        total = Coalesce(models.Subquery(conteo), 0)
+        return queryset.exclude(ocupados=total).update(ocupados=total, updated_at=timezone.now())
 
 
 class Objeto(AuditableModel):
@@ -166,35 +240,91 @@ class Objeto(AuditableModel):
         verbose_name_plural = "Objetos"
         ordering = ['-fecha_ingreso']
         indexes = [
-            models.Index(fields=['cajon', 'tipo_objeto']),
+            ActiveIndex(fields=['cajon', 'tipo_objeto'], name='objeto_cajon_tipo_activo'),
+            models.Index(fields=['cajon', 'updated_at', 'id'], name='objeto_cajon_cambios'),
             models.Index(fields=['nombre']),
         ]
 
     def __str__(self):
         return f"{self.nombre} ({self.get_tipo_objeto_display()})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Recordar el cajón cuya ocupación cuenta este objeto al cargarlo."""
+        instance = super().from_db(db, field_names, values)
+        if 'cajon_id' in instance.__dict__ and 'is_active' in instance.__dict__:
+            instance._cajon_ocupado = instance.cajon_id if instance.is_active else None
+        return instance
+    
+    def _obtener_cajon_ocupado(self):
+        """Id del cajón en cuya ocupación está contado actualmente el objeto."""
+        if self._state.adding:
+            return None
+        if '_cajon_ocupado' not in self.__dict__:
+            fila = type(self).all_objects.filter(pk=self.pk).values_list('cajon_id', 'is_active').first()
+            self._cajon_ocupado = fila[0] if fila and fila[1] else None
+        return self._cajon_ocupado
+    
     def clean(self):
         """Validaciones personalizadas del modelo."""
         super().clean()
         
-        # Validar que el cajón no esté lleno (solo si hay cajón asignado)
-        if self.cajon and self.cajon.esta_lleno:
-            # Si estamos actualizando, verificar si es el mismo objeto
-            if not self.pk:
-                raise models.ValidationError("El cajón seleccionado está lleno")
+        # Verificación anticipada; la reserva atómica en save() es la definitiva
+        if self._state.adding and self.cajon and self.cajon.esta_lleno:
+            raise ValidationError("El cajón seleccionado está lleno")
     
     def save(self, *args, **kwargs):
-        """Override save para validaciones antes de guardar."""
+        """
+        Override save para validaciones antes de guardar.
+        Reserva espacio en el cajón destino y libera el del cajón anterior
+        dentro de la misma transacción que la escritura; el cajón anterior
+        se lee de la fila bloqueada con SELECT ... FOR UPDATE.
+        """
         self.full_clean()  # Ejecuta las validaciones
-        super().save(*args, **kwargs)
+        
+        cajon_nuevo = self.cajon_id if self.is_active else None
+        if self._state.adding:
+            if cajon_nuevo is None:
+                super().save(*args, **kwargs)
+                return
+        elif cajon_nuevo is not None and cajon_nuevo == self._obtener_cajon_ocupado():
+            # La ubicación no cambió: no se reescribe, así una copia
+            # desactualizada no deshace un movimiento concurrente
+            if kwargs.get('update_fields') is None:
+                kwargs['update_fields'] = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name not in ('cajon', 'is_active')
+                ]
+            super().save(*args, **kwargs)
+            return
+        
+        with transaction.atomic():
+            cajon_anterior = None
+            if not self._state.adding:
+                # El cajón que se libera es el de la fila bloqueada, no el que
+                # recuerda la instancia (otro escritor pudo moverlo después)
+                fila = type(self).all_objects.select_for_update().filter(pk=self.pk).values_list(
+                    'cajon_id', 'is_active'
+                ).first()
+                cajon_anterior = fila[0] if fila and fila[1] else None
+                self._cajon_ocupado = cajon_anterior
+            if cajon_anterior != cajon_nuevo:
+                if cajon_nuevo:
+                    Cajon.reservar_espacio(cajon_nuevo)
+                if cajon_anterior:
+                    Cajon.liberar_espacio(cajon_anterior)
+            super().save(*args, **kwargs)
+        self._cajon_ocupado = cajon_nuevo
     
     @classmethod
-    def nuevo_objeto(cls, **kwargs):
+    def nuevo_objeto(cls, user=None, **kwargs):
         """
         Método de clase para crear un nuevo objeto.
         Implementa el método nuevoObjeto requerido.
         """
-        return cls.objects.create(**kwargs)
+        objeto = cls(**kwargs)
+        objeto.save(user=user)
+        return objeto
     
     def modificar_objeto(self, nombre=None, **info):
         """
@@ -225,7 +355,7 @@ class Objeto(AuditableModel):
         Consulta objetos por nombre.
         Implementa el método consultarObjeto requerido.
         """
-        queryset = cls.objects.filter(is_active=True)
+        queryset = cls.objects.all()
         
         if nombre:
             queryset = queryset.filter(nombre__icontains=nombre)
@@ -238,7 +368,7 @@ class Objeto(AuditableModel):
         Ordena objetos por tipo.
         Implementa el método ordenarTipo requerido.
         """
-        return cls.objects.filter(is_active=True).order_by('tipo_objeto', 'nombre')
+        return cls.objects.order_by('tipo_objeto', 'nombre')
     
     @classmethod
     def sugerir_tamanio(cls, nombre_objeto):
@@ -268,6 +398,181 @@ class Objeto(AuditableModel):
         
         return Tamanio.MEDIANO  # Por defecto
     
+    @classmethod
+    def mover_objetos(cls, movimientos, usuario):
+        """
+        Mueve varios objetos a sus cajones destino en una sola operación.
+
+        Mueve con un único UPDATE condicionado al cajón de origen leído: si
+        otra operación movió alguno de los objetos entretanto, la transacción
+        completa se revierte. Luego ajusta cada cajón por su saldo neto
+        (entrantes - salientes), reservando con un UPDATE condicional los
+        que crecen, de modo que un intercambio entre cajones llenos es
+        válido. Registra el historial con una sola inserción masiva.
+
+        Args:
+            movimientos: Diccionario {id_objeto: id_cajon_destino}
+            usuario: Usuario que realiza el movimiento
+
+        Returns:
+            Cantidad de objetos movidos
+        """
+        with transaction.atomic():
+            objetos = list(
+                cls.objects.filter(pk__in=movimientos.keys(), cajon__usuario=usuario)
+                .values('pk', 'nombre', 'cajon_id')
+            )
+            if len(objetos) != len(movimientos):
+                raise ValidationError("Uno o más objetos no existen o no pertenecen al usuario")
+
+            # Solo se mueven los objetos cuyo destino es distinto del cajón actual
+            objetos = [obj for obj in objetos if movimientos[obj['pk']] != obj['cajon_id']]
+            if not objetos:
+                return 0
+
+            saldos, por_origen = {}, {}
+            for obj in objetos:
+                destino = movimientos[obj['pk']]
+                saldos[destino] = saldos.get(destino, 0) + 1
+                saldos[obj['cajon_id']] = saldos.get(obj['cajon_id'], 0) - 1
+                por_origen.setdefault(obj['cajon_id'], []).append(obj['pk'])
+            destinos = {movimientos[obj['pk']] for obj in objetos}
+
+            cajones = {cajon.pk: cajon for cajon in Cajon.all_objects.filter(pk__in=saldos.keys())}
+            destinos_validos = {
+                pk for pk, cajon in cajones.items()
+                if cajon.usuario_id == usuario.pk and cajon.is_active
+            }
+            if not destinos <= destinos_validos:
+                raise ValidationError("Uno o más cajones destino no existen o no pertenecen al usuario")
+
+            ahora = timezone.now()
+            if len(destinos) == 1:
+                nuevo_cajon = next(iter(destinos))
+            else:
+                nuevo_cajon = models.Case(
+                    *[models.When(pk=obj['pk'], then=models.Value(movimientos[obj['pk']])) for obj in objetos],
+                    output_field=cls._meta.get_field('cajon').target_field,
+                )
+            origen_leido = models.Q()
+            for origen, ids in por_origen.items():
+                origen_leido |= models.Q(pk__in=ids, cajon_id=origen)
+            movidos = cls.objects.filter(origen_leido).update(
+                cajon_id=nuevo_cajon, updated_at=ahora, updated_by=usuario
+            )
+            if movidos != len(objetos):
+                raise ValidationError("Uno o más objetos fueron modificados por otra operación; intente de nuevo")
+
+            # Reservas en orden de pk para evitar interbloqueos entre movimientos concurrentes
+            llenos = []
+            for cajon_id in sorted(saldos, key=str):
+                if saldos[cajon_id] > 0:
+                    try:
+                        Cajon.reservar_espacio(cajon_id, saldos[cajon_id])
+                    except ValidationError:
+                        llenos.append(cajones[cajon_id].nombre)
+                elif saldos[cajon_id] < 0:
+                    Cajon.liberar_espacio(cajon_id, -saldos[cajon_id])
+            if llenos:
+                raise ValidationError(f"Capacidad insuficiente en: {', '.join(sorted(llenos))}")
+
+            for obj in objetos:
+                publish_on_commit(usuario.pk, 'objeto_movido', {
+                    'objeto': obj['pk'], 'cajon': movimientos[obj['pk']], 'cajon_anterior': obj['cajon_id'],
+                })
+
+            Historial.objects.bulk_create([
+                Historial(
+                    nombre=f"Objeto mover: {obj['nombre']}",
+                    motivo=(
+                        f"Se movió el objeto '{obj['nombre']}' de "
+                        f"'{cajones[obj['cajon_id']].nombre}' "
+                        f"a '{cajones[movimientos[obj['pk']]].nombre}'"
+                    ),
+                    usuario=usuario,
+                    objeto_id=obj['pk'],
+                    cajon_id=movimientos[obj['pk']],
+                    tipo_accion='MOVER',
+                )
+                for obj in objetos
+            ])
+            return len(objetos)
+
+    @classmethod
+    def eliminar_duplicados_cajon(cls, cajon, usuario, progreso=None, lote=500):
+        """
+        Elimina lógicamente los objetos repetidos del cajón: mismo nombre
+        (sin distinguir mayúsculas ni espacios extremos), tipo y tamaño. De
+        cada grupo se conserva el ingresado primero.
+
+        Procesa de a `lote` objetos, cada lote en su transacción: bloquea
+        los que siguen en el cajón, los elimina con un UPDATE, libera su
+        espacio y registra el historial (una inserción masiva) y los eventos
+        solo de esos. Tras cada lote llama a `progreso(porcentaje)`.
+
+        Returns:
+            Cantidad de objetos eliminados
+        """
+        vistos, duplicados = set(), []
+        filas = cls.objects.filter(cajon=cajon).order_by('fecha_ingreso', 'pk').values_list(
+            'pk', 'nombre', 'tipo_objeto', 'tamanio'
+        )
+        for pk, nombre, tipo_objeto, tamanio in filas.iterator():
+            clave = (nombre.strip().lower(), tipo_objeto, tamanio)
+            if clave in vistos:
+                duplicados.append((pk, nombre))
+            else:
+                vistos.add(clave)
+
+        eliminados = 0
+        for inicio in range(0, len(duplicados), lote):
+            bloque = duplicados[inicio:inicio + lote]
+            with transaction.atomic():
+                # Solo los que siguen activos en el cajón: otro escritor pudo
+                # moverlos o eliminarlos después de la lectura
+                vigentes = set(
+                    cls.objects.select_for_update().filter(pk__in=[pk for pk, _ in bloque], cajon=cajon)
+                    .values_list('pk', flat=True)
+                )
+                eliminar = [(pk, nombre) for pk, nombre in bloque if pk in vigentes]
+                afectados = 0
+                if eliminar:
+                    afectados = cls.objects.filter(pk__in=vigentes, cajon=cajon).update(
+                        is_active=False, updated_at=timezone.now(), updated_by=usuario
+                    )
+                    Cajon.liberar_espacio(cajon.pk, afectados)
+                for pk, _ in eliminar:
+                    publish_on_commit(usuario.pk, 'objeto_eliminado', {'objeto': pk, 'cajon': cajon.pk})
+                Historial.objects.bulk_create([
+                    Historial(
+                        nombre=f"Objeto eliminado: {nombre}",
+                        motivo=f"Se eliminó el objeto duplicado '{nombre}' del cajón '{cajon.nombre}'",
+                        usuario=usuario,
+                        objeto_id=pk,
+                        cajon_id=cajon.pk,
+                        tipo_accion='ELIMINAR',
+                    )
+                    for pk, nombre in eliminar
+                ])
+            eliminados += afectados
+            if progreso:
+                progreso((inicio + len(bloque)) * 100 // len(duplicados))
+        return eliminados
+
+    @classmethod
+    def ordenar_objetos_cajon(cls, cajon, criterio='nombre'):
+        """
+        Objetos activos del cajón ordenados por `criterio` ('nombre',
+        'tipo_objeto', 'tamanio' de menor a mayor o 'fecha_ingreso').
+        """
+        if criterio == 'tamanio':
+            orden = models.Case(
+                *[models.When(tamanio=valor, then=posicion) for posicion, valor in enumerate(Tamanio.values)]
+            )
+        else:
+            orden = models.F(criterio)
+        return cls.objects.filter(cajon=cajon).order_by(orden, 'nombre', 'pk')
+
     def obtener_porcentaje_espacio(self):
         """Obtiene qué porcentaje del cajón ocupa este objeto (siempre 1/capacidad_maxima)."""
         if not self.cajon or not self.cajon.capacidad_maxima:
@@ -332,7 +637,7 @@ class Historial(BaseModel):
         verbose_name_plural = "Historiales"
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['usuario', '-created_at']),
+            ActiveIndex(fields=['usuario', '-created_at'], name='historial_usuario_fecha_activo'),
             models.Index(fields=['tipo_accion']),
         ]
 
@@ -407,7 +712,8 @@ class Recomendacion(BaseModel):
         verbose_name_plural = "Recomendaciones"
         ordering = ['-fecha_creacion', '-prioridad']
         indexes = [
-            models.Index(fields=['usuario', '-fecha_creacion']),
+            ActiveIndex(fields=['usuario', '-fecha_creacion'], name='recomendacion_usuario_activo'),
+            models.Index(fields=['usuario', 'updated_at', 'id'], name='recomendacion_usuario_cambios'),
             models.Index(fields=['prioridad']),
             models.Index(fields=['implementada']),
         ]
@@ -419,10 +725,40 @@ class Recomendacion(BaseModel):
         """Marca la recomendación como implementada."""
         self.implementada = True
         self.fecha_implementacion = timezone.now()
-        self.save(update_fields=['implementada', 'fecha_implementacion'])
+        self.save(update_fields=['implementada', 'fecha_implementacion', 'updated_at'])
     
     def desmarcar_implementacion(self):
         """Desmarca la recomendación como implementada."""
         self.implementada = False
         self.fecha_implementacion = None
-        self.save(update_fields=['implementada', 'fecha_implementacion'])
+        self.save(update_fields=['implementada', 'fecha_implementacion', 'updated_at'])
+
+    @classmethod
+    def actualizar_en_lote(cls, queryset, accion):
+        """
+        Aplica una acción a todas las recomendaciones del queryset con un
+        único UPDATE y retorna cuántas cambiaron. Las que ya están en el
+        estado destino no se tocan.
+
+        Acciones: 'implementar', 'desmarcar', 'archivar' (eliminación
+        lógica) y 'restaurar'; para restaurar el queryset debe partir de
+        `all_objects`. update() no emite señales: el llamador invalida los
+        dashboards de los usuarios afectados.
+        """
+        ahora = timezone.now()
+        if accion == 'implementar':
+            queryset = queryset.filter(implementada=False)
+            campos = {'implementada': True, 'fecha_implementacion': ahora}
+        elif accion == 'desmarcar':
+            queryset = queryset.filter(implementada=True)
+            campos = {'implementada': False, 'fecha_implementacion': None}
+        elif accion == 'archivar':
+            queryset = queryset.filter(is_active=True)
+            campos = {'is_active': False}
+        elif accion == 'restaurar':
+            queryset = queryset.filter(is_active=False)
+            campos = {'is_active': True}
+        else:
+            raise ValueError(f'Acción desconocida: {accion}')
+        # updated_at explícito: lo usa el feed de cambios
+        return queryset.update(updated_at=ahora, **campos)
@@ -44,7 +44,7 @@ class CajonSerializer(AuditableModelSerializer):
             'esta_lleno', 'porcentaje_uso'
         ]
         read_only_fields = AuditableModelSerializer.Meta.fields + [
-            'objetos_count', 'capacidad_disponible', 'esta_lleno', 'porcentaje_uso'
+            'usuario', 'objetos_count', 'capacidad_disponible', 'esta_lleno', 'porcentaje_uso'
         ]
     
     def validate_capacidad_maxima(self, value):
@@ -53,6 +53,10 @@ class CajonSerializer(AuditableModelSerializer):
             raise serializers.ValidationError("La capacidad máxima debe ser mayor que 0")
         if value > 1000:
             raise serializers.ValidationError("La capacidad máxima no puede exceder 1000")
+        if self.instance and value < self.instance.ocupados:
+            raise serializers.ValidationError(
+                f"La capacidad máxima no puede ser menor a los {self.instance.ocupados} objetos actuales"
+            )
         return value
     
     def validate_nombre(self, value):
@@ -132,11 +136,56 @@ class ObjetoListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Objeto
         fields = [
-            'id', 'nombre', 'codigo', 'tipo_objeto', 'tipo_objeto_display',
+            'id', 'nombre', 'tipo_objeto', 'tipo_objeto_display',
             'tamanio', 'tamanio_display', 'cajon_nombre', 'fecha_ingreso'
         ]
 
 
+class MovimientoSerializer(serializers.Serializer):
+    """
+    Serializador para el movimiento de un objeto a un cajón destino.
+    """
+    objeto = serializers.UUIDField()
+    cajon = serializers.UUIDField()
+
+
+class MoverObjetosSerializer(serializers.Serializer):
+    """
+    Serializador para mover varios objetos en una sola operación.
+    Acepta una lista de objetos con un cajón destino común, o una lista
+    de movimientos con un destino por objeto.
+    """
+    MAX_OBJETOS = 1000
+
+    objetos = serializers.ListField(
+        child=serializers.UUIDField(), required=False, allow_empty=False, max_length=MAX_OBJETOS
+    )
+    cajon_destino = serializers.UUIDField(required=False)
+    movimientos = MovimientoSerializer(
+        many=True, required=False, allow_empty=False, max_length=MAX_OBJETOS
+    )
+
+    def validate(self, attrs):
+        """Normaliza ambas formas a un diccionario {objeto: cajón destino}."""
+        if 'movimientos' in attrs:
+            if 'objetos' in attrs or 'cajon_destino' in attrs:
+                raise serializers.ValidationError(
+                    "Use 'movimientos' o bien 'objetos' con 'cajon_destino', no ambos"
+                )
+            pares = [(mov['objeto'], mov['cajon']) for mov in attrs['movimientos']]
+        elif 'objetos' in attrs and 'cajon_destino' in attrs:
+            pares = [(objeto, attrs['cajon_destino']) for objeto in attrs['objetos']]
+        else:
+            raise serializers.ValidationError(
+                "Debe indicar 'movimientos' o bien 'objetos' junto con 'cajon_destino'"
+            )
+
+        movimientos = dict(pares)
+        if len(movimientos) != len(pares):
+            raise serializers.ValidationError("Un objeto no puede aparecer más de una vez")
+        return {'movimientos': movimientos}
+
+
 class HistorialSerializer(BaseModelSerializer):
     """
     Serializador para el modelo Historial.
@@ -198,6 +247,26 @@ class RecomendacionSerializer(BaseModelSerializer):
         return value.strip()
 
 
+class RecomendacionesLoteSerializer(serializers.Serializer):
+    """
+    Serializador para aplicar una acción a varias recomendaciones.
+    Las recomendaciones se eligen por lista de ids o por los mismos filtros
+    del listado (prioridad, tipo_recomendacion, implementada).
+    """
+    MAX_RECOMENDACIONES = 1000
+
+    accion = serializers.ChoiceField(choices=['implementar', 'desmarcar', 'archivar', 'restaurar'])
+    ids = serializers.ListField(
+        child=serializers.UUIDField(), required=False, allow_empty=False, max_length=MAX_RECOMENDACIONES
+    )
+    filtros = serializers.DictField(required=False)
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filtros' in attrs):
+            raise serializers.ValidationError("Debe indicar 'ids' o bien 'filtros', no ambos")
+        return attrs
+
+
 class EstadisticasSerializer(serializers.Serializer):
     """
     Serializador para estadísticas del usuario.
@@ -206,48 +275,55 @@ class EstadisticasSerializer(serializers.Serializer):
     total_objetos = serializers.IntegerField()
     objetos_por_tipo = serializers.DictField()
     cajones_llenos = serializers.IntegerField()
-    peso_total = serializers.DecimalField(max_digits=10, decimal_places=2)
-    peso_utilizado = serializers.DecimalField(max_digits=10, decimal_places=2)
+    capacidad_total = serializers.IntegerField()
+    capacidad_utilizada = serializers.IntegerField()
     porcentaje_utilizacion = serializers.FloatField()
+    recomendaciones_pendientes = serializers.IntegerField()
+    ultimo_historial = serializers.DictField(allow_null=True)
+
+
+class CajonDashboardSerializer(CajonListSerializer):
+    """
+    Serializador de cajones con su ocupación para el dashboard.
+    """
+    capacidad_disponible = serializers.ReadOnlyField()
+    porcentaje_uso = serializers.ReadOnlyField()
+
+    class Meta(CajonListSerializer.Meta):
+        fields = CajonListSerializer.Meta.fields + ['capacidad_disponible', 'porcentaje_uso']
+
+
+class DashboardSerializer(serializers.Serializer):
+    """
+    Serializador del modelo de vista completo de la pantalla principal.
+    """
+    cajones = CajonDashboardSerializer(many=True)
+    historial_reciente = HistorialSerializer(many=True)
+    recomendaciones_pendientes = RecomendacionSerializer(many=True)
+    estadisticas = serializers.DictField()
 
 
 class EliminarDuplicadosSerializer(serializers.Serializer):
     """
     Serializador para la acción de eliminar duplicados.
     """
-    cajon_id = serializers.IntegerField()
-    
-    def validate_cajon_id(self, value):
-        """Validar que el cajón existe."""
-        try:
-            cajon = Cajon.objects.get(id=value, is_active=True)
-            return value
-        except Cajon.DoesNotExist:
-            raise serializers.ValidationError("El cajón especificado no existe.")
+    cajon_id = serializers.UUIDField()
 
 
 class OrdenarObjetosSerializer(serializers.Serializer):
     """
     Serializador para la acción de ordenar objetos.
     """
-    cajon_id = serializers.IntegerField()
+    cajon_id = serializers.UUIDField()
     criterio = serializers.ChoiceField(
         choices=[
             ('nombre', 'Nombre'),
             ('tipo_objeto', 'Tipo de Objeto'),
-            ('peso', 'Peso'),
+            ('tamanio', 'Tamaño'),
             ('fecha_ingreso', 'Fecha de Ingreso')
         ],
         default='nombre'
     )
-    
-    def validate_cajon_id(self, value):
-        """Validar que el cajón existe."""
-        try:
-            cajon = Cajon.objects.get(id=value, is_active=True)
-            return value
-        except Cajon.DoesNotExist:
-            raise serializers.ValidationError("El cajón especificado no existe.")
 
 
 class AccionResultadoSerializer(serializers.Serializer):
@@ -257,8 +333,6 @@ class AccionResultadoSerializer(serializers.Serializer):
     mensaje = serializers.CharField()
     elementos_afectados = serializers.IntegerField()
     detalles = serializers.DictField(required=False)
-    recomendaciones_pendientes = serializers.IntegerField()
-    ultimo_historial = HistorialSerializer(read_only=True)
 
 
 class TipoObjetoSerializer(serializers.Serializer):
@@ -0,0 +1,115 @@
+"""
+Señales de la aplicación de Cajones Inteligentes.
+Invalidan las cachés por usuario cuando cambian sus datos, mantienen
+el contador de ocupación de los cajones y publican los eventos en tiempo
+real (core.events) de altas, movimientos y bajas de objetos y cambios de
+capacidad de los cajones.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.events import publish_on_commit
+from utils.helpers import bump_cache_version
+from .models import Cajon, Objeto, Historial, Recomendacion
+
+DASHBOARD_CACHE_NAMESPACE = 'dashboard'
+
+
+def _usuario_id(instance):
+    """Obtiene el id del usuario propietario de la instancia."""
+    if isinstance(instance, Objeto):
+        if not instance.cajon_id:
+            return None
+        if Objeto.cajon.is_cached(instance):
+            return instance.cajon.usuario_id
+        # Varios receptores lo piden en la misma escritura: una sola consulta
+        cajon_id, usuario_id = instance.__dict__.get('_usuario_cajon', (None, None))
+        if cajon_id != instance.cajon_id:
+            usuario_id = Cajon.all_objects.filter(pk=instance.cajon_id).values_list('usuario_id', flat=True).first()
+            instance._usuario_cajon = (instance.cajon_id, usuario_id)
+        return usuario_id
+    return instance.usuario_id
+
+
+@receiver(post_save, sender=Cajon)
+@receiver(post_save, sender=Objeto)
+@receiver(post_save, sender=Historial)
+@receiver(post_save, sender=Recomendacion)
+@receiver(post_delete, sender=Cajon)
+@receiver(post_delete, sender=Objeto)
+@receiver(post_delete, sender=Historial)
+@receiver(post_delete, sender=Recomendacion)
+def invalidar_dashboard(sender, instance, **kwargs):
+    """Invalida el dashboard del usuario propietario de la instancia."""
+    usuario_id = _usuario_id(instance)
+    if usuario_id is not None:
+        invalidar_dashboard_usuario(usuario_id)
+
+
+@receiver(post_delete, sender=Objeto)
+def liberar_espacio_objeto(sender, instance, **kwargs):
+    """Libera el espacio que ocupaba un objeto eliminado físicamente."""
+    cajon_id = instance.__dict__.get('_cajon_ocupado')
+    if cajon_id is None and instance.is_active:
+        cajon_id = instance.cajon_id
+    if cajon_id:
+        Cajon.liberar_espacio(cajon_id)
+
+
+@receiver(post_save, sender=Objeto)
+def publicar_evento_objeto(sender, instance, created, **kwargs):
+    """
+    Publica el alta, el movimiento o la baja lógica del objeto. Durante
+    post_save `_cajon_ocupado` conserva el cajón anterior (Objeto.save lo
+    actualiza después de guardar).
+    """
+    anterior = instance.__dict__.get('_cajon_ocupado')
+    actual = instance.cajon_id if instance.is_active else None
+    if anterior == actual:
+        return
+    if anterior is None:
+        evento = 'objeto_creado' if created else 'objeto_restaurado'
+        datos = {'objeto': instance.pk, 'cajon': actual}
+    elif actual is None:
+        evento, datos = 'objeto_eliminado', {'objeto': instance.pk, 'cajon': anterior}
+    else:
+        evento, datos = 'objeto_movido', {'objeto': instance.pk, 'cajon': actual, 'cajon_anterior': anterior}
+    usuario_id = _usuario_id(instance)
+    if usuario_id is not None:
+        publish_on_commit(usuario_id, evento, datos)
+
+
+@receiver(post_delete, sender=Objeto)
+def publicar_objeto_eliminado(sender, instance, **kwargs):
+    """Publica la eliminación física de un objeto que ocupaba un cajón."""
+    cajon_id = instance.__dict__.get('_cajon_ocupado')
+    if cajon_id is None and instance.is_active:
+        cajon_id = instance.cajon_id
+    usuario_id = _usuario_id(instance) if cajon_id else None
+    if usuario_id is not None:
+        publish_on_commit(usuario_id, 'objeto_eliminado', {'objeto': instance.pk, 'cajon': cajon_id})
+
+
+@receiver(post_save, sender=Cajon)
+def publicar_capacidad_cajon(sender, instance, created, update_fields=None, **kwargs):
+    """Publica el cambio de capacidad máxima (`_capacidad_guardada` aún es la anterior)."""
+    anterior = instance.__dict__.get('_capacidad_guardada')
+    if created or anterior in (None, instance.capacidad_maxima):
+        return
+    if update_fields is not None and 'capacidad_maxima' not in update_fields:
+        return
+    publish_on_commit(instance.usuario_id, 'cajon_capacidad_cambiada', {
+        'cajon': instance.pk, 'capacidad_maxima': instance.capacidad_maxima, 'capacidad_anterior': anterior,
+    })
+
+
+def invalidar_dashboard_usuario(usuario_id):
+    """
+    Invalida el dashboard del usuario una vez confirmada la transacción.
+    Debe llamarse explícitamente en escrituras masivas (update/bulk_create),
+    que no emiten señales de modelo.
+    """
+    transaction.on_commit(
+        lambda: bump_cache_version(DASHBOARD_CACHE_NAMESPACE, usuario_id)
+    )
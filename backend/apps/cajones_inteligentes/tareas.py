@@ -0,0 +1,56 @@
+"""
+Tareas de Cajones Inteligentes ejecutadas como trabajos en segundo plano
+(ver apps/trabajos). Se encolan desde /api/v1/gestion-cajones/.
+"""
+from trabajos.tareas import tarea
+from .models import Cajon, Objeto
+from .serializers import AccionResultadoSerializer
+from .signals import invalidar_dashboard_usuario
+
+# Objetos incluidos en el resultado de ordenar_objetos
+MAX_OBJETOS_ORDENADOS = 1000
+
+
+@tarea('eliminar_duplicados')
+def eliminar_duplicados(trabajo, cajon_id):
+    """Elimina los objetos duplicados de un cajón del usuario."""
+    cajon = Cajon.objects.get(pk=cajon_id, usuario=trabajo.usuario)
+    eliminados = Objeto.eliminar_duplicados_cajon(cajon, trabajo.usuario, progreso=trabajo.reportar_progreso)
+    if eliminados:
+        invalidar_dashboard_usuario(trabajo.usuario_id)
+    return AccionResultadoSerializer({
+        'mensaje': f'Se eliminaron {eliminados} objetos duplicados',
+        'elementos_afectados': eliminados,
+        'detalles': {'cajon': cajon.nombre, 'cajon_id': str(cajon.pk)},
+    }).data
+
+
+@tarea('ordenar_objetos')
+def ordenar_objetos(trabajo, cajon_id, criterio):
+    """Retorna los objetos de un cajón del usuario ordenados por `criterio`."""
+    cajon = Cajon.objects.get(pk=cajon_id, usuario=trabajo.usuario)
+    objetos = list(
+        Objeto.ordenar_objetos_cajon(cajon, criterio)
+        .values('id', 'nombre', 'tipo_objeto', 'tamanio')[:MAX_OBJETOS_ORDENADOS]
+    )
+    return AccionResultadoSerializer({
+        'mensaje': f'Se ordenaron {len(objetos)} objetos por {criterio}',
+        'elementos_afectados': len(objetos),
+        'detalles': {
+            'cajon': cajon.nombre,
+            'cajon_id': str(cajon.pk),
+            'criterio': criterio,
+            'objetos_ordenados': [{**objeto, 'id': str(objeto['id'])} for objeto in objetos],
+        },
+    }).data
+
+
+@tarea('recalcular_ocupacion')
+def recalcular_ocupacion(trabajo):
+    """Recalcula el contador de ocupación de todos los cajones del usuario."""
+    recalculados = Cajon.recalcular_ocupacion(Cajon.all_objects.filter(usuario=trabajo.usuario))
+    invalidar_dashboard_usuario(trabajo.usuario_id)
+    return AccionResultadoSerializer({
+        'mensaje': f'Se corrigió la ocupación de {recalculados} cajones',
+        'elementos_afectados': recalculados,
+    }).data
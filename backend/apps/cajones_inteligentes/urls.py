@@ -10,6 +10,8 @@ from .views import (
     HistorialViewSet,
     RecomendacionViewSet,
     EstadisticasViewSet,
+    DashboardViewSet,
+    CambiosViewSet,
     ConfiguracionViewSet,
     CajonManagementViewSet
 )
@@ -23,6 +25,8 @@ router.register(r'objetos', ObjetoViewSet, basename='objeto')
 router.register(r'historial', HistorialViewSet, basename='historial')
 router.register(r'recomendaciones', RecomendacionViewSet, basename='recomendacion')
 router.register(r'estadisticas', EstadisticasViewSet, basename='estadisticas')
+router.register(r'dashboard', DashboardViewSet, basename='dashboard')
+router.register(r'cambios', CambiosViewSet, basename='cambios')
 router.register(r'configuracion', ConfiguracionViewSet, basename='configuracion')
 router.register(r'gestion-cajones', CajonManagementViewSet, basename='gestion-cajones')
 
@@ -2,28 +2,42 @@
 Views para la aplicación de Cajones Inteligentes.
 Implementa principios SOLID y Clean Architecture.
 """
+import asyncio
 from datetime import timedelta
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
 from django.db import transaction, models
-from django.db.models import Count, Q, F
+from django.db.models import Count, Q, F, Sum
 from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 
-from core.views import BaseViewSet, ReadOnlyBaseViewSet
+from core.changefeed import CursorExpired, InvalidCursor, changes_since
+from core.views import (
+    AsyncActionsMixin, BaseViewSet, QueryBudgetMixin, ReadOnlyBaseViewSet, ReplicaReadMixin, afetch_all
+)
+from core.metrics import record_cache_access
 from core.serializers import DetailSerializer
+from utils.helpers import versioned_cache_key
+from trabajos.models import Trabajo
+from trabajos.serializers import TrabajoSerializer
 from .models import Cajon, Objeto, Historial, Recomendacion, TipoObjeto, Tamanio
 from .serializers import (
     CajonSerializer, CajonListSerializer,
     ObjetoSerializer, ObjetoListSerializer,
     HistorialSerializer, RecomendacionSerializer,
-    EstadisticasSerializer, TipoObjetoSerializer, TamanioSerializer
+    EstadisticasSerializer, TipoObjetoSerializer, TamanioSerializer,
+    DashboardSerializer, MoverObjetosSerializer, RecomendacionesLoteSerializer,
+    EliminarDuplicadosSerializer, OrdenarObjetosSerializer
 )
+from .signals import DASHBOARD_CACHE_NAMESPACE, invalidar_dashboard_usuario
 
 
 @extend_schema_view(
@@ -69,13 +83,21 @@ class CajonViewSet(BaseViewSet):
     search_fields = ['nombre', 'descripcion']
     ordering_fields = ['nombre', 'capacidad_maxima', 'created_at']
     ordering = ['nombre']
+    replica_actions = ('list', 'retrieve', 'objetos', 'estadisticas')
+    async_actions = ('list', 'estadisticas')
+    query_budget = {
+        'list': 2, 'retrieve': 2, 'create': 3, 'update': 5, 'partial_update': 4,
+        'destroy': 4, 'objetos': 2, 'estadisticas': 5, 'soft_delete': 2, 'restore': 2,
+    }
+    throttle_cost = {'estadisticas': 10}
 
     def get_queryset(self):
         """Filtrar cajones por usuario autenticado."""
-        return Cajon.objects.filter(
-            usuario=self.request.user,
-            is_active=True
-        ).select_related('usuario').prefetch_related('objetos')
+        return Cajon.objects.filter(usuario=self.request.user).select_related('usuario')
+
+    def get_restore_queryset(self):
+        """Cajones del usuario, incluidos los eliminados lógicamente."""
+        return Cajon.all_objects.filter(usuario=self.request.user)
 
     def get_serializer_class(self):
         """Usar serializador simplificado para list."""
@@ -116,7 +138,7 @@ class CajonViewSet(BaseViewSet):
     def objetos(self, request, pk=None):
         """Obtener todos los objetos de un cajón específico."""
         cajon = self.get_object()
-        objetos = cajon.objetos.filter(is_active=True)
+        objetos = cajon.objetos.all()
         
         # Aplicar filtros opcionales
         tipo_objeto = request.query_params.get('tipo_objeto')
@@ -134,28 +156,38 @@ class CajonViewSet(BaseViewSet):
     def estadisticas(self, request, pk=None):
         """Obtener estadísticas específicas de un cajón."""
         cajon = self.get_object()
-        objetos = cajon.objetos.filter(is_active=True)
-        
-        stats = {
+        objetos, por_tipo, por_tamanio = self._consultas_estadisticas(cajon)
+        return Response(self._estadisticas(cajon, objetos.count(), por_tipo, por_tamanio))
+
+    async def aestadisticas(self, request, pk=None):
+        """Versión async de `estadisticas`: las consultas se lanzan en paralelo."""
+        cajon = await self.aget_object()
+        objetos, por_tipo, por_tamanio = self._consultas_estadisticas(cajon)
+        resultados = await asyncio.gather(objetos.acount(), afetch_all(por_tipo), afetch_all(por_tamanio))
+        return Response(self._estadisticas(cajon, *resultados))
+
+    @staticmethod
+    def _consultas_estadisticas(cajon):
+        """Consultas independientes de las estadísticas de un cajón."""
+        objetos = cajon.objetos.all()
+        return (
+            objetos,
+            objetos.values('tipo_objeto').annotate(count=Count('id')).values_list('tipo_objeto', 'count'),
+            objetos.values('tamanio').annotate(count=Count('id')).values_list('tamanio', 'count'),
+        )
+
+    @staticmethod
+    def _estadisticas(cajon, objetos_actuales, por_tipo, por_tamanio):
+        return {
             'nombre_cajon': cajon.nombre,
             'capacidad_maxima': cajon.capacidad_maxima,
-            'objetos_actuales': objetos.count(),
+            'objetos_actuales': objetos_actuales,
             'capacidad_disponible': cajon.capacidad_disponible,
-            'porcentaje_ocupacion': (objetos.count() / cajon.capacidad_maxima) * 100,
-            'objetos_por_tipo': dict(
-                objetos.values('tipo_objeto').annotate(
-                    count=Count('id')
-                ).values_list('tipo_objeto', 'count')
-            ),
-            'objetos_por_tamanio': dict(
-                objetos.values('tamanio').annotate(
-                    count=Count('id')
-                ).values_list('tamanio', 'count')
-            ),
+            'porcentaje_ocupacion': (objetos_actuales / cajon.capacidad_maxima) * 100,
+            'objetos_por_tipo': dict(por_tipo),
+            'objetos_por_tamanio': dict(por_tamanio),
             'esta_lleno': cajon.esta_lleno
         }
-        
-        return Response(stats)
 
 
 class ObjetoViewSet(BaseViewSet):
@@ -166,17 +198,28 @@ class ObjetoViewSet(BaseViewSet):
     serializer_class = ObjetoSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['tipo_objeto', 'tamanio', 'cajon']
-    search_fields = ['nombre', 'descripcion', 'codigo']
+    search_fields = ['nombre', 'descripcion']
     ordering_fields = ['nombre', 'fecha_ingreso', 'tipo_objeto']
     ordering = ['-fecha_ingreso']
+    async_actions = ('list',)
+    query_budget = {
+        'list': 3, 'retrieve': 2, 'create': 6, 'update': 10, 'partial_update': 6,
+        'destroy': 4, 'nuevo_objeto': 6, 'modificar_objeto': 6, 'eliminar_objeto': 7,
+        'consultar_objeto': 2, 'mover': 6, 'ordenar_por_tipo': 1, 'soft_delete': 6, 'restore': 6,
+    }
+    # Búsqueda LIKE por nombre más una escritura en el historial
+    throttle_cost = {'consultar_objeto': 10}
 
     def get_queryset(self):
         """Filtrar objetos por cajones del usuario autenticado."""
         return Objeto.objects.filter(
-            cajon__usuario=self.request.user,
-            is_active=True
+            cajon__usuario=self.request.user
         ).select_related('cajon', 'cajon__usuario')
 
+    def get_restore_queryset(self):
+        """Objetos del usuario, incluidos los eliminados lógicamente."""
+        return Objeto.all_objects.filter(cajon__usuario=self.request.user)
+
     def get_serializer_class(self):
         """Usar serializador simplificado para list."""
         if self.action == 'list':
@@ -234,18 +277,21 @@ class ObjetoViewSet(BaseViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        with transaction.atomic():
-            objeto = Objeto.nuevo_objeto(**serializer.validated_data, user=request.user)
-            
-            # Crear entrada en historial
-            Historial.objects.create(
-                nombre=f"Objeto creado (método nuevo_objeto): {objeto.nombre}",
-                motivo=f"Se creó el objeto '{objeto.nombre}' usando el método nuevo_objeto",
-                usuario=request.user,
-                objeto=objeto,
-                cajon=objeto.cajon,
-                tipo_accion='CREAR'
-            )
+        try:
+            with transaction.atomic():
+                objeto = Objeto.nuevo_objeto(**serializer.validated_data, user=request.user)
+                
+                # Crear entrada en historial
+                Historial.objects.create(
+                    nombre=f"Objeto creado (método nuevo_objeto): {objeto.nombre}",
+                    motivo=f"Se creó el objeto '{objeto.nombre}' usando el método nuevo_objeto",
+                    usuario=request.user,
+                    objeto=objeto,
+                    cajon=objeto.cajon,
+                    tipo_accion='CREAR'
+                )
+        except ValidationError as exc:
+            return Response({'detail': ' '.join(exc.messages)}, status=status.HTTP_400_BAD_REQUEST)
         
         response_serializer = ObjetoSerializer(objeto)
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
@@ -334,13 +380,44 @@ class ObjetoViewSet(BaseViewSet):
         
         return Response(serializer.data)
 
+    @extend_schema(
+        summary="Mover objetos",
+        description="Mueve varios objetos entre cajones en una sola operación atómica.",
+        request=MoverObjetosSerializer,
+        tags=["Objetos"]
+    )
+    @action(detail=False, methods=['post'])
+    def mover(self, request):
+        """
+        Mueve varios objetos validando la capacidad de los destinos en conjunto.
+
+        Body parameters:
+        - objetos + cajon_destino: Lista de ids y un cajón destino común
+        - movimientos: Lista de {objeto, cajon} con un destino por objeto
+        """
+        serializer = MoverObjetosSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            movidos = Objeto.mover_objetos(serializer.validated_data['movimientos'], request.user)
+        except ValidationError as exc:
+            return Response({'detail': ' '.join(exc.messages)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if movidos:
+            invalidar_dashboard_usuario(request.user.pk)
+
+        return Response({
+            'mensaje': f'Se movieron {movidos} objetos',
+            'elementos_afectados': movidos
+        }, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['get'])
     def ordenar_por_tipo(self, request):
         """
         Endpoint para obtener objetos ordenados por tipo.
         Implementa el método ordenarTipo requerido.
         """
-        objetos = Objeto.ordenar_por_tipo().filter(cajon__usuario=request.user)
+        objetos = Objeto.ordenar_por_tipo().filter(cajon__usuario=request.user).select_related('cajon')
         serializer = ObjetoListSerializer(objetos, many=True)
         return Response(serializer.data)
 
@@ -355,38 +432,51 @@ class HistorialViewSet(ReadOnlyBaseViewSet):
     search_fields = ['nombre', 'motivo']
     ordering_fields = ['created_at', 'tipo_accion']
     ordering = ['-created_at']
+    async_actions = ('list', 'estadisticas')
+    query_budget = {'list': 3, 'retrieve': 1, 'estadisticas': 4}
+    throttle_cost = {'estadisticas': 10}
 
     def get_queryset(self):
         """Filtrar historial por usuario autenticado."""
         return Historial.objects.filter(
-            usuario=self.request.user,
-            is_active=True
-        ).select_related('usuario', 'objeto', 'cajon')
+            usuario=self.request.user
+        ).select_related('usuario', 'objeto__cajon', 'cajon')
 
     @action(detail=False, methods=['get'])
     def estadisticas(self, request):
         """Obtener estadísticas del historial."""
+        total, por_tipo, ultima_semana, mas_modificados = self._consultas_estadisticas()
+        return Response(self._estadisticas(total.count(), por_tipo, ultima_semana.count(), mas_modificados))
+
+    async def aestadisticas(self, request):
+        """Versión async de `estadisticas`: las consultas se lanzan en paralelo."""
+        total, por_tipo, ultima_semana, mas_modificados = self._consultas_estadisticas()
+        resultados = await asyncio.gather(
+            total.acount(), afetch_all(por_tipo), ultima_semana.acount(), afetch_all(mas_modificados)
+        )
+        return Response(self._estadisticas(*resultados))
+
+    def _consultas_estadisticas(self):
+        """Consultas independientes de las estadísticas del historial."""
         queryset = self.get_queryset()
-        
-        stats = {
-            'total_acciones': queryset.count(),
-            'acciones_por_tipo': dict(
-                queryset.values('tipo_accion').annotate(
-                    count=Count('id')
-                ).values_list('tipo_accion', 'count')
-            ),
-            'acciones_ultima_semana': queryset.filter(
-                created_at__gte=timezone.now() - timedelta(days=7)
-            ).count(),
-            'objetos_mas_modificados': list(
-                queryset.filter(objeto__isnull=False)
-                .values('objeto__nombre', 'objeto__id')
-                .annotate(count=Count('id'))
-                .order_by('-count')[:5]
-            )
+        return (
+            queryset,
+            queryset.values('tipo_accion').annotate(count=Count('id')).values_list('tipo_accion', 'count'),
+            queryset.filter(created_at__gte=timezone.now() - timedelta(days=7)),
+            queryset.filter(objeto__isnull=False)
+            .values('objeto__nombre', 'objeto__id')
+            .annotate(count=Count('id'))
+            .order_by('-count')[:5],
+        )
+
+    @staticmethod
+    def _estadisticas(total_acciones, por_tipo, acciones_ultima_semana, mas_modificados):
+        return {
+            'total_acciones': total_acciones,
+            'acciones_por_tipo': dict(por_tipo),
+            'acciones_ultima_semana': acciones_ultima_semana,
+            'objetos_mas_modificados': list(mas_modificados)
         }
-        
-        return Response(stats)
 
 
 class RecomendacionViewSet(BaseViewSet):
@@ -399,14 +489,22 @@ class RecomendacionViewSet(BaseViewSet):
     search_fields = ['nombre', 'descripcion']
     ordering_fields = ['fecha_creacion', 'prioridad']
     ordering = ['-fecha_creacion', '-prioridad']
+    query_budget = {
+        'list': 2, 'retrieve': 1, 'create': 2, 'update': 3, 'partial_update': 2, 'destroy': 2,
+        'marcar_implementada': 2, 'desmarcar_implementada': 2, 'pendientes': 1,
+        'soft_delete': 2, 'restore': 2, 'lote': 1,
+    }
 
     def get_queryset(self):
         """Filtrar recomendaciones por usuario autenticado."""
         return Recomendacion.objects.filter(
-            usuario=self.request.user,
-            is_active=True
+            usuario=self.request.user
         ).select_related('usuario')
 
+    def get_restore_queryset(self):
+        """Recomendaciones del usuario, incluidas las eliminadas lógicamente."""
+        return Recomendacion.all_objects.filter(usuario=self.request.user)
+
     def perform_create(self, serializer):
         """Asignar usuario actual al crear recomendación."""
         serializer.save(usuario=self.request.user, user=self.request.user)
@@ -429,6 +527,50 @@ class RecomendacionViewSet(BaseViewSet):
         serializer = self.get_serializer(recomendacion)
         return Response(serializer.data)
 
+    @extend_schema(
+        summary="Acción en lote",
+        description="Implementa, desmarca, archiva o restaura varias recomendaciones por ids o por filtros.",
+        request=RecomendacionesLoteSerializer,
+        tags=["Recomendaciones"]
+    )
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def lote(self, request):
+        """
+        Implementa, desmarca, archiva o restaura varias recomendaciones con un
+        único UPDATE.
+
+        Body parameters:
+        - accion: implementar, desmarcar, archivar o restaurar
+        - ids: Lista de ids de recomendaciones
+        - filtros: Filtros del listado (prioridad, tipo_recomendacion, implementada);
+          {} aplica a todas
+        """
+        serializer = RecomendacionesLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+
+        if datos['accion'] == 'restaurar':
+            queryset = self.get_restore_queryset()
+        else:
+            queryset = Recomendacion.objects.filter(usuario=request.user)
+        if 'ids' in datos:
+            queryset = queryset.filter(pk__in=datos['ids'])
+        else:
+            filterset_class = DjangoFilterBackend().get_filterset_class(self, queryset)
+            filterset = filterset_class(data=datos['filtros'], queryset=queryset, request=request)
+            if not filterset.is_valid():
+                return Response({'filtros': filterset.errors}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = filterset.qs
+
+        actualizadas = Recomendacion.actualizar_en_lote(queryset, datos['accion'])
+        if actualizadas:
+            invalidar_dashboard_usuario(request.user.pk)
+
+        return Response({
+            'mensaje': f'Se actualizaron {actualizadas} recomendaciones',
+            'elementos_afectados': actualizadas
+        }, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['get'])
     def pendientes(self, request):
         """Obtener recomendaciones pendientes ordenadas por prioridad."""
@@ -437,46 +579,72 @@ class RecomendacionViewSet(BaseViewSet):
         return Response(serializer.data)
 
 
-class EstadisticasViewSet(viewsets.ViewSet):
+class EstadisticasViewSet(AsyncActionsMixin, QueryBudgetMixin, ReplicaReadMixin, viewsets.ViewSet):
     """
     ViewSet para obtener estadísticas generales del usuario.
     """
     permission_classes = [IsAuthenticated]
+    replica_actions = '__all__'
+    async_actions = ('generales',)
+    query_budget = {'generales': 11}
+    throttle_cost = {'generales': 10}
 
     @action(detail=False, methods=['get'])
     def generales(self, request):
         """Obtener estadísticas generales del usuario."""
-        usuario = request.user
-        
-        # Obtener datos base
-        cajones = Cajon.objects.filter(usuario=usuario, is_active=True)
-        objetos = Objeto.objects.filter(cajon__usuario=usuario, is_active=True)
-        recomendaciones = Recomendacion.objects.filter(usuario=usuario, is_active=True)
-        ultimo_historial = Historial.objects.filter(usuario=usuario, is_active=True).first()
-        
-        # Calcular estadísticas
-        total_cajones = cajones.count()
-        total_objetos = objetos.count()
-        cajones_llenos = cajones.filter(objetos__is_active=True).annotate(
-            count_objetos=Count('objetos')
-        ).filter(count_objetos__gte=models.F('capacidad_maxima')).count()
-        
-        capacidad_total = sum(cajon.capacidad_maxima for cajon in cajones)
+        consultas = self._consultas_generales(request.user)
+        return self._respuesta_generales(
+            total_cajones=consultas['cajones'].count(),
+            total_objetos=consultas['objetos'].count(),
+            cajones_llenos=consultas['cajones_llenos'].count(),
+            capacidad=consultas['cajones'].aggregate(total=Sum('capacidad_maxima')),
+            objetos_por_tipo=list(consultas['objetos_por_tipo']),
+            recomendaciones_pendientes=consultas['recomendaciones_pendientes'].count(),
+            ultimo_historial=consultas['historial'].first(),
+        )
+
+    async def agenerales(self, request):
+        """Versión async de `generales`: las consultas se lanzan en paralelo."""
+        consultas = self._consultas_generales(request.user)
+        resultados = await asyncio.gather(
+            consultas['cajones'].acount(),
+            consultas['objetos'].acount(),
+            consultas['cajones_llenos'].acount(),
+            consultas['cajones'].aaggregate(total=Sum('capacidad_maxima')),
+            afetch_all(consultas['objetos_por_tipo']),
+            consultas['recomendaciones_pendientes'].acount(),
+            consultas['historial'].afirst(),
+        )
+        return self._respuesta_generales(*resultados)
+
+    @staticmethod
+    def _consultas_generales(usuario):
+        """Consultas independientes de las estadísticas generales."""
+        cajones = Cajon.objects.filter(usuario=usuario)
+        objetos = Objeto.objects.filter(cajon__usuario=usuario)
+        return {
+            'cajones': cajones,
+            'objetos': objetos,
+            'cajones_llenos': cajones.filter(objetos__is_active=True).annotate(
+                count_objetos=Count('objetos')
+            ).filter(count_objetos__gte=models.F('capacidad_maxima')),
+            'objetos_por_tipo': objetos.values('tipo_objeto').annotate(
+                count=Count('id')
+            ).values_list('tipo_objeto', 'count'),
+            'recomendaciones_pendientes': Recomendacion.objects.filter(usuario=usuario, implementada=False),
+            'historial': Historial.objects.filter(usuario=usuario).select_related('usuario', 'objeto__cajon', 'cajon'),
+        }
+
+    def _respuesta_generales(self, total_cajones, total_objetos, cajones_llenos, capacidad,
+                             objetos_por_tipo, recomendaciones_pendientes, ultimo_historial):
+        capacidad_total = capacidad['total'] or 0
         capacidad_utilizada = total_objetos
         porcentaje_utilizacion = (capacidad_utilizada / capacidad_total * 100) if capacidad_total > 0 else 0
-        
-        objetos_por_tipo = dict(
-            objetos.values('tipo_objeto').annotate(
-                count=Count('id')
-            ).values_list('tipo_objeto', 'count')
-        )
-        
-        recomendaciones_pendientes = recomendaciones.filter(implementada=False).count()
-        
+
         stats = {
             'total_cajones': total_cajones,
             'total_objetos': total_objetos,
-            'objetos_por_tipo': objetos_por_tipo,
+            'objetos_por_tipo': dict(objetos_por_tipo),
             'cajones_llenos': cajones_llenos,
             'capacidad_total': capacidad_total,
             'capacidad_utilizada': capacidad_utilizada,
@@ -489,11 +657,165 @@ class EstadisticasViewSet(viewsets.ViewSet):
         return Response(serializer.data)
 
 
-class ConfiguracionViewSet(viewsets.ViewSet):
+class DashboardViewSet(QueryBudgetMixin, ReplicaReadMixin, viewsets.ViewSet):
+    """
+    ViewSet que entrega el modelo de vista completo de la pantalla principal.
+    Usa un número fijo de consultas (máximo 4) sin importar la cantidad de cajones.
+    """
+    permission_classes = [IsAuthenticated]
+    query_budget = {'list': 4}
+    historial_reciente_limite = 10
+
+    @extend_schema(
+        summary="Dashboard del usuario",
+        description="Cajones con ocupación, historial reciente, recomendaciones pendientes y estadísticas generales.",
+        responses=DashboardSerializer,
+        tags=["Dashboard"]
+    )
+    def list(self, request):
+        """Obtener el dashboard del usuario, usando la caché versionada."""
+        cache_key = versioned_cache_key(DASHBOARD_CACHE_NAMESPACE, request.user.pk)
+        data = cache.get(cache_key)
+        record_cache_access('dashboard', data is not None)
+        if data is None:
+            data = DashboardSerializer(self._construir_dashboard(request.user)).data
+            cache.set(cache_key, data, settings.DASHBOARD_CACHE_TIMEOUT)
+        return Response(data)
+
+    def _construir_dashboard(self, usuario):
+        """Arma el modelo de vista con un presupuesto fijo de consultas."""
+        # Consulta 1: cajones (la ocupación es el contador desnormalizado)
+        cajones = list(Cajon.objects.filter(usuario=usuario).order_by('nombre'))
+
+        # Consulta 2: historial reciente con sus cajones y objetos
+        historial = list(
+            Historial.objects.filter(usuario=usuario)
+            .select_related('usuario', 'objeto', 'objeto__cajon', 'cajon')
+            .order_by('-created_at')[:self.historial_reciente_limite]
+        )
+
+        # Consulta 3: recomendaciones pendientes
+        recomendaciones = list(
+            Recomendacion.objects.filter(usuario=usuario, is_active=True, implementada=False)
+            .select_related('usuario')
+        )
+
+        # Consulta 4: objetos por tipo
+        objetos_por_tipo = dict(
+            Objeto.objects.filter(
+                cajon__usuario=usuario, cajon__is_active=True
+            ).values('tipo_objeto').annotate(count=Count('id')).values_list('tipo_objeto', 'count')
+        )
+
+        capacidad_total = sum(cajon.capacidad_maxima for cajon in cajones)
+        capacidad_utilizada = sum(cajon.objetos_count for cajon in cajones)
+        porcentaje_utilizacion = (capacidad_utilizada / capacidad_total * 100) if capacidad_total > 0 else 0
+
+        return {
+            'cajones': cajones,
+            'historial_reciente': historial,
+            'recomendaciones_pendientes': recomendaciones,
+            'estadisticas': {
+                'total_cajones': len(cajones),
+                'total_objetos': capacidad_utilizada,
+                'objetos_por_tipo': objetos_por_tipo,
+                'cajones_llenos': sum(1 for cajon in cajones if cajon.esta_lleno),
+                'capacidad_total': capacidad_total,
+                'capacidad_utilizada': capacidad_utilizada,
+                'porcentaje_utilizacion': round(porcentaje_utilizacion, 2),
+                'recomendaciones_pendientes': len(recomendaciones),
+            }
+        }
+
+
+class CambiosViewSet(QueryBudgetMixin, viewsets.ViewSet):
+    """
+    Feed de cambios para sincronización por deltas (ver core.changefeed).
+    Se lee siempre de la base principal: con el retraso de una réplica un
+    cliente podría avanzar el cursor por encima de cambios aún no replicados.
+    """
+    permission_classes = [IsAuthenticated]
+    query_budget = {'list': 3}
+    # tipo -> serializador de la fila completa
+    serializadores = {
+        'cajon': CajonSerializer,
+        'objeto': ObjetoSerializer,
+        'recomendacion': RecomendacionSerializer,
+    }
+
+    @extend_schema(
+        summary="Feed de cambios",
+        description=(
+            "Cajones, objetos y recomendaciones creados, modificados o eliminados "
+            "lógicamente (eliminado=true, sin datos) desde el cursor `desde`. Sin "
+            "`desde` entrega todo desde el principio. Con un cursor demasiado antiguo "
+            "responde 410 con snapshot_requerido y el cursor desde el que seguir tras "
+            "descargar el estado completo."
+        ),
+        parameters=[
+            OpenApiParameter('desde', OpenApiTypes.STR, description='Cursor de la respuesta anterior'),
+            OpenApiParameter('limite', OpenApiTypes.INT, description='Cambios por página'),
+        ],
+        responses={200: OpenApiTypes.OBJECT, 410: OpenApiTypes.OBJECT},
+        tags=["Sincronización"]
+    )
+    def list(self, request):
+        """Obtener la siguiente página de cambios del usuario."""
+        try:
+            limite = min(int(request.query_params.get('limite', settings.CHANGE_FEED_PAGE_SIZE)),
+                         settings.CHANGE_FEED_MAX_PAGE_SIZE)
+        except ValueError:
+            limite = 0
+        if limite < 1:
+            return Response({'detail': 'limite debe ser un entero positivo'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            cambios, cursor, hay_mas = changes_since(
+                self._fuentes(request.user), request.query_params.get('desde'), limite
+            )
+        except InvalidCursor:
+            return Response({'detail': 'Cursor inválido'}, status=status.HTTP_400_BAD_REQUEST)
+        except CursorExpired as exc:
+            return Response({
+                'detail': 'El cursor es demasiado antiguo; se requiere descargar el estado completo',
+                'snapshot_requerido': True,
+                'cursor': exc.head,
+            }, status=status.HTTP_410_GONE)
+
+        return Response({
+            'cambios': [self._cambio(tipo, instancia) for tipo, instancia in cambios],
+            'cursor': cursor,
+            'hay_mas': hay_mas,
+        })
+
+    @staticmethod
+    def _fuentes(usuario):
+        """Una consulta por tabla, con las lápidas y las relaciones que serializa cada tipo."""
+        return [
+            ('cajon', Cajon.all_objects.filter(usuario=usuario).select_related(
+                'usuario', 'created_by', 'updated_by')),
+            ('objeto', Objeto.all_objects.filter(cajon__usuario=usuario).select_related(
+                'cajon', 'created_by', 'updated_by')),
+            ('recomendacion', Recomendacion.all_objects.filter(usuario=usuario).select_related('usuario')),
+        ]
+
+    def _cambio(self, tipo, instancia):
+        eliminado = not instancia.is_active
+        return {
+            'tipo': tipo,
+            'id': str(instancia.pk),
+            'eliminado': eliminado,
+            'updated_at': instancia.updated_at,
+            'datos': None if eliminado else self.serializadores[tipo](instancia).data,
+        }
+
+
+class ConfiguracionViewSet(QueryBudgetMixin, viewsets.ViewSet):
     """
     ViewSet para obtener opciones de configuración.
     """
     permission_classes = [IsAuthenticated]
+    query_budget = {'tipos_objeto': 0, 'tamanios': 0}
 
     @action(detail=False, methods=['get'])
     def tipos_objeto(self, request):
@@ -510,84 +832,57 @@ class ConfiguracionViewSet(viewsets.ViewSet):
         return Response(serializer.data)
 
 
-class CajonManagementViewSet(viewsets.GenericViewSet):
+class CajonManagementViewSet(QueryBudgetMixin, viewsets.GenericViewSet):
     """
-    ViewSet para gestión avanzada de cajones (eliminar duplicados, ordenar).
+    ViewSet para gestión avanzada de cajones (eliminar duplicados, ordenar,
+    recalcular ocupación).
+
+    Son operaciones largas sobre cajones grandes: se encolan como trabajos
+    en segundo plano y responden 202 con el trabajo, cuyo progreso y
+    resultado se consultan en /api/v1/jobs/{id}/.
     """
     permission_classes = [IsAuthenticated]
-    
+    query_budget = {'eliminar_duplicados': 2, 'ordenar_objetos': 2, 'recalcular_ocupacion': 1}
+    throttle_cost = {'eliminar_duplicados': 25, 'ordenar_objetos': 25, 'recalcular_ocupacion': 25}
+
+    def _encolar(self, request, tipo, **parametros):
+        """Encola el trabajo y responde 202 con su estado."""
+        trabajo = Trabajo.encolar(tipo, request.user, **parametros)
+        datos = TrabajoSerializer(trabajo, context={'request': request}).data
+        return Response(datos, status=status.HTTP_202_ACCEPTED, headers={'Location': datos['url']})
+
     @action(detail=False, methods=['post'])
     def eliminar_duplicados(self, request):
         """
-        Elimina objetos duplicados de un cajón específico.
+        Encola la eliminación de los objetos duplicados de un cajón.
         
         Body parameters:
         - cajon_id: ID del cajón del cual eliminar duplicados
         """
-        from .serializers import EliminarDuplicadosSerializer, AccionResultadoSerializer
-        
         serializer = EliminarDuplicadosSerializer(data=request.data)
-        if serializer.is_valid():
-            cajon_id = serializer.validated_data['cajon_id']
-            cajon = get_object_or_404(Cajon, id=cajon_id, usuario=request.user, is_active=True)
-            
-            # Ejecutar eliminación de duplicados
-            duplicados_eliminados = Objeto.eliminar_duplicados_cajon(cajon, request.user)
-            
-            resultado = {
-                'mensaje': f'Se eliminaron {duplicados_eliminados} objetos duplicados',
-                'elementos_afectados': duplicados_eliminados,
-                'detalles': {
-                    'cajon': cajon.nombre,
-                    'cajon_id': cajon.id
-                }
-            }
-            
-            resultado_serializer = AccionResultadoSerializer(resultado)
-            return Response(resultado_serializer.data, status=status.HTTP_200_OK)
-        
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer.is_valid(raise_exception=True)
+        cajon = get_object_or_404(Cajon, id=serializer.validated_data['cajon_id'], usuario=request.user)
+        return self._encolar(request, 'eliminar_duplicados', cajon_id=cajon.pk)
     
     @action(detail=False, methods=['post'])
     def ordenar_objetos(self, request):
         """
-        Ordena los objetos de un cajón según el criterio especificado.
+        Encola el ordenamiento de los objetos de un cajón según el criterio especificado.
         
         Body parameters:
         - cajon_id: ID del cajón cuyos objetos ordenar
-        - criterio: Criterio de ordenamiento ('nombre', 'tipo_objeto', 'peso', 'fecha_ingreso')
+        - criterio: Criterio de ordenamiento ('nombre', 'tipo_objeto', 'tamanio', 'fecha_ingreso')
         """
-        from .serializers import OrdenarObjetosSerializer, AccionResultadoSerializer
-        
         serializer = OrdenarObjetosSerializer(data=request.data)
-        if serializer.is_valid():
-            cajon_id = serializer.validated_data['cajon_id']
-            criterio = serializer.validated_data['criterio']
-            cajon = get_object_or_404(Cajon, id=cajon_id, usuario=request.user, is_active=True)
-            
-            # Ejecutar ordenamiento
-            objetos_ordenados = Objeto.ordenar_objetos_cajon(cajon, criterio, request.user)
-            
-            resultado = {
-                'mensaje': f'Se ordenaron {len(objetos_ordenados)} objetos por {criterio}',
-                'elementos_afectados': len(objetos_ordenados),
-                'detalles': {
-                    'cajon': cajon.nombre,
-                    'cajon_id': cajon.id,
-                    'criterio': criterio,
-                    'objetos_ordenados': [
-                        {
-                            'id': obj.id,
-                            'nombre': obj.nombre,
-                            'tipo_objeto': obj.tipo_objeto,
-                            'peso': str(obj.peso)
-                        }
-                        for obj in objetos_ordenados[:10]  # Mostrar solo los primeros 10
-                    ]
-                }
-            }
-            
-            resultado_serializer = AccionResultadoSerializer(resultado)
-            return Response(resultado_serializer.data, status=status.HTTP_200_OK)
-        
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer.is_valid(raise_exception=True)
+        cajon = get_object_or_404(Cajon, id=serializer.validated_data['cajon_id'], usuario=request.user)
+        return self._encolar(
+            request, 'ordenar_objetos', cajon_id=cajon.pk, criterio=serializer.validated_data['criterio']
+        )
+
+    @action(detail=False, methods=['post'])
+    def recalcular_ocupacion(self, request):
+        """
+        Encola el recálculo del contador de ocupación de todos los cajones del usuario.
+        """
+        return self._encolar(request, 'recalcular_ocupacion')
@@ -0,0 +1,4 @@
+"""
+Aplicación de Trabajos.
+Cola persistente de trabajos en segundo plano para operaciones largas.
+"""
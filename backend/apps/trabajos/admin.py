@@ -0,0 +1,36 @@
+"""
+Configuración del admin para Trabajos.
+"""
+from django.contrib import admin
+from core.admin import AllObjectsAdminMixin, LargeTableAdminMixin
+from .models import Trabajo
+
+
+@admin.register(Trabajo)
+class TrabajoAdmin(AllObjectsAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
+    """
+    Configuración del admin para Trabajo.
+    """
+    list_display = ['tipo', 'estado', 'progreso', 'usuario', 'intentos', 'worker', 'created_at', 'finalizado_en']
+    list_select_related = ['usuario']
+    list_filter = ['estado', 'tipo', 'created_at']
+    search_fields = ['tipo', 'usuario__username', 'worker']
+    readonly_fields = [
+        'id', 'tipo', 'usuario', 'parametros', 'progreso', 'resultado', 'error', 'intentos',
+        'disponible_desde', 'iniciado_en', 'finalizado_en', 'latido', 'worker', 'created_at', 'updated_at'
+    ]
+    fieldsets = (
+        ('Información Básica', {
+            'fields': ('tipo', 'usuario', 'parametros')
+        }),
+        ('Estado', {
+            'fields': ('estado', 'progreso', 'intentos', 'resultado', 'error')
+        }),
+        ('Ejecución', {
+            'fields': ('disponible_desde', 'iniciado_en', 'finalizado_en', 'latido', 'worker'),
+        }),
+        ('Auditoría', {
+            'fields': ('id', 'created_at', 'updated_at'),
+            'classes': ('collapse',)
+        })
+    )
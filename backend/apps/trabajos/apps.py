@@ -0,0 +1,10 @@
+"""
+Configuración de la aplicación Trabajos.
+"""
+from django.apps import AppConfig
+
+
+class TrabajosConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'trabajos'
+    verbose_name = 'Trabajos en segundo plano'
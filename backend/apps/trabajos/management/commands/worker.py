@@ -0,0 +1,96 @@
+"""
+Procesa la cola de trabajos en segundo plano.
+
+Lanza --procesos procesos que toman trabajos de la tabla (sin broker
+externo) hasta recibir SIGINT o SIGTERM; cada proceso termina el trabajo en
+curso antes de salir. Un proceso que muere se reemplaza. Con --una-vez
+ejecuta los pendientes en este proceso y termina (útil en cron o tests).
+
+Uso:
+    python manage.py worker --procesos 4
+    python manage.py worker --una-vez
+"""
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from trabajos.worker import bucle, mantenimiento, procesar_pendientes
+
+
+def _proceso(nombre, detener, intervalo):
+    django.setup()
+    connections.close_all()
+    # El proceso principal coordina la salida con `detener`: una señal no
+    # interrumpe el trabajo en curso
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    bucle(nombre, detener, intervalo)
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta los trabajos en segundo plano de la cola'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--procesos', type=int, default=settings.JOBS_WORKER_PROCESSES,
+                            help='Procesos que ejecutan trabajos en paralelo (1: en este proceso)')
+        parser.add_argument('--intervalo', type=float, default=settings.JOBS_POLL_INTERVAL,
+                            help='Segundos de espera cuando la cola está vacía')
+        parser.add_argument('--una-vez', action='store_true',
+                            help='Ejecuta los trabajos pendientes y termina')
+
+    def handle(self, *args, **options):
+        if options['procesos'] < 1 or options['intervalo'] <= 0:
+            raise CommandError('--procesos debe ser al menos 1 y --intervalo mayor que 0')
+        nombre = f'{socket.gethostname()}:{os.getpid()}'
+
+        if options['una_vez']:
+            mantenimiento()
+            ejecutados = procesar_pendientes(nombre)
+            self.stdout.write(self.style.SUCCESS(f'{ejecutados} trabajos ejecutados'))
+            return
+
+        if options['procesos'] == 1:
+            detener = threading.Event()
+            for senal in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(senal, lambda *args: detener.set())
+            bucle(nombre, detener, options['intervalo'])
+            return
+
+        # Las señales solo marcan la salida: multiprocessing.Event.set() desde
+        # un handler se bloquea si el hilo principal espera en el mismo evento
+        salir = threading.Event()
+        for senal in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(senal, lambda *args: salir.set())
+
+        detener = multiprocessing.Event()
+        # Los procesos hijos abren sus propias conexiones
+        connections.close_all()
+        procesos = {}
+
+        def lanzar(indice):
+            proceso = multiprocessing.Process(
+                target=_proceso, args=(f'{nombre}-{indice}', detener, options['intervalo'])
+            )
+            proceso.start()
+            procesos[indice] = proceso
+
+        for indice in range(options['procesos']):
+            lanzar(indice)
+        self.stdout.write(f"Worker {nombre} con {options['procesos']} procesos")
+        try:
+            while not salir.wait(1):
+                for indice, proceso in list(procesos.items()):
+                    if not proceso.is_alive():
+                        self.stderr.write(f'Proceso {indice} terminó con código {proceso.exitcode}; se reemplaza')
+                        lanzar(indice)
+        finally:
+            detener.set()
+            for proceso in procesos.values():
+                proceso.join()
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:03
+
+import core.fields
+import django.core.serializers.json
+import django.core.validators
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Trabajo',
+            fields=[
+                ('id', core.fields.CompactUUIDField(default=core.fields.generate_primary_key, editable=False, help_text='Identificador único universal (ordenado por tiempo con UUIDv7)', primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Fecha y hora de creación')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Fecha y hora de última actualización')),
+                ('is_active', models.BooleanField(default=True, help_text='Indica si el registro está activo')),
+                ('tipo', models.CharField(help_text='Nombre de la tarea registrada que ejecuta el trabajo', max_length=50)),
+                ('parametros', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Argumentos de la tarea')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_PROCESO', 'En proceso'), ('COMPLETADO', 'Completado'), ('FALLIDO', 'Fallido')], default='PENDIENTE', help_text='Estado del trabajo', max_length=20)),
+                ('progreso', models.PositiveSmallIntegerField(default=0, help_text='Porcentaje completado (0-100)', validators=[django.core.validators.MaxValueValidator(100)])),
+                ('resultado', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Resultado retornado por la tarea', null=True)),
+                ('error', models.TextField(blank=True, help_text='Error del último intento fallido')),
+                ('intentos', models.PositiveSmallIntegerField(default=0, help_text='Veces que un worker tomó el trabajo')),
+                ('disponible_desde', models.DateTimeField(default=django.utils.timezone.now, help_text='Momento desde el cual puede tomarse (reintentos diferidos)')),
+                ('iniciado_en', models.DateTimeField(blank=True, help_text='Inicio del último intento', null=True)),
+                ('finalizado_en', models.DateTimeField(blank=True, help_text='Momento en que terminó (completado o fallido)', null=True)),
+                ('latido', models.DateTimeField(blank=True, help_text='Última señal de vida del worker que lo ejecuta', null=True)),
+                ('worker', models.CharField(blank=True, help_text='Worker que ejecuta el trabajo', max_length=100)),
+                ('usuario', models.ForeignKey(help_text='Usuario que encoló el trabajo', on_delete=django.db.models.deletion.CASCADE, related_name='trabajos', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Trabajo',
+                'verbose_name_plural': 'Trabajos',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['estado', 'disponible_desde'], name='trabajo_cola'), models.Index(fields=['usuario', '-created_at'], name='trabajo_usuario_fecha')],
+            },
+        ),
+    ]
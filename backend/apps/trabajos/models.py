@@ -0,0 +1,234 @@
+"""
+Modelos de la aplicación Trabajos.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.validators import MaxValueValidator
+from django.db import models
+from django.utils import timezone
+
+from core.models import BaseModel
+from .tareas import obtener_tarea
+
+
+class EstadoTrabajo(models.TextChoices):
+    """
+    Estados de un trabajo en la cola.
+    """
+    PENDIENTE = 'PENDIENTE', 'Pendiente'
+    EN_PROCESO = 'EN_PROCESO', 'En proceso'
+    COMPLETADO = 'COMPLETADO', 'Completado'
+    FALLIDO = 'FALLIDO', 'Fallido'
+
+
+class Trabajo(BaseModel):
+    """
+    Trabajo en segundo plano: la tabla es la cola.
+
+    Los workers (`manage.py worker`) toman los pendientes con un UPDATE
+    condicional sobre el estado, sin bloqueos ni broker externo: si dos
+    workers eligen el mismo trabajo solo uno logra marcarlo EN_PROCESO.
+    Mientras se ejecuta, el worker renueva `latido` cada
+    JOBS_HEARTBEAT_INTERVAL segundos (también al reportar progreso); uno sin
+    latido en JOBS_STALE_TIMEOUT segundos (worker caído) vuelve a la cola. Los errores se reintentan hasta JOBS_MAX_ATTEMPTS intentos.
+    """
+    tipo = models.CharField(
+        max_length=50,
+        help_text="Nombre de la tarea registrada que ejecuta el trabajo"
+    )
+
+    usuario = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='trabajos',
+        help_text="Usuario que encoló el trabajo"
+    )
+
+    parametros = models.JSONField(
+        default=dict,
+        encoder=DjangoJSONEncoder,
+        help_text="Argumentos de la tarea"
+    )
+
+    estado = models.CharField(
+        max_length=20,
+        choices=EstadoTrabajo.choices,
+        default=EstadoTrabajo.PENDIENTE,
+        help_text="Estado del trabajo"
+    )
+
+    progreso = models.PositiveSmallIntegerField(
+        default=0,
+        validators=[MaxValueValidator(100)],
+        help_text="Porcentaje completado (0-100)"
+    )
+
+    resultado = models.JSONField(
+        null=True,
+        blank=True,
+        encoder=DjangoJSONEncoder,
+        help_text="Resultado retornado por la tarea"
+    )
+
+    error = models.TextField(
+        blank=True,
+        help_text="Error del último intento fallido"
+    )
+
+    intentos = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Veces que un worker tomó el trabajo"
+    )
+
+    disponible_desde = models.DateTimeField(
+        default=timezone.now,
+        help_text="Momento desde el cual puede tomarse (reintentos diferidos)"
+    )
+
+    iniciado_en = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Inicio del último intento"
+    )
+
+    finalizado_en = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Momento en que terminó (completado o fallido)"
+    )
+
+    latido = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Última señal de vida del worker que lo ejecuta"
+    )
+
+    worker = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text="Worker que ejecuta el trabajo"
+    )
+
+    class Meta:
+        verbose_name = "Trabajo"
+        verbose_name_plural = "Trabajos"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['estado', 'disponible_desde'], name='trabajo_cola'),
+            models.Index(fields=['usuario', '-created_at'], name='trabajo_usuario_fecha'),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} ({self.get_estado_display()})"
+
+    @classmethod
+    def encolar(cls, tipo, usuario, **parametros):
+        """
+        Crea un trabajo pendiente de la tarea `tipo`.
+
+        Raises:
+            LookupError: Si la tarea no está registrada
+        """
+        obtener_tarea(tipo)
+        return cls.objects.create(tipo=tipo, usuario=usuario, parametros=parametros)
+
+    @classmethod
+    def tomar(cls, worker, candidatos=10):
+        """
+        Toma el siguiente trabajo disponible para `worker`, o None si no hay.
+
+        Lee unos pocos candidatos en orden y los reclama con un UPDATE
+        condicional (estado = PENDIENTE); el primero que se logra marcar
+        EN_PROCESO es del worker. Funciona igual en MySQL y SQLite.
+        """
+        ahora = timezone.now()
+        pendientes = cls.objects.filter(
+            estado=EstadoTrabajo.PENDIENTE, disponible_desde__lte=ahora
+        ).order_by('disponible_desde', 'id').values_list('pk', flat=True)[:candidatos]
+        for pk in pendientes:
+            tomado = cls.objects.filter(pk=pk, estado=EstadoTrabajo.PENDIENTE).update(
+                estado=EstadoTrabajo.EN_PROCESO, intentos=models.F('intentos') + 1,
+                iniciado_en=ahora, latido=ahora, worker=worker, updated_at=ahora,
+            )
+            if tomado:
+                return cls.objects.get(pk=pk)
+        return None
+
+    def _actualizar_en_proceso(self, **campos):
+        """
+        Actualiza el trabajo solo si sigue en proceso en este worker: si se
+        recuperó por falta de latido, el worker anterior ya no lo modifica.
+        """
+        ahora = timezone.now()
+        campos.setdefault('latido', ahora)
+        actualizados = type(self).objects.filter(
+            pk=self.pk, estado=EstadoTrabajo.EN_PROCESO, worker=self.worker
+        ).update(updated_at=ahora, **campos)
+        if actualizados:
+            for campo, valor in campos.items():
+                setattr(self, campo, valor)
+        return bool(actualizados)
+
+    def renovar_latido(self):
+        """Renueva el latido; retorna False si el trabajo ya no es de este worker."""
+        return self._actualizar_en_proceso()
+
+    def reportar_progreso(self, progreso):
+        """Guarda el porcentaje completado y renueva el latido."""
+        return self._actualizar_en_proceso(progreso=max(0, min(100, int(progreso))))
+
+    def completar(self, resultado=None):
+        """Marca el trabajo como completado con su resultado."""
+        return self._actualizar_en_proceso(
+            estado=EstadoTrabajo.COMPLETADO, progreso=100, resultado=resultado,
+            error='', finalizado_en=timezone.now(),
+        )
+
+    def fallar(self, error):
+        """
+        Registra el error del intento. Con intentos restantes el trabajo
+        vuelve a la cola tras JOBS_RETRY_DELAY segundos (el doble en cada
+        reintento); si no, queda FALLIDO.
+        """
+        if self.intentos < settings.JOBS_MAX_ATTEMPTS:
+            espera = settings.JOBS_RETRY_DELAY * 2 ** (self.intentos - 1)
+            return self._actualizar_en_proceso(
+                estado=EstadoTrabajo.PENDIENTE, error=error, worker='',
+                disponible_desde=timezone.now() + timedelta(seconds=espera),
+            )
+        return self._actualizar_en_proceso(
+            estado=EstadoTrabajo.FALLIDO, error=error, finalizado_en=timezone.now(),
+        )
+
+    @classmethod
+    def recuperar_abandonados(cls):
+        """
+        Devuelve a la cola los trabajos en proceso sin latido en
+        JOBS_STALE_TIMEOUT segundos (su worker terminó sin completarlos).
+        Los que ya agotaron sus intentos quedan FALLIDO. Retorna cuántos.
+        """
+        ahora = timezone.now()
+        abandonados = cls.objects.filter(
+            estado=EstadoTrabajo.EN_PROCESO,
+            latido__lt=ahora - timedelta(seconds=settings.JOBS_STALE_TIMEOUT),
+        )
+        error = 'El worker se detuvo sin completar el trabajo'
+        fallidos = abandonados.filter(intentos__gte=settings.JOBS_MAX_ATTEMPTS).update(
+            estado=EstadoTrabajo.FALLIDO, error=error, finalizado_en=ahora, updated_at=ahora,
+        )
+        reencolados = abandonados.update(
+            estado=EstadoTrabajo.PENDIENTE, error=error, worker='', disponible_desde=ahora, updated_at=ahora,
+        )
+        return fallidos + reencolados
+
+    @classmethod
+    def purgar_finalizados(cls):
+        """Elimina los trabajos terminados hace más de JOBS_RETENTION_DAYS días."""
+        limite = timezone.now() - timedelta(days=settings.JOBS_RETENTION_DAYS)
+        borrados, _ = cls.all_objects.filter(
+            estado__in=[EstadoTrabajo.COMPLETADO, EstadoTrabajo.FALLIDO], finalizado_en__lt=limite
+        ).delete()
+        return borrados
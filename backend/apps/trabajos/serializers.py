@@ -0,0 +1,22 @@
+"""
+Serializadores para la aplicación Trabajos.
+"""
+from rest_framework import serializers
+from core.serializers import BaseModelSerializer
+from .models import Trabajo
+
+
+class TrabajoSerializer(BaseModelSerializer):
+    """
+    Serializador de solo lectura del estado de un trabajo.
+    """
+    estado_display = serializers.CharField(source='get_estado_display', read_only=True)
+    url = serializers.HyperlinkedIdentityField(view_name='trabajos:trabajo-detail')
+
+    class Meta:
+        model = Trabajo
+        fields = BaseModelSerializer.Meta.fields + [
+            'url', 'tipo', 'estado', 'estado_display', 'progreso', 'parametros', 'resultado',
+            'error', 'intentos', 'iniciado_en', 'finalizado_en'
+        ]
+        read_only_fields = fields
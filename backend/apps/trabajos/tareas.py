@@ -0,0 +1,35 @@
+"""
+Registro de tareas ejecutables como trabajos en segundo plano.
+
+Cada aplicación registra sus tareas al cargarse (en `AppConfig.ready`):
+
+    @tarea('eliminar_duplicados')
+    def eliminar_duplicados(trabajo, cajon_id):
+        ...
+        trabajo.reportar_progreso(50)
+        ...
+        return {'elementos_afectados': 3}
+
+La función recibe el Trabajo y sus `parametros` como argumentos con nombre,
+y lo que retorna se guarda en `resultado`. Un trabajo puede ejecutarse más
+de una vez (reintentos, workers caídos): las tareas deben ser idempotentes.
+"""
+_tareas = {}
+
+
+def tarea(nombre):
+    """Decorador que registra la función como tarea `nombre`."""
+    def registrar(funcion):
+        if _tareas.get(nombre, funcion) is not funcion:
+            raise ValueError(f'La tarea {nombre!r} ya está registrada')
+        _tareas[nombre] = funcion
+        return funcion
+    return registrar
+
+
+def obtener_tarea(nombre):
+    """Función registrada como `nombre`; LookupError si no existe."""
+    try:
+        return _tareas[nombre]
+    except KeyError:
+        raise LookupError(f'Tarea desconocida: {nombre}') from None
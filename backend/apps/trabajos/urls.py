@@ -0,0 +1,15 @@
+"""
+URLs para la aplicación Trabajos.
+"""
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import TrabajoViewSet
+
+app_name = 'trabajos'
+
+router = DefaultRouter()
+router.register(r'jobs', TrabajoViewSet, basename='trabajo')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
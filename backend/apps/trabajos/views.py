@@ -0,0 +1,26 @@
+"""
+Vistas para la aplicación Trabajos.
+"""
+from rest_framework import filters
+from django_filters.rest_framework import DjangoFilterBackend
+from core.views import ReadOnlyBaseViewSet
+from .models import Trabajo
+from .serializers import TrabajoSerializer
+
+
+class TrabajoViewSet(ReadOnlyBaseViewSet):
+    """
+    Estado y progreso de los trabajos en segundo plano del usuario.
+    """
+    serializer_class = TrabajoSerializer
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['tipo', 'estado']
+    ordering_fields = ['created_at']
+    ordering = ['-created_at']
+    # El progreso lo escribe el worker: una réplica atrasada lo mostraría detenido
+    replica_actions = ()
+    query_budget = {'list': 2, 'retrieve': 1}
+
+    def get_queryset(self):
+        """Filtrar trabajos por usuario autenticado."""
+        return Trabajo.objects.filter(usuario=self.request.user)
@@ -0,0 +1,111 @@
+"""
+Ejecución de los trabajos de la cola (usada por `manage.py worker`).
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from .models import Trabajo
+from .tareas import obtener_tarea
+
+logger = logging.getLogger(__name__)
+
+# Cada cuántos segundos un worker recupera abandonados y purga finalizados
+MANTENIMIENTO_INTERVALO = 60
+
+
+@contextmanager
+def latiendo(trabajo):
+    """
+    Renueva el latido del trabajo en un hilo mientras dura el bloque, aunque
+    la tarea no reporte progreso: sin él una tarea larga se recuperaría como
+    abandonada y se ejecutaría dos veces.
+    """
+    detener = threading.Event()
+    hilo = threading.Thread(target=_latir, args=(trabajo, detener), name=f'latido-{trabajo.pk}', daemon=True)
+    hilo.start()
+    try:
+        yield
+    finally:
+        detener.set()
+        hilo.join()
+
+
+def _latir(trabajo, detener):
+    # Corre en su propio hilo, con su propia conexión a la base
+    try:
+        while not detener.wait(settings.JOBS_HEARTBEAT_INTERVAL):
+            try:
+                if not trabajo.renovar_latido():
+                    # Se recuperó como abandonado: ya no es de este worker
+                    logger.warning('Trabajo %s ya no está en proceso en este worker', trabajo.pk)
+                    return
+            except Exception:
+                logger.exception('No se pudo renovar el latido del trabajo %s', trabajo.pk)
+    finally:
+        connections.close_all()
+
+
+def ejecutar(trabajo):
+    """Ejecuta un trabajo ya tomado y registra su resultado o su error."""
+    inicio = time.perf_counter()
+    try:
+        funcion = obtener_tarea(trabajo.tipo)
+        with latiendo(trabajo):
+            resultado = funcion(trabajo, **trabajo.parametros)
+    except Exception as exc:
+        logger.exception('Trabajo %s (%s) falló en el intento %s', trabajo.pk, trabajo.tipo, trabajo.intentos)
+        trabajo.fallar(f'{type(exc).__name__}: {exc}')
+    else:
+        trabajo.completar(resultado)
+        logger.info(
+            'Trabajo %s (%s) completado en %.2f s', trabajo.pk, trabajo.tipo, time.perf_counter() - inicio
+        )
+
+
+def mantenimiento():
+    """Recupera los trabajos abandonados y purga los antiguos."""
+    recuperados = Trabajo.recuperar_abandonados()
+    if recuperados:
+        logger.warning('%s trabajos abandonados recuperados', recuperados)
+    Trabajo.purgar_finalizados()
+
+
+def procesar_pendientes(worker, limite=None):
+    """Ejecuta trabajos hasta vaciar la cola (o `limite`); retorna cuántos ejecutó."""
+    ejecutados = 0
+    while limite is None or ejecutados < limite:
+        trabajo = Trabajo.tomar(worker)
+        if trabajo is None:
+            break
+        ejecutar(trabajo)
+        ejecutados += 1
+        # Como al final de una petición: descarta conexiones rotas o vencidas
+        close_old_connections()
+    return ejecutados
+
+
+def bucle(worker, detener, intervalo):
+    """
+    Procesa la cola hasta que se active el evento `detener`; espera
+    `intervalo` segundos cuando no hay trabajos. Un trabajo en curso
+    siempre termina antes de salir.
+    """
+    logger.info('Worker %s iniciado', worker)
+    ultimo_mantenimiento = 0
+    while not detener.is_set():
+        if time.monotonic() - ultimo_mantenimiento >= MANTENIMIENTO_INTERVALO:
+            mantenimiento()
+            ultimo_mantenimiento = time.monotonic()
+        trabajo = Trabajo.tomar(worker)
+        if trabajo is None:
+            close_old_connections()
+            detener.wait(intervalo)
+            continue
+        ejecutar(trabajo)
+        close_old_connections()
+    logger.info('Worker %s detenido', worker)
@@ -0,0 +1,271 @@
+"""
+Suite de benchmarks de la API sobre conjuntos de datos sintéticos escalables.
+
+Siembra usuarios × cajones × objetos × filas de historial y ejecuta escenarios
+cronometrados sobre los endpoints más usados (listado de cajones, búsqueda de
+objetos, paginación del historial, estadísticas, alta y movimiento de objetos).
+Por escenario reporta p50/p95/p99 y consultas por petición, y puede guardarlo
+en JSON. Con --linea-base compara contra resultados anteriores y termina con
+código 1 si algún escenario empeora más que --umbral o ejecuta más consultas.
+
+Los datos y el orden de las peticiones dependen solo de --semilla, por lo que
+dos ejecuciones con los mismos parámetros son comparables.
+
+Uso:
+    python benchmarks/api.py --usuarios 5 --cajones 20 --objetos 25 --historial 2000
+    python benchmarks/api.py --guardar-linea-base benchmarks/linea_base.json
+    python benchmarks/api.py --linea-base benchmarks/linea_base.json --umbral 0.25 --salida resultados.json
+"""
+import argparse
+import json
+import logging
+import platform
+import random
+import statistics
+import sys
+import time
+
+from entorno import configurar_django
+
+# Métricas comparadas contra la línea base
+METRICAS_TIEMPO = ('p50_ms', 'p95_ms')
+
+
+def sembrar(usuarios, cajones, objetos, historial, semilla):
+    """
+    Crea `usuarios` usuarios, cada uno con `cajones` cajones de `objetos`
+    objetos y `historial` filas de historial. Retorna la lista de
+    diccionarios {'usuario', 'cajones', 'objetos'} por usuario.
+    """
+    from django.contrib.auth.models import User
+    from cajones_inteligentes.models import Cajon, Historial, Objeto, Tamanio, TipoObjeto
+
+    aleatorio = random.Random(semilla)
+    tipos = [choice[0] for choice in TipoObjeto.choices]
+    tamanios = [choice[0] for choice in Tamanio.choices]
+    acciones = [choice[0] for choice in Historial._meta.get_field('tipo_accion').choices]
+
+    sembrados = []
+    for u in range(usuarios):
+        usuario = User.objects.create_user(username=f'benchmark{u}', password=None)
+        lista_cajones = Cajon.objects.bulk_create([
+            # Holgura para las altas y movimientos de los escenarios de escritura
+            Cajon(nombre=f'Cajon {u} {c}', capacidad_maxima=objetos * 4 + 1000,
+                  usuario=usuario, created_by=usuario)
+            for c in range(cajones)
+        ])
+        lista_objetos = Objeto.objects.bulk_create([
+            Objeto(
+                nombre=f'Objeto {c} {o}',
+                descripcion=f'Objeto sintético {aleatorio.randrange(10000)}',
+                tipo_objeto=aleatorio.choice(tipos),
+                tamanio=aleatorio.choice(tamanios),
+                cajon=cajon,
+                created_by=usuario,
+            )
+            for c, cajon in enumerate(lista_cajones)
+            for o in range(objetos)
+        ], batch_size=1000)
+        Historial.objects.bulk_create([
+            Historial(
+                nombre=f'Accion {h}',
+                motivo='Datos de benchmark',
+                usuario=usuario,
+                objeto=objeto,
+                cajon_id=objeto.cajon_id,
+                tipo_accion=aleatorio.choice(acciones),
+            )
+            for h, objeto in enumerate(aleatorio.choice(lista_objetos) for _ in range(historial))
+        ], batch_size=1000)
+        sembrados.append({
+            'usuario': usuario,
+            'cajones': [str(cajon.pk) for cajon in lista_cajones],
+            'objetos': [str(objeto.pk) for objeto in lista_objetos],
+        })
+    Cajon.recalcular_ocupacion()
+    return sembrados
+
+
+def escenarios(datos, parametros):
+    """
+    Escenarios como {nombre: función(cliente, aleatorio) -> respuesta}.
+    Todos actúan sobre el primer usuario sembrado.
+    """
+    from cajones_inteligentes.models import Tamanio, TipoObjeto
+
+    cajones, objetos = datos['cajones'], datos['objetos']
+    paginas_historial = max(1, -(-parametros['historial'] // 20))
+    contador = iter(range(sys.maxsize))
+
+    def crear(cliente, aleatorio):
+        return cliente.post('/api/v1/objetos/', {
+            'nombre': f'Objeto nuevo {next(contador)}', 'tipo_objeto': TipoObjeto.ROPA,
+            'tamanio': Tamanio.PEQUENO, 'cajon': aleatorio.choice(cajones),
+        }, content_type='application/json')
+
+    def mover(cliente, aleatorio):
+        return cliente.post('/api/v1/objetos/mover/', {
+            'objetos': aleatorio.sample(objetos, min(5, len(objetos))),
+            'cajon_destino': aleatorio.choice(cajones),
+        }, content_type='application/json')
+
+    return {
+        'cajones_listar': lambda cliente, aleatorio: cliente.get('/api/v1/cajones/'),
+        'objetos_buscar': lambda cliente, aleatorio: cliente.get(
+            '/api/v1/objetos/', {'search': f'Objeto {aleatorio.randrange(parametros["cajones"])}'}
+        ),
+        'objetos_filtrar_cajon': lambda cliente, aleatorio: cliente.get(
+            '/api/v1/objetos/', {'cajon': aleatorio.choice(cajones)}
+        ),
+        'historial_paginar': lambda cliente, aleatorio: cliente.get(
+            '/api/v1/historial/', {'page': aleatorio.randint(1, paginas_historial)}
+        ),
+        'historial_estadisticas': lambda cliente, aleatorio: cliente.get('/api/v1/historial/estadisticas/'),
+        'estadisticas_generales': lambda cliente, aleatorio: cliente.get('/api/v1/estadisticas/generales/'),
+        'dashboard': lambda cliente, aleatorio: cliente.get('/api/v1/dashboard/'),
+        'objetos_crear': crear,
+        'objetos_mover': mover,
+    }
+
+
+def percentil(valores, p):
+    if len(valores) == 1:
+        return valores[0]
+    return statistics.quantiles(valores, n=100, method='inclusive')[p - 1]
+
+
+def ejecutar(datos, parametros, repeticiones, calentamiento, semilla, filtro=None):
+    """Ejecuta cada escenario y retorna {nombre: resultados}."""
+    from django.test import Client
+    from core.queries import record_queries
+
+    cliente = Client(raise_request_exception=False)
+    cliente.force_login(datos['usuario'])
+
+    resultados = {}
+    for nombre, escenario in escenarios(datos, parametros).items():
+        if filtro and nombre not in filtro:
+            continue
+        aleatorio = random.Random(f'{semilla}-{nombre}')
+        for _ in range(calentamiento):
+            escenario(cliente, aleatorio)
+
+        latencias, consultas, errores = [], [], 0
+        for _ in range(repeticiones):
+            with record_queries() as recorder:
+                inicio = time.perf_counter()
+                respuesta = escenario(cliente, aleatorio)
+                latencias.append(time.perf_counter() - inicio)
+            consultas.append(recorder.count)
+            if respuesta.status_code >= 400:
+                errores += 1
+
+        resultados[nombre] = {
+            'peticiones': repeticiones,
+            'errores': errores,
+            'p50_ms': round(percentil(latencias, 50) * 1000, 3),
+            'p95_ms': round(percentil(latencias, 95) * 1000, 3),
+            'p99_ms': round(percentil(latencias, 99) * 1000, 3),
+            'consultas': max(consultas),
+        }
+    return resultados
+
+
+def comparar(resultados, linea_base, umbral):
+    """Lista de regresiones (texto) respecto a la línea base."""
+    regresiones = []
+    for nombre, base in linea_base['escenarios'].items():
+        actual = resultados.get(nombre)
+        if actual is None:
+            continue
+        for metrica in METRICAS_TIEMPO:
+            if base[metrica] > 0 and actual[metrica] > base[metrica] * (1 + umbral):
+                regresiones.append(
+                    f'{nombre}: {metrica} {actual[metrica]:.2f} ms vs. {base[metrica]:.2f} ms '
+                    f'(+{(actual[metrica] / base[metrica] - 1) * 100:.0f}%, umbral {umbral * 100:.0f}%)'
+                )
+        if actual['consultas'] > base['consultas']:
+            regresiones.append(f"{nombre}: {actual['consultas']} consultas vs. {base['consultas']}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--settings', default='config.settings.testing')
+    parser.add_argument('--usuarios', type=int, default=3)
+    parser.add_argument('--cajones', type=int, default=20, help='Cajones por usuario')
+    parser.add_argument('--objetos', type=int, default=25, help='Objetos por cajón')
+    parser.add_argument('--historial', type=int, default=2000, help='Filas de historial por usuario')
+    parser.add_argument('--repeticiones', type=int, default=50, help='Peticiones medidas por escenario')
+    parser.add_argument('--calentamiento', type=int, default=5, help='Peticiones sin medir por escenario')
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--escenarios', nargs='*', help='Ejecutar solo estos escenarios')
+    parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+    parser.add_argument('--linea-base', help='Resultados JSON anteriores contra los cuales comparar')
+    parser.add_argument('--guardar-linea-base', help='Guardar los resultados como nueva línea base')
+    parser.add_argument('--umbral', type=float, default=0.2,
+                        help='Empeoramiento relativo de p50/p95 tolerado (default: 0.2 = 20%%)')
+    args = parser.parse_args()
+    if min(args.usuarios, args.cajones, args.objetos, args.repeticiones) < 1:
+        parser.error('--usuarios, --cajones, --objetos y --repeticiones deben ser al menos 1')
+    if args.umbral < 0:
+        parser.error('--umbral no puede ser negativo')
+
+    parametros = {
+        'usuarios': args.usuarios, 'cajones': args.cajones, 'objetos': args.objetos,
+        'historial': args.historial, 'repeticiones': args.repeticiones, 'semilla': args.semilla,
+    }
+    destruir = configurar_django(args.settings)
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+    try:
+        inicio = time.perf_counter()
+        datos = sembrar(args.usuarios, args.cajones, args.objetos, args.historial, args.semilla)
+        print(f'Datos sembrados en {time.perf_counter() - inicio:.1f} s')
+        resultados = ejecutar(
+            datos[0], parametros, args.repeticiones, args.calentamiento, args.semilla, args.escenarios
+        )
+    finally:
+        destruir()
+
+    reporte = {
+        'parametros': parametros,
+        'entorno': {'python': platform.python_version(), 'plataforma': platform.platform()},
+        'escenarios': resultados,
+    }
+
+    print(f"\n{'Escenario':<26}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'Consultas':>11}{'Errores':>9}")
+    for nombre, r in resultados.items():
+        print(
+            f"{nombre:<26}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+            f"{r['consultas']:>11}{r['errores']:>9}"
+        )
+
+    for ruta in filter(None, (args.salida, args.guardar_linea_base)):
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump(reporte, archivo, indent=2, ensure_ascii=False)
+            archivo.write('\n')
+        print(f'\nResultados guardados en {ruta}')
+
+    fallos = [f'{nombre}: {r["errores"]} respuestas con error' for nombre, r in resultados.items() if r['errores']]
+    if args.linea_base:
+        with open(args.linea_base, encoding='utf-8') as archivo:
+            linea_base = json.load(archivo)
+        distintos = {
+            clave: (valor, parametros.get(clave))
+            for clave, valor in linea_base['parametros'].items() if parametros.get(clave) != valor
+        }
+        if distintos:
+            print(f'\nAdvertencia: parámetros distintos a la línea base (base, actual): {distintos}')
+        fallos += comparar(resultados, linea_base, args.umbral)
+
+    if fallos:
+        print('\nRegresiones:')
+        for fallo in fallos:
+            print(f'  - {fallo}')
+        sys.exit(1)
+    if args.linea_base:
+        print('\nSin regresiones respecto a la línea base')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""
+Prueba de carga: concurrencia por worker con WSGI (hilos) y con ASGI.
+
+Lanza --concurrencias clientes simultáneos contra los endpoints de lectura
+(listados de cajones, objetos e historial y las tres estadísticas) en un
+solo proceso:
+
+- WSGI: el handler de Django atendido por --hilos hilos, como un worker
+  gthread de gunicorn; los clientes que no tienen hilo esperan turno.
+- ASGI vistas sync: core.asgi con ASYNC_VIEWS=False.
+- ASGI vistas async: core.asgi con las vistas async (AsyncActionsMixin).
+
+Las variantes ASGI se sirven desde un solo event loop, como un worker de
+uvicorn. --latencia-bd añade una espera a cada consulta para simular la red
+de un MySQL remoto (con SQLite local las consultas apenas esperan E/S).
+Reporta peticiones/s, latencias p50/p95 y errores por variante.
+
+Uso:
+    python benchmarks/asgi_concurrencia.py --concurrencias 1 8 32 64 --latencia-bd 5
+"""
+import argparse
+import asyncio
+import io
+import logging
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from entorno import Cronometro, configurar_django
+
+RUTAS = [
+    '/api/v1/cajones/',
+    '/api/v1/objetos/',
+    '/api/v1/historial/',
+    '/api/v1/estadisticas/generales/',
+    '/api/v1/historial/estadisticas/',
+    '/api/v1/cajones/{cajon}/estadisticas/',
+]
+
+
+def sembrar(cajones, objetos):
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from cajones_inteligentes.models import Cajon, Historial, Objeto, Tamanio, TipoObjeto
+
+    usuario = User.objects.create_user('benchmark', password='benchmark')
+    creados = [
+        Cajon.objects.create(nombre=f'Cajón {i}', capacidad_maxima=objetos, usuario=usuario)
+        for i in range(cajones)
+    ]
+    tipos = list(TipoObjeto.values)
+    for i in range(objetos):
+        objeto = Objeto.objects.create(
+            nombre=f'Objeto {i}', cajon=creados[i % cajones], tipo_objeto=tipos[i % len(tipos)],
+            tamanio=Tamanio.PEQUENO,
+        )
+        Historial.objects.create(
+            nombre=f'Alta {i}', motivo='Benchmark', usuario=usuario, objeto=objeto,
+            cajon=objeto.cajon, tipo_accion='CREAR',
+        )
+    Cajon.recalcular_ocupacion()
+
+    cliente = Client()
+    cliente.force_login(usuario)
+    from django.conf import settings
+    sesion = cliente.cookies[settings.SESSION_COOKIE_NAME].value
+    rutas = [ruta.format(cajon=creados[0].pk) for ruta in RUTAS]
+    return f'{settings.SESSION_COOKIE_NAME}={sesion}', rutas
+
+
+def simular_latencia(segundos):
+    """Espera `segundos` en cada consulta de las conexiones que se abran."""
+    from django.db.backends.signals import connection_created
+
+    def esperar(execute, sql, params, many, context):
+        time.sleep(segundos)
+        return execute(sql, params, many, context)
+
+    def instalar(sender, connection, **kwargs):
+        # La señal se repite cada vez que el mismo wrapper reconecta
+        if esperar not in connection.execute_wrappers:
+            connection.execute_wrappers.append(esperar)
+
+    if segundos:
+        connection_created.connect(instalar, weak=False)
+
+
+def resumen(nombre, concurrencia, latencias, errores, segundos):
+    cortes = statistics.quantiles(latencias, n=100) if len(latencias) > 1 else [latencias[0]] * 99
+    return {
+        'variante': nombre,
+        'concurrencia': concurrencia,
+        'peticiones_s': len(latencias) / segundos,
+        'p50_ms': cortes[49] * 1000,
+        'p95_ms': cortes[94] * 1000,
+        'errores': errores,
+    }
+
+
+def cargar_wsgi(cookie, rutas, concurrencia, peticiones, hilos):
+    """Clientes en hilos propios; el servidor atiende con un pool de `hilos`."""
+    from django.core.handlers.wsgi import WSGIHandler
+
+    aplicacion = WSGIHandler()
+    latencias, errores = [], []
+    lock = threading.Lock()
+
+    def atender(ruta):
+        estado = []
+        entorno = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': ruta, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'localhost', 'HTTP_COOKIE': cookie, 'wsgi.input': io.BytesIO(),
+            'wsgi.url_scheme': 'http', 'wsgi.errors': io.StringIO(),
+        }
+        respuesta = aplicacion(entorno, lambda status, headers: estado.append(int(status[:3])))
+        b''.join(respuesta)
+        respuesta.close()
+        return estado[0]
+
+    with ThreadPoolExecutor(max_workers=hilos) as servidor:
+        def cliente(indice):
+            propias, fallos = [], 0
+            for numero in range(peticiones):
+                inicio = time.perf_counter()
+                codigo = servidor.submit(atender, rutas[(indice + numero) % len(rutas)]).result()
+                propias.append(time.perf_counter() - inicio)
+                fallos += codigo >= 400
+            with lock:
+                latencias.extend(propias)
+                errores.append(fallos)
+
+        clientes = [threading.Thread(target=cliente, args=(i,)) for i in range(concurrencia)]
+        with Cronometro() as cronometro:
+            for hilo in clientes:
+                hilo.start()
+            for hilo in clientes:
+                hilo.join()
+    return latencias, sum(errores), cronometro.segundos
+
+
+def cargar_asgi(cookie, rutas, concurrencia, peticiones):
+    """Clientes como corrutinas en el mismo event loop que core.asgi."""
+    from core.asgi import get_asgi_application
+
+    aplicacion = get_asgi_application()
+
+    async def atender(ruta):
+        estado = []
+        entregado = False
+
+        async def receive():
+            nonlocal entregado
+            if not entregado:
+                entregado = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            # El cliente sigue conectado hasta que Django termina la respuesta
+            await asyncio.Event().wait()
+
+        async def send(mensaje):
+            if mensaje['type'] == 'http.response.start':
+                estado.append(mensaje['status'])
+
+        await aplicacion({
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': ruta, 'raw_path': ruta.encode(), 'query_string': b'',
+            'root_path': '', 'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+            'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+        }, receive, send)
+        return estado[0]
+
+    async def cliente(indice):
+        propias, fallos = [], 0
+        for numero in range(peticiones):
+            inicio = time.perf_counter()
+            codigo = await atender(rutas[(indice + numero) % len(rutas)])
+            propias.append(time.perf_counter() - inicio)
+            fallos += codigo >= 400
+        return propias, fallos
+
+    async def ejecutar():
+        return await asyncio.gather(*(cliente(i) for i in range(concurrencia)))
+
+    with Cronometro() as cronometro:
+        resultados = asyncio.run(ejecutar())
+    latencias = [latencia for propias, _ in resultados for latencia in propias]
+    return latencias, sum(fallos for _, fallos in resultados), cronometro.segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--settings', default='config.settings.testing')
+    parser.add_argument('--concurrencias', type=int, nargs='+', default=[1, 8, 32, 64])
+    parser.add_argument('--peticiones', type=int, default=20, help='Peticiones por cliente')
+    parser.add_argument('--hilos', type=int, default=8, help='Hilos del worker WSGI')
+    parser.add_argument('--latencia-bd', type=float, default=5, help='Espera por consulta (ms)')
+    parser.add_argument('--cajones', type=int, default=10)
+    parser.add_argument('--objetos', type=int, default=200)
+    args = parser.parse_args()
+
+    destruir = configurar_django(args.settings)
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+    try:
+        from django.conf import settings
+        from django.db import connections
+
+        cookie, rutas = sembrar(args.cajones, args.objetos)
+        connections.close_all()
+        simular_latencia(args.latencia_bd / 1000)
+        resultados = []
+        for concurrencia in args.concurrencias:
+            resultados.append(resumen(f'WSGI {args.hilos} hilos', concurrencia, *cargar_wsgi(
+                cookie, rutas, concurrencia, args.peticiones, args.hilos
+            )))
+            for nombre, async_views in (('ASGI vistas sync', False), ('ASGI vistas async', True)):
+                settings.ASYNC_VIEWS = async_views
+                resultados.append(resumen(nombre, concurrencia, *cargar_asgi(
+                    cookie, rutas, concurrencia, args.peticiones
+                )))
+            connections.close_all()
+    finally:
+        destruir()
+
+    print(f"{'Variante':<20}{'Clientes':>9}{'Pet/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'Errores':>9}")
+    for r in resultados:
+        print(
+            f"{r['variante']:<20}{r['concurrencia']:>9}{r['peticiones_s']:>10,.0f}"
+            f"{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['errores']:>9}"
+        )
+
+
+if __name__ == '__main__':
+    main()
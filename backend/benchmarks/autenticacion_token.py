@@ -0,0 +1,101 @@
+"""
+Benchmark: costo por petición de la autenticación por token.
+
+Atiende --peticiones GET con `Authorization: Token <clave>` a través del
+handler WSGI completo (todos los middlewares) contra un endpoint que no
+consulta la base, para aislar el trabajo de autenticación:
+
+- DRF: SessionAuthentication y luego TokenAuthentication (configuración
+  anterior): la sesión se carga y cada petición consulta token y usuario.
+- Caché: core.authentication.CachedTokenAuthentication en primer lugar.
+
+--latencia-bd añade una espera a cada consulta para simular la red de un
+MySQL remoto. Reporta microsegundos y consultas por petición.
+
+Uso:
+    python benchmarks/autenticacion_token.py --peticiones 2000 --latencia-bd 0.5
+"""
+import argparse
+import io
+import statistics
+import time
+
+from entorno import configurar_django
+
+RUTA = '/api/v1/configuracion/tipos_objeto/'
+
+
+def medir(aplicacion, token, peticiones):
+    from django.db import connection
+
+    consultas = 0
+
+    def contar(execute, sql, params, many, context):
+        nonlocal consultas
+        consultas += 1
+        return execute(sql, params, many, context)
+
+    tiempos = []
+    with connection.execute_wrapper(contar):
+        for _ in range(peticiones):
+            estado = []
+            entorno = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': RUTA, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+                'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': 'localhost', 'HTTP_AUTHORIZATION': f'Token {token}',
+                'wsgi.input': io.BytesIO(), 'wsgi.url_scheme': 'http', 'wsgi.errors': io.StringIO(),
+            }
+            inicio = time.perf_counter()
+            respuesta = aplicacion(entorno, lambda status, headers: estado.append(int(status[:3])))
+            b''.join(respuesta)
+            respuesta.close()
+            tiempos.append(time.perf_counter() - inicio)
+            assert estado[0] == 200, estado
+    return statistics.median(tiempos) * 1e6, statistics.mean(tiempos) * 1e6, consultas / peticiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--settings', default='config.settings.testing')
+    parser.add_argument('--peticiones', type=int, default=2000)
+    parser.add_argument('--latencia-bd', type=float, default=0, help='Espera por consulta (ms)')
+    args = parser.parse_args()
+
+    destruir = configurar_django(args.settings)
+    try:
+        from django.contrib.auth.models import User
+        from django.core.handlers.wsgi import WSGIHandler
+        from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+        from rest_framework.authtoken.models import Token
+        from rest_framework.views import APIView
+
+        from asgi_concurrencia import simular_latencia
+        from core.authentication import CachedTokenAuthentication
+
+        usuario = User.objects.create_user('benchmark', password='benchmark')
+        token = Token.objects.create(user=usuario).key
+        simular_latencia(args.latencia_bd / 1000)
+        aplicacion = WSGIHandler()
+
+        variantes = [
+            ('DRF', [SessionAuthentication, TokenAuthentication]),
+            ('Caché', [CachedTokenAuthentication, SessionAuthentication]),
+        ]
+        resultados = []
+        for nombre, clases in variantes:
+            # Las vistas sin authentication_classes propias heredan las de APIView
+            APIView.authentication_classes = clases
+            medir(aplicacion, token, 50)  # calentamiento (y primera resolución del token)
+            resultados.append((nombre, *medir(aplicacion, token, args.peticiones)))
+    finally:
+        destruir()
+
+    print(f"{'Autenticación':<15}{'p50 µs':>10}{'media µs':>10}{'Consultas':>11}")
+    for nombre, mediana, media, consultas in resultados:
+        print(f'{nombre:<15}{mediana:>10,.0f}{media:>10,.0f}{consultas:>11.2f}')
+    base, cacheada = resultados[0][2], resultados[1][2]
+    print(f'\nAhorro por petición: {base - cacheada:,.0f} µs ({(1 - cacheada / base) * 100:.0f}%)')
+
+
+if __name__ == '__main__':
+    main()
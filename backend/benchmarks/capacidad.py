@@ -0,0 +1,93 @@
+"""
+Benchmark de la reserva atómica de capacidad bajo contención.
+
+Varios hilos intentan crear objetos en pocos cajones compartidos. Se reporta
+el rendimiento (objetos creados por segundo), los rechazos por cajón lleno y
+se verifica que el contador de ocupación coincida con los objetos activos.
+
+Uso:
+    python benchmarks/capacidad.py --hilos 16 --intentos 50 --cajones 2 --capacidad 200
+"""
+import argparse
+import threading
+import time
+
+from entorno import Cronometro, configurar_django
+
+
+def ejecutar(hilos, intentos, cantidad_cajones, capacidad):
+    from django.contrib.auth.models import User
+    from django.core.exceptions import ValidationError
+    from django.db import OperationalError, connection
+    from cajones_inteligentes.models import Cajon, Objeto
+
+    usuario = User.objects.create_user(username='benchmark', password='x')
+    cajones = [
+        Cajon.objects.create(nombre=f'Cajon {i}', capacidad_maxima=capacidad, usuario=usuario).pk
+        for i in range(cantidad_cajones)
+    ]
+    resultados = {'creados': 0, 'rechazados': 0, 'reintentos': 0}
+    lock = threading.Lock()
+
+    def trabajador(indice):
+        try:
+            for intento in range(intentos):
+                cajon_id = cajones[(indice + intento) % len(cajones)]
+                while True:
+                    try:
+                        Objeto.objects.create(nombre=f'Objeto {indice} {intento}', cajon_id=cajon_id)
+                        resultado = 'creados'
+                    except ValidationError:
+                        resultado = 'rechazados'
+                    except OperationalError:
+                        with lock:
+                            resultados['reintentos'] += 1
+                        time.sleep(0.001)
+                        continue
+                    with lock:
+                        resultados[resultado] += 1
+                    break
+        finally:
+            connection.close()
+
+    with Cronometro() as cronometro:
+        trabajadores = [threading.Thread(target=trabajador, args=(i,)) for i in range(hilos)]
+        for hilo in trabajadores:
+            hilo.start()
+        for hilo in trabajadores:
+            hilo.join()
+
+    inconsistentes = [
+        cajon.nombre for cajon in Cajon.objects.filter(pk__in=cajones)
+        if cajon.ocupados != cajon.objetos.filter(is_active=True).count()
+        or cajon.ocupados > cajon.capacidad_maxima
+    ]
+    total = hilos * intentos
+    print(f"Intentos:            {total} ({hilos} hilos x {intentos})")
+    print(f"Creados:             {resultados['creados']}")
+    print(f"Rechazados (lleno):  {resultados['rechazados']}")
+    print(f"Reintentos (lock):   {resultados['reintentos']}")
+    print(f"Tiempo:              {cronometro.segundos:.3f} s")
+    print(f"Rendimiento:         {total / cronometro.segundos:.1f} operaciones/s")
+    print(f"Invariante:          {'OK' if not inconsistentes else 'FALLA en ' + ', '.join(inconsistentes)}")
+    return not inconsistentes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hilos', type=int, default=8)
+    parser.add_argument('--intentos', type=int, default=50)
+    parser.add_argument('--cajones', type=int, default=2)
+    parser.add_argument('--capacidad', type=int, default=150)
+    args = parser.parse_args()
+
+    destruir = configurar_django()
+    try:
+        ok = ejecutar(args.hilos, args.intentos, args.cajones, args.capacidad)
+    finally:
+        destruir()
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Benchmark de estrategias de clave primaria para tablas tipo Historial.
+
+Compara uuid4 / uuid7 almacenados como char(32) y BINARY(16): rendimiento de
+inserción, de búsquedas por clave y tamaño de datos e índices.
+
+Uso:
+    # 10M de filas contra MySQL (configurado en config.settings.production / .env)
+    python benchmarks/claves_primarias.py --settings config.settings.production --filas 10000000
+
+    # Prueba rápida con SQLite temporal
+    python benchmarks/claves_primarias.py --filas 200000
+"""
+import argparse
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from entorno import Cronometro, configurar_django
+
+VARIANTES = [
+    ('uuid4', 'char(32)'),
+    ('uuid7', 'char(32)'),
+    ('uuid4', 'binary(16)'),
+    ('uuid7', 'binary(16)'),
+]
+
+
+def codificar(valor, tipo):
+    return valor.bytes if tipo == 'binary(16)' else valor.hex
+
+
+def crear_tabla(cursor, tabla, tipo):
+    cursor.execute(f"DROP TABLE IF EXISTS {tabla}")
+    cursor.execute(
+        f"CREATE TABLE {tabla} ("
+        f" id {tipo} NOT NULL PRIMARY KEY,"
+        f" usuario_id integer NOT NULL,"
+        f" objeto_id {tipo} NULL,"
+        f" tipo_accion varchar(50) NOT NULL,"
+        f" created_at datetime NOT NULL)"
+    )
+    cursor.execute(f"CREATE INDEX {tabla}_usuario ON {tabla} (usuario_id, created_at)")
+    cursor.execute(f"CREATE INDEX {tabla}_objeto ON {tabla} (objeto_id)")
+
+
+def paginas_usadas(connection, cursor):
+    """Bytes ocupados por la base SQLite (páginas en uso)."""
+    if connection.vendor != 'sqlite':
+        return None
+    cursor.execute("PRAGMA page_size")
+    tamanio_pagina = cursor.fetchone()[0]
+    cursor.execute("PRAGMA page_count")
+    paginas = cursor.fetchone()[0]
+    cursor.execute("PRAGMA freelist_count")
+    return (paginas - cursor.fetchone()[0]) * tamanio_pagina
+
+
+def tamanio_tabla(connection, cursor, tabla, bytes_antes):
+    """Retorna (bytes de datos, bytes de índices, bytes totales); None si no se puede medir."""
+    if connection.vendor == 'mysql':
+        cursor.execute(f"ANALYZE TABLE {tabla}")
+        cursor.fetchall()
+        cursor.execute(
+            "SELECT DATA_LENGTH, INDEX_LENGTH FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", [tabla]
+        )
+        datos, indices = cursor.fetchone()
+        return datos, indices, datos + indices
+    if connection.vendor == 'sqlite':
+        # dbstat no siempre está compilado; el total se mide por páginas usadas
+        return None, None, paginas_usadas(connection, cursor) - bytes_antes
+    return None, None, None
+
+
+def ejecutar_variante(generador, tipo, filas, lote, busquedas):
+    from django.db import connection, transaction
+    from core.fields import uuid7
+
+    generar = uuid7 if generador == 'uuid7' else uuid.uuid4
+    tabla = f"bench_pk_{generador}_{tipo.split('(')[0]}"
+    inicio = datetime(2024, 1, 1)
+    muestra = []
+
+    with connection.cursor() as cursor:
+        bytes_antes = paginas_usadas(connection, cursor)
+        crear_tabla(cursor, tabla, tipo)
+        sql = (
+            f"INSERT INTO {tabla} (id, usuario_id, objeto_id, tipo_accion, created_at) "
+            f"VALUES (%s, %s, %s, %s, %s)"
+        )
+        with Cronometro() as insercion:
+            for desde in range(0, filas, lote):
+                valores = []
+                for i in range(desde, min(desde + lote, filas)):
+                    clave = generar()
+                    valores.append((
+                        codificar(clave, tipo), i % 1000, codificar(generar(), tipo),
+                        'CREAR', inicio + timedelta(seconds=i)
+                    ))
+                    if len(muestra) < busquedas or random.random() < busquedas / filas:
+                        muestra.append(codificar(clave, tipo))
+                with transaction.atomic():
+                    cursor.executemany(sql, valores)
+
+        muestra = random.sample(muestra, min(busquedas, len(muestra)))
+        with Cronometro() as lectura:
+            for clave in muestra:
+                cursor.execute(f"SELECT tipo_accion FROM {tabla} WHERE id = %s", [clave])
+                cursor.fetchone()
+
+        datos, indices, total = tamanio_tabla(connection, cursor, tabla, bytes_antes)
+        cursor.execute(f"DROP TABLE {tabla}")
+
+    return {
+        'variante': f'{generador} {tipo}',
+        'inserciones_s': filas / insercion.segundos,
+        'busquedas_s': len(muestra) / lectura.segundos if muestra else 0,
+        'datos_mb': datos / 2 ** 20 if datos is not None else None,
+        'indices_mb': indices / 2 ** 20 if indices is not None else None,
+        'total_mb': total / 2 ** 20 if total is not None else None,
+    }
+
+
+def formatear(valor, formato):
+    return format(valor, formato) if valor is not None else 'n/d'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--settings', default='config.settings.testing')
+    parser.add_argument('--filas', type=int, default=10_000_000)
+    parser.add_argument('--lote', type=int, default=5000)
+    parser.add_argument('--busquedas', type=int, default=10000)
+    args = parser.parse_args()
+
+    destruir = configurar_django(args.settings)
+    try:
+        resultados = [
+            ejecutar_variante(generador, tipo, args.filas, args.lote, args.busquedas)
+            for generador, tipo in VARIANTES
+        ]
+    finally:
+        destruir()
+
+    print(
+        f"{'Variante':<20}{'Inserciones/s':>16}{'Búsquedas/s':>14}"
+        f"{'Datos MB':>11}{'Índices MB':>12}{'Total MB':>11}"
+    )
+    for r in resultados:
+        print(
+            f"{r['variante']:<20}{r['inserciones_s']:>16,.0f}{r['busquedas_s']:>14,.0f}"
+            f"{formatear(r['datos_mb'], '.1f'):>11}{formatear(r['indices_mb'], '.1f'):>12}"
+            f"{formatear(r['total_mb'], '.1f'):>11}"
+        )
+
+
+if __name__ == '__main__':
+    main()
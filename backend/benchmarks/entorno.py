@@ -0,0 +1,51 @@
+"""
+Utilidades comunes para los scripts de benchmark.
+Configura Django con una base de datos temporal en disco para que varios
+hilos (o procesos) puedan compartirla.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import django
+
+# Agregar el directorio del proyecto al path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, 'apps'))
+
+
+def configurar_django(settings_module='config.settings.testing'):
+    """
+    Inicializa Django y crea una base de datos de prueba temporal.
+    Retorna una función que destruye la base al terminar.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    ruta = os.path.join(tempfile.mkdtemp(prefix='benchmark-'), 'db.sqlite3')
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = ruta
+    setup_test_environment()
+    nombre_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+    def destruir():
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+    return destruir
+
+
+class Cronometro:
+    """Mide el tiempo transcurrido dentro de un bloque with."""
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.segundos = time.perf_counter() - self.inicio
@@ -0,0 +1,161 @@
+"""
+Prueba de carga: conexión nueva por petición vs. pool de conexiones.
+
+Simula peticiones concurrentes en ráfagas (varios hilos que arrancan a la vez)
+donde cada petición obtiene una conexión, ejecuta unas consultas y la libera.
+Sin pool cada petición abre y cierra su conexión (CONN_MAX_AGE=0); con pool
+se reutilizan hasta --pool conexiones. Reporta latencias p50/p95/p99/máxima
+y las métricas del pool.
+
+Uso:
+    # Contra MySQL local (config.settings.production / .env)
+    python benchmarks/pool_conexiones.py --settings config.settings.production --hilos 64 --pool 10
+
+    # Prueba rápida con SQLite temporal
+    python benchmarks/pool_conexiones.py --hilos 16 --peticiones 100
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+
+from entorno import Cronometro, configurar_django
+
+
+def abrir_conexion(connection, parametros):
+    """Conexión física nueva, sin pasar por el pool aunque el backend lo tenga."""
+    from core.db.pool import PooledDatabaseWrapperMixin
+
+    if isinstance(connection, PooledDatabaseWrapperMixin):
+        return super(PooledDatabaseWrapperMixin, connection).get_new_connection(parametros)
+    return connection.get_new_connection(parametros)
+
+
+def ping(connection):
+    from core.db.pool import PooledDatabaseWrapperMixin
+
+    if isinstance(connection, PooledDatabaseWrapperMixin):
+        return connection.ping_connection
+    return lambda conexion: PooledDatabaseWrapperMixin.ping_connection(connection, conexion)
+
+
+def ejecutar_peticion(conexion, sql, consultas):
+    cursor = conexion.cursor()
+    try:
+        for _ in range(consultas):
+            cursor.execute(sql)
+            cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def cargar(obtener, devolver, sql, hilos, peticiones, consultas, pausa):
+    """Ejecuta la carga y retorna las latencias por petición (segundos)."""
+    latencias = []
+    errores = []
+    lock = threading.Lock()
+    barrera = threading.Barrier(hilos)
+
+    def trabajador():
+        propias = []
+        barrera.wait()
+        for _ in range(peticiones):
+            inicio = time.perf_counter()
+            try:
+                conexion = obtener()
+                try:
+                    ejecutar_peticion(conexion, sql, consultas)
+                finally:
+                    devolver(conexion)
+            except Exception as exc:
+                with lock:
+                    errores.append(exc)
+                continue
+            propias.append(time.perf_counter() - inicio)
+            if pausa:
+                time.sleep(random.expovariate(1 / pausa))
+        with lock:
+            latencias.extend(propias)
+
+    hilos_activos = [threading.Thread(target=trabajador) for _ in range(hilos)]
+    with Cronometro() as cronometro:
+        for hilo in hilos_activos:
+            hilo.start()
+        for hilo in hilos_activos:
+            hilo.join()
+    return latencias, errores, cronometro.segundos
+
+
+def resumir(nombre, latencias, errores, segundos):
+    if not latencias:
+        raise SystemExit(f'{nombre}: todas las peticiones fallaron ({errores[0]!r})')
+    cortes = statistics.quantiles(latencias, n=100) if len(latencias) > 1 else [latencias[0]] * 99
+    return {
+        'variante': nombre,
+        'peticiones_s': len(latencias) / segundos,
+        'p50_ms': cortes[49] * 1000,
+        'p95_ms': cortes[94] * 1000,
+        'p99_ms': cortes[98] * 1000,
+        'max_ms': max(latencias) * 1000,
+        'errores': len(errores),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--settings', default='config.settings.testing')
+    parser.add_argument('--hilos', type=int, default=32, help='Peticiones concurrentes')
+    parser.add_argument('--peticiones', type=int, default=200, help='Peticiones por hilo')
+    parser.add_argument('--consultas', type=int, default=3, help='Consultas por petición')
+    parser.add_argument('--pool', type=int, default=10, help='Tamaño máximo del pool')
+    parser.add_argument('--pausa', type=float, default=0.001, help='Pausa media entre peticiones (s)')
+    args = parser.parse_args()
+
+    destruir = configurar_django(args.settings)
+    try:
+        from django.db import connections
+        from cajones_inteligentes.models import Cajon
+        from core.db.pool import ConnectionPool
+
+        # Wrapper del hilo principal (django.db.connection es distinto en cada hilo)
+        connection = connections['default']
+        parametros = connection.get_connection_params()
+        sql = f'SELECT COUNT(*) FROM {connection.ops.quote_name(Cajon._meta.db_table)}'
+        comun = (sql, args.hilos, args.peticiones, args.consultas, args.pausa)
+
+        sin_pool = cargar(
+            lambda: abrir_conexion(connection, parametros), lambda c: c.close(), *comun
+        )
+        pool = ConnectionPool(
+            create=lambda: abrir_conexion(connection, parametros),
+            close=lambda c: c.close(),
+            ping=ping(connection),
+            max_size=args.pool,
+            timeout=30,
+        )
+        con_pool = cargar(pool.acquire, pool.release, *comun)
+        metricas = pool.snapshot()
+        pool.close_all()
+    finally:
+        destruir()
+
+    resultados = [
+        resumir('sin pool', *sin_pool),
+        resumir(f'pool ({args.pool})', *con_pool),
+    ]
+    print(f"{'Variante':<14}{'Pet/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'Máx ms':>10}{'Errores':>9}")
+    for r in resultados:
+        print(
+            f"{r['variante']:<14}{r['peticiones_s']:>10,.0f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+            f"{r['p99_ms']:>10.2f}{r['max_ms']:>10.2f}{r['errores']:>9}"
+        )
+    print(
+        f"\nPool: {metricas['created']} conexiones creadas, {metricas['checkouts']} entregas, "
+        f"{metricas['waits']} esperas (máx. {metricas['wait_seconds_max'] * 1000:.2f} ms), "
+        f"{metricas['ping_failures']} pings fallidos"
+    )
+
+
+if __name__ == '__main__':
+    main()
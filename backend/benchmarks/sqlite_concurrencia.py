@@ -0,0 +1,174 @@
+"""
+Prueba de carga: tráfico mixto de lectura/escritura sobre SQLite en disco.
+
+Varios hilos hacen peticiones a la API (listados de cajones y objetos, alta de
+objetos) con la configuración por defecto de SQLite (journal DELETE, BEGIN
+DEFERRED, escritores compitiendo por el lock) y con el perfil de alta
+concurrencia (WAL, synchronous=NORMAL, mmap, caché, BEGIN IMMEDIATE y cola
+de escrituras del proceso). Reporta peticiones/s, latencias y errores
+("database is locked" termina en respuestas 500).
+
+Uso:
+    python benchmarks/sqlite_concurrencia.py --hilos 16 --peticiones 100 --escrituras 0.3
+"""
+import argparse
+import logging
+import random
+import statistics
+import threading
+import time
+
+from entorno import Cronometro, configurar_django
+
+
+def variantes(settings):
+    return [
+        ('por defecto', {'journal_mode': 'DELETE', 'synchronous': 'FULL'}, None, False),
+        ('alta concurrencia', settings.SQLITE_HIGH_CONCURRENCY_PRAGMAS, 'IMMEDIATE', True),
+    ]
+
+
+def configurar_variante(pragmas, transaction_mode, serializar):
+    from django.conf import settings
+    from django.db import connections
+
+    connections.close_all()
+    opciones = connections.settings['default'].setdefault('OPTIONS', {})
+    opciones.pop('transaction_mode', None)
+    if transaction_mode:
+        opciones['transaction_mode'] = transaction_mode
+    settings.SQLITE_PRAGMAS = pragmas
+    settings.SQLITE_SERIALIZE_WRITES = serializar
+
+
+def sembrar(cajones):
+    from django.contrib.auth.models import User
+    from cajones_inteligentes.models import Cajon
+
+    usuario = User.objects.create_user('benchmark', password='benchmark')
+    ids = [
+        str(Cajon.objects.create(nombre=f'Cajón {i}', capacidad_maxima=100000, usuario=usuario).pk)
+        for i in range(cajones)
+    ]
+    return usuario, ids
+
+
+def limpiar():
+    """Elimina los objetos creados para que cada variante parta de los mismos datos."""
+    from django.db import connections
+    from cajones_inteligentes.models import Cajon, Historial, Objeto
+
+    Historial.all_objects.all()._raw_delete('default')
+    Objeto.all_objects.all()._raw_delete('default')
+    Cajon.recalcular_ocupacion()
+    connections.close_all()
+
+
+def cargar(usuario, cajones, hilos, peticiones, escrituras):
+    """Ejecuta la carga y retorna latencias (s), estados HTTP y duración total."""
+    from django.db import connections
+    from django.test import Client
+    from cajones_inteligentes.models import Tamanio, TipoObjeto
+
+    latencias = []
+    estados = {}
+    lock = threading.Lock()
+    barrera = threading.Barrier(hilos)
+    # Las sesiones se crean antes de la carga, sin concurrencia
+    clientes = [Client(raise_request_exception=False) for _ in range(hilos)]
+    for cliente in clientes:
+        cliente.force_login(usuario)
+    connections.close_all()
+
+    def trabajador(indice):
+        cliente = clientes[indice]
+        aleatorio = random.Random(indice)
+        propias, codigos = [], []
+        barrera.wait()
+        for numero in range(peticiones):
+            cajon = aleatorio.choice(cajones)
+            inicio = time.perf_counter()
+            if aleatorio.random() < escrituras:
+                respuesta = cliente.post('/api/v1/objetos/', {
+                    'nombre': f'Objeto {indice}-{numero}', 'tipo_objeto': TipoObjeto.ROPA,
+                    'tamanio': Tamanio.PEQUENO, 'cajon': cajon,
+                }, content_type='application/json')
+            elif aleatorio.random() < 0.5:
+                respuesta = cliente.get('/api/v1/cajones/')
+            else:
+                respuesta = cliente.get('/api/v1/objetos/', {'cajon': cajon})
+            propias.append(time.perf_counter() - inicio)
+            codigos.append(respuesta.status_code)
+        connections.close_all()
+        with lock:
+            latencias.extend(propias)
+            for codigo in codigos:
+                estados[codigo] = estados.get(codigo, 0) + 1
+
+    hilos_activos = [threading.Thread(target=trabajador, args=(i,)) for i in range(hilos)]
+    with Cronometro() as cronometro:
+        for hilo in hilos_activos:
+            hilo.start()
+        for hilo in hilos_activos:
+            hilo.join()
+    return latencias, estados, cronometro.segundos
+
+
+def resumir(nombre, latencias, estados, segundos):
+    if not latencias:
+        raise SystemExit(f'{nombre}: no se completó ninguna petición')
+    cortes = statistics.quantiles(latencias, n=100) if len(latencias) > 1 else [latencias[0]] * 99
+    exitosas = sum(total for codigo, total in estados.items() if codigo < 400)
+    return {
+        'variante': nombre,
+        'peticiones_s': len(latencias) / segundos,
+        'exitosas_s': exitosas / segundos,
+        'p50_ms': cortes[49] * 1000,
+        'p99_ms': cortes[98] * 1000,
+        'errores': len(latencias) - exitosas,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--settings', default='config.settings.edge')
+    parser.add_argument('--hilos', type=int, default=16, help='Clientes concurrentes')
+    parser.add_argument('--peticiones', type=int, default=100, help='Peticiones por hilo')
+    parser.add_argument('--escrituras', type=float, default=0.3, help='Proporción de escrituras (0-1)')
+    parser.add_argument('--cajones', type=int, default=10)
+    args = parser.parse_args()
+
+    destruir = configurar_django(args.settings)
+    # Los 500 por "database is locked" se cuentan en el resumen, sin trazas
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+    try:
+        from django.conf import settings
+        from core.db.sqlite import write_queue
+
+        usuario, cajones = sembrar(args.cajones)
+        resultados = []
+        for nombre, pragmas, transaction_mode, serializar in variantes(settings):
+            configurar_variante(pragmas, transaction_mode, serializar)
+            resultados.append(resumir(nombre, *cargar(
+                usuario, cajones, args.hilos, args.peticiones, args.escrituras
+            )))
+            limpiar()
+        cola = write_queue.snapshot()
+        configurar_variante({'journal_mode': 'DELETE'}, None, False)
+    finally:
+        destruir()
+
+    print(f"{'Variante':<20}{'Pet/s':>10}{'Éxito/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'Errores':>9}")
+    for r in resultados:
+        print(
+            f"{r['variante']:<20}{r['peticiones_s']:>10,.0f}{r['exitosas_s']:>10,.0f}"
+            f"{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['errores']:>9}"
+        )
+    print(
+        f"\nCola de escrituras: {cola['writes']} escrituras, {cola['waits']} esperas "
+        f"(máx. {cola['wait_seconds_max'] * 1000:.2f} ms), {cola['timeouts']} sin turno"
+    )
+
+
+if __name__ == '__main__':
+    main()
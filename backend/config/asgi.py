@@ -2,6 +2,9 @@
 ASGI config for smart_drawers_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The handler comes from core.asgi: read endpoints with an async implementation
+(see core.views.AsyncActionsMixin) are served without holding a thread while
+they wait on the database.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -9,8 +12,8 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smart_drawers_backend.settings')
+from core.asgi import get_asgi_application  # noqa: E402
 
 application = get_asgi_application()
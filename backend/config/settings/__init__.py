@@ -10,6 +10,8 @@ ENVIRONMENT = os.environ.get('DJANGO_ENVIRONMENT', 'development')
 
 if ENVIRONMENT == 'production':
     from .production import *
+elif ENVIRONMENT == 'edge':
+    from .edge import *
 elif ENVIRONMENT == 'testing':
     from .testing import *
 else:
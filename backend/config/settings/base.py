@@ -34,6 +34,7 @@ DJANGO_APPS = [
 
 THIRD_PARTY_APPS = [
     'rest_framework',
+    'rest_framework.authtoken',
     'corsheaders',
     'django_filters',
     'drf_spectacular',
@@ -44,17 +45,25 @@ LOCAL_APPS = [
     'core',
     # Aplicaciones del dominio
     'cajones_inteligentes',
+    # Trabajos en segundo plano
+    'trabajos',
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'core.middleware.RequestContextMiddleware',
+    'core.middleware.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.QueryInstrumentationMiddleware',
+    'core.middleware.SQLiteWriteQueueMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -79,6 +88,11 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# Vistas async bajo ASGI (config.asgi, core.asgi): las acciones de lectura con
+# versión async se atienden sin ocupar un hilo mientras esperan a la base.
+# Sin efecto bajo WSGI.
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=True, cast=bool)
+
 # Database configuration
 DATABASES = {
     'default': {
@@ -95,6 +109,32 @@ DATABASES = {
     }
 }
 
+# Réplicas de lectura (core.db.routers.PrimaryReplicaRouter)
+# DATABASE_REPLICAS: alias de DATABASES que reciben las lecturas de las
+# acciones marcadas con ReplicaReadMixin; vacío = todo va a 'default'.
+# REPLICA_PIN_SECONDS: tras escribir, el usuario lee de la primaria durante
+# este tiempo (debe superar el retraso de replicación habitual).
+DATABASE_ROUTERS = ['core.db.routers.PrimaryReplicaRouter']
+DATABASE_REPLICAS = []
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=int)
+
+# Perfil SQLite de alta concurrencia (core.db.sqlite), usado en desarrollo y edge.
+# SQLITE_PRAGMAS: pragmas aplicados a cada conexión SQLite nueva (vacío = ninguno).
+# SQLITE_SERIALIZE_WRITES: con el backend core.db.backends.sqlite_queue, las
+# transacciones que escriben esperan turno en una cola del proceso (solo útil con
+# WSGI y varios hilos); tras SQLITE_WRITE_TIMEOUT segundos se responde 503.
+SQLITE_HIGH_CONCURRENCY_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,          # ms
+    'mmap_size': 268435456,        # 256 MB
+    'cache_size': -65536,          # 64 MB (negativo = KiB)
+    'temp_store': 'MEMORY',
+}
+SQLITE_PRAGMAS = {}
+SQLITE_SERIALIZE_WRITES = False
+SQLITE_WRITE_TIMEOUT = config('SQLITE_WRITE_TIMEOUT', default=10, cast=float)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -131,11 +171,20 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Claves primarias de BaseModel (core.fields)
+# PRIMARY_KEY_STRATEGY: 'uuid7' (ordenado por tiempo) o 'uuid4' (aleatorio)
+PRIMARY_KEY_STRATEGY = config('PRIMARY_KEY_STRATEGY', default='uuid7')
+# Almacenar los UUID como BINARY(16) en MySQL en lugar de char(32).
+# En bases existentes activar solo al ejecutar la fase 'intercambiar' de
+# `manage.py migrar_claves_binarias` (ver core/management/commands).
+UUID_BINARY_STORAGE = config('UUID_BINARY_STORAGE', default=False, cast=bool)
+
 # Django REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        # El token primero: las peticiones con token no cargan la sesión
+        'core.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -154,7 +203,109 @@ REST_FRAMEWORK = {
         'rest_framework.filters.OrderingFilter',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.CostBasedThrottle',
+    ],
+}
+
+# Throttling por costo (core.throttling)
+# Un token bucket por usuario (por IP sin sesión) en la caché compartida:
+# ráfagas de hasta CAPACITY tokens, que se recuperan a REFILL_RATE por segundo.
+# Cada acción consume su `throttle_cost` (THROTTLE_DEFAULT_COST si no lo declara).
+# Con DummyCache (desarrollo, tests) no limita.
+THROTTLE_BUCKET = {
+    'CAPACITY': config('THROTTLE_CAPACITY', default=120, cast=int),
+    'REFILL_RATE': config('THROTTLE_REFILL_RATE', default=2, cast=float),
 }
+THROTTLE_DEFAULT_COST = 1
+
+# Caché de autenticación por token (core.authentication)
+# Usuarios por token en un LRU del proceso de AUTH_TOKEN_CACHE_SIZE entradas
+# que se revalidan contra la caché compartida cada AUTH_TOKEN_LOCAL_TIMEOUT
+# segundos (lo que tarda otro proceso en ver una revocación); en la caché
+# compartida viven AUTH_TOKEN_CACHE_TIMEOUT segundos.
+AUTH_TOKEN_CACHE_SIZE = config('AUTH_TOKEN_CACHE_SIZE', default=1000, cast=int)
+AUTH_TOKEN_LOCAL_TIMEOUT = config('AUTH_TOKEN_LOCAL_TIMEOUT', default=5, cast=float)
+AUTH_TOKEN_CACHE_TIMEOUT = config('AUTH_TOKEN_CACHE_TIMEOUT', default=300, cast=int)
+
+# Response compression (core.middleware.CompressionMiddleware)
+# Ver DEFAULT_COMPRESSION en core/middleware.py para los valores por defecto
+COMPRESSION = {
+    'MIN_SIZE': config('COMPRESSION_MIN_SIZE', default=1024, cast=int),
+    'LEVELS': {
+        'application/json': {'br': 4, 'gzip': 6},
+        'text/*': {'br': 5, 'gzip': 6},
+        '*': {'br': 4, 'gzip': 5},
+    },
+}
+
+# Instrumentación de consultas (core.middleware.QueryInstrumentationMiddleware)
+# Registra consultas y tiempo en base de datos por petición, marca patrones N+1
+# (misma consulta QUERY_N1_THRESHOLD veces o más) y el `query_budget` excedido
+QUERY_INSTRUMENTATION = config('QUERY_INSTRUMENTATION', default=False, cast=bool)
+QUERY_N1_THRESHOLD = config('QUERY_N1_THRESHOLD', default=3, cast=int)
+
+# Métricas (core.metrics, GET /metrics en formato Prometheus)
+# METRICS_MULTIPROC_DIR: directorio compartido por los workers de gunicorn; cada
+# worker vuelca sus métricas cada METRICS_FLUSH_INTERVAL segundos. Vaciarlo al
+# arrancar el servidor. METRICS_TOKEN: si se define, /metrics exige Bearer token; si no, un usuario staff.
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_MULTIPROC_DIR = config('METRICS_MULTIPROC_DIR', default='')
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=1.0, cast=float)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Perfilado bajo demanda (core.middleware.ProfilingMiddleware, /api/v1/perfiles/)
+# Se perfila con el encabezado PROFILING_HEADER (solo staff) o por muestreo
+# (PROFILING_SAMPLE_RATE entre 0 y 1). Se conservan PROFILING_MAX_PROFILES perfiles.
+PROFILING_HEADER = 'X-Profile'
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=0.0, cast=float)
+PROFILING_DIR = config('PROFILING_DIR', default=str(BASE_DIR / 'profiles'))
+PROFILING_MAX_PROFILES = config('PROFILING_MAX_PROFILES', default=200, cast=int)
+PROFILING_TRACEMALLOC_FRAMES = 10
+
+# Batch requests
+# Máximo de sub-peticiones permitidas en una llamada a /api/v1/batch/
+BATCH_MAX_SUBREQUESTS = config('BATCH_MAX_SUBREQUESTS', default=20, cast=int)
+
+# Dashboard
+# Tiempo de vida (segundos) de la caché versionada por usuario del dashboard
+DASHBOARD_CACHE_TIMEOUT = config('DASHBOARD_CACHE_TIMEOUT', default=300, cast=int)
+
+# Eventos en tiempo real (core.events, GET /api/v1/eventos/stream/ en SSE)
+# EVENTS_BACKEND reparte los eventos entre procesos: LocalBackend solo sirve
+# con un worker; con varios usar core.events.RedisBackend (ver production.py).
+# Cada conexión guarda hasta EVENTS_BUFFER_SIZE eventos sin leer y recibe un
+# comentario de keepalive cada EVENTS_KEEPALIVE segundos sin eventos.
+EVENTS_BACKEND = {'BACKEND': 'core.events.LocalBackend'}
+EVENTS_BUFFER_SIZE = config('EVENTS_BUFFER_SIZE', default=100, cast=int)
+EVENTS_KEEPALIVE = config('EVENTS_KEEPALIVE', default=15, cast=float)
+
+# Feed de cambios (core.changefeed, GET /api/v1/cambios/)
+# Páginas de CHANGE_FEED_PAGE_SIZE cambios (hasta CHANGE_FEED_MAX_PAGE_SIZE
+# con `limite`); solo se entregan cambios con más de CHANGE_FEED_SETTLE_SECONDS
+# (debe superar la transacción más larga) y los cursores con más de
+# CHANGE_FEED_RETENTION_DAYS días requieren un snapshot completo.
+CHANGE_FEED_PAGE_SIZE = config('CHANGE_FEED_PAGE_SIZE', default=100, cast=int)
+CHANGE_FEED_MAX_PAGE_SIZE = config('CHANGE_FEED_MAX_PAGE_SIZE', default=500, cast=int)
+CHANGE_FEED_SETTLE_SECONDS = config('CHANGE_FEED_SETTLE_SECONDS', default=2, cast=float)
+CHANGE_FEED_RETENTION_DAYS = config('CHANGE_FEED_RETENTION_DAYS', default=30, cast=int)
+
+# Trabajos en segundo plano (apps/trabajos, `manage.py worker`, /api/v1/jobs/)
+# La cola es la tabla de trabajos: no requiere broker. El worker lanza
+# JOBS_WORKER_PROCESSES procesos que consultan la cola cada JOBS_POLL_INTERVAL
+# segundos cuando está vacía. Un trabajo fallido se reintenta hasta
+# JOBS_MAX_ATTEMPTS veces (esperando JOBS_RETRY_DELAY segundos, el doble en
+# cada reintento); uno sin latido en JOBS_STALE_TIMEOUT segundos vuelve a la
+# cola. El worker renueva el latido de cada trabajo en curso cada
+# JOBS_HEARTBEAT_INTERVAL segundos (muy por debajo de JOBS_STALE_TIMEOUT).
+# Los terminados se eliminan tras JOBS_RETENTION_DAYS días.
+JOBS_WORKER_PROCESSES = config('JOBS_WORKER_PROCESSES', default=2, cast=int)
+JOBS_POLL_INTERVAL = config('JOBS_POLL_INTERVAL', default=1, cast=float)
+JOBS_MAX_ATTEMPTS = config('JOBS_MAX_ATTEMPTS', default=3, cast=int)
+JOBS_RETRY_DELAY = config('JOBS_RETRY_DELAY', default=30, cast=int)
+JOBS_STALE_TIMEOUT = config('JOBS_STALE_TIMEOUT', default=300, cast=int)
+JOBS_HEARTBEAT_INTERVAL = config('JOBS_HEARTBEAT_INTERVAL', default=60, cast=float)
+JOBS_RETENTION_DAYS = config('JOBS_RETENTION_DAYS', default=7, cast=int)
 
 # drf-spectacular settings
 SPECTACULAR_SETTINGS = {
@@ -197,46 +348,79 @@ SECURE_CONTENT_TYPE_NOSNIFF = True
 X_FRAME_OPTIONS = 'DENY'
 
 # Logging configuration
+# No bloqueante (core.logs): los registros se encolan en 'queue' y un
+# hilo de fondo los escribe en 'file' (JSON, con structlog si está instalado)
+# y 'console'. Cada registro lleva request_id, user y action de la petición.
+# Con la cola por encima de LOG_QUEUE_SAMPLING_THRESHOLD solo se conserva la
+# fracción LOG_DEBUG_SAMPLE_RATE de los registros DEBUG; con la cola llena se
+# descartan (nunca se bloquea una petición).
+LOG_QUEUE_SIZE = config('LOG_QUEUE_SIZE', default=10000, cast=int)
+LOG_QUEUE_SAMPLING_THRESHOLD = config('LOG_QUEUE_SAMPLING_THRESHOLD', default=0.5, cast=float)
+LOG_DEBUG_SAMPLE_RATE = config('LOG_DEBUG_SAMPLE_RATE', default=0.1, cast=float)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
-            'style': '{',
+        'json': {
+            '()': 'core.logs.json_formatter',
         },
         'simple': {
-            'format': '{levelname} {message}',
+            'format': '{levelname} [{request_id}] {message}',
             'style': '{',
         },
     },
+    'filters': {
+        'request_context': {
+            '()': 'core.logs.RequestContextFilter',
+        },
+    },
     'handlers': {
+        # Solo los usa el listener de 'queue', fuera de los hilos de petición
         'file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
+            'class': 'logging.handlers.WatchedFileHandler',
             'filename': BASE_DIR / 'logs' / 'django.log',
-            'formatter': 'verbose',
+            'formatter': 'json',
         },
         'console': {
             'level': 'DEBUG',
             'class': 'logging.StreamHandler',
             'formatter': 'simple',
         },
+        'queue': {
+            '()': 'core.logs.BackgroundQueueHandler',
+            'targets': ['file', 'console'],
+            'maxsize': LOG_QUEUE_SIZE,
+            'sampling_threshold': LOG_QUEUE_SAMPLING_THRESHOLD,
+            'debug_sample_rate': LOG_DEBUG_SAMPLE_RATE,
+            'filters': ['request_context'],
+        },
     },
     'root': {
-        'handlers': ['console'],
+        'handlers': ['queue'],
         'level': 'INFO',
     },
     'loggers': {
         'django': {
-            'handlers': ['file', 'console'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': False,
         },
         'apps': {
-            'handlers': ['file', 'console'],
+            'handlers': ['queue'],
             'level': 'DEBUG',
             'propagate': False,
         },
+        'core': {
+            'handlers': ['queue'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'trabajos': {
+            'handlers': ['queue'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
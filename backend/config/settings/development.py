@@ -13,11 +13,28 @@ ALLOWED_HOSTS = ['localhost', '127.0.0.1', '0.0.0.0']
 # Database configuration for development (usando SQLite para facilidad)
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # sqlite3 de Django más la cola de escrituras (SQLITE_SERIALIZE_WRITES)
+        'ENGINE': 'core.db.backends.sqlite_queue',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # BEGIN IMMEDIATE: la transacción toma el lock de escritura al empezar
+        # en lugar de fallar con "database is locked" al escalar de lectura
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
     }
 }
 
+# Perfil SQLite de alta concurrencia (ver config/settings/base.py)
+SQLITE_PRAGMAS = SQLITE_HIGH_CONCURRENCY_PRAGMAS
+SQLITE_SERIALIZE_WRITES = True
+
+# Réplica local opcional para probar el enrutamiento de lecturas: una copia
+# de db.sqlite3 (p. ej. `cp db.sqlite3 db_replica.sqlite3`), DB_REPLICA_SQLITE=True
+if config('DB_REPLICA_SQLITE', default=False, cast=bool):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+    }
+    DATABASE_REPLICAS = ['replica']
+
 # Si prefieres usar MySQL, comenta la configuración SQLite arriba 
 # y descomenta la configuración MySQL abajo:
 """
@@ -37,6 +54,9 @@ DATABASES = {
 }
 """
 
+# Instrumentación de consultas por petición (encabezados X-Query-Count y Server-Timing)
+QUERY_INSTRUMENTATION = config('QUERY_INSTRUMENTATION', default=True, cast=bool)
+
 # CORS settings for development
 CORS_ALLOW_ALL_ORIGINS = True
 
@@ -0,0 +1,51 @@
+"""
+Configuración para instancias edge sobre SQLite (un solo nodo, varios hilos).
+
+Ejecutar con un servidor de hilos y pocos procesos, p. ej.:
+    gunicorn config.wsgi --workers 2 --threads 8
+La cola de escrituras ordena los hilos de cada proceso; entre procesos
+espera busy_timeout.
+"""
+
+from .base import *
+
+# Debug mode
+DEBUG = False
+
+SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+
+# SQLite con WAL: las lecturas no bloquean a la escritura en curso
+DATABASES = {
+    'default': {
+        # sqlite3 de Django más la cola de escrituras (SQLITE_SERIALIZE_WRITES)
+        'ENGINE': 'core.db.backends.sqlite_queue',
+        'NAME': config('SQLITE_PATH', default=str(BASE_DIR / 'db.sqlite3')),
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': config('SQLITE_BUSY_TIMEOUT', default=5, cast=int),
+        },
+        # Conexiones persistentes por hilo: los pragmas se aplican una sola vez
+        'CONN_MAX_AGE': config('SQLITE_CONN_MAX_AGE', default=600, cast=int),
+    }
+}
+DATABASE_REPLICAS = []
+
+SQLITE_PRAGMAS = {
+    **SQLITE_HIGH_CONCURRENCY_PRAGMAS,
+    'busy_timeout': config('SQLITE_BUSY_TIMEOUT', default=5, cast=int) * 1000,
+    'mmap_size': config('SQLITE_MMAP_SIZE', default=268435456, cast=int),
+    'cache_size': config('SQLITE_CACHE_SIZE', default=-65536, cast=int),
+}
+SQLITE_SERIALIZE_WRITES = True
+
+# Cache local del proceso (sin Redis en el edge)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Logging configuration for edge
+LOGGING['handlers']['file']['level'] = 'WARNING'
+LOGGING['loggers']['django']['level'] = 'WARNING'
+LOGGING['loggers']['apps']['level'] = 'INFO'
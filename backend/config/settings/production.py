@@ -17,9 +17,11 @@ SECURE_HSTS_INCLUDE_SUBDOMAINS = True
 SECURE_HSTS_PRELOAD = True
 
 # Database configuration for production
+# Backend con pool de conexiones por worker (core/db/pool.py): CONN_MAX_AGE=0
+# devuelve la conexión al pool al final de cada petición
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'core.db.backends.mysql_pool',
         'NAME': config('DB_NAME'),
         'USER': config('DB_USER'),
         'PASSWORD': config('DB_PASSWORD'),
@@ -29,10 +31,25 @@ DATABASES = {
             'charset': 'utf8mb4',
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
         },
-        'CONN_MAX_AGE': 600,
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'MAX_SIZE': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'TIMEOUT': config('DB_POOL_TIMEOUT', default=5.0, cast=float),
+            'MAX_IDLE': config('DB_POOL_MAX_IDLE', default=300.0, cast=float),
+            'MAX_LIFETIME': config('DB_POOL_MAX_LIFETIME', default=3600.0, cast=float),
+            'PRE_PING': config('DB_POOL_PRE_PING', default=True, cast=bool),
+        },
     }
 }
 
+# Réplicas de lectura: DB_REPLICA_HOSTS=host1,host2 (mismas credenciales que la primaria)
+DB_REPLICA_HOSTS = config('DB_REPLICA_HOSTS', default='', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])
+DATABASE_REPLICAS = []
+for indice, host in enumerate(DB_REPLICA_HOSTS, start=1):
+    alias = f'replica_{indice}'
+    DATABASES[alias] = {**DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(alias)
+
 # Cache configuration for production
 CACHES = {
     'default': {
@@ -41,6 +58,12 @@ CACHES = {
     }
 }
 
+# Eventos SSE entre workers por pub/sub de Redis
+EVENTS_BACKEND = {
+    'BACKEND': 'core.events.RedisBackend',
+    'OPTIONS': {'url': config('REDIS_URL', default='redis://127.0.0.1:6379/1')},
+}
+
 # Email configuration for production
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = config('EMAIL_HOST')
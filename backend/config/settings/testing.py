@@ -10,9 +10,16 @@ DEBUG = False
 # Use in-memory database for faster tests
 DATABASES = {
     'default': {
+        # Igual a sqlite3 mientras SQLITE_SERIALIZE_WRITES esté desactivado
+        'ENGINE': 'core.db.backends.sqlite_queue',
+        'NAME': ':memory:',
+    },
+    # Segunda base independiente para los tests de réplicas (sin replicación:
+    # permite comprobar a qué base se envía cada consulta)
+    'replica': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': ':memory:',
-    }
+    },
 }
 
 # Disable migrations for faster tests
@@ -7,6 +7,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework.routers import DefaultRouter
+from core.views import BatchView, EventStreamViewSet, LoginView, LogoutView, MetricsView, ProfileViewSet
 from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularRedocView,
@@ -15,20 +16,29 @@ from drf_spectacular.views import (
 
 # Router principal para API REST
 api_router = DefaultRouter()
+api_router.register(r'perfiles', ProfileViewSet, basename='perfil')
+api_router.register(r'eventos', EventStreamViewSet, basename='eventos')
 
 urlpatterns = [
     # Admin
     path('admin/', admin.site.urls),
     
     # API REST
+    path('api/v1/auth/login/', LoginView.as_view(), name='login'),
+    path('api/v1/auth/logout/', LogoutView.as_view(), name='logout'),
+    path('api/v1/batch/', BatchView.as_view(), name='batch'),
     path('api/v1/', include(api_router.urls)),
     path('api/v1/', include('cajones_inteligentes.urls')),
+    path('api/v1/', include('trabajos.urls')),
     
     # Autenticación DRF
     path('api-auth/', include('rest_framework.urls')),
     
     # Health check
     path('health/', include('core.urls')),
+
+    # Métricas (formato Prometheus)
+    path('metrics', MetricsView.as_view(), name='metrics'),
     
     # Documentación de la API con drf-spectacular
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
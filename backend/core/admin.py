@@ -0,0 +1,68 @@
+"""
+Utilidades del admin para los modelos base.
+"""
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class AllObjectsAdminMixin:
+    """
+    Mixin para ModelAdmin que muestra también los registros eliminados
+    lógicamente (el manager por defecto de BaseModel solo retorna activos).
+    """
+
+    def get_queryset(self, request):
+        queryset = self.model.all_objects.get_queryset()
+        ordering = self.get_ordering(request)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset
+
+
+def estimate_row_count(model, using='default'):
+    """
+    Filas de la tabla según las estadísticas del motor (sin recorrerla), o
+    None si el motor no las ofrece (SQLite).
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == 'mysql':
+        sql = 'SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s'
+    elif connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)'
+    else:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [table])
+        row = cursor.fetchone()
+    return row[0] if row and row[0] is not None and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginador para tablas enormes: sin filtros usa el conteo estimado del
+    motor en lugar de COUNT(*) (que recorre la tabla completa) cuando supera
+    `estimate_threshold` filas. Con filtros cuenta con exactitud, sobre el
+    índice del filtro.
+    """
+    estimate_threshold = 100_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is not None and not query.where and not query.distinct and not query.combinator:
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > self.estimate_threshold:
+                return estimate
+        return super().count
+
+
+class LargeTableAdminMixin:
+    """
+    Mixin para ModelAdmin de tablas grandes: conteo estimado y sin el
+    segundo COUNT(*) del total sin filtrar.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
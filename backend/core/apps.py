@@ -0,0 +1,35 @@
+"""
+Configuración de la aplicación core.
+"""
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class CoreConfig(AppConfig):
+    name = 'core'
+    verbose_name = 'Core'
+
+    def ready(self):
+        """
+        Configura cada conexión nueva: pragmas de SQLite (SQLITE_PRAGMAS) y
+        medición del tiempo en base de datos para las métricas. Si structlog
+        está instalado, lo enruta por el logging estándar (core.logs). Las
+        cachés de autenticación por token se invalidan al revocar un token o
+        guardar su usuario (core.authentication).
+        """
+        from django.contrib.auth import get_user_model
+        from django.db.models.signals import post_delete, post_save
+        from rest_framework.authtoken.models import Token
+
+        from core.authentication import invalidate_token, invalidate_user_tokens
+        from core.db.sqlite import configure_sqlite
+        from core.logs import configure_structlog
+        from core.metrics import install_database_timer
+
+        configure_structlog()
+        connection_created.connect(configure_sqlite, dispatch_uid='core.db.sqlite.configure_sqlite')
+        connection_created.connect(install_database_timer, dispatch_uid='core.metrics.install_database_timer')
+        post_delete.connect(invalidate_token, sender=Token, dispatch_uid='core.authentication.invalidate_token')
+        post_save.connect(
+            invalidate_user_tokens, sender=get_user_model(), dispatch_uid='core.authentication.invalidate_user_tokens'
+        )
@@ -0,0 +1,44 @@
+"""
+Handler ASGI con las vistas async de la API.
+
+Al resolver una ruta cuya vista tiene versión async (`async_actions`, ver
+core.views.AsyncActionsMixin) se usa esa versión, de modo que la petición no
+ocupa un hilo mientras espera a la base. Con ASYNC_VIEWS=False se atienden
+con las vistas síncronas, como bajo WSGI.
+"""
+import django
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler as DjangoASGIHandler
+from django.db import connections
+
+
+class AsyncViewsMixin:
+    """Mixin de handler: sustituye la vista resuelta por su versión async."""
+
+    def resolve_request(self, request):
+        resolver_match = super().resolve_request(request)
+        async_view = getattr(resolver_match.func, 'async_view', None)
+        if async_view is not None and getattr(settings, 'ASYNC_VIEWS', True):
+            resolver_match.func = async_view
+        return resolver_match
+
+
+class ASGIHandler(AsyncViewsMixin, DjangoASGIHandler):
+    pass
+
+
+def get_asgi_application():
+    """Equivalente a django.core.asgi.get_asgi_application con las vistas async."""
+    django.setup(set_prefix=False)
+    return ASGIHandler()
+
+
+def close_request_connections():
+    """Cierra las conexiones de la petición; retorna False si alguna sigue en una transacción."""
+    libres = True
+    for conexion in connections.all(initialized_only=True):
+        if conexion.in_atomic_block:
+            libres = False
+        else:
+            conexion.close()
+    return libres
@@ -0,0 +1,162 @@
+"""
+Autenticación por token con la resolución token -> usuario en caché.
+
+TokenAuthentication de DRF consulta la tabla de tokens (con su usuario) en
+cada petición. CachedTokenAuthentication guarda el usuario resuelto en un LRU
+del proceso (AUTH_TOKEN_CACHE_SIZE entradas, AUTH_TOKEN_LOCAL_TIMEOUT
+segundos) respaldado por la caché compartida (AUTH_TOKEN_CACHE_TIMEOUT). La
+caché compartida solo guarda (pk, is_active) del usuario, nunca la instancia
+(con el hash de la contraseña): al resolver desde ella el usuario se carga
+por pk, sin la tabla de tokens, y queda en el LRU del proceso.
+
+Revocar el token (borrarlo) o guardar su usuario (p. ej. desactivarlo)
+invalida ambas cachés en el proceso que escribe; los demás procesos lo ven
+al expirar su entrada local, como mucho AUTH_TOKEN_LOCAL_TIMEOUT segundos
+después. En la caché compartida se guarda un hash del token, nunca la clave.
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+
+from core.metrics import record_cache_access
+
+CACHE_PREFIX = 'auth:token:'
+
+
+class TokenCache:
+    """LRU acotado en el proceso delante de la caché compartida, por hash de token."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def digest(key):
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, digest):
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                expires, user = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(digest)
+                    record_cache_access('auth_token', True)
+                    return copy.copy(user)
+                del self._entries[digest]
+
+        entry = cache.get(CACHE_PREFIX + digest)
+        record_cache_access('auth_token', entry is not None)
+        if entry is None:
+            return None
+        pk, is_active = entry
+        user = get_user_model()._default_manager.filter(pk=pk, is_active=True).first() if is_active else None
+        if user is None:
+            return None
+        self._remember(digest, user)
+        return copy.copy(user)
+
+    def set(self, digest, user):
+        cache.set(CACHE_PREFIX + digest, (user.pk, user.is_active), settings.AUTH_TOKEN_CACHE_TIMEOUT)
+        self._remember(digest, user)
+
+    def _remember(self, digest, user):
+        with self._lock:
+            self._entries[digest] = (time.monotonic() + settings.AUTH_TOKEN_LOCAL_TIMEOUT, user)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > settings.AUTH_TOKEN_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        digest = self.digest(key)
+        cache.delete(CACHE_PREFIX + digest)
+        with self._lock:
+            self._entries.pop(digest, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication con caché. Acepta `Authorization: Token <clave>` y
+    `Bearer <clave>` (el que envía el frontend).
+
+    Va antes que SessionAuthentication en DEFAULT_AUTHENTICATION_CLASSES: una
+    petición con token no carga la sesión (ni agrega Vary: Cookie) y no pasa
+    por la verificación CSRF de SessionAuthentication.
+    """
+    keywords = ('Token', 'Bearer')
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() not in {keyword.lower().encode() for keyword in self.keywords}:
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(_('Invalid token header. No credentials provided.'))
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(
+                _('Invalid token header. Token string should not contain invalid characters.')
+            )
+        return self.authenticate_credentials(key)
+
+    def authenticate_header(self, request):
+        # Sin WWW-Authenticate las peticiones sin credenciales siguen
+        # respondiendo 403, como con SessionAuthentication en primer lugar
+        return None
+
+    def authenticate_credentials(self, key):
+        digest = token_cache.digest(key)
+        user = token_cache.get(digest)
+        if user is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(digest, user)
+            return user, token
+        # request.auth sigue siendo un Token, sin consultar su tabla
+        return user, self.get_model()(key=key, user=user)
+
+
+def invalidate(key):
+    """
+    Invalida el token ahora y otra vez al confirmarse la transacción: una
+    petición concurrente que aún lee el estado anterior podría volver a
+    guardarlo en caché mientras tanto.
+    """
+    token_cache.invalidate(key)
+    transaction.on_commit(partial(token_cache.invalidate, key), robust=True)
+
+
+def invalidate_token(sender, instance, **kwargs):
+    """post_delete de Token: el token revocado deja de autenticar."""
+    invalidate(instance.key)
+
+
+def invalidate_user_tokens(sender, instance, created=False, update_fields=None, **kwargs):
+    """post_save de User: los cambios (desactivación, permisos) llegan a las peticiones con token."""
+    from rest_framework.authtoken.models import Token
+
+    # El inicio de sesión solo actualiza last_login
+    if created or (update_fields is not None and set(update_fields) == {'last_login'}):
+        return
+    for key in Token.objects.filter(user_id=instance.pk).values_list('key', flat=True):
+        invalidate(key)
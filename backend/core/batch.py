@@ -0,0 +1,192 @@
+"""
+Ejecución de peticiones agrupadas (batch) dentro del mismo proceso.
+Permite resolver varias sub-peticiones contra las rutas existentes de la API
+en una sola ida y vuelta del cliente.
+"""
+import io
+import json
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from urllib.parse import urlsplit
+
+from django.db import transaction
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger(__name__)
+
+_identity_map = ContextVar('batch_identity_map', default=None)
+
+
+class IdentityMap:
+    """
+    Caché de identidad con alcance de una petición batch.
+    Garantiza que cada entidad se cargue una sola vez.
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    def get_or_load(self, key, loader):
+        """
+        Devuelve la entrada asociada a la clave, cargándola si no existe.
+        """
+        if key not in self._entries:
+            self._entries[key] = loader()
+        return self._entries[key]
+
+    def clear(self):
+        """Invalida todas las entradas (tras una escritura)."""
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def get_identity_map():
+    """Retorna la caché de identidad activa o None fuera de un batch."""
+    return _identity_map.get()
+
+
+@contextmanager
+def identity_map_scope():
+    """
+    Activa una caché de identidad nueva durante el bloque.
+    """
+    token = _identity_map.set(IdentityMap())
+    try:
+        yield _identity_map.get()
+    finally:
+        _identity_map.reset(token)
+
+
+class BatchSubRequestError(Exception):
+    """
+    Error al preparar una sub-petición (ruta inexistente o no permitida).
+    """
+
+    def __init__(self, message, status_code=400):
+        self.message = message
+        self.status_code = status_code
+        super().__init__(message)
+
+
+class BatchExecutor:
+    """
+    Ejecuta una lista de sub-peticiones reutilizando el usuario autenticado
+    de la petición principal.
+
+    Cada sub-petición se ejecuta siempre (también las lecturas repetidas,
+    que pueden tener efectos como registrar historial); solo las entidades
+    que cargan las vistas se comparten en una caché de identidad que las
+    escrituras invalidan. Una excepción en una sub-petición se convierte en
+    un resultado 500 sin interrumpir las demás.
+    Con ``atomic=True`` todas las sub-peticiones comparten una transacción que
+    se revierte si alguna termina con un estado de error.
+    """
+
+    def __init__(self, request, excluded_views=()):
+        self.request = request
+        self.excluded_views = tuple(excluded_views)
+
+    def execute(self, sub_requests, atomic=False):
+        """
+        Ejecuta las sub-peticiones en orden y retorna la lista de resultados.
+        """
+        with identity_map_scope():
+            if not atomic:
+                return [self._run(sub_request) for sub_request in sub_requests]
+
+            results = []
+            with transaction.atomic():
+                for sub_request in sub_requests:
+                    result = self._run(sub_request)
+                    results.append(result)
+                    if result['status'] >= 400:
+                        transaction.set_rollback(True)
+                        break
+            return results
+
+    def _run(self, sub_request):
+        """
+        Ejecuta una sub-petición; las escrituras invalidan la caché de identidad.
+        """
+        method = sub_request['method'].upper()
+        result = self._dispatch(method, sub_request['url'], sub_request.get('body'))
+        if method not in SAFE_METHODS:
+            get_identity_map().clear()
+        return result
+
+    def _dispatch(self, method, url, body):
+        """
+        Resuelve la ruta e invoca la vista correspondiente.
+        """
+        try:
+            http_request, match = self._build_request(method, url, body)
+        except BatchSubRequestError as exc:
+            return {'status': exc.status_code, 'body': {'detail': exc.message}}
+
+        try:
+            response = match.func(http_request, *match.args, **match.kwargs)
+        except Exception:
+            logger.exception('Error en la sub-petición batch %s %s', method, url)
+            return {'status': 500, 'body': {'detail': 'Error interno del servidor'}}
+        return {'status': response.status_code, 'body': self._extract_body(response)}
+
+    def _build_request(self, method, url, body):
+        """
+        Construye un HttpRequest interno a partir de la petición principal.
+        """
+        parts = urlsplit(url)
+        try:
+            match = resolve(parts.path)
+        except Resolver404:
+            raise BatchSubRequestError(f'Ruta no encontrada: {parts.path}', 404)
+
+        view_class = getattr(match.func, 'cls', getattr(match.func, 'view_class', None))
+        if view_class is not None and issubclass(view_class, self.excluded_views):
+            raise BatchSubRequestError(f'Ruta no permitida en batch: {parts.path}')
+
+        payload = json.dumps(body).encode('utf-8') if body is not None else b''
+
+        http_request = HttpRequest()
+        http_request.method = method
+        http_request.path = http_request.path_info = parts.path
+        http_request.META = {
+            **self.request.META,
+            'REQUEST_METHOD': method,
+            'PATH_INFO': parts.path,
+            'QUERY_STRING': parts.query,
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(payload)),
+        }
+        http_request.GET = QueryDict(parts.query)
+        http_request.COOKIES = self.request.COOKIES
+        http_request.resolver_match = match
+        http_request._stream = io.BytesIO(payload)
+        http_request._read_started = False
+
+        # Reutilizar la autenticación ya resuelta en la petición principal
+        http_request.user = self.request.user
+        http_request._force_auth_user = self.request.user
+        http_request._force_auth_token = getattr(self.request, 'auth', None)
+        if hasattr(self.request, 'session'):
+            http_request.session = self.request.session
+
+        return http_request, match
+
+    @staticmethod
+    def _extract_body(response):
+        """
+        Obtiene el cuerpo de la respuesta sin renderizarlo cuando es posible.
+        """
+        if hasattr(response, 'data'):
+            return response.data
+        if getattr(response, 'streaming', False):
+            return None
+        try:
+            return json.loads(response.content or b'null')
+        except ValueError:
+            return response.content.decode(response.charset or 'utf-8')
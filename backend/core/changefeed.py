@@ -0,0 +1,108 @@
+"""
+Feed de cambios incremental para la sincronización por deltas
+(GET /api/v1/cambios/?desde=<cursor>).
+
+Cada fuente es un queryset de un modelo con BaseModel (incluidos los
+registros eliminados lógicamente, que se entregan como lápidas) con un
+índice (<propietario>, updated_at, id). Si la fuente filtra directamente
+por esa columna la consulta es un recorrido de rango sobre el índice a
+partir del cursor; si filtra a través de una relación (los objetos, por el
+usuario de su cajón) el índice se recorre una vez por cada fila
+relacionada y el resultado se ordena. El cursor es opaco para el cliente y
+codifica el (updated_at, id) del último cambio entregado; las fuentes se
+mezclan en ese mismo orden.
+
+Solo se entregan cambios con más de CHANGE_FEED_SETTLE_SECONDS de
+antigüedad: `updated_at` se fija al guardar y la fila es visible al
+confirmarse la transacción, así que una transacción en curso podría
+confirmar un cambio anterior al cursor de un cliente que ya avanzó.
+
+Las lápidas solo se garantizan durante CHANGE_FEED_RETENTION_DAYS; un cursor
+más antiguo requiere volver a descargar el estado completo (CursorExpired).
+"""
+import base64
+import heapq
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+# Cursor anterior a cualquier cambio (sin `desde`)
+ORIGIN = (EPOCH, uuid.UUID(int=0))
+
+
+class InvalidCursor(ValueError):
+    """El cursor no fue emitido por este feed."""
+
+
+class CursorExpired(Exception):
+    """El cursor es anterior a la retención de lápidas; hace falta un snapshot."""
+
+    def __init__(self, head):
+        super().__init__('Cursor anterior a la retención de cambios')
+        self.head = head
+
+
+def encode_cursor(updated_at, pk):
+    # Aritmética entera: timestamp() en coma flotante puede perder un microsegundo
+    micros = (updated_at - EPOCH) // MICROSECOND
+    return base64.urlsafe_b64encode(f'{micros}.{pk.hex}'.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        micros, pk = texto.split('.')
+        updated_at = EPOCH + int(micros) * MICROSECOND
+        return updated_at, uuid.UUID(hex=pk)
+    except (ValueError, UnicodeDecodeError, OverflowError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def head_cursor(now=None):
+    """Cursor desde el que sigue un cliente que acaba de descargar el estado completo."""
+    return encode_cursor(visible_until(now), uuid.UUID(int=0))
+
+
+def visible_until(now=None):
+    return (now or timezone.now()) - timedelta(seconds=settings.CHANGE_FEED_SETTLE_SECONDS)
+
+
+def after(updated_at, pk):
+    """Filas posteriores a (updated_at, pk): rango updated_at >= cursor sin repetir el propio cursor."""
+    return Q(updated_at__gte=updated_at) & ~Q(updated_at=updated_at, id__lte=pk)
+
+
+def changes_since(sources, cursor=None, limit=None):
+    """
+    Cambios posteriores a `cursor` de las fuentes [(tipo, queryset), ...],
+    en orden (updated_at, id). Retorna ([(tipo, instancia), ...], cursor
+    siguiente, hay_mas); sin cambios nuevos el cursor no avanza.
+
+    Raises:
+        InvalidCursor: Si el cursor no se puede decodificar
+        CursorExpired: Si el cursor es anterior a la retención de lápidas
+    """
+    limit = limit or settings.CHANGE_FEED_PAGE_SIZE
+    now = timezone.now()
+    desde = decode_cursor(cursor) if cursor else ORIGIN
+    if cursor and desde[0] < now - timedelta(days=settings.CHANGE_FEED_RETENTION_DAYS):
+        raise CursorExpired(head_cursor(now))
+
+    # Una consulta por fuente con limit + 1 filas: suficiente para la página
+    # mezclada y para saber si queda algo detrás
+    rango = after(*desde) & Q(updated_at__lte=visible_until(now))
+    filas = [
+        [(instancia.updated_at, instancia.pk, tipo, instancia)
+         for instancia in queryset.filter(rango).order_by('updated_at', 'id')[:limit + 1]]
+        for tipo, queryset in sources
+    ]
+    mezcla = list(islice(heapq.merge(*filas, key=lambda fila: fila[:2]), limit + 1))
+    pagina = mezcla[:limit]
+    siguiente = encode_cursor(*pagina[-1][:2]) if pagina else cursor
+    return [(tipo, instancia) for _, _, tipo, instancia in pagina], siguiente, len(mezcla) > limit
@@ -0,0 +1,3 @@
+"""
+Infraestructura de base de datos del core: enrutamiento y conexiones.
+"""
@@ -0,0 +1,3 @@
+"""
+Backends de base de datos del core.
+"""
@@ -0,0 +1,19 @@
+"""
+Backend MySQL con pool de conexiones (ver core/db/pool.py).
+
+Uso en DATABASES:
+    'ENGINE': 'core.db.backends.mysql_pool',
+    'CONN_MAX_AGE': 0,
+    'POOL': {'MAX_SIZE': 10, 'TIMEOUT': 5, 'MAX_IDLE': 300, 'MAX_LIFETIME': 3600},
+"""
+from django.db.backends.mysql import base
+
+from core.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """DatabaseWrapper de MySQL que reutiliza conexiones del pool."""
+
+    def ping_connection(self, connection):
+        # mysqlclient: ida y vuelta mínima al servidor; lanza si la conexión cayó
+        connection.ping()
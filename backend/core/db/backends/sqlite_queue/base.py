@@ -0,0 +1,15 @@
+"""
+Backend SQLite con cola de escrituras (ver core/db/sqlite.py).
+
+Uso en DATABASES:
+    'ENGINE': 'core.db.backends.sqlite_queue',
+y SQLITE_SERIALIZE_WRITES = True. Con la opción desactivada se comporta
+como el backend sqlite3 de Django.
+"""
+from django.db.backends.sqlite3 import base
+
+from core.db.sqlite import SerializedWritesMixin
+
+
+class DatabaseWrapper(SerializedWritesMixin, base.DatabaseWrapper):
+    """DatabaseWrapper de SQLite que serializa las transacciones que escriben."""
@@ -0,0 +1,298 @@
+"""
+Pool de conexiones de base de datos por proceso.
+
+Cada alias de DATABASES con un backend agrupado (ver core/db/backends) tiene un
+pool por proceso, con:
+
+- tamaño máximo: límite de conexiones físicas por worker; las peticiones que
+  exceden el límite esperan hasta TIMEOUT segundos.
+- pre-ping: la conexión se verifica al entregarla; si falla se reemplaza.
+- expulsión por inactividad (MAX_IDLE) y reciclado por antigüedad (MAX_LIFETIME).
+- métricas: entregas, esperas, tiempo de espera, creaciones, expulsiones.
+
+Configuración en DATABASES[alias]['POOL'] (CONN_MAX_AGE debe ser 0: Django
+devuelve la conexión al pool al final de cada petición):
+
+    'POOL': {'MAX_SIZE': 10, 'TIMEOUT': 5, 'MAX_IDLE': 300, 'MAX_LIFETIME': 3600, 'PRE_PING': True}
+"""
+import functools
+import os
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError
+
+DEFAULT_POOL = {
+    'MAX_SIZE': 10,
+    'TIMEOUT': 5.0,
+    'MAX_IDLE': 300.0,
+    'MAX_LIFETIME': 3600.0,
+    'PRE_PING': True,
+}
+
+
+class PoolTimeout(OperationalError):
+    """No se obtuvo una conexión libre dentro del tiempo de espera."""
+
+
+class _Entry:
+    __slots__ = ('connection', 'created_at', 'released_at')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = self.released_at = time.monotonic()
+
+
+class ConnectionPool:
+    """
+    Pool acotado y seguro entre hilos de conexiones DB-API.
+
+    Args:
+        create: Función sin argumentos que abre una conexión nueva
+        close: Función que cierra una conexión
+        ping: Función que lanza una excepción si la conexión no está sana
+    """
+
+    def __init__(self, create, close, ping, max_size=10, timeout=5.0,
+                 max_idle=300.0, max_lifetime=3600.0, pre_ping=True):
+        if max_size < 1:
+            raise ValueError('max_size debe ser al menos 1')
+        self._create = create
+        self._close = close
+        self._ping = ping
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.pre_ping = pre_ping
+
+        self._condition = threading.Condition()
+        self._idle = deque()
+        self._in_use = {}
+        self._reserved = 0
+        self._stats = dict.fromkeys((
+            'checkouts', 'waits', 'timeouts', 'created', 'closed', 'evicted', 'ping_failures'
+        ), 0)
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def acquire(self):
+        """
+        Entrega una conexión sana, creando una nueva si hay cupo.
+
+        Raises:
+            PoolTimeout: Si el pool está lleno durante más de `timeout` segundos
+        """
+        inicio = time.monotonic()
+        esperando = False
+        with self._condition:
+            while True:
+                self._evict_expired()
+                if self._idle or len(self._in_use) + self._reserved < self.max_size:
+                    entry = self._idle.pop() if self._idle else None
+                    # Cupo reservado hasta registrar la conexión como entregada
+                    self._reserved += 1
+                    break
+                restante = self.timeout - (time.monotonic() - inicio)
+                if restante <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(
+                        f'No hay conexiones libres en el pool (máximo {self.max_size}) '
+                        f'tras {self.timeout}s de espera'
+                    )
+                esperando = True
+                self._condition.wait(restante)
+        espera = time.monotonic() - inicio
+
+        try:
+            entry = self._checkout(entry)
+        except Exception:
+            with self._condition:
+                self._reserved -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._reserved -= 1
+            self._in_use[id(entry.connection)] = entry
+            self._stats['checkouts'] += 1
+            self._stats['waits'] += esperando
+            self._wait_total += espera
+            self._wait_max = max(self._wait_max, espera)
+        return entry.connection
+
+    def _checkout(self, entry):
+        """Verifica la conexión libre (pre-ping) o abre una nueva, fuera del lock."""
+        if entry is not None and self.pre_ping:
+            try:
+                self._ping(entry.connection)
+            except Exception:
+                with self._condition:
+                    self._stats['ping_failures'] += 1
+                self._close_quietly(entry.connection)
+                entry = None
+        if entry is None:
+            entry = _Entry(self._create())
+            with self._condition:
+                self._stats['created'] += 1
+        return entry
+
+    def release(self, connection):
+        """Devuelve una conexión al pool (o la cierra si superó su vida útil)."""
+        with self._condition:
+            entry = self._in_use.pop(id(connection), None)
+            if entry is None:
+                return
+            entry.released_at = time.monotonic()
+            if self.max_lifetime and entry.released_at - entry.created_at > self.max_lifetime:
+                self._stats['evicted'] += 1
+                cerrar = True
+            else:
+                self._idle.append(entry)
+                cerrar = False
+            self._condition.notify()
+        if cerrar:
+            self._close_quietly(connection)
+
+    def discard(self, connection):
+        """Cierra una conexión entregada que no debe reutilizarse."""
+        with self._condition:
+            if self._in_use.pop(id(connection), None) is None:
+                return
+            self._condition.notify()
+        self._close_quietly(connection)
+
+    def close_all(self):
+        """Cierra las conexiones libres (las entregadas se cierran al devolverse)."""
+        with self._condition:
+            libres = [entry.connection for entry in self._idle]
+            self._idle.clear()
+            # Las conexiones entregadas se cierran al devolverse en lugar de reutilizarse
+            self.max_lifetime = -1
+        for connection in libres:
+            self._close_quietly(connection)
+
+    def snapshot(self):
+        """Métricas del pool."""
+        with self._condition:
+            return {
+                **self._stats,
+                'in_use': len(self._in_use),
+                'idle': len(self._idle),
+                'max_size': self.max_size,
+                'wait_seconds_total': round(self._wait_total, 6),
+                'wait_seconds_max': round(self._wait_max, 6),
+            }
+
+    def _evict_expired(self):
+        """Expulsa las conexiones libres inactivas o antiguas (con el lock tomado)."""
+        ahora = time.monotonic()
+        vigentes = deque()
+        expiradas = []
+        for entry in self._idle:
+            inactiva = self.max_idle and ahora - entry.released_at > self.max_idle
+            antigua = self.max_lifetime and ahora - entry.created_at > self.max_lifetime
+            (expiradas if inactiva or antigua else vigentes).append(entry)
+        if expiradas:
+            self._idle = vigentes
+            self._stats['evicted'] += len(expiradas)
+            for entry in expiradas:
+                self._close_quietly(entry.connection)
+
+    def _close_quietly(self, connection):
+        try:
+            self._close(connection)
+        except Exception:
+            pass
+        with self._condition:
+            self._stats['closed'] += 1
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pools_pid = os.getpid()
+
+
+def get_pool(alias, factory):
+    """
+    Retorna el pool del alias en este proceso, creándolo con `factory()`.
+    Tras un fork (workers de gunicorn) se descartan los pools heredados.
+    """
+    global _pools_pid
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            _pools.clear()
+            _pools_pid = os.getpid()
+        if alias not in _pools:
+            _pools[alias] = factory()
+        return _pools[alias]
+
+
+def pool_stats():
+    """Métricas de todos los pools del proceso, por alias."""
+    with _pools_lock:
+        pools = dict(_pools) if _pools_pid == os.getpid() else {}
+    return {alias: pool.snapshot() for alias, pool in pools.items()}
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Mixin para un DatabaseWrapper de Django: obtiene las conexiones del pool
+    y las devuelve al cerrarlas en lugar de cerrarlas físicamente.
+    """
+
+    def pool_options(self):
+        return {**DEFAULT_POOL, **self.settings_dict.get('POOL', {})}
+
+    def ping_connection(self, connection):
+        """Verificación de salud; los backends pueden usar un ping nativo."""
+        cursor = connection.cursor()
+        try:
+            cursor.execute('SELECT 1')
+            cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def get_pool(self):
+        return get_pool(self.alias, self._build_pool)
+
+    def _build_pool(self):
+        opciones = self.pool_options()
+        return ConnectionPool(
+            create=functools.partial(super().get_new_connection, self.get_connection_params()),
+            close=lambda connection: connection.close(),
+            ping=self.ping_connection,
+            max_size=opciones['MAX_SIZE'],
+            timeout=opciones['TIMEOUT'],
+            max_idle=opciones['MAX_IDLE'],
+            max_lifetime=opciones['MAX_LIFETIME'],
+            pre_ping=opciones['PRE_PING'],
+        )
+
+    def get_new_connection(self, conn_params):
+        return self.get_pool().acquire()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        connection = self.connection
+        pool = self.get_pool()
+        # Una conexión cerrada a mitad de transacción o tras un error no se reutiliza
+        if self.in_atomic_block or self.errors_occurred:
+            pool.discard(connection)
+            return
+        try:
+            connection.rollback()
+        except Exception:
+            pool.discard(connection)
+        else:
+            pool.release(connection)
@@ -0,0 +1,94 @@
+"""
+Enrutamiento de lecturas a réplicas con lectura de las propias escrituras.
+
+Las lecturas se envían a una réplica solo dentro de un contexto explícito
+(`read_from_replica` o las acciones marcadas en `ReplicaReadMixin`); todo lo
+demás, incluidas las escrituras y las lecturas dentro de transacciones, va a
+la base primaria. Tras una escritura, el usuario queda fijado a la primaria
+durante `REPLICA_PIN_SECONDS` para no leer datos desfasados por el retraso de
+replicación.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_CACHE_PREFIX = 'db_primary_pin'
+
+_replica_alias = ContextVar('replica_alias', default=None)
+
+
+def get_replicas():
+    """Alias de las réplicas configuradas en DATABASE_REPLICAS."""
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def choose_replica():
+    """Elige una réplica al azar; None si no hay réplicas configuradas."""
+    replicas = get_replicas()
+    return random.choice(replicas) if replicas else None
+
+
+def activate_replica():
+    """
+    Envía las lecturas del contexto actual a una réplica.
+    Retorna el token para `deactivate_replica`, o None si no hay réplicas.
+    """
+    alias = choose_replica()
+    return _replica_alias.set(alias) if alias else None
+
+
+def deactivate_replica(token):
+    if token is not None:
+        _replica_alias.reset(token)
+
+
+@contextmanager
+def read_from_replica():
+    """Context manager para ejecutar lecturas en una réplica."""
+    token = activate_replica()
+    try:
+        yield _replica_alias.get()
+    finally:
+        deactivate_replica(token)
+
+
+def _pin_key(user_id):
+    return f'{PIN_CACHE_PREFIX}:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """Fija las lecturas del usuario a la primaria durante REPLICA_PIN_SECONDS."""
+    timeout = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+    if get_replicas() and timeout > 0:
+        cache.set(_pin_key(user_id), True, timeout)
+
+
+def is_pinned_to_primary(user_id):
+    return bool(get_replicas()) and cache.get(_pin_key(user_id), False)
+
+
+class PrimaryReplicaRouter:
+    """
+    Router de Django: escrituras a la primaria; lecturas a la réplica activa
+    en el contexto actual, salvo dentro de una transacción de la primaria.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _replica_alias.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        # Explícito: sin router Django usaría la base de la instancia (réplica)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -0,0 +1,205 @@
+"""
+Perfil de SQLite para alta concurrencia.
+
+- Pragmas por conexión (SQLITE_PRAGMAS): se aplican en `connection_created`,
+  p. ej. WAL para que las lecturas no bloqueen a las escrituras.
+- Cola de escrituras en proceso (SQLITE_SERIALIZE_WRITES): SQLite admite un
+  único escritor; en lugar de que los hilos compitan por el lock del archivo
+  (y reciban "database is locked"), cada transacción que escribe espera su
+  turno en una cola FIFO. Requiere el backend `core.db.backends.sqlite_queue`
+  (SerializedWritesMixin): el turno se toma en la primera sentencia de
+  escritura (o en BEGIN IMMEDIATE) y se libera al confirmar o revertir, sin
+  importar el método HTTP de la petición. Entre procesos el orden lo
+  resuelve busy_timeout.
+
+La cola ordena hilos de un mismo proceso: es una medida para servidores WSGI
+con hilos. Bajo ASGI todo el acceso síncrono a la base ya corre en el único
+hilo thread-sensitive, así que nunca hay espera.
+"""
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.utils import OperationalError
+
+
+class WriteQueueTimeout(OperationalError):
+    """No se obtuvo el turno de escritura dentro del tiempo de espera."""
+
+
+class WriteQueue:
+    """
+    Turno de escritura FIFO y reentrante para los hilos del proceso.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiting = deque()
+        self._owner = None
+        self._depth = 0
+        self._stats = {'writes': 0, 'waits': 0, 'timeouts': 0}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def acquire(self, timeout=None):
+        """
+        Espera el turno de escritura del hilo actual.
+
+        Raises:
+            WriteQueueTimeout: Si el turno no llega en `timeout` segundos
+        """
+        ident = threading.get_ident()
+        with self._lock:
+            if self._owner == ident:
+                self._depth += 1
+                return
+            self._stats['writes'] += 1
+            if self._owner is None and not self._waiting:
+                self._owner, self._depth = ident, 1
+                return
+            turno = threading.Event()
+            self._waiting.append((ident, turno))
+            self._stats['waits'] += 1
+
+        inicio = time.monotonic()
+        concedido = turno.wait(timeout)
+        espera = time.monotonic() - inicio
+        with self._lock:
+            self._wait_total += espera
+            self._wait_max = max(self._wait_max, espera)
+            # El turno pudo concederse justo al vencer la espera
+            if not concedido and self._owner != ident:
+                self._waiting.remove((ident, turno))
+                self._stats['timeouts'] += 1
+                raise WriteQueueTimeout(f'Turno de escritura no disponible tras {timeout}s')
+
+    def release(self):
+        with self._lock:
+            if self._owner != threading.get_ident():
+                raise RuntimeError('El hilo actual no tiene el turno de escritura')
+            self._depth -= 1
+            if self._depth:
+                return
+            if self._waiting:
+                # Se cede el turno directamente al siguiente en la cola
+                self._owner, turno = self._waiting.popleft()
+                self._depth = 1
+                turno.set()
+            else:
+                self._owner = None
+
+    @contextmanager
+    def turn(self, timeout=None):
+        self.acquire(timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                **self._stats,
+                'queued': len(self._waiting),
+                'wait_seconds_total': round(self._wait_total, 6),
+                'wait_seconds_max': round(self._wait_max, 6),
+            }
+
+
+write_queue = WriteQueue()
+
+
+def serialize_writes_enabled(connection):
+    return connection.vendor == 'sqlite' and getattr(settings, 'SQLITE_SERIALIZE_WRITES', False)
+
+
+@contextmanager
+def serialized_write(connection=None):
+    """
+    Ejecuta un bloque en un solo turno de la cola (no-op fuera de SQLite):
+    varias transacciones seguidas sin que otro hilo escriba entre ellas.
+    """
+    from django.db import connection as default_connection
+
+    connection = connection or default_connection
+    if not serialize_writes_enabled(connection):
+        yield
+        return
+    with write_queue.turn(getattr(settings, 'SQLITE_WRITE_TIMEOUT', 10)):
+        yield
+
+
+# Sentencias que toman el lock de escritura de SQLite
+_WRITE_STATEMENT = re.compile(
+    r'\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER|BEGIN\s+(IMMEDIATE|EXCLUSIVE))\b', re.IGNORECASE
+)
+
+
+class SerializedWritesMixin:
+    """
+    Mixin para el DatabaseWrapper de SQLite: con SQLITE_SERIALIZE_WRITES la
+    primera escritura de cada transacción espera su turno en `write_queue` y
+    lo conserva hasta el COMMIT o ROLLBACK (o hasta terminar la sentencia en
+    autocommit). También cubre las lecturas HTTP que escriben (historial).
+
+    Raises:
+        WriteQueueTimeout: Si el turno no llega en SQLITE_WRITE_TIMEOUT segundos
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._write_turn = False
+        self.execute_wrappers.append(self._serialize_write)
+
+    def _serialize_write(self, execute, sql, params, many, context):
+        if self._write_turn or not serialize_writes_enabled(self) or not _WRITE_STATEMENT.match(sql):
+            return execute(sql, params, many, context)
+        write_queue.acquire(getattr(settings, 'SQLITE_WRITE_TIMEOUT', 10))
+        self._write_turn = True
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            # En autocommit la sentencia ya se confirmó; en una transacción el
+            # turno sigue hasta _commit/_rollback
+            if self.connection is None or not self.connection.in_transaction:
+                self._release_write_turn()
+
+    def _release_write_turn(self):
+        if self._write_turn:
+            self._write_turn = False
+            write_queue.release()
+
+    def _commit(self):
+        try:
+            super()._commit()
+        finally:
+            self._release_write_turn()
+
+    def _rollback(self):
+        try:
+            super()._rollback()
+        finally:
+            self._release_write_turn()
+
+    def _close(self):
+        try:
+            super()._close()
+        finally:
+            self._release_write_turn()
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Receptor de `connection_created`: aplica SQLITE_PRAGMAS a las conexiones SQLite."""
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None)
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    en_memoria = connection.is_in_memory_db()
+    with connection.cursor() as cursor:
+        for nombre, valor in pragmas.items():
+            # WAL y mmap no aplican a bases en memoria
+            if en_memoria and nombre in ('journal_mode', 'mmap_size'):
+                continue
+            cursor.execute(f'PRAGMA {nombre} = {valor}')
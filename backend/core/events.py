@@ -0,0 +1,245 @@
+"""
+Eventos de dominio en tiempo real para los streams SSE (GET /api/v1/eventos/stream/).
+
+Las escrituras publican con `publish_on_commit(user_id, evento, datos)`: el
+evento sale al confirmarse la transacción y nunca si se revierte. El backend
+de EVENTS_BACKEND lo reparte entre procesos y cada proceso lo entrega a las
+suscripciones del usuario en `event_bus`:
+
+- core.events.LocalBackend: solo el proceso actual (un worker, desarrollo).
+- core.events.RedisBackend: pub/sub de Redis entre todos los workers.
+
+Una suscripción en espera es un búfer acotado y un evento de espera: con el
+stream async bajo ASGI no ocupa hilos ni conexiones a la base. Si el cliente
+no consume a tiempo se descartan los eventos más antiguos y recibe un evento
+`resync` para volver a consultar el estado completo.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - dependencia opcional
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Espera del navegador antes de reconectar (campo `retry` de SSE)
+RECONNECT_MS = 3000
+KEEPALIVE = b': keepalive\n\n'
+
+
+class Subscription:
+    """
+    Eventos pendientes de una conexión. `put` es seguro entre hilos; se
+    consume con `get` (desde un hilo) o `aget` (desde el event loop en el que
+    se creó la suscripción).
+    """
+
+    def __init__(self, user_id, maxsize):
+        self.user_id = user_id
+        self.events = deque(maxlen=maxsize)
+        self.dropped = 0
+        self._lock = threading.Lock()
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+            self._ready = threading.Event()
+        else:
+            self._ready = asyncio.Event()
+
+    def put(self, event):
+        """Encola el evento; retorna True si se descartó el más antiguo."""
+        with self._lock:
+            lleno = len(self.events) == self.events.maxlen
+            self.dropped += lleno
+            self.events.append(event)
+        if self._loop is None:
+            self._ready.set()
+        else:
+            try:
+                self._loop.call_soon_threadsafe(self._ready.set)
+            except RuntimeError:  # el event loop ya terminó
+                pass
+        return lleno
+
+    def drain(self):
+        """Eventos pendientes y cuántos se descartaron desde la última llamada."""
+        self._ready.clear()
+        with self._lock:
+            events, dropped = list(self.events), self.dropped
+            self.events.clear()
+            self.dropped = 0
+        return events, dropped
+
+    def get(self, timeout):
+        self._ready.wait(timeout)
+        return self.drain()
+
+    async def aget(self, timeout):
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.drain()
+
+
+class EventBus:
+    """Suscripciones del proceso por usuario."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+        self.dropped = 0
+
+    def subscribe(self, user_id, maxsize=None):
+        # El backend empieza a escuchar a otros procesos con la primera suscripción
+        get_backend()
+        subscription = Subscription(user_id, maxsize or settings.EVENTS_BUFFER_SIZE)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            suscripciones = self._subscriptions.get(subscription.user_id, set())
+            suscripciones.discard(subscription)
+            if not suscripciones:
+                self._subscriptions.pop(subscription.user_id, None)
+
+    def dispatch(self, user_id, event):
+        """Entrega `event` a las suscripciones del usuario en este proceso."""
+        with self._lock:
+            suscripciones = list(self._subscriptions.get(user_id, ()))
+        descartados = sum(subscription.put(event) for subscription in suscripciones)
+        if descartados:
+            with self._lock:
+                self.dropped += descartados
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscriptions': sum(len(s) for s in self._subscriptions.values()),
+                'dropped': self.dropped,
+            }
+
+
+event_bus = EventBus()
+
+
+class LocalBackend:
+    """Entrega solo en el proceso actual: con varios workers cada uno ve únicamente sus escrituras."""
+
+    def __init__(self, bus):
+        self.bus = bus
+
+    def publish(self, user_id, event):
+        self.bus.dispatch(user_id, event)
+
+
+class RedisBackend:
+    """
+    Reparte los eventos entre procesos por un canal de pub/sub de Redis. Cada
+    proceso escucha el canal en un hilo y entrega a sus suscripciones locales.
+    """
+
+    def __init__(self, bus, url, channel='eventos'):
+        if redis is None:
+            raise ImproperlyConfigured('core.events.RedisBackend requiere el paquete redis')
+        self.bus = bus
+        self.channel = channel
+        self.client = redis.Redis.from_url(url)
+        threading.Thread(target=self.listen, name='events-redis', daemon=True).start()
+
+    def publish(self, user_id, event):
+        self.client.publish(self.channel, json.dumps([user_id, *event]))
+
+    def listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for mensaje in pubsub.listen():
+                    self.recibir(mensaje)
+            except redis.RedisError:
+                logger.warning('Suscripción de eventos a Redis interrumpida; reintentando', exc_info=True)
+                time.sleep(1)
+
+    def recibir(self, mensaje):
+        """Entrega un mensaje del canal; uno mal formado se registra y se descarta."""
+        try:
+            user_id, *event = json.loads(mensaje['data'])
+            self.bus.dispatch(user_id, tuple(event))
+        except Exception:
+            logger.exception('Mensaje de eventos inválido en el canal %s; se descarta', self.channel)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                config = settings.EVENTS_BACKEND
+                _backend = import_string(config['BACKEND'])(event_bus, **config.get('OPTIONS', {}))
+    return _backend
+
+
+def publish(user_id, event, data):
+    """Publica un evento para las suscripciones del usuario en todos los procesos."""
+    get_backend().publish(user_id, (event, json.dumps(data, cls=DjangoJSONEncoder)))
+
+
+def publish_on_commit(user_id, event, data, using=None):
+    """
+    Publica el evento al confirmarse la transacción actual (inmediatamente
+    fuera de una transacción). Un fallo del backend se registra sin afectar
+    a la escritura ya confirmada.
+    """
+    transaction.on_commit(partial(publish, user_id, event, data), using=using, robust=True)
+
+
+def encode(events, dropped=0):
+    """Fragmento SSE con los eventos (y `resync` si se descartaron); keepalive si no hay ninguno."""
+    lineas = [f'event: resync\ndata: {json.dumps({"dropped": dropped})}\n\n'] if dropped else []
+    lineas += [f'event: {event}\ndata: {data}\n\n' for event, data in events]
+    return ''.join(lineas).encode() or KEEPALIVE
+
+
+def stream(user_id, keepalive=None):
+    """Stream SSE síncrono: ocupa el hilo que lo consume mientras la conexión sigue abierta."""
+    keepalive = keepalive or settings.EVENTS_KEEPALIVE
+    subscription = event_bus.subscribe(user_id)
+    try:
+        yield f'retry: {RECONNECT_MS}\n\n'.encode()
+        while True:
+            yield encode(*subscription.get(keepalive))
+    finally:
+        event_bus.unsubscribe(subscription)
+
+
+async def astream(user_id, keepalive=None):
+    """Stream SSE async: en espera solo cuesta la suscripción y un temporizador de keepalive."""
+    keepalive = keepalive or settings.EVENTS_KEEPALIVE
+    subscription = event_bus.subscribe(user_id)
+    try:
+        yield f'retry: {RECONNECT_MS}\n\n'.encode()
+        while True:
+            yield encode(*await subscription.aget(keepalive))
+    finally:
+        event_bus.unsubscribe(subscription)
@@ -0,0 +1,255 @@
+"""
+Captura de planes de ejecución y sugerencia de índices compuestos.
+
+Ejecuta EXPLAIN sobre las consultas capturadas (EXPLAIN QUERY PLAN en SQLite,
+EXPLAIN tabular en MySQL) y detecta:
+
+- escaneo_completo:     lectura completa de una tabla sin usar índices
+- ordenamiento_externo: ORDER BY resuelto fuera de un índice (filesort / TEMP B-TREE)
+- tabla_temporal:       GROUP BY o DISTINCT materializados en una tabla temporal
+
+Para las tablas con alertas propone un índice compuesto con el orden
+igualdad → orden → rango, a partir de las columnas usadas en la consulta.
+"""
+import hashlib
+import re
+
+from django.apps import apps
+
+ESCANEO_COMPLETO = 'escaneo_completo'
+ORDENAMIENTO_EXTERNO = 'ordenamiento_externo'
+TABLA_TEMPORAL = 'tabla_temporal'
+
+SENTENCIAS_ANALIZABLES = ('SELECT', 'UPDATE', 'DELETE')
+COLUMNA_ACTIVO = 'is_active'
+
+_COMILLA = r'["`]'
+_ESCANEO_SQLITE = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?(.*)$')
+_ALIAS = re.compile(rf'{_COMILLA}(\w+){_COMILLA}\s+(?:AS\s+)?{_COMILLA}?([A-Z]\d+){_COMILLA}?')
+_TABLA_PRINCIPAL = re.compile(rf'\bFROM\s+{_COMILLA}?(\w+){_COMILLA}?', re.IGNORECASE)
+_FIN_ORDER_BY = re.compile(r'\b(?:LIMIT|OFFSET|FOR UPDATE)\b|\)', re.IGNORECASE)
+
+
+def es_analizable(sql):
+    """Indica si la sentencia admite EXPLAIN (lecturas y escrituras con WHERE)."""
+    return sql.lstrip().upper().startswith(SENTENCIAS_ANALIZABLES)
+
+
+def explicar(connection, sql):
+    """
+    Ejecuta EXPLAIN y retorna el plan como lista de diccionarios.
+
+    Raises:
+        NotImplementedError: Si el motor no es SQLite ni MySQL
+    """
+    if connection.vendor == 'sqlite':
+        prefijo = 'EXPLAIN QUERY PLAN '
+    elif connection.vendor == 'mysql':
+        prefijo = 'EXPLAIN '
+    else:
+        raise NotImplementedError(f'EXPLAIN no soportado para {connection.vendor}')
+
+    with connection.cursor() as cursor:
+        cursor.execute(prefijo + sql)
+        columnas = [columna[0] for columna in cursor.description]
+        filas = cursor.fetchall()
+    return [dict(zip(columnas, fila)) for fila in filas]
+
+
+def resolver_alias(sql):
+    """Retorna {alias: tabla} para los alias que genera el ORM (U0, T3, ...)."""
+    return {alias: tabla for tabla, alias in _ALIAS.findall(sql)}
+
+
+def detectar_alertas(vendor, plan, sql):
+    """
+    Retorna las alertas del plan como lista de (tipo, tabla) sin repetidos.
+    """
+    alias = resolver_alias(sql)
+    principal = _TABLA_PRINCIPAL.search(sql)
+    principal = principal.group(1) if principal else None
+    alertas = []
+
+    def agregar(tipo, tabla):
+        tabla = alias.get(tabla, tabla)
+        if tabla and (tipo, tabla) not in alertas:
+            alertas.append((tipo, tabla))
+
+    for fila in plan:
+        if vendor == 'sqlite':
+            detalle = fila.get('detail', '')
+            escaneo = _ESCANEO_SQLITE.match(detalle)
+            if escaneo and 'USING' not in escaneo.group(3) and escaneo.group(1) != 'CONSTANT':
+                agregar(ESCANEO_COMPLETO, escaneo.group(1))
+            if detalle.startswith('USE TEMP B-TREE FOR'):
+                tipo = ORDENAMIENTO_EXTERNO if 'ORDER BY' in detalle else TABLA_TEMPORAL
+                agregar(tipo, principal)
+        else:
+            extra = fila.get('Extra') or ''
+            tabla = fila.get('table') or ''
+            if tabla.startswith('<'):
+                # Tablas derivadas (<derived2>, <subquery3>): no tienen índices propios
+                tabla = principal
+            if fila.get('type') == 'ALL':
+                agregar(ESCANEO_COMPLETO, tabla)
+            if 'Using filesort' in extra:
+                agregar(ORDENAMIENTO_EXTERNO, tabla)
+            if 'Using temporary' in extra:
+                agregar(TABLA_TEMPORAL, tabla)
+    return alertas
+
+
+def _referencias(sql, tabla):
+    """Patrón para `tabla.columna` usando el nombre de la tabla o sus alias."""
+    nombres = [tabla] + [a for a, t in resolver_alias(sql).items() if t == tabla]
+    opciones = '|'.join(re.escape(nombre) for nombre in nombres)
+    return rf'{_COMILLA}?(?:{opciones}){_COMILLA}?\.{_COMILLA}(\w+){_COMILLA}'
+
+
+def _orden(sql, referencia):
+    """Columnas del último ORDER BY si pertenecen todas a la tabla; si no, []."""
+    posicion = sql.upper().rfind('ORDER BY')
+    if posicion < 0:
+        return []
+    clausula = sql[posicion + len('ORDER BY'):]
+    fin = _FIN_ORDER_BY.search(clausula)
+    clausula = clausula[:fin.start()] if fin else clausula
+
+    columnas = []
+    for termino in clausula.split(','):
+        encontrada = re.search(referencia, termino)
+        if not encontrada:
+            return []
+        descendente = re.search(r'\bDESC\b', termino, re.IGNORECASE) is not None
+        columnas.append(('-' if descendente else '') + encontrada.group(1))
+    return columnas
+
+
+def columnas_candidatas(sql, tabla, pk='id'):
+    """
+    Propone las columnas de un índice compuesto para `tabla` en la consulta.
+
+    Returns:
+        tuple: ([columnas], usa_is_active); columnas vacías si no hay propuesta
+    """
+    referencia = _referencias(sql, tabla)
+    posicion = re.search(r'\bWHERE\b', sql, re.IGNORECASE)
+    condiciones = sql[posicion.end():] if posicion else ''
+
+    igualdad = re.findall(rf'{referencia}\s*(?:=|IN\s*\(|IS\s)', condiciones, re.IGNORECASE)
+    igualdad += re.findall(rf'=\s*{referencia}', sql)
+    rango = re.findall(rf'{referencia}\s*(?:<|>|BETWEEN\b)', condiciones, re.IGNORECASE)
+    usa_activo = COLUMNA_ACTIVO in re.findall(referencia, condiciones)
+
+    if pk in igualdad:
+        return [], usa_activo
+
+    columnas = []
+    for columna in igualdad + _orden(sql, referencia) + rango[:1]:
+        if columna.lstrip('-') != COLUMNA_ACTIVO and columna.lstrip('-') not in {
+            c.lstrip('-') for c in columnas
+        }:
+            columnas.append(columna)
+    return columnas, usa_activo
+
+
+def indices_existentes(connection, tabla):
+    """Columnas de los índices existentes, sin is_active (cubierto por índices parciales)."""
+    with connection.cursor() as cursor:
+        restricciones = connection.introspection.get_constraints(cursor, tabla)
+    return [
+        [columna for columna in info['columns'] if columna != COLUMNA_ACTIVO]
+        for info in restricciones.values()
+        if info.get('index') or info.get('primary_key') or info.get('unique')
+    ]
+
+
+def esta_cubierto(columnas, existentes):
+    """Un índice existente cubre la propuesta si la tiene como prefijo."""
+    nombres = [columna.lstrip('-') for columna in columnas]
+    return any(indice[:len(nombres)] == nombres for indice in existentes)
+
+
+def modelo_de_tabla(tabla):
+    return next((m for m in apps.get_models() if m._meta.db_table == tabla), None)
+
+
+def definicion_indice(model, columnas, usa_activo):
+    """Código del índice para Meta.indexes con los nombres de campo del modelo."""
+    por_columna = {field.column: field.name for field in model._meta.concrete_fields}
+    campos = [
+        ('-' if columna.startswith('-') else '') + por_columna.get(columna.lstrip('-'), columna.lstrip('-'))
+        for columna in columnas
+    ]
+    partes = [model._meta.model_name] + [campo.lstrip('-') for campo in campos]
+    if usa_activo:
+        partes.append('activo')
+    nombre = '_'.join(partes)
+    if len(nombre) > 30:
+        # Django limita los nombres de índice a 30 caracteres
+        sufijo = hashlib.md5(nombre.encode()).hexdigest()[:6]
+        nombre = f"{nombre[:23].rstrip('_')}_{sufijo}"
+    clase = 'ActiveIndex' if usa_activo else 'models.Index'
+    return f"{clase}(fields={campos!r}, name={nombre!r})"
+
+
+class AnalizadorConsultas:
+    """
+    Analiza consultas capturadas y acumula las sugerencias de índices.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.sugerencias = {}
+        self._existentes = {}
+        self._tablas = set(connection.introspection.table_names())
+
+    def analizar(self, sql, origen):
+        """
+        Explica una consulta y registra sugerencias para sus tablas con alertas.
+
+        Args:
+            sql: Consulta con los parámetros ya interpolados
+            origen: Identificador de la acción que la ejecutó
+        """
+        try:
+            plan = explicar(self.connection, sql)
+        except Exception as exc:
+            return {'sql': sql, 'plan': [], 'alertas': [], 'error': str(exc)}
+
+        alertas = [
+            (tipo, tabla) for tipo, tabla in detectar_alertas(self.connection.vendor, plan, sql)
+            if tabla in self._tablas
+        ]
+        for tabla in {tabla for _, tabla in alertas}:
+            self._sugerir(sql, tabla, origen)
+        return {
+            'sql': sql,
+            'plan': plan,
+            'alertas': [{'tipo': tipo, 'tabla': tabla} for tipo, tabla in alertas],
+        }
+
+    def _sugerir(self, sql, tabla, origen):
+        model = modelo_de_tabla(tabla)
+        columnas, usa_activo = columnas_candidatas(sql, tabla, model._meta.pk.column if model else 'id')
+        if not columnas:
+            return
+        if tabla not in self._existentes:
+            self._existentes[tabla] = indices_existentes(self.connection, tabla)
+        if esta_cubierto(columnas, self._existentes[tabla]):
+            return
+
+        clave = (tabla, tuple(columnas), usa_activo)
+        sugerencia = self.sugerencias.setdefault(clave, {
+            'tabla': tabla,
+            'modelo': model._meta.label if model else None,
+            'columnas': columnas,
+            'parcial_activos': usa_activo,
+            'definicion': definicion_indice(model, columnas, usa_activo) if model else None,
+            'origenes': [],
+        })
+        if origen not in sugerencia['origenes']:
+            sugerencia['origenes'].append(origen)
+
+    def lista_sugerencias(self):
+        return sorted(self.sugerencias.values(), key=lambda s: (-len(s['origenes']), s['tabla']))
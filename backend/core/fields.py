@@ -0,0 +1,127 @@
+"""
+Campos y generadores de claves primarias del core.
+"""
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import models
+
+
+class _UUID7Generator:
+    """
+    Generador de UUIDv7 (RFC 9562): 48 bits de timestamp Unix en milisegundos
+    seguidos de un contador de 12 bits y 62 bits aleatorios.
+
+    El contador garantiza que los identificadores generados dentro del mismo
+    milisegundo sigan siendo crecientes, de modo que las inserciones se
+    agregan al final del índice en lugar de repartirse por todo el árbol.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._counter = 0
+
+    def __call__(self):
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                # Se deja libre el bit alto para absorber ráfagas dentro del mismo ms
+                self._counter = int.from_bytes(os.urandom(2), 'big') & 0x7FF
+            else:
+                self._counter += 1
+                if self._counter > 0xFFF:
+                    # Contador agotado: se avanza el timestamp artificialmente
+                    self._last_ms += 1
+                    self._counter = 0
+            timestamp_ms, counter = self._last_ms, self._counter
+
+        rand_b = int.from_bytes(os.urandom(8), 'big') & ((1 << 62) - 1)
+        value = (
+            (timestamp_ms & ((1 << 48) - 1)) << 80
+            | 0x7 << 76
+            | counter << 64
+            | 0b10 << 62
+            | rand_b
+        )
+        return uuid.UUID(int=value)
+
+
+uuid7 = _UUID7Generator()
+
+
+PRIMARY_KEY_GENERATORS = {
+    'uuid4': uuid.uuid4,
+    'uuid7': uuid7,
+}
+
+
+def generate_primary_key():
+    """
+    Genera la clave primaria de BaseModel según settings.PRIMARY_KEY_STRATEGY.
+    """
+    strategy = getattr(settings, 'PRIMARY_KEY_STRATEGY', 'uuid7')
+    try:
+        return PRIMARY_KEY_GENERATORS[strategy]()
+    except KeyError:
+        raise ValueError(
+            f"PRIMARY_KEY_STRATEGY inválida: {strategy!r}. "
+            f"Opciones: {', '.join(PRIMARY_KEY_GENERATORS)}"
+        )
+
+
+def binary_uuid_storage_enabled(connection=None):
+    """
+    Indica si los UUID se almacenan como BINARY(16).
+    Solo aplica a MySQL; el resto de motores usan su tipo UUID habitual.
+    """
+    if not getattr(settings, 'UUID_BINARY_STORAGE', False):
+        return False
+    return connection is None or connection.vendor == 'mysql'
+
+
+class CompactUUIDField(models.UUIDField):
+    """
+    UUIDField que en MySQL se almacena en 16 bytes (BINARY(16)) en lugar de
+    char(32) cuando settings.UUID_BINARY_STORAGE está activo.
+
+    La API no cambia: el valor en Python sigue siendo uuid.UUID, y las claves
+    foráneas que apuntan al campo heredan el mismo tipo de columna.
+    """
+    description = "UUID compacto (BINARY(16) en MySQL)"
+
+    def get_internal_type(self):
+        # Con almacenamiento binario se evita el conversor de UUID del backend
+        # de MySQL, que espera texto hexadecimal
+        return 'BinaryField' if binary_uuid_storage_enabled() else 'UUIDField'
+
+    def db_type(self, connection):
+        if binary_uuid_storage_enabled(connection):
+            return 'binary(16)'
+        return connection.data_types['UUIDField']
+
+    def cast_db_type(self, connection):
+        return self.db_type(connection)
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, bytearray, memoryview)) and len(value) == 16:
+            return uuid.UUID(bytes=bytes(value))
+        return super().to_python(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not binary_uuid_storage_enabled(connection):
+            return super().get_db_prep_value(value, connection, prepared)
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = self.to_python(value)
+        return value.bytes
+
+    def from_db_value(self, value, expression, connection):
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        return self.to_python(value)
@@ -0,0 +1,32 @@
+"""
+Índices base para los modelos con eliminación lógica.
+"""
+from django.db import models
+from django.db.models import Q
+
+
+class ActiveIndex(models.Index):
+    """
+    Índice parcial que solo cubre los registros activos (WHERE is_active).
+
+    En motores sin índices parciales (MySQL, Oracle) se crea en su lugar un
+    índice completo con is_active insertado después de la primera columna,
+    de modo que sigue sirviendo a los filtros (columna, is_active, ...).
+    """
+
+    def __init__(self, *, fields, name, condition=None, **kwargs):
+        super().__init__(
+            fields=fields, name=name, condition=condition or Q(is_active=True), **kwargs
+        )
+
+    def fallback_index(self):
+        """Índice equivalente sin condición para motores sin índices parciales."""
+        fields = list(self.fields)
+        if 'is_active' not in fields:
+            fields.insert(1, 'is_active')
+        return models.Index(fields=fields, name=self.name, db_tablespace=self.db_tablespace)
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.features.supports_partial_indexes:
+            return super().create_sql(model, schema_editor, using=using, **kwargs)
+        return self.fallback_index().create_sql(model, schema_editor, using=using, **kwargs)
@@ -0,0 +1,278 @@
+"""
+Logging no bloqueante y estructurado.
+
+Los registros de los hilos de petición se encolan en `BackgroundQueueHandler`
+y un único hilo (QueueListener) los escribe en los handlers de archivo y
+consola, de modo que una escritura lenta a disco nunca agrega latencia a la
+API. Cada registro lleva el contexto de la petición (request_id, usuario y
+acción), capturado en el hilo de la petición antes de encolarlo.
+
+Con `structlog` instalado la salida JSON la genera su ProcessorFormatter y
+`structlog.get_logger()` comparte la misma cola; sin él se usa un formateador
+JSON equivalente.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+import weakref
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from django.utils.functional import SimpleLazyObject, empty
+
+try:
+    import structlog
+except ImportError:  # pragma: no cover - dependencia opcional
+    structlog = None
+
+# Petición en curso: {'request_id', 'action', 'request'}
+_request_context = ContextVar('log_request_context', default=None)
+
+# Atributos estándar de LogRecord; el resto se emite como campos extra
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+CONTEXT_FIELDS = ('request_id', 'user', 'action')
+
+
+def bind_request(request, request_id):
+    """Asocia la petición al contexto de logging; retorna el token para reset_request."""
+    return _request_context.set({'request_id': request_id, 'action': None, 'request': request})
+
+
+def bind_action(action):
+    contexto = _request_context.get()
+    if contexto is not None:
+        contexto['action'] = action
+
+
+def reset_request(token):
+    _request_context.reset(token)
+
+
+def _usuario(request):
+    """Usuario ya autenticado de la petición, sin forzar consultas a la sesión."""
+    usuario = request.__dict__.get('user')
+    if isinstance(usuario, SimpleLazyObject):
+        usuario = usuario._wrapped
+        if usuario is empty:
+            return None
+    if usuario is None or not getattr(usuario, 'is_authenticated', False):
+        return None
+    return usuario.get_username()
+
+
+class RequestContextFilter(logging.Filter):
+    """Agrega request_id, user y action de la petición en curso a cada registro."""
+
+    def filter(self, record):
+        contexto = _request_context.get()
+        if contexto is None:
+            record.request_id = record.user = record.action = None
+        else:
+            record.request_id = contexto['request_id']
+            record.action = contexto['action']
+            record.user = _usuario(contexto['request'])
+        return True
+
+
+_exception_formatter = logging.Formatter()
+# Handlers en cola del proceso (para queue_stats y el cierre ordenado)
+_queue_handlers = weakref.WeakSet()
+
+
+def _get_handler_by_name(name):
+    getter = getattr(logging, 'getHandlerByName', None)  # Python 3.12+
+    return getter(name) if getter else logging._handlers.get(name)
+
+
+class _Listener(logging.handlers.QueueListener):
+    # Con la cola llena el centinela de stop() espera a que el hilo la vacíe
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+def _resolve_target(target):
+    if isinstance(target, logging.Handler):
+        return target
+    handler = _get_handler_by_name(target)
+    if handler is None:
+        # dictConfig reintenta al final los handlers cuya causa de error
+        # contiene este texto (el mismo mecanismo que `target` de MemoryHandler)
+        raise ValueError(f'Handler {target!r} no configurado') from TypeError('target not configured yet')
+    return handler
+
+
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """
+    Encola los registros sin bloquear; un QueueListener por proceso los
+    entrega a los handlers `targets` (instancias o nombres de handlers de la
+    misma configuración). Se guardan referencias a los targets: un handler que
+    ningún logger usa directamente no sobrevive a dictConfig por sí solo.
+
+    - Cola llena: el registro se descarta y se cuenta en `dropped`.
+    - Bajo carga (cola por encima de `sampling_threshold`): de los registros
+      DEBUG solo se conserva la fracción `debug_sample_rate`.
+
+    El listener se inicia con el primer registro y se reinicia tras un fork
+    (workers de gunicorn).
+    """
+
+    def __init__(self, targets=(), maxsize=10000, sampling_threshold=0.5, debug_sample_rate=0.1):
+        super().__init__(queue.Queue(maxsize))
+        self.targets = [_resolve_target(target) for target in targets]
+        self.maxsize = maxsize
+        self.sampling_threshold = int(maxsize * sampling_threshold)
+        self.debug_sample_rate = debug_sample_rate
+        self.listener = None
+        self.dropped = 0
+        self.sampled = 0
+        self._pid = None
+        self._start_lock = threading.Lock()
+        _queue_handlers.add(self)
+
+    def start(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # Proceso hijo: el hilo del listener no sobrevive al fork
+                self.queue = queue.Queue(self.maxsize)
+            self.listener = _Listener(
+                self.queue, *self.targets, respect_handler_level=True
+            )
+            self.listener.start()
+            self._pid = os.getpid()
+
+    def stop(self):
+        with self._start_lock:
+            if self.listener is not None and self._pid == os.getpid():
+                self.listener.stop()
+            self.listener = None
+            self._pid = None
+
+    def close(self):
+        # dictConfig cierra los handlers anteriores al reconfigurar
+        self.stop()
+        super().close()
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            self.start()
+        if (record.levelno < logging.INFO and self.queue.qsize() > self.sampling_threshold
+                and random.random() >= self.debug_sample_rate):
+            self.sampled += 1
+            return
+        try:
+            self.queue.put_nowait(self.prepare(record))
+        except queue.Full:
+            self.dropped += 1
+        except Exception:
+            self.handleError(record)
+
+    def prepare(self, record):
+        """
+        Copia del registro lista para otro hilo: mensaje interpolado y
+        traza de la excepción como texto en `exc_text`.
+        """
+        record = copy.copy(record)
+        if not isinstance(record.msg, dict):  # los de structlog llevan su event_dict
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def queue_stats():
+    """Totales de los handlers en cola del proceso: queued, dropped, sampled."""
+    return {
+        'queued': sum(handler.queue.qsize() for handler in list(_queue_handlers)),
+        'dropped': sum(handler.dropped for handler in list(_queue_handlers)),
+        'sampled': sum(handler.sampled for handler in list(_queue_handlers)),
+    }
+
+
+@atexit.register
+def _stop_listeners():
+    for handler in list(_queue_handlers):
+        handler.stop()
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Una línea JSON por registro: timestamp, level, logger, event, contexto de
+    la petición, campos `extra` y excepción. Mismas claves que la salida de
+    structlog (ver json_formatter).
+    """
+
+    def format(self, record):
+        evento = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'event': record.getMessage(),
+        }
+        for clave, valor in vars(record).items():
+            if clave not in _RECORD_ATTRIBUTES and not clave.startswith('_'):
+                evento[clave] = valor
+        if record.exc_info:
+            evento['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            evento['exception'] = record.exc_text
+        return json.dumps(evento, default=str, ensure_ascii=False)
+
+
+def _campos_del_registro(logger, method_name, event_dict):
+    """Procesador de structlog: contexto de la petición y `extra` del LogRecord."""
+    record = event_dict.get('_record')
+    if record is not None:
+        for clave, valor in vars(record).items():
+            if clave not in _RECORD_ATTRIBUTES and not clave.startswith('_'):
+                event_dict.setdefault(clave, valor)
+        if record.exc_text:
+            event_dict.setdefault('exception', record.exc_text)
+    return event_dict
+
+
+def json_formatter():
+    """Formateador JSON: ProcessorFormatter de structlog si está instalado."""
+    if structlog is None:
+        return JSONFormatter()
+    return structlog.stdlib.ProcessorFormatter(
+        foreign_pre_chain=[
+            structlog.stdlib.add_log_level,
+            structlog.stdlib.add_logger_name,
+            structlog.processors.TimeStamper(fmt='iso', utc=True, key='timestamp'),
+            _campos_del_registro,
+        ],
+        processors=[
+            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+            structlog.processors.format_exc_info,
+            structlog.processors.JSONRenderer(default=str, ensure_ascii=False),
+        ],
+    )
+
+
+def configure_structlog():
+    """Envía `structlog.get_logger()` por el logging estándar (y por tanto por la cola)."""
+    if structlog is None:
+        return
+    structlog.configure(
+        processors=[
+            structlog.stdlib.filter_by_level,
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.add_log_level,
+            structlog.processors.TimeStamper(fmt='iso', utc=True, key='timestamp'),
+            structlog.processors.StackInfoRenderer(),
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+        ],
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=True,
+    )
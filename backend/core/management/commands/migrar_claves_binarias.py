@@ -0,0 +1,275 @@
+"""
+Conversión en línea de las claves UUID de char(32) a BINARY(16) en MySQL.
+
+La conversión se hace por fases para no bloquear las tablas:
+
+1. preparar:     agrega columnas sombra BINARY(16) (ALGORITHM=INPLACE, LOCK=NONE)
+                 y triggers que las mantienen sincronizadas con las escrituras.
+2. copiar:       rellena las columnas sombra por lotes ordenados por clave primaria.
+3. intercambiar: reemplaza las columnas y recrea índices y claves foráneas.
+                 Se ejecuta en la ventana corta sin escrituras del despliegue que
+                 activa UUID_BINARY_STORAGE=True (el DDL de MySQL no es transaccional).
+4. limpiar:      elimina las columnas char(32) antiguas.
+
+Uso:
+    python manage.py migrar_claves_binarias preparar
+    python manage.py migrar_claves_binarias copiar --lote 5000 --pausa 0.05
+    python manage.py migrar_claves_binarias intercambiar
+    python manage.py migrar_claves_binarias limpiar
+    python manage.py migrar_claves_binarias preparar --plan   # solo muestra el SQL
+"""
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from core.fields import CompactUUIDField
+
+SUFIJO_BINARIO = '__bin'
+SUFIJO_ANTIGUO = '__char'
+
+
+def columnas_uuid():
+    """
+    Retorna {tabla: {'pk': columna_pk, 'columnas': [(columna, nula)]}} para
+    las claves CompactUUIDField y las claves foráneas que apuntan a ellas.
+    """
+    tablas = {}
+    for model in apps.get_models():
+        if model._meta.proxy or not model._meta.managed:
+            continue
+        for field in model._meta.local_concrete_fields:
+            es_clave = isinstance(field, CompactUUIDField)
+            es_referencia = field.many_to_one and isinstance(field.target_field, CompactUUIDField)
+            if not (es_clave or es_referencia):
+                continue
+            tabla = tablas.setdefault(model._meta.db_table, {
+                'pk': model._meta.pk.column, 'columnas': []
+            })
+            tabla['columnas'].append((field.column, field.null))
+    return tablas
+
+
+class PlanConversion:
+    """
+    Genera las sentencias SQL de cada fase de la conversión.
+    """
+
+    def __init__(self, connection, tablas):
+        self.connection = connection
+        self.tablas = tablas
+        self.qn = connection.ops.quote_name
+
+    def preparar(self):
+        sentencias = []
+        for tabla, info in self.tablas.items():
+            columnas = [columna for columna, _ in info['columnas']]
+            agregar = ', '.join(
+                f"ADD COLUMN {self.qn(columna + SUFIJO_BINARIO)} BINARY(16) NULL"
+                for columna in columnas
+            )
+            sentencias.append(
+                f"ALTER TABLE {self.qn(tabla)} {agregar}, ALGORITHM=INPLACE, LOCK=NONE"
+            )
+            asignaciones = ', '.join(
+                f"NEW.{self.qn(columna + SUFIJO_BINARIO)} = UNHEX(NEW.{self.qn(columna)})"
+                for columna in columnas
+            )
+            for evento in ('INSERT', 'UPDATE'):
+                sentencias.append(
+                    f"CREATE TRIGGER {self.qn(self._trigger(tabla, evento))} "
+                    f"BEFORE {evento} ON {self.qn(tabla)} FOR EACH ROW SET {asignaciones}"
+                )
+        return sentencias
+
+    def copiar_lote(self, tabla, desde, hasta):
+        """UPDATE de un rango (desde, hasta] de claves primarias."""
+        info = self.tablas[tabla]
+        asignaciones = ', '.join(
+            f"{self.qn(columna + SUFIJO_BINARIO)} = UNHEX({self.qn(columna)})"
+            for columna, _ in info['columnas']
+        )
+        condiciones, parametros = [], []
+        if desde is not None:
+            condiciones.append(f"{self.qn(info['pk'])} > %s")
+            parametros.append(desde)
+        if hasta is not None:
+            condiciones.append(f"{self.qn(info['pk'])} <= %s")
+            parametros.append(hasta)
+        where = f" WHERE {' AND '.join(condiciones)}" if condiciones else ''
+        return f"UPDATE {self.qn(tabla)} SET {asignaciones}{where}", parametros
+
+    def intercambiar(self, claves_foraneas, indices):
+        """
+        Args:
+            claves_foraneas: [(tabla, nombre, columna, tabla_ref, columna_ref)]
+            indices: {tabla: [(nombre, unico, [columnas])]} que usan columnas convertidas
+        """
+        sentencias = [
+            f"ALTER TABLE {self.qn(tabla)} DROP FOREIGN KEY {self.qn(nombre)}"
+            for tabla, nombre, *_ in claves_foraneas
+        ]
+        for tabla, info in self.tablas.items():
+            for evento in ('INSERT', 'UPDATE'):
+                sentencias.append(f"DROP TRIGGER IF EXISTS {self.qn(self._trigger(tabla, evento))}")
+            # Sincronización final de filas que hubieran quedado desfasadas
+            for columna, _ in info['columnas']:
+                binaria = self.qn(columna + SUFIJO_BINARIO)
+                sentencias.append(
+                    f"UPDATE {self.qn(tabla)} SET {binaria} = UNHEX({self.qn(columna)}) "
+                    f"WHERE NOT ({binaria} <=> UNHEX({self.qn(columna)}))"
+                )
+
+        for tabla, info in self.tablas.items():
+            cambios = []
+            for columna, nula in info['columnas']:
+                cambios.append(f"RENAME COLUMN {self.qn(columna)} TO {self.qn(columna + SUFIJO_ANTIGUO)}")
+                cambios.append(f"RENAME COLUMN {self.qn(columna + SUFIJO_BINARIO)} TO {self.qn(columna)}")
+            sentencias.append(f"ALTER TABLE {self.qn(tabla)} {', '.join(cambios)}")
+
+            cambios = []
+            for columna, nula in info['columnas']:
+                cambios.append(
+                    f"MODIFY {self.qn(columna + SUFIJO_ANTIGUO)} char(32) NULL"
+                )
+                cambios.append(
+                    f"MODIFY {self.qn(columna)} BINARY(16) {'NULL' if nula else 'NOT NULL'}"
+                )
+            if any(columna == info['pk'] for columna, _ in info['columnas']):
+                cambios.append("DROP PRIMARY KEY")
+                cambios.append(f"ADD PRIMARY KEY ({self.qn(info['pk'])})")
+            for nombre, unico, columnas in indices.get(tabla, []):
+                cambios.append(f"DROP INDEX {self.qn(nombre)}")
+                cambios.append(
+                    f"ADD {'UNIQUE ' if unico else ''}INDEX {self.qn(nombre)} "
+                    f"({', '.join(self.qn(columna) for columna in columnas)})"
+                )
+            sentencias.append(f"ALTER TABLE {self.qn(tabla)} {', '.join(cambios)}")
+
+        sentencias.extend(
+            f"ALTER TABLE {self.qn(tabla)} ADD CONSTRAINT {self.qn(nombre)} "
+            f"FOREIGN KEY ({self.qn(columna)}) REFERENCES {self.qn(tabla_ref)} ({self.qn(columna_ref)})"
+            for tabla, nombre, columna, tabla_ref, columna_ref in claves_foraneas
+        )
+        return sentencias
+
+    def limpiar(self):
+        return [
+            f"ALTER TABLE {self.qn(tabla)} "
+            + ', '.join(
+                f"DROP COLUMN {self.qn(columna + SUFIJO_ANTIGUO)}" for columna, _ in info['columnas']
+            )
+            for tabla, info in self.tablas.items()
+        ]
+
+    @staticmethod
+    def _trigger(tabla, evento):
+        return f"{tabla}{SUFIJO_BINARIO}_{evento.lower()}"[:64]
+
+
+class Command(BaseCommand):
+    help = 'Convierte en línea las claves UUID de char(32) a BINARY(16) en MySQL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('fase', choices=['preparar', 'copiar', 'intercambiar', 'limpiar'])
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--lote', type=int, default=5000, help='Filas por lote en la fase copiar')
+        parser.add_argument('--pausa', type=float, default=0.05, help='Segundos de espera entre lotes')
+        parser.add_argument('--plan', action='store_true', help='Mostrar el SQL sin ejecutarlo')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'mysql' and not options['plan']:
+            raise CommandError('La conversión a BINARY(16) solo aplica a MySQL')
+
+        self.connection = connection
+        self.plan = PlanConversion(connection, columnas_uuid())
+        self.solo_plan = options['plan']
+
+        fase = options['fase']
+        if fase == 'preparar':
+            self.ejecutar(self.plan.preparar())
+        elif fase == 'copiar':
+            for tabla in self.plan.tablas:
+                self.copiar_tabla(tabla, options['lote'], options['pausa'])
+        elif fase == 'intercambiar':
+            claves_foraneas, indices = self.leer_esquema() if not self.solo_plan else ([], {})
+            self.ejecutar(self.plan.intercambiar(claves_foraneas, indices))
+            self.stdout.write(self.style.WARNING(
+                'Columnas intercambiadas: desplegar ahora con UUID_BINARY_STORAGE=True'
+            ))
+        else:
+            self.ejecutar(self.plan.limpiar())
+
+        self.stdout.write(self.style.SUCCESS(f'Fase {fase} completada'))
+
+    def ejecutar(self, sentencias):
+        with self.connection.cursor() as cursor:
+            for sentencia in sentencias:
+                self.stdout.write(sentencia + ';')
+                if not self.solo_plan:
+                    cursor.execute(sentencia)
+
+    def copiar_tabla(self, tabla, lote, pausa):
+        """Rellena las columnas sombra por rangos de clave primaria."""
+        qn = self.connection.ops.quote_name
+        pk = self.plan.tablas[tabla]['pk']
+        if self.solo_plan:
+            self.stdout.write(self.plan.copiar_lote(tabla, '<desde>', '<hasta>')[0] + ';')
+            return
+
+        desde, copiadas = None, 0
+        while True:
+            with self.connection.cursor() as cursor:
+                condicion = f"WHERE {qn(pk)} > %s " if desde is not None else ''
+                cursor.execute(
+                    f"SELECT {qn(pk)} FROM {qn(tabla)} {condicion}"
+                    f"ORDER BY {qn(pk)} LIMIT 1 OFFSET %s",
+                    ([desde] if desde is not None else []) + [lote - 1]
+                )
+                fila = cursor.fetchone()
+                hasta = fila[0] if fila else None
+                sql, parametros = self.plan.copiar_lote(tabla, desde, hasta)
+                with transaction.atomic(using=self.connection.alias):
+                    cursor.execute(sql, parametros)
+                    copiadas += cursor.rowcount
+            self.stdout.write(f'{tabla}: {copiadas} filas copiadas')
+            if hasta is None:
+                return
+            desde = hasta
+            time.sleep(pausa)
+
+    def leer_esquema(self):
+        """Lee de information_schema las claves foráneas e índices afectados."""
+        convertidas = {
+            (tabla, columna) for tabla, info in self.plan.tablas.items()
+            for columna, _ in info['columnas']
+        }
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT TABLE_NAME, CONSTRAINT_NAME, COLUMN_NAME, "
+                "REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME "
+                "FROM information_schema.KEY_COLUMN_USAGE "
+                "WHERE TABLE_SCHEMA = DATABASE() AND REFERENCED_TABLE_NAME IS NOT NULL"
+            )
+            claves_foraneas = [
+                fila for fila in cursor.fetchall()
+                if (fila[0], fila[2]) in convertidas or (fila[3], fila[4]) in convertidas
+            ]
+
+            cursor.execute(
+                "SELECT TABLE_NAME, INDEX_NAME, NON_UNIQUE, COLUMN_NAME "
+                "FROM information_schema.STATISTICS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND INDEX_NAME <> 'PRIMARY' "
+                "ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX"
+            )
+            agrupados = {}
+            for tabla, nombre, no_unico, columna in cursor.fetchall():
+                agrupados.setdefault((tabla, nombre, not no_unico), []).append(columna)
+
+        indices = {}
+        for (tabla, nombre, unico), columnas in agrupados.items():
+            if any((tabla, columna) in convertidas for columna in columnas):
+                indices.setdefault(tabla, []).append((nombre, unico, columnas))
+        return claves_foraneas, indices
@@ -0,0 +1,20 @@
+"""
+Managers base para los modelos con eliminación lógica.
+"""
+from django.db import models
+
+
+class ActiveManager(models.Manager):
+    """
+    Manager por defecto: solo retorna los registros activos (is_active=True).
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_active=True)
+
+
+class AllObjectsManager(models.Manager):
+    """
+    Manager que incluye los registros eliminados lógicamente.
+    Debe usarse de forma explícita (restauración, administración, auditoría).
+    """
@@ -0,0 +1,357 @@
+"""
+Registro de métricas en proceso con exportación en formato de texto de Prometheus.
+
+core.middleware.MetricsMiddleware registra por cada `viewset.accion`:
+peticiones (por método y estado), histogramas de latencia, tiempo en base de
+datos, tiempo de serialización (render de la respuesta) y tamaño de la
+respuesta. `record_cache_access` cuenta aciertos y fallos de caché y las
+métricas de compresión, pools de conexiones y cola de escrituras SQLite se
+agregan al exportar.
+
+Con varios procesos (gunicorn) cada worker vuelca periódicamente su registro
+a METRICS_MULTIPROC_DIR (un archivo JSON por pid) y GET /metrics suma los
+archivos de todos los workers. El directorio debe vaciarse al arrancar el
+servidor (los contadores de workers terminados se conservan hasta entonces).
+"""
+import atexit
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# nombre: (tipo, ayuda, buckets)
+METRICS = {
+    'http_requests_total': ('counter', 'Peticiones HTTP por acción, método y estado.', None),
+    'http_request_duration_seconds': ('histogram', 'Latencia de las peticiones por acción.', LATENCY_BUCKETS),
+    'http_request_db_seconds': ('histogram', 'Tiempo en base de datos por petición.', LATENCY_BUCKETS),
+    'http_request_serialization_seconds': (
+        'histogram', 'Tiempo de render de la respuesta por petición.', LATENCY_BUCKETS
+    ),
+    'http_response_size_bytes': ('histogram', 'Tamaño del cuerpo de la respuesta.', SIZE_BUCKETS),
+    'cache_requests_total': ('counter', 'Accesos a caché por resultado (hit/miss).', None),
+    'compression_responses_total': ('counter', 'Respuestas comprimidas por codificación.', None),
+    'compression_bytes_in_total': ('counter', 'Bytes antes de comprimir.', None),
+    'compression_bytes_out_total': ('counter', 'Bytes después de comprimir.', None),
+    'compression_cpu_seconds_total': ('counter', 'Tiempo de CPU dedicado a comprimir.', None),
+    'db_pool_connections': ('gauge', 'Conexiones del pool por estado.', None),
+    'db_pool_checkouts_total': ('counter', 'Conexiones entregadas por el pool.', None),
+    'db_pool_waits_total': ('counter', 'Entregas que esperaron una conexión libre.', None),
+    'db_pool_timeouts_total': ('counter', 'Esperas del pool que agotaron el tiempo.', None),
+    'sqlite_write_queue_writes_total': ('counter', 'Escrituras que pasaron por la cola.', None),
+    'sqlite_write_queue_waits_total': ('counter', 'Escrituras que esperaron turno.', None),
+    'sqlite_write_queue_timeouts_total': ('counter', 'Escrituras que no obtuvieron turno.', None),
+    'logging_queue_records': ('gauge', 'Registros de logging pendientes de escribir.', None),
+    'logging_records_dropped_total': ('counter', 'Registros de logging descartados con la cola llena.', None),
+    'logging_records_sampled_total': ('counter', 'Registros DEBUG descartados por muestreo bajo carga.', None),
+    'events_subscriptions': ('gauge', 'Streams de eventos SSE abiertos.', None),
+    'events_dropped_total': ('counter', 'Eventos descartados por streams que no consumen a tiempo.', None),
+    'throttled_requests_total': ('counter', 'Peticiones rechazadas por el throttling por costo (429).', None),
+}
+
+REQUEST_HISTOGRAMS = (
+    'http_request_duration_seconds', 'http_request_db_seconds', 'http_request_serialization_seconds',
+)
+
+
+class MetricsRegistry:
+    """
+    Contadores e histogramas por etiquetas, seguros entre hilos.
+
+    Las etiquetas son tuplas de pares (nombre, valor). Los histogramas guardan
+    conteos por bucket (no acumulados), suma y total.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counters = {}
+            self._histograms = {}
+            self._requests = {}
+            self._request_keys = {}
+
+    def inc(self, name, labels=(), amount=1):
+        with self._lock:
+            clave = (name, labels)
+            self._counters[clave] = self._counters.get(clave, 0) + amount
+
+    def observe(self, name, value, labels=()):
+        with self._lock:
+            self._observe(name, value, labels)
+
+    def _observe(self, name, value, labels):
+        buckets = METRICS[name][2]
+        clave = (name, labels)
+        datos = self._histograms.get(clave)
+        if datos is None:
+            # Un bucket extra para +Inf, luego suma y total
+            datos = self._histograms[clave] = [0] * (len(buckets) + 1) + [0.0, 0]
+        datos[bisect.bisect_left(buckets, value)] += 1
+        datos[-2] += value
+        datos[-1] += 1
+
+    def observe_request(self, view, method, status, duration, db_seconds, serialization_seconds, size):
+        """Registra una petición completa con una sola toma del lock (camino rápido)."""
+        bucket = bisect.bisect_left
+        with self._lock:
+            series = self._requests.get(view) or self._request_series(view)
+            clave = self._request_keys.get((view, method, status)) or self._request_key(view, method, status)
+            self._counters[clave] += 1
+            duracion, base_de_datos, render, tamanio = series
+            duracion[bucket(LATENCY_BUCKETS, duration)] += 1
+            duracion[-2] += duration
+            duracion[-1] += 1
+            base_de_datos[bucket(LATENCY_BUCKETS, db_seconds)] += 1
+            base_de_datos[-2] += db_seconds
+            base_de_datos[-1] += 1
+            render[bucket(LATENCY_BUCKETS, serialization_seconds)] += 1
+            render[-2] += serialization_seconds
+            render[-1] += 1
+            if size is not None:
+                tamanio[bucket(SIZE_BUCKETS, size)] += 1
+                tamanio[-2] += size
+                tamanio[-1] += 1
+
+    def _request_key(self, view, method, status):
+        clave = ('http_requests_total', (('view', view), ('method', method), ('status', str(status))))
+        self._counters.setdefault(clave, 0)
+        self._request_keys[(view, method, status)] = clave
+        return clave
+
+    def _request_series(self, view):
+        """Crea (con el lock tomado) los histogramas de una acción."""
+        etiquetas = (('view', view),)
+        series = []
+        for name in REQUEST_HISTOGRAMS + ('http_response_size_bytes',):
+            datos = [0] * (len(METRICS[name][2]) + 1) + [0.0, 0]
+            self._histograms[(name, etiquetas)] = datos
+            series.append(datos)
+        self._requests[view] = series
+        return series
+
+    def snapshot(self):
+        """Copia serializable en JSON: {'counters': [...], 'histograms': [...]}."""
+        with self._lock:
+            return {
+                'counters': [[name, list(map(list, labels)), value]
+                             for (name, labels), value in self._counters.items()],
+                'histograms': [[name, list(map(list, labels)), list(datos)]
+                               for (name, labels), datos in self._histograms.items()],
+            }
+
+
+registry = MetricsRegistry()
+
+# Tiempo en base de datos de la petición en curso ([segundos] o None)
+_database_time = ContextVar('metrics_database_time', default=None)
+
+
+def database_timer(execute, sql, params, many, context):
+    """execute_wrapper permanente: acumula el tiempo de las consultas de la petición."""
+    acumulado = _database_time.get()
+    if acumulado is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        acumulado[0] += time.perf_counter() - inicio
+
+
+def install_database_timer(sender, connection, **kwargs):
+    """
+    Receptor de `connection_created`: instala database_timer una sola vez por
+    conexión, al inicio de la lista para no alterar los wrappers temporales.
+    """
+    if database_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, database_timer)
+
+
+def start_database_timer():
+    """Empieza a medir el tiempo en base de datos; retorna (acumulado, token)."""
+    acumulado = [0.0]
+    return acumulado, _database_time.set(acumulado)
+
+
+def stop_database_timer(token):
+    _database_time.reset(token)
+
+
+def record_cache_access(cache_name, hit):
+    """Cuenta un acceso a caché ('hit' o 'miss')."""
+    registry.inc('cache_requests_total', (('cache', cache_name), ('result', 'hit' if hit else 'miss')))
+
+
+def runtime_samples():
+    """Métricas de otros componentes del proceso como [nombre, etiquetas, valor]."""
+    from core.db.pool import pool_stats
+    from core.db.sqlite import write_queue
+    from core.events import event_bus
+    from core.logs import queue_stats
+    from core.middleware import compression_stats
+
+    muestras = []
+    for encoding, datos in compression_stats.snapshot().items():
+        etiquetas = [['encoding', encoding]]
+        muestras += [
+            ['compression_responses_total', etiquetas, datos['responses']],
+            ['compression_bytes_in_total', etiquetas, datos['bytes_in']],
+            ['compression_bytes_out_total', etiquetas, datos['bytes_out']],
+            ['compression_cpu_seconds_total', etiquetas, datos['cpu_seconds']],
+        ]
+    for alias, datos in pool_stats().items():
+        etiquetas = [['alias', alias]]
+        muestras += [
+            ['db_pool_connections', etiquetas + [['state', 'in_use']], datos['in_use']],
+            ['db_pool_connections', etiquetas + [['state', 'idle']], datos['idle']],
+            ['db_pool_checkouts_total', etiquetas, datos['checkouts']],
+            ['db_pool_waits_total', etiquetas, datos['waits']],
+            ['db_pool_timeouts_total', etiquetas, datos['timeouts']],
+        ]
+    cola = write_queue.snapshot()
+    if cola['writes']:
+        muestras += [
+            ['sqlite_write_queue_writes_total', [], cola['writes']],
+            ['sqlite_write_queue_waits_total', [], cola['waits']],
+            ['sqlite_write_queue_timeouts_total', [], cola['timeouts']],
+        ]
+    registros = queue_stats()
+    muestras += [
+        ['logging_queue_records', [], registros['queued']],
+        ['logging_records_dropped_total', [], registros['dropped']],
+        ['logging_records_sampled_total', [], registros['sampled']],
+    ]
+    eventos = event_bus.stats()
+    muestras += [
+        ['events_subscriptions', [], eventos['subscriptions']],
+        ['events_dropped_total', [], eventos['dropped']],
+    ]
+    return muestras
+
+
+def process_snapshot():
+    """Registro del proceso más las métricas de sus componentes."""
+    snapshot = registry.snapshot()
+    snapshot['counters'] += runtime_samples()
+    return snapshot
+
+
+def multiproc_dir():
+    return getattr(settings, 'METRICS_MULTIPROC_DIR', None) or None
+
+
+_flush_lock = threading.Lock()
+_last_flush = 0.0
+
+
+def flush(directorio=None):
+    """Escribe el registro del proceso en el directorio compartido (escritura atómica)."""
+    global _last_flush
+    directorio = directorio or multiproc_dir()
+    if not directorio:
+        return
+    contenido = json.dumps(process_snapshot())
+    with _flush_lock:
+        fd, temporal = tempfile.mkstemp(dir=directorio, prefix='.metrics-')
+        with os.fdopen(fd, 'w') as archivo:
+            archivo.write(contenido)
+        os.replace(temporal, os.path.join(directorio, f'metrics_{os.getpid()}.json'))
+        _last_flush = time.monotonic()
+
+
+def maybe_flush():
+    """Vuelca el registro si pasó METRICS_FLUSH_INTERVAL desde el último volcado."""
+    directorio = multiproc_dir()
+    if directorio and time.monotonic() - _last_flush >= getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0):
+        flush(directorio)
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        if settings.configured and multiproc_dir():
+            flush()
+    except Exception:
+        pass
+
+
+def merge(snapshots):
+    """Suma contadores e histogramas de varios procesos."""
+    contadores, histogramas = {}, {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            clave = (name, tuple(map(tuple, labels)))
+            contadores[clave] = contadores.get(clave, 0) + value
+        for name, labels, datos in snapshot['histograms']:
+            clave = (name, tuple(map(tuple, labels)))
+            previos = histogramas.get(clave)
+            histogramas[clave] = list(datos) if previos is None else [a + b for a, b in zip(previos, datos)]
+    return contadores, histogramas
+
+
+def collect():
+    """Métricas del proceso o, en modo multiproceso, de todos los workers."""
+    directorio = multiproc_dir()
+    if not directorio:
+        return merge([process_snapshot()])
+    flush(directorio)
+    snapshots = []
+    for nombre in os.listdir(directorio):
+        if nombre.startswith('metrics_') and nombre.endswith('.json'):
+            try:
+                with open(os.path.join(directorio, nombre), encoding='utf-8') as archivo:
+                    snapshots.append(json.load(archivo))
+            except (OSError, ValueError):
+                continue
+    return merge(snapshots)
+
+
+def _formatear_etiquetas(labels, extra=()):
+    pares = list(labels) + list(extra)
+    if not pares:
+        return ''
+    valores = ','.join(
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in pares
+    )
+    return '{' + valores + '}'
+
+
+def _formatear_numero(valor):
+    if isinstance(valor, float):
+        return repr(round(valor, 9))
+    return str(valor)
+
+
+def render_prometheus():
+    """Exposición en formato de texto de Prometheus (versión 0.0.4)."""
+    contadores, histogramas = collect()
+    lineas = []
+    for name, (tipo, ayuda, buckets) in METRICS.items():
+        muestras = contadores if tipo != 'histogram' else histogramas
+        series = sorted((labels, valor) for (nombre, labels), valor in muestras.items() if nombre == name)
+        if not series:
+            continue
+        lineas.append(f'# HELP {name} {ayuda}')
+        lineas.append(f'# TYPE {name} {tipo}')
+        for labels, valor in series:
+            if tipo != 'histogram':
+                lineas.append(f'{name}{_formatear_etiquetas(labels)} {_formatear_numero(valor)}')
+                continue
+            acumulado = 0
+            for limite, conteo in zip(list(buckets) + ['+Inf'], valor[:-2]):
+                acumulado += conteo
+                lineas.append(f"{name}_bucket{_formatear_etiquetas(labels, [('le', limite)])} {acumulado}")
+            lineas.append(f'{name}_sum{_formatear_etiquetas(labels)} {_formatear_numero(valor[-2])}')
+            lineas.append(f'{name}_count{_formatear_etiquetas(labels)} {valor[-1]}')
+    return '\n'.join(lineas) + '\n'
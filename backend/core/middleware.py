@@ -0,0 +1,594 @@
+"""
+Middleware del core.
+Funcionalidades transversales aplicadas a todas las respuestas de la API.
+"""
+import logging
+import random
+import threading
+import time
+import uuid
+import zlib
+from types import MethodType
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMPRESSION = {
+    # Respuestas más pequeñas que este tamaño (bytes) se envían sin comprimir
+    'MIN_SIZE': 1024,
+    # Nivel por content type; se busca el tipo exacto, luego 'tipo/*' y luego '*'
+    'LEVELS': {
+        'application/json': {'br': 4, 'gzip': 6},
+        'text/*': {'br': 5, 'gzip': 6},
+        '*': {'br': 4, 'gzip': 5},
+    },
+    # Tipos que ya vienen comprimidos o no deben almacenarse en búfer
+    'EXCLUDED_TYPES': [
+        'image/', 'video/', 'audio/', 'font/woff', 'font/woff2',
+        'application/zip', 'application/gzip', 'application/x-gzip',
+        'application/x-brotli', 'application/pdf', 'application/octet-stream',
+        'text/event-stream',
+    ],
+}
+
+_accept_encoding_re = _lazy_re_compile(r'\s*([^\s;,]+)\s*(?:;\s*q=([0-9.]+))?')
+
+
+class CompressionStats:
+    """
+    Métricas acumuladas de compresión (bytes, ratio y tiempo de CPU).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Reinicia los contadores."""
+        with self._lock:
+            self._data = {}
+
+    def record(self, encoding, bytes_in, bytes_out, cpu_seconds, responses=1):
+        """Registra el resultado de comprimir una respuesta (o un fragmento)."""
+        with self._lock:
+            entry = self._data.setdefault(encoding, {
+                'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'cpu_seconds': 0.0
+            })
+            entry['responses'] += responses
+            entry['bytes_in'] += bytes_in
+            entry['bytes_out'] += bytes_out
+            entry['cpu_seconds'] += cpu_seconds
+
+    def snapshot(self):
+        """Retorna una copia de las métricas con el ratio de compresión."""
+        with self._lock:
+            return {
+                encoding: {
+                    **entry,
+                    'ratio': round(entry['bytes_out'] / entry['bytes_in'], 4) if entry['bytes_in'] else None,
+                }
+                for encoding, entry in self._data.items()
+            }
+
+
+compression_stats = CompressionStats()
+
+
+class _GzipEncoder:
+    """Compresor gzip incremental."""
+    name = 'gzip'
+
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    """Compresor brotli incremental."""
+    name = 'br'
+
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+ENCODERS = {'gzip': _GzipEncoder}
+if brotli is not None:
+    ENCODERS['br'] = _BrotliEncoder
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Comprime las respuestas con brotli o gzip según el encabezado Accept-Encoding.
+
+    - Respuestas por debajo de COMPRESSION['MIN_SIZE'] se envían sin comprimir.
+    - Las respuestas en streaming se comprimen fragmento a fragmento.
+    - Se omiten tipos de contenido ya comprimidos (imágenes, zip, etc.).
+    - El nivel de compresión es configurable por content type.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.config = {**DEFAULT_COMPRESSION, **getattr(settings, 'COMPRESSION', {})}
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        if response.streaming and response.has_header('Content-Length'):
+            if int(response['Content-Length']) < self.config['MIN_SIZE']:
+                return response
+        elif not response.streaming and len(response.content) < self.config['MIN_SIZE']:
+            return response
+
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if self._is_excluded(content_type):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = self.negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+        level = self.level_for(content_type, encoding)
+
+        if response.streaming:
+            self._compress_streaming(response, encoding, level)
+        elif not self._compress_content(response, encoding, level):
+            return response
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def negotiate(self, accept_encoding):
+        """
+        Elige la mejor codificación soportada (prioriza brotli sobre gzip).
+        """
+        accepted = {}
+        for match in _accept_encoding_re.finditer(accept_encoding):
+            coding, quality = match.group(1).lower(), match.group(2)
+            try:
+                accepted[coding] = float(quality) if quality is not None else 1.0
+            except ValueError:
+                accepted[coding] = 0.0
+
+        wildcard = accepted.get('*', 0.0)
+        candidates = [
+            coding for coding in ('br', 'gzip')
+            if coding in ENCODERS and accepted.get(coding, wildcard) > 0
+        ]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda coding: accepted.get(coding, wildcard))
+
+    def level_for(self, content_type, encoding):
+        """
+        Obtiene el nivel de compresión configurado para el content type.
+        """
+        levels = self.config['LEVELS']
+        major_type = content_type.split('/')[0]
+        for key in (content_type, f'{major_type}/*', '*'):
+            if key in levels and encoding in levels[key]:
+                return levels[key][encoding]
+        return DEFAULT_COMPRESSION['LEVELS']['*'][encoding]
+
+    def _is_excluded(self, content_type):
+        return any(content_type.startswith(excluded) for excluded in self.config['EXCLUDED_TYPES'])
+
+    def _compress_content(self, response, encoding, level):
+        """
+        Comprime una respuesta completa. Retorna False si no reduce el tamaño.
+        """
+        content = response.content
+        started = time.thread_time()
+        encoder = ENCODERS[encoding](level)
+        compressed = encoder.compress(content) + encoder.finish()
+        compression_stats.record(encoding, len(content), len(compressed), time.thread_time() - started)
+
+        if len(compressed) >= len(content):
+            return False
+
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        return True
+
+    def _compress_streaming(self, response, encoding, level):
+        """
+        Sustituye el contenido en streaming por su versión comprimida por fragmentos.
+        """
+        encoder = ENCODERS[encoding](level)
+
+        def compress_chunk(chunk, final=False):
+            started = time.thread_time()
+            data = encoder.compress(chunk) + (encoder.finish() if final else encoder.flush())
+            compression_stats.record(
+                encoding, len(chunk), len(data), time.thread_time() - started, responses=int(final)
+            )
+            return data
+
+        if response.is_async:
+            original = response.streaming_content
+
+            async def compressed_content():
+                async for chunk in original:
+                    yield compress_chunk(bytes(chunk))
+                yield compress_chunk(b'', final=True)
+        else:
+            original = response.streaming_content
+
+            def compressed_content():
+                for chunk in original:
+                    yield compress_chunk(bytes(chunk))
+                yield compress_chunk(b'', final=True)
+
+        response.streaming_content = compressed_content()
+        response.headers.pop('Content-Length', None)
+
+
+def _as_coroutine(hook):
+    # Método ligado: Django usa `__self__` para nombrar el middleware en errores
+    async def coroutine_hook(self, *args):
+        return hook(*args)
+    return MethodType(coroutine_hook, hook.__self__)
+
+
+class HybridMiddleware:
+    """
+    Base de los middlewares del core: sirven en la cadena síncrona (WSGI) y en
+    la async (ASGI) sin que Django los adapte con un hilo por petición. Las
+    subclases implementan `__call__` y `__acall__`; en modo async `__call__`
+    debe delegar en `__acall__`.
+
+    `process_view` y `process_template_response` no consultan la base: en
+    modo async se exponen como corrutinas para ejecutarse en el event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            for hook in ('process_view', 'process_template_response'):
+                if hasattr(self, hook):
+                    setattr(self, hook, _as_coroutine(getattr(self, hook)))
+
+
+class SQLiteWriteQueueMiddleware(HybridMiddleware):
+    """
+    Responde 503 con Retry-After cuando una escritura no obtiene turno en la
+    cola de SQLite (WriteQueueTimeout, ver core.db.sqlite). La serialización
+    ocurre en la conexión (backend core.db.backends.sqlite_queue) para
+    cualquier petición que escriba, también las lecturas que registran
+    historial.
+    """
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+    def process_exception(self, request, exception):
+        from core.db.sqlite import WriteQueueTimeout
+
+        if not isinstance(exception, WriteQueueTimeout):
+            return None
+        response = JsonResponse(
+            {'detail': 'Servidor ocupado procesando escrituras, intente de nuevo.'}, status=503
+        )
+        response['Retry-After'] = '1'
+        return response
+
+
+class QueryInstrumentationMiddleware(HybridMiddleware):
+    """
+    Registra las consultas de cada petición (ver core.queries) cuando
+    QUERY_INSTRUMENTATION está activo:
+
+    - encabezados X-Query-Count y Server-Timing (tiempo total en base de datos)
+    - advertencia con el frame de origen por cada consulta repetida (N+1)
+    - advertencia si la acción supera el `query_budget` de su viewset
+
+    En modo async el registro se instala en el hilo de base de datos de la
+    petición, donde el ORM async ejecuta las consultas.
+    """
+
+    def __call__(self, request):
+        from core.queries import record_queries
+
+        if self.async_mode:
+            return self.__acall__(request)
+        if not getattr(settings, 'QUERY_INSTRUMENTATION', False):
+            return self.get_response(request)
+        with record_queries() as recorder:
+            request.query_recorder = recorder
+            response = self.get_response(request)
+        self.report(request, response, recorder)
+        return response
+
+    async def __acall__(self, request):
+        from core.queries import record_queries
+
+        if not getattr(settings, 'QUERY_INSTRUMENTATION', False):
+            return await self.get_response(request)
+        registro = record_queries()
+        recorder = await sync_to_async(registro.__enter__)()
+        request.query_recorder = recorder
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(registro.__exit__)(None, None, None)
+        self.report(request, response, recorder)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(request, 'query_recorder', None) is None:
+            return None
+        view = getattr(view_func, 'cls', None)
+        actions = getattr(view_func, 'actions', None) or {}
+        request.query_action = (view, actions.get(request.method.lower(), request.method.lower()))
+        return None
+
+    def report(self, request, response, recorder):
+        from core.queries import get_query_budget
+
+        response['X-Query-Count'] = str(recorder.count)
+        response['Server-Timing'] = f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} consultas"'
+
+        view, action = getattr(request, 'query_action', (None, None))
+        origen = f'{view.__name__}.{action}' if view is not None else request.path
+        for repetida in recorder.repeated():
+            logger.warning(
+                'N+1 en %s %s (%s): %d consultas desde %s: %s', request.method, request.path,
+                origen, repetida['count'], repetida['origin'], repetida['fingerprint'],
+            )
+        presupuesto = get_query_budget(view, action) if view is not None else None
+        if presupuesto is not None and recorder.action_count > presupuesto:
+            logger.warning(
+                'Presupuesto de consultas excedido en %s: %d consultas (presupuesto %d)',
+                origen, recorder.action_count, presupuesto,
+            )
+
+
+class RequestContextMiddleware(HybridMiddleware):
+    """
+    Asigna un identificador a cada petición (X-Request-ID entrante si es
+    válido, o uno nuevo) y lo asocia, junto con el usuario y la acción, a los
+    registros de logging emitidos mientras se atiende (ver core.logs). El
+    identificador se devuelve en el encabezado X-Request-ID.
+    """
+    header = 'HTTP_X_REQUEST_ID'
+    valid_request_id = _lazy_re_compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+    def __init__(self, get_response):
+        from core import logs
+
+        super().__init__(get_response)
+        self.logs = logs
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        request_id = self.request_id(request)
+        token = self.logs.bind_request(request, request_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.logs.reset_request(token)
+        response['X-Request-ID'] = request_id
+        return response
+
+    async def __acall__(self, request):
+        request_id = self.request_id(request)
+        token = self.logs.bind_request(request, request_id)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.logs.reset_request(token)
+        response['X-Request-ID'] = request_id
+        return response
+
+    def request_id(self, request):
+        request_id = request.META.get(self.header, '')
+        if not self.valid_request_id.match(request_id):
+            request_id = uuid.uuid4().hex
+        request.request_id = request_id
+        return request_id
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.logs.bind_action(view_label(view_func, request.method))
+        return None
+
+
+def view_label(view_func, method):
+    """Etiqueta `Vista.accion` de la vista que atiende la petición."""
+    view = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    actions = getattr(view_func, 'actions', None)
+    if view is None:
+        return getattr(view_func, '__name__', 'unknown')
+    if actions:
+        return f'{view.__name__}.{actions.get(method.lower(), method.lower())}'
+    return f'{view.__name__}.{method.lower()}'
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """
+    Registra en core.metrics cada petición por `viewset.accion`: latencia,
+    tiempo en base de datos, tiempo de render de la respuesta y tamaño.
+    Se desactiva con METRICS_ENABLED=False.
+    """
+
+    def __init__(self, get_response):
+        from core import metrics
+
+        super().__init__(get_response)
+        self.metrics = metrics
+        self.enabled = getattr(settings, 'METRICS_ENABLED', True)
+        self.multiproc = bool(metrics.multiproc_dir())
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        inicio = time.perf_counter()
+        base_de_datos, token = self.metrics.start_database_timer()
+        request._metrics_render = 0.0
+        try:
+            response = self.get_response(request)
+        finally:
+            self.metrics.stop_database_timer(token)
+        self.observe(request, response, inicio, base_de_datos)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        inicio = time.perf_counter()
+        # El contexto (y el acumulador) se copia a los hilos del ORM async
+        base_de_datos, token = self.metrics.start_database_timer()
+        request._metrics_render = 0.0
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.metrics.stop_database_timer(token)
+        self.observe(request, response, inicio, base_de_datos)
+        return response
+
+    def observe(self, request, response, inicio, base_de_datos):
+        self.metrics.registry.observe_request(
+            getattr(request, '_metrics_view', 'unmatched'),
+            request.method,
+            response.status_code,
+            time.perf_counter() - inicio,
+            base_de_datos[0],
+            request._metrics_render,
+            None if response.streaming else len(response.content),
+        )
+        if self.multiproc:
+            self.metrics.maybe_flush()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view = view_label(view_func, request.method)
+        return None
+
+    def process_template_response(self, request, response):
+        # Las respuestas de DRF se renderizan después de la vista
+        inicio = time.perf_counter()
+
+        def medir(rendered):
+            request._metrics_render = time.perf_counter() - inicio
+
+        response.add_post_render_callback(medir)
+        return response
+
+
+class ProfilingMiddleware(HybridMiddleware):
+    """
+    Perfila peticiones bajo demanda (ver core.profiling):
+
+    - con el encabezado PROFILING_HEADER (default: X-Profile) si el usuario es staff
+    - por muestreo, una de cada 1/PROFILING_SAMPLE_RATE peticiones
+
+    La respuesta perfilada incluye `X-Profile-Id`. Sin encabezado ni muestreo
+    el costo es una búsqueda en request.META. Debe ir después de
+    AuthenticationMiddleware.
+
+    En modo async la petición perfilada se atiende desde un hilo: el perfil de
+    CPU cubre lo que corre en ese hilo (ORM y consultas), no el event loop.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        header = getattr(settings, 'PROFILING_HEADER', 'X-Profile')
+        self.meta_key = 'HTTP_' + header.upper().replace('-', '_')
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if self.meta_key in request.META:
+            trigger = 'header' if self.is_staff(request) else None
+        else:
+            trigger = self.sample()
+        if trigger is None:
+            return self.get_response(request)
+        return self.profile(request, trigger, self.get_response)
+
+    async def __acall__(self, request):
+        if self.meta_key in request.META:
+            trigger = 'header' if await sync_to_async(self.is_staff)(request) else None
+        else:
+            trigger = self.sample()
+        if trigger is None:
+            return await self.get_response(request)
+        return await sync_to_async(self.profile)(request, trigger, async_to_sync(self.get_response))
+
+    def sample(self):
+        if self.sample_rate and random.random() < self.sample_rate:
+            return 'sample'
+        return None
+
+    def profile(self, request, trigger, get_response):
+        from core.profiling import profile_request
+
+        response, profile_id = profile_request(get_response, request, trigger)
+        if profile_id is not None:
+            response['X-Profile-Id'] = profile_id
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._profile_view = view_label(view_func, request.method)
+        return None
+
+    @staticmethod
+    def is_staff(request):
+        """
+        Autentica con las clases de DRF (sesión o token) para decidir antes
+        de ejecutar la vista; cualquier error de autenticación equivale a no.
+        """
+        from rest_framework.request import Request
+        from rest_framework.settings import api_settings
+
+        try:
+            usuario = Request(
+                request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+            ).user
+        except Exception:
+            return False
+        return bool(getattr(usuario, 'is_staff', False))
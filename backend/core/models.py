@@ -1,9 +1,12 @@
 """
 Modelos base siguiendo principios DDD y Clean Architecture.
 """
-from django.db import models
+from django.core.exceptions import NON_FIELD_ERRORS
+from django.db import connection, models
 from django.utils import timezone
-import uuid
+from .fields import CompactUUIDField, generate_primary_key
+from .indexes import ActiveIndex
+from .managers import ActiveManager, AllObjectsManager
 
 
 class BaseModel(models.Model):
@@ -11,11 +14,11 @@ class BaseModel(models.Model):
     Modelo base que implementa campos comunes para todas las entidades.
     Sigue principios de DDD (Domain-Driven Design).
     """
-    id = models.UUIDField(
+    id = CompactUUIDField(
         primary_key=True,
-        default=uuid.uuid4,
+        default=generate_primary_key,
         editable=False,
-        help_text="Identificador único universal"
+        help_text="Identificador único universal (ordenado por tiempo con UUIDv7)"
     )
     
     created_at = models.DateTimeField(
@@ -33,6 +36,11 @@ class BaseModel(models.Model):
         help_text="Indica si el registro está activo"
     )
 
+    # `objects` excluye los registros eliminados lógicamente;
+    # `all_objects` los incluye y debe usarse de forma explícita
+    objects = ActiveManager()
+    all_objects = AllObjectsManager()
+
     class Meta:
         abstract = True
         ordering = ['-created_at']
@@ -40,6 +48,48 @@ class BaseModel(models.Model):
     def __str__(self):
         return f"{self.__class__.__name__}({self.id})"
 
+    @classmethod
+    def _check_indexes(cls, databases):
+        """
+        Omite models.W037 (índices con condición) solo para ActiveIndex: en
+        motores sin índices parciales crea un índice equivalente sin condición.
+        """
+        errores = super()._check_indexes(databases)
+        if all(isinstance(indice, ActiveIndex) for indice in cls._meta.indexes if indice.condition is not None):
+            errores = [error for error in errores if error.id != 'models.W037']
+        return errores
+
+    def _perform_unique_checks(self, unique_checks):
+        """
+        Model._perform_unique_checks con `all_objects`: las restricciones de
+        unicidad de la base también incluyen los registros eliminados
+        lógicamente (full_clean, admin y ModelForm).
+        """
+        errors = {}
+        for model_class, unique_check in unique_checks:
+            lookup_kwargs = {}
+            for field_name in unique_check:
+                f = self._meta.get_field(field_name)
+                lookup_value = getattr(self, f.attname)
+                if lookup_value is None or (
+                    lookup_value == '' and connection.features.interprets_empty_strings_as_nulls
+                ):
+                    continue
+                if f in model_class._meta.pk_fields and not self._state.adding:
+                    continue
+                lookup_kwargs[str(field_name)] = lookup_value
+            if len(unique_check) != len(lookup_kwargs):
+                continue
+
+            manager = getattr(model_class, 'all_objects', model_class._default_manager)
+            qs = manager.filter(**lookup_kwargs)
+            if not self._state.adding and self._is_pk_set(model_class._meta):
+                qs = qs.exclude(pk=self._get_pk_val(model_class._meta))
+            if qs.exists():
+                key = unique_check[0] if len(unique_check) == 1 else NON_FIELD_ERRORS
+                errors.setdefault(key, []).append(self.unique_error_message(model_class, unique_check))
+        return errors
+
     def soft_delete(self):
         """Eliminación lógica del registro."""
         self.is_active = False
@@ -0,0 +1,183 @@
+"""
+Perfilado bajo demanda de peticiones.
+
+Una petición perfilada guarda en PROFILING_DIR tres archivos con el mismo id:
+
+- `<id>.json`: metadatos (acción, usuario, duración, consultas) y resumen
+  de las funciones más costosas y de las líneas que más memoria asignaron
+- `<id>.prof`: perfil de CPU de cProfile (pstats, snakeviz, ...)
+- `<id>.tracemalloc`: snapshot de tracemalloc (`tracemalloc.Snapshot.load`)
+
+cProfile y tracemalloc son globales al proceso, por lo que solo se perfila
+una petición a la vez; las demás se atienden sin perfilar.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+
+from django.conf import settings
+
+PROFILE_ID_RE = re.compile(r'^\d{8}T\d{6}-[0-9a-f]{8}$')
+
+PROFILE_FILES = {
+    'cpu': '.prof',
+    'memory': '.tracemalloc',
+}
+
+# Filas del resumen guardado en los metadatos
+SUMMARY_ROWS = 25
+
+_profiling_lock = threading.Lock()
+
+
+def profiles_dir():
+    return str(getattr(settings, 'PROFILING_DIR', os.path.join(settings.BASE_DIR, 'profiles')))
+
+
+def profile_path(profile_id, kind):
+    """Ruta del archivo `kind` ('cpu' o 'memory') de un perfil, o None si el id no es válido."""
+    if not PROFILE_ID_RE.match(profile_id) or kind not in PROFILE_FILES:
+        return None
+    return os.path.join(profiles_dir(), profile_id + PROFILE_FILES[kind])
+
+
+def list_profiles():
+    """Metadatos de los perfiles guardados, del más reciente al más antiguo."""
+    directorio = profiles_dir()
+    if not os.path.isdir(directorio):
+        return []
+    perfiles = []
+    for nombre in sorted(os.listdir(directorio), reverse=True):
+        perfil_id, extension = os.path.splitext(nombre)
+        if extension == '.json' and PROFILE_ID_RE.match(perfil_id):
+            perfil = load_profile(perfil_id)
+            if perfil is not None:
+                perfil.pop('summary', None)
+                perfiles.append(perfil)
+    return perfiles
+
+
+def load_profile(profile_id):
+    """Metadatos y resumen de un perfil (o None)."""
+    if not PROFILE_ID_RE.match(profile_id):
+        return None
+    try:
+        with open(os.path.join(profiles_dir(), f'{profile_id}.json'), encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError):
+        return None
+
+
+def delete_profile(profile_id):
+    if not PROFILE_ID_RE.match(profile_id):
+        return
+    for extension in ('.json', *PROFILE_FILES.values()):
+        try:
+            os.remove(os.path.join(profiles_dir(), profile_id + extension))
+        except FileNotFoundError:
+            pass
+
+
+def prune_profiles():
+    """Conserva solo los PROFILING_MAX_PROFILES perfiles más recientes."""
+    maximo = getattr(settings, 'PROFILING_MAX_PROFILES', 200)
+    for perfil in list_profiles()[maximo:]:
+        delete_profile(perfil['id'])
+
+
+def cpu_summary(profiler):
+    """Funciones con mayor tiempo acumulado."""
+    estadisticas = pstats.Stats(profiler, stream=io.StringIO())
+    filas = []
+    for (archivo, linea, funcion), (_, llamadas, propio, acumulado, _) in estadisticas.stats.items():
+        filas.append({
+            'function': f'{archivo}:{linea}({funcion})',
+            'calls': llamadas,
+            'own_seconds': round(propio, 6),
+            'cumulative_seconds': round(acumulado, 6),
+        })
+    filas.sort(key=lambda fila: fila['cumulative_seconds'], reverse=True)
+    return filas[:SUMMARY_ROWS]
+
+
+def memory_summary(snapshot):
+    """Líneas que más memoria asignaron durante la petición (y siguen vivas al terminar)."""
+    return [
+        {'line': str(estadistica.traceback[0]), 'size': estadistica.size, 'count': estadistica.count}
+        for estadistica in snapshot.statistics('lineno')[:SUMMARY_ROWS]
+    ]
+
+
+def _usuario(request):
+    usuario = getattr(request, 'user', None)
+    if usuario is None or not usuario.is_authenticated:
+        return None
+    return usuario.get_username()
+
+
+def profile_request(get_response, request, trigger):
+    """
+    Atiende la petición con cProfile y tracemalloc activos y guarda el perfil.
+
+    Retorna (response, profile_id); profile_id es None si otra petición
+    se estaba perfilando y esta se atendió sin perfilar.
+    """
+    from core.queries import record_queries
+
+    if not _profiling_lock.acquire(blocking=False):
+        return get_response(request), None
+    try:
+        iniciar_tracemalloc = not tracemalloc.is_tracing()
+        if iniciar_tracemalloc:
+            tracemalloc.start(getattr(settings, 'PROFILING_TRACEMALLOC_FRAMES', 10))
+        profiler = cProfile.Profile()
+        inicio = time.perf_counter()
+        try:
+            with record_queries() as recorder:
+                profiler.enable()
+                try:
+                    response = get_response(request)
+                finally:
+                    profiler.disable()
+            duracion = time.perf_counter() - inicio
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            ))
+        finally:
+            if iniciar_tracemalloc:
+                tracemalloc.stop()
+
+        perfil_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        metadatos = {
+            'id': perfil_id,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'trigger': trigger,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'action': getattr(request, '_profile_view', None),
+            'user': _usuario(request),
+            'status': response.status_code,
+            'duration_ms': round(duracion * 1000, 3),
+            'queries': recorder.count,
+            'db_ms': round(recorder.duration * 1000, 3),
+            'summary': {'cpu': cpu_summary(profiler), 'memory': memory_summary(snapshot)},
+        }
+        directorio = profiles_dir()
+        os.makedirs(directorio, exist_ok=True)
+        profiler.dump_stats(os.path.join(directorio, f'{perfil_id}.prof'))
+        snapshot.dump(os.path.join(directorio, f'{perfil_id}.tracemalloc'))
+        # Los metadatos al final: un perfil listado siempre tiene sus archivos
+        with open(os.path.join(directorio, f'{perfil_id}.json'), 'w', encoding='utf-8') as archivo:
+            json.dump(metadatos, archivo)
+        prune_profiles()
+        return response, perfil_id
+    finally:
+        _profiling_lock.release()
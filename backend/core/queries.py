@@ -0,0 +1,165 @@
+"""
+Instrumentación de consultas por petición.
+
+QueryRecorder se instala con `connection.execute_wrapper` y registra, para
+cada consulta, su huella (SQL normalizado sin literales ni listas IN), la
+duración y, cuando una huella se repite, el frame del proyecto que la originó.
+Una huella repetida QUERY_N1_THRESHOLD veces o más se marca como N+1.
+
+Cada viewset declara su presupuesto de consultas por acción:
+
+    class CajonViewSet(BaseViewSet):
+        query_budget = {'list': 3, 'retrieve': 2, 'create': 6}
+
+El presupuesto cuenta las consultas de la acción, sin las de autenticación
+(ver core.views.QueryBudgetMixin). El middleware
+(core.middleware.QueryInstrumentationMiddleware) lo verifica en cada petición
+y los tests lo hacen cumplir (tests/test_presupuesto_consultas.py).
+"""
+import os
+import re
+import sys
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+DEFAULT_N1_THRESHOLD = 3
+
+_literal_re = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s")
+_lista_re = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_espacios_re = re.compile(r'\s+')
+# Sentencias de control que se repiten legítimamente en cada transacción
+_control_re = re.compile(r'^\s*(SAVEPOINT|RELEASE|ROLLBACK|BEGIN|COMMIT)\b', re.IGNORECASE)
+
+_EXCLUDED_DIRS = ('site-packages', 'dist-packages')
+# Wrappers de consultas propios (instrumentación, cola de SQLite), nunca son el origen
+_INSTRUMENTATION_FILES = (
+    os.path.join('core', 'queries.py'), os.path.join('core', 'metrics.py'), os.path.join('core', 'db', 'sqlite.py'),
+)
+_ORM_DIR = os.path.join('django', 'db', '')
+
+
+def fingerprint(sql):
+    """SQL normalizado: literales y parámetros como '?' y listas IN colapsadas."""
+    normalizado = _literal_re.sub('?', sql)
+    normalizado = _lista_re.sub('(...)', normalizado)
+    return _espacios_re.sub(' ', normalizado).strip()
+
+
+def origin_frame():
+    """
+    Frame más interno del código del proyecto ('ruta:línea en función').
+
+    Si la consulta nace al serializar (p. ej. un campo con `source='cajon.nombre'`)
+    se agrega el campo del serializador responsable. Si no hay frames del
+    proyecto se usa el frame más interno fuera del ORM.
+    """
+    proyecto = str(settings.BASE_DIR)
+    campo = externo = None
+    frame = sys._getframe(1)
+    while frame is not None:
+        archivo = frame.f_code.co_filename
+        if campo is None and frame.f_code.co_name == 'to_representation' and 'field' in frame.f_locals:
+            serializador = frame.f_locals.get('self')
+            campo = f"{type(serializador).__name__}.{getattr(frame.f_locals['field'], 'field_name', '?')}"
+        if archivo.endswith(_INSTRUMENTATION_FILES) or _ORM_DIR in archivo:
+            pass
+        elif archivo.startswith(proyecto) and not any(excluido in archivo for excluido in _EXCLUDED_DIRS):
+            origen = f'{os.path.relpath(archivo, proyecto)}:{frame.f_lineno} en {frame.f_code.co_name}'
+            return f'{origen} ({campo})' if campo else origen
+        elif externo is None:
+            externo = f'{archivo}:{frame.f_lineno} en {frame.f_code.co_name}'
+        frame = frame.f_back
+    return f'{externo} ({campo})' if campo and externo else externo
+
+
+def n1_threshold():
+    return getattr(settings, 'QUERY_N1_THRESHOLD', DEFAULT_N1_THRESHOLD)
+
+
+class QueryRecorder:
+    """
+    Wrapper de ejecución que acumula las consultas de un bloque.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = {}
+        self.action_start = 0
+
+    def mark_action(self):
+        """Marca el inicio de la acción (tras autenticación y permisos)."""
+        self.action_start = self.count
+
+    @property
+    def action_count(self):
+        """Consultas de la acción, las que cuenta el presupuesto."""
+        return self.count - self.action_start
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(sql, time.perf_counter() - inicio)
+
+    def record(self, sql, duracion):
+        self.duration += duracion
+        # Las sentencias de control de transacciones no cuentan para el presupuesto
+        if _control_re.match(sql):
+            return
+        self.count += 1
+        huella = fingerprint(sql)
+        entrada = self.statements.get(huella)
+        if entrada is None:
+            self.statements[huella] = {'count': 1, 'duration': duracion, 'origin': None}
+            return
+        entrada['count'] += 1
+        entrada['duration'] += duracion
+        # El stack solo se inspecciona cuando la consulta se repite
+        if entrada['origin'] is None:
+            entrada['origin'] = origin_frame()
+
+    def repeated(self, threshold=None):
+        """Huellas repetidas al menos `threshold` veces (patrones N+1)."""
+        threshold = threshold or n1_threshold()
+        return [
+            {'fingerprint': huella, **datos}
+            for huella, datos in sorted(self.statements.items(), key=lambda item: -item[1]['count'])
+            if datos['count'] >= threshold
+        ]
+
+    def summary(self, threshold=None):
+        return {
+            'queries': self.count,
+            'duration_ms': round(self.duration * 1000, 3),
+            'n_plus_one': [
+                {**repetida, 'duration': round(repetida['duration'] * 1000, 3)}
+                for repetida in self.repeated(threshold)
+            ],
+        }
+
+
+@contextmanager
+def record_queries(aliases=None):
+    """
+    Registra las consultas del bloque en todas las bases (o en `aliases`).
+
+        with record_queries() as recorder:
+            ...
+        recorder.count, recorder.repeated()
+    """
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for alias in aliases or connections:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        yield recorder
+
+
+def get_query_budget(view, action):
+    """Presupuesto de consultas declarado por la vista para la acción (o None)."""
+    presupuesto = getattr(view, 'query_budget', None) or {}
+    return presupuesto.get(action)
@@ -2,8 +2,12 @@
 Serializadores base para la API REST.
 Implementa principios SOLID y DRY.
 """
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 from rest_framework.fields import CharField, DateTimeField, UUIDField, BooleanField
+from .models import AuditableModel
 
 
 class BaseModelSerializer(serializers.ModelSerializer):
@@ -26,25 +30,55 @@ class BaseModelSerializer(serializers.ModelSerializer):
         """
         return super().validate(attrs)
 
+    def build_standard_field(self, field_name, model_field):
+        """
+        Las restricciones de unicidad de la base de datos incluyen los registros
+        eliminados lógicamente, por lo que la validación usa `all_objects`.
+        """
+        field_class, field_kwargs = super().build_standard_field(field_name, model_field)
+        manager = getattr(self.Meta.model, 'all_objects', None)
+        if manager is not None and 'validators' in field_kwargs:
+            field_kwargs['validators'] = [
+                UniqueValidator(queryset=manager.all(), message=validator.message, lookup=validator.lookup)
+                if isinstance(validator, UniqueValidator) else validator
+                for validator in field_kwargs['validators']
+            ]
+        return field_class, field_kwargs
+
     def create(self, validated_data):
         """
         Override create para manejar lógica de negocio común.
+        El usuario se pasa a save() para la auditoría: no es un campo del modelo.
         """
-        request = self.context.get('request')
-        if request and hasattr(request, 'user'):
-            validated_data['user'] = request.user
-        
-        return super().create(validated_data)
+        user = self._pop_user(validated_data)
+        return self._save_instance(self.Meta.model(**validated_data), user)
 
     def update(self, instance, validated_data):
         """
         Override update para manejar lógica de negocio común.
         """
+        user = self._pop_user(validated_data)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        return self._save_instance(instance, user)
+
+    def _pop_user(self, validated_data):
+        """Obtiene el usuario que realiza la operación."""
         request = self.context.get('request')
-        if request and hasattr(request, 'user'):
-            validated_data['user'] = request.user
-        
-        return super().update(instance, validated_data)
+        user = validated_data.pop('user', getattr(request, 'user', None))
+        return user if user is not None and user.is_authenticated else None
+
+    def _save_instance(self, instance, user):
+        """
+        Guarda la instancia convirtiendo los errores de validación del modelo
+        (por ejemplo, un cajón lleno) en errores de la API.
+        """
+        kwargs = {'user': user} if isinstance(instance, AuditableModel) else {}
+        try:
+            instance.save(**kwargs)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(serializers.as_serializer_error(exc))
+        return instance
 
 
 class AuditableModelSerializer(BaseModelSerializer):
@@ -69,3 +103,42 @@ class DetailSerializer(serializers.Serializer):
     def __init__(self, message="Operación exitosa", *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.fields['detail'].default = message
+
+
+class BatchSubRequestSerializer(serializers.Serializer):
+    """
+    Serializador para una sub-petición dentro de un batch.
+    """
+    method = serializers.ChoiceField(
+        choices=['GET', 'POST', 'PUT', 'PATCH', 'DELETE'],
+        default='GET'
+    )
+    url = serializers.CharField(max_length=2000)
+    body = serializers.JSONField(required=False, allow_null=True)
+
+    def validate_method(self, value):
+        """Normalizar el método HTTP."""
+        return value.upper()
+
+    def validate_url(self, value):
+        """Solo se permiten rutas relativas de la API."""
+        if not value.startswith('/'):
+            raise serializers.ValidationError("La URL debe ser una ruta relativa que inicie con '/'")
+        return value
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    """
+    Serializador para la petición batch completa.
+    """
+    requests = BatchSubRequestSerializer(many=True, allow_empty=False)
+    atomic = serializers.BooleanField(default=False)
+
+    def validate_requests(self, value):
+        """Validar el límite de sub-peticiones por llamada."""
+        max_requests = settings.BATCH_MAX_SUBREQUESTS
+        if len(value) > max_requests:
+            raise serializers.ValidationError(
+                f"Se permiten como máximo {max_requests} sub-peticiones por llamada"
+            )
+        return value
@@ -0,0 +1,143 @@
+"""
+Throttling por costo con un token bucket por usuario (por IP sin sesión).
+
+Cada acción declara cuántos tokens consume en `throttle_cost` de su vista,
+igual que `query_budget`; las acciones sin costo declarado consumen
+THROTTLE_DEFAULT_COST:
+
+    throttle_cost = {'consultar_objeto': 10, 'estadisticas': 10}
+
+El bucket admite ráfagas de THROTTLE_BUCKET['CAPACITY'] tokens y se rellena
+a THROTTLE_BUCKET['REFILL_RATE'] tokens por segundo. Se implementa con GCRA
+(equivalente a un token bucket): en la caché solo se guarda el instante en
+que el bucket vuelve a estar lleno. Con Redis la lectura y la escritura son
+un script Lua atómico entre todos los workers (con el reloj de Redis),
+ejecutado con un cliente propio creado desde la LOCATION de la caché. Con
+LocMemCache (la caché es del propio proceso) se serializan con un lock del
+proceso y con DummyCache no se limita; otros backends compartidos no
+admiten una actualización atómica y se rechazan con ImproperlyConfigured.
+Una petición rechazada responde 429 con Retry-After y no consume tokens.
+"""
+import math
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.throttling import BaseThrottle
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - dependencia opcional
+    redis = None
+
+from core.metrics import registry
+
+CACHE_PREFIX = 'throttle:'
+
+# KEYS[1]: instante en que el bucket vuelve a estar lleno. ARGV: segundos por
+# token, tolerancia (capacidad × segundos por token) y costo. Retorna la
+# espera en segundos ('0' si se admite) como cadena: Redis trunca los
+# números de Lua a enteros.
+GCRA_SCRIPT = """
+local reloj = redis.call('TIME')
+local ahora = tonumber(reloj[1]) + tonumber(reloj[2]) / 1000000
+local intervalo, tolerancia, costo = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local lleno = math.max(tonumber(redis.call('GET', KEYS[1]) or ahora), ahora)
+local nuevo = lleno + costo * intervalo
+local espera = nuevo - tolerancia - ahora
+if espera > 0 then
+    return tostring(espera)
+end
+redis.call('SET', KEYS[1], tostring(nuevo), 'PX', math.ceil((nuevo - ahora) * 1000))
+return '0'
+"""
+
+
+class TokenBucket:
+    """Buckets GCRA en la caché `default`."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # LOCATION -> script GCRA registrado en un cliente de ese servidor
+        self._scripts = {}
+
+    def consume(self, key, cost, capacity, refill_rate):
+        """Consume `cost` tokens; retorna 0 si se admite o los segundos hasta poder hacerlo."""
+        interval = 1 / refill_rate
+        # Un costo mayor que la capacidad no se admitiría nunca
+        cost = min(cost, capacity)
+        backend = caches['default']
+        if isinstance(backend, RedisCache):
+            return self._consume_redis(backend, CACHE_PREFIX + key, cost, capacity * interval, interval)
+        if isinstance(backend, (LocMemCache, DummyCache)):
+            return self._consume_local(backend, CACHE_PREFIX + key, cost, capacity * interval, interval)
+        raise ImproperlyConfigured(
+            'core.throttling.CostBasedThrottle requiere RedisCache, LocMemCache o DummyCache '
+            f'en la caché default (configurada: {type(backend).__name__})'
+        )
+
+    def _consume_redis(self, backend, key, cost, tolerance, interval):
+        key = backend.make_and_validate_key(key)
+        return float(self._get_script()(keys=[key], args=[interval, tolerance, cost]))
+
+    def _get_script(self):
+        # Como RedisCache, las escrituras van al primer servidor de LOCATION
+        location = settings.CACHES['default']['LOCATION']
+        if isinstance(location, str):
+            location = re.split('[;,]', location)
+        url = location[0]
+        script = self._scripts.get(url)
+        if script is None:
+            with self._lock:
+                script = self._scripts.get(url)
+                if script is None:
+                    script = redis.Redis.from_url(url).register_script(GCRA_SCRIPT)
+                    self._scripts[url] = script
+        return script
+
+    def _consume_local(self, backend, key, cost, tolerance, interval):
+        with self._lock:
+            now = time.time()
+            full_at = max(backend.get(key) or now, now)
+            new_full_at = full_at + cost * interval
+            wait = new_full_at - tolerance - now
+            if wait > 0:
+                return wait
+            backend.set(key, new_full_at, math.ceil(new_full_at - now))
+            return 0
+
+
+bucket = TokenBucket()
+
+
+def get_throttle_cost(view):
+    """Tokens que consume la acción actual de la vista."""
+    costs = getattr(view, 'throttle_cost', None) or {}
+    return costs.get(getattr(view, 'action', None), settings.THROTTLE_DEFAULT_COST)
+
+
+class CostBasedThrottle(BaseThrottle):
+    """
+    Throttle de DRF sobre TokenBucket: todas las acciones de un usuario
+    comparten su bucket y cada una consume su `throttle_cost`.
+    """
+
+    def allow_request(self, request, view):
+        user = request.user
+        ident = f'user:{user.pk}' if user and user.is_authenticated else f'ip:{self.get_ident(request)}'
+        config = settings.THROTTLE_BUCKET
+        self._wait = bucket.consume(ident, get_throttle_cost(view), config['CAPACITY'], config['REFILL_RATE'])
+        if self._wait:
+            registry.inc('throttled_requests_total', (('view', type(view).__name__),))
+            return False
+        return True
+
+    def wait(self):
+        # Retry-After se envía en segundos enteros
+        return math.ceil(self._wait)
@@ -2,35 +2,434 @@
 Views base para la API REST.
 Implementa principios SOLID y patrones de diseño.
 """
+import hmac
+import json
+import os
+from functools import update_wrapper
+
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, status
+from rest_framework.authtoken.models import Token
+from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, SAFE_METHODS
 from rest_framework.views import APIView
-from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, get_object_or_404
 from django.db import transaction
-from .serializers import DetailSerializer
+from . import events
+from .asgi import close_request_connections
+from .batch import BatchExecutor, get_identity_map
+from .metrics import render_prometheus
+from .profiling import delete_profile, list_profiles, load_profile, profile_path
+from .db.routers import (
+    activate_replica, deactivate_replica, is_pinned_to_primary, pin_to_primary
+)
+from .serializers import BatchRequestSerializer, DetailSerializer
 
 
 class HealthCheckView(APIView):
     """
     Vista para verificar el estado de la API.
+    Es pública: solo informa el estado. Las métricas internas (pools de
+    conexiones, colas) se exponen en /metrics, protegido con METRICS_TOKEN.
     """
     authentication_classes = []
     permission_classes = []
+    throttle_classes = []
 
     def get(self, request):
         """
         Endpoint de health check.
         """
-        return Response({
+        data = {
             'status': 'healthy',
             'message': 'Smart Drawers Backend API is running',
             'version': '1.0.0'
-        }, status=status.HTTP_200_OK)
+        }
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class MetricsView(APIView):
+    """
+    Métricas de la API en formato de texto de Prometheus.
+    Si METRICS_TOKEN está definido se exige `Authorization: Bearer <token>`;
+    si no, solo las leen usuarios staff.
+    """
+    throttle_classes = []
+
+    def get_authenticators(self):
+        # Con METRICS_TOKEN el Bearer es el token de métricas, no el de un usuario
+        return [] if settings.METRICS_TOKEN else super().get_authenticators()
+
+    def get_permissions(self):
+        return [] if settings.METRICS_TOKEN else [IsAdminUser()]
+
+    def get(self, request):
+        token = settings.METRICS_TOKEN
+        if token and not hmac.compare_digest(
+            request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode()
+        ):
+            return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+        return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class LoginView(ObtainAuthToken):
+    """
+    Inicio de sesión por token (POST /api/v1/auth/login/ con username y
+    password). Retorna el token del usuario, creado en el primer inicio.
+    """
+    authentication_classes = []
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data['user']
+        token, _ = Token.objects.get_or_create(user=user)
+        return Response({
+            'token': token.key,
+            'user': {
+                'id': user.pk,
+                'username': user.username,
+                'email': user.email,
+                'first_name': user.first_name,
+                'last_name': user.last_name,
+            },
+        })
+
+
+class LogoutView(APIView):
+    """
+    Revoca el token de la petición (POST /api/v1/auth/logout/); deja de
+    autenticar también en las cachés (core.authentication).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if isinstance(request.auth, Token):
+            Token.objects.filter(key=request.auth.key).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class BatchView(APIView):
+    """
+    Vista para ejecutar varias sub-peticiones de la API en una sola llamada.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """
+        Ejecuta las sub-peticiones en orden y retorna todos los resultados.
+
+        Body parameters:
+        - requests: Lista de sub-peticiones ({method, url, body})
+        - atomic: Si es verdadero, las escrituras comparten una transacción
+        """
+        serializer = BatchRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        executor = BatchExecutor(request, excluded_views=(BatchView,))
+        results = executor.execute(
+            serializer.validated_data['requests'],
+            atomic=serializer.validated_data['atomic']
+        )
+
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+
+class ProfileViewSet(viewsets.ViewSet):
+    """
+    Perfiles de peticiones guardados por ProfilingMiddleware (solo staff).
+
+    - list: metadatos de todos los perfiles
+    - retrieve: metadatos y resumen de CPU y memoria
+    - descargar: archivo del perfil (`?tipo=cpu` pstats o `?tipo=memoria` tracemalloc)
+    """
+    permission_classes = [IsAdminUser]
+    lookup_value_regex = r'\d{8}T\d{6}-[0-9a-f]{8}'
+    tipos = {'cpu': 'cpu', 'memoria': 'memory'}
+
+    def list(self, request):
+        return Response(list_profiles())
+
+    def retrieve(self, request, pk=None):
+        perfil = load_profile(pk)
+        if perfil is None:
+            raise Http404
+        return Response(perfil)
+
+    def destroy(self, request, pk=None):
+        if load_profile(pk) is None:
+            raise Http404
+        delete_profile(pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['get'])
+    def descargar(self, request, pk=None):
+        tipo = request.query_params.get('tipo', 'cpu')
+        if tipo not in self.tipos:
+            return Response(
+                {'detail': f'Tipo de perfil no válido: {tipo!r} (cpu o memoria)'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        ruta = profile_path(pk, self.tipos[tipo])
+        try:
+            archivo = open(ruta, 'rb')
+        except (FileNotFoundError, TypeError):
+            raise Http404
+        return FileResponse(archivo, as_attachment=True, filename=os.path.basename(ruta))
+
+
+class IdentityMapMixin:
+    """
+    Mixin que reutiliza las entidades ya cargadas dentro de una petición batch.
+    """
+
+    def get_object(self):
+        """
+        Obtener el objeto desde la caché de identidad en lecturas de un batch.
+        """
+        identity_map = get_identity_map()
+        if identity_map is None or self.request.method not in SAFE_METHODS:
+            return super().get_object()
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        key = ('object', self.__class__.__name__, self.kwargs.get(lookup_url_kwarg))
+        return identity_map.get_or_load(key, super().get_object)
 
 
-class BaseViewSet(viewsets.ModelViewSet):
+class ReplicaReadMixin:
+    """
+    Mixin que envía a una réplica las lecturas de las acciones seguras
+    indicadas en `replica_actions` ('__all__' para todas).
+
+    Tras una escritura exitosa el usuario queda fijado a la primaria
+    durante REPLICA_PIN_SECONDS para leer sus propios cambios.
+    """
+    replica_actions = ('list', 'retrieve')
+
+    def use_replica(self, request):
+        if request.method not in SAFE_METHODS:
+            return False
+        if self.replica_actions != '__all__' and getattr(self, 'action', None) not in self.replica_actions:
+            return False
+        user = request.user
+        return not (user.is_authenticated and is_pinned_to_primary(user.pk))
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # use_replica consulta la caché; la activación es del contexto actual
+        self._replica_pendiente = self.use_replica(request)
+        if not getattr(self, 'defer_replica_activation', False):
+            self.activate_replica_reads()
+
+    def activate_replica_reads(self):
+        """Envía a la réplica las lecturas del contexto actual si `initial` lo decidió."""
+        if self.__dict__.pop('_replica_pendiente', False):
+            self._replica_token = activate_replica()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        deactivate_replica(self.__dict__.pop('_replica_token', None))
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user.pk)
+        return response
+
+
+class QueryBudgetMixin:
+    """
+    Mixin que declara el presupuesto de consultas por acción:
+
+        query_budget = {'list': 2, 'retrieve': 2, 'create': 3}
+
+    El presupuesto cuenta las consultas posteriores a la autenticación y los
+    permisos (ver core.queries). Los tests lo hacen cumplir para todas las
+    acciones del router.
+    """
+    query_budget = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        recorder = getattr(request, 'query_recorder', None)
+        if recorder is not None:
+            recorder.mark_action()
+
+
+async def afetch_all(queryset):
+    """Evalúa un queryset con el ORM async y retorna la lista de resultados."""
+    return [fila async for fila in queryset]
+
+
+class AsyncActionsMixin:
+    """
+    Versiones async de las acciones de lectura listadas en `async_actions`,
+    usadas bajo ASGI (ver core.asgi); bajo WSGI se usan las síncronas:
+
+        async_actions = ('list', 'estadisticas')
+
+    La versión async de una acción es el método `a<acción>` (`alist`,
+    `aestadisticas`) y consulta con el ORM async. `initial` (autenticación,
+    permisos, throttles y fijación a la primaria) y los filtros con parámetros
+    se ejecutan en un hilo (consultan la base o la caché); la activación de la
+    réplica, la serialización y el render de errores, en el event loop.
+    Los demás métodos HTTP de la misma ruta se atienden con la vista síncrona.
+    """
+    async_actions = ()
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        asincronas = {metodo: accion for metodo, accion in actions.items() if accion in cls.async_actions}
+        if 'get' in asincronas:
+            asincronas.setdefault('head', asincronas['get'])
+        if asincronas:
+            view.async_view = cls._as_async_view(view, asincronas, initkwargs)
+        return view
+
+    @classmethod
+    def _as_async_view(cls, view, asincronas, initkwargs):
+        vista_sincrona = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            accion = asincronas.get(request.method.lower())
+            if accion is None:
+                return await vista_sincrona(request, *args, **kwargs)
+            self = cls(**initkwargs)
+            self.action_map = view.actions
+            self.args, self.kwargs = args, kwargs
+            return await self.adispatch(request, getattr(self, f'a{accion}'), *args, **kwargs)
+
+        update_wrapper(async_view, view)
+        return async_view
+
+    async def adispatch(self, request, handler, *args, **kwargs):
+        """APIView.dispatch para una acción async."""
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            # La réplica se activa en el contexto del event loop, donde corre la
+            # acción: un ContextVar fijado en el hilo no se puede restablecer aquí
+            self.defer_replica_activation = True
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if isinstance(self, ReplicaReadMixin):
+                self.activate_replica_reads()
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def afilter_queryset(self, queryset):
+        """filter_queryset; con parámetros corre en un hilo (django-filter valida contra la base)."""
+        if not self.request.query_params:
+            return self.filter_queryset(queryset)
+        return await sync_to_async(self.filter_queryset)(queryset)
+
+    async def aget_object(self):
+        """get_object con el ORM async."""
+        queryset = await self.afilter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await aget_object_or_404(queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def apaginate_queryset(self, queryset):
+        """paginate_queryset con el conteo y la página consultados con el ORM async."""
+        paginador = self.paginator
+        if not isinstance(paginador, PageNumberPagination):
+            return await sync_to_async(self.paginate_queryset)(queryset)
+        tamanio = paginador.get_page_size(self.request)
+        if not tamanio:
+            return None
+        django_paginator = paginador.django_paginator_class(queryset, tamanio)
+        django_paginator.count = await queryset.acount()
+        numero = paginador.get_page_number(self.request, django_paginator)
+        try:
+            pagina = django_paginator.page(numero)
+        except InvalidPage as exc:
+            raise NotFound(paginador.invalid_page_message.format(page_number=numero, message=str(exc)))
+        pagina.object_list = await afetch_all(pagina.object_list)
+        paginador.request, paginador.page = self.request, pagina
+        if django_paginator.num_pages > 1 and paginador.template is not None:
+            paginador.display_page_controls = True
+        return pagina.object_list
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        pagina = await self.apaginate_queryset(queryset)
+        if pagina is not None:
+            return self.get_paginated_response(self.get_serializer(pagina, many=True).data)
+        return Response(self.get_serializer(await afetch_all(queryset), many=True).data)
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Permite negociar `Accept: text/event-stream`; los errores se envían como JSON."""
+    media_type = 'text/event-stream'
+    format = 'sse'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return b'' if data is None else json.dumps(data).encode()
+
+
+class EventStreamViewSet(AsyncActionsMixin, viewsets.ViewSet):
+    """
+    Stream SSE con los eventos de dominio del usuario autenticado (core.events).
+
+    Bajo ASGI la conexión en espera no ocupa conexiones a la base ni bloquea
+    hilos (el hilo síncrono de la petición queda reservado, inactivo, hasta
+    que se cierra); bajo WSGI ocupa un hilo del worker mientras sigue abierta.
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
+    async_actions = ('stream',)
+
+    @action(detail=False, methods=['get'])
+    def stream(self, request):
+        user_id = request.user.pk
+
+        def contenido():
+            # La conexión a la base no se vuelve a usar mientras dure el stream
+            close_request_connections()
+            yield from events.stream(user_id)
+
+        return self.event_stream_response(contenido())
+
+    async def astream(self, request):
+        user_id = request.user.pk
+
+        async def contenido():
+            # La conexión a la base no se vuelve a usar mientras dure el stream
+            await sync_to_async(close_request_connections)()
+            async for fragmento in events.astream(user_id):
+                yield fragmento
+
+        return self.event_stream_response(contenido())
+
+    @staticmethod
+    def event_stream_response(contenido):
+        response = StreamingHttpResponse(contenido, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Sin búfer en nginx: cada evento se envía en cuanto se publica
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class BaseViewSet(AsyncActionsMixin, QueryBudgetMixin, ReplicaReadMixin, IdentityMapMixin, viewsets.ModelViewSet):
     """
     ViewSet base que implementa funcionalidades comunes.
     Sigue principios SOLID, especialmente Single Responsibility.
@@ -43,7 +442,7 @@ class BaseViewSet(viewsets.ModelViewSet):
         Puede ser overrideado por subclases.
         """
         queryset = super().get_queryset()
-        if hasattr(self.queryset.model, 'is_active'):
+        if hasattr(queryset.model, 'is_active'):
             queryset = queryset.filter(is_active=True)
         return queryset
 
@@ -59,6 +458,13 @@ class BaseViewSet(viewsets.ModelViewSet):
         """
         serializer.save(user=self.request.user)
 
+    def get_restore_queryset(self):
+        """
+        Queryset usado para restaurar: incluye explícitamente los registros
+        inactivos. Las subclases deben limitarlo a los registros del usuario.
+        """
+        return self.get_queryset().model.all_objects.all()
+
     @action(detail=True, methods=['post'])
     def soft_delete(self, request, pk=None):
         """
@@ -67,8 +473,11 @@ class BaseViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         
         if hasattr(instance, 'soft_delete'):
-            with transaction.atomic():
-                instance.soft_delete()
+            try:
+                with transaction.atomic():
+                    instance.soft_delete()
+            except ValidationError as exc:
+                return Response({'detail': ' '.join(exc.messages)}, status=status.HTTP_400_BAD_REQUEST)
             
             serializer = DetailSerializer(data={'detail': 'Registro eliminado correctamente'})
             serializer.is_valid()
@@ -84,13 +493,14 @@ class BaseViewSet(viewsets.ModelViewSet):
         """
         Restaurar un objeto eliminado lógicamente.
         """
-        # Para restore, necesitamos obtener todos los objetos, incluso inactivos
-        queryset = self.queryset.model.objects.all()
-        instance = get_object_or_404(queryset, pk=pk)
+        instance = get_object_or_404(self.get_restore_queryset(), pk=pk)
         
         if hasattr(instance, 'restore'):
-            with transaction.atomic():
-                instance.restore()
+            try:
+                with transaction.atomic():
+                    instance.restore()
+            except ValidationError as exc:
+                return Response({'detail': ' '.join(exc.messages)}, status=status.HTTP_400_BAD_REQUEST)
             
             serializer = DetailSerializer(data={'detail': 'Registro restaurado correctamente'})
             serializer.is_valid()
@@ -102,17 +512,20 @@ class BaseViewSet(viewsets.ModelViewSet):
         )
 
 
-class ReadOnlyBaseViewSet(viewsets.ReadOnlyModelViewSet):
+class ReadOnlyBaseViewSet(AsyncActionsMixin, QueryBudgetMixin, ReplicaReadMixin, IdentityMapMixin,
+                          viewsets.ReadOnlyModelViewSet):
     """
     ViewSet base para operaciones de solo lectura.
+    Todas sus acciones se leen desde una réplica.
     """
     permission_classes = [IsAuthenticated]
+    replica_actions = '__all__'
     
     def get_queryset(self):
         """
         Filtrar por registros activos por defecto.
         """
         queryset = super().get_queryset()
-        if hasattr(self.queryset.model, 'is_active'):
+        if hasattr(queryset.model, 'is_active'):
             queryset = queryset.filter(is_active=True)
         return queryset
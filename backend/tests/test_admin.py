@@ -0,0 +1,140 @@
+"""
+Tests del admin de Cajones Inteligentes: consultas por página y acciones masivas.
+"""
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from cajones_inteligentes.models import Cajon, Historial, Objeto, Recomendacion
+from core.admin import EstimatedCountPaginator
+
+
+class TestChangelists(TestCase):
+    """
+    El número de consultas de cada changelist no depende de las filas.
+    """
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+        self.client.force_login(self.admin)
+
+    def crear_datos(self, cantidad):
+        inicio = Cajon.objects.count()
+        for i in range(inicio, inicio + cantidad):
+            usuario = User.objects.create_user(f'usuario{i}')
+            cajon = Cajon.objects.create(nombre=f'Cajon {i}', capacidad_maxima=2, usuario=usuario)
+            objeto = Objeto.objects.create(nombre='Objeto', cajon=cajon)
+            Historial.objects.create(
+                nombre='Objeto creado', motivo='Prueba', usuario=usuario, objeto=objeto, cajon=cajon
+            )
+            Recomendacion.objects.create(nombre='Ordenar', descripcion='Ordenar el cajón', usuario=usuario)
+
+    def consultas(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_consultas_constantes(self):
+        modelos = ['cajon', 'objeto', 'historial', 'recomendacion']
+        self.crear_datos(2)
+        antes = {modelo: self.consultas(f'/admin/cajones_inteligentes/{modelo}/') for modelo in modelos}
+        self.crear_datos(5)
+        despues = {modelo: self.consultas(f'/admin/cajones_inteligentes/{modelo}/') for modelo in modelos}
+
+        self.assertEqual(antes, despues)
+
+    def test_columnas_anotadas_ordenables(self):
+        usuario = User.objects.create_user('ordenar')
+        lleno = Cajon.objects.create(nombre='Lleno', capacidad_maxima=1, usuario=usuario)
+        Objeto.objects.create(nombre='Objeto', cajon=lleno)
+        Cajon.objects.create(nombre='Vacio', capacidad_maxima=3, usuario=usuario)
+
+        # Columna 5: capacidad disponible, ascendente
+        response = self.client.get('/admin/cajones_inteligentes/cajon/?o=5')
+        cajones = list(response.context['cl'].result_list)
+
+        self.assertEqual([c.nombre for c in cajones], ['Lleno', 'Vacio'])
+        self.assertEqual([(c.disponibles, c.lleno) for c in cajones], [(0, True), (3, False)])
+
+
+class TestEstimatedCountPaginator(TestCase):
+    """
+    Tests del conteo estimado.
+    """
+
+    def setUp(self):
+        usuario = User.objects.create_user('paginador')
+        Cajon.objects.create(nombre='Cajon', usuario=usuario)
+
+    def test_sin_filtros_usa_la_estimacion(self):
+        with mock.patch('core.admin.estimate_row_count', return_value=500_000):
+            paginator = EstimatedCountPaginator(Cajon.all_objects.all(), 100)
+            self.assertEqual(paginator.count, 500_000)
+
+    def test_con_filtros_cuenta(self):
+        with mock.patch('core.admin.estimate_row_count', return_value=500_000) as estimacion:
+            paginator = EstimatedCountPaginator(Cajon.all_objects.filter(nombre='Cajon'), 100)
+            self.assertEqual(paginator.count, 1)
+        estimacion.assert_not_called()
+
+    def test_tabla_pequena_cuenta(self):
+        with mock.patch('core.admin.estimate_row_count', return_value=50):
+            self.assertEqual(EstimatedCountPaginator(Cajon.all_objects.all(), 100).count, 1)
+
+    def test_sqlite_cuenta(self):
+        self.assertEqual(
+            EstimatedCountPaginator(Cajon.all_objects.all(), 100).count,
+            Paginator(Cajon.all_objects.all(), 100).count
+        )
+
+
+class TestAccionesRecomendacion(TestCase):
+    """
+    Las acciones masivas actualizan con un solo UPDATE.
+    """
+    url = '/admin/cajones_inteligentes/recomendacion/'
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+        self.client.force_login(self.admin)
+        self.usuario = User.objects.create_user('recomendaciones')
+        self.recomendaciones = [
+            Recomendacion.objects.create(nombre=f'R{i}', descripcion='Prueba', usuario=self.usuario)
+            for i in range(3)
+        ]
+
+    def ejecutar(self, accion, recomendaciones):
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = self.client.post(self.url, {
+                    'action': accion,
+                    '_selected_action': [str(r.pk) for r in recomendaciones],
+                })
+        self.assertEqual(response.status_code, 302)
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE')]
+        return updates, callbacks
+
+    def test_marcar(self):
+        anterior = self.recomendaciones[0].updated_at
+        updates, callbacks = self.ejecutar('marcar_como_implementada', self.recomendaciones)
+
+        self.assertEqual(len(updates), 1)
+        # Una invalidación por usuario afectado
+        self.assertEqual(len(callbacks), 1)
+        recomendacion = Recomendacion.objects.get(pk=self.recomendaciones[0].pk)
+        self.assertTrue(recomendacion.implementada)
+        self.assertIsNotNone(recomendacion.fecha_implementacion)
+        self.assertGreater(recomendacion.updated_at, anterior)
+
+    def test_desmarcar_solo_implementadas(self):
+        self.recomendaciones[0].marcar_como_implementada()
+        updates, _ = self.ejecutar('desmarcar_implementacion', self.recomendaciones)
+
+        self.assertEqual(len(updates), 1)
+        self.assertFalse(Recomendacion.objects.filter(implementada=True).exists())
+        self.assertIsNone(Recomendacion.objects.get(pk=self.recomendaciones[0].pk).fecha_implementacion)
@@ -0,0 +1,142 @@
+"""
+Tests para la captura de planes de ejecución y el comando analizar_consultas.
+"""
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from cajones_inteligentes.models import Historial, Objeto
+from core.explain import (
+    ESCANEO_COMPLETO, ORDENAMIENTO_EXTERNO, TABLA_TEMPORAL,
+    columnas_candidatas, definicion_indice, detectar_alertas, esta_cubierto
+)
+
+OBJETO = Objeto._meta.db_table
+HISTORIAL = Historial._meta.db_table
+
+
+class TestDeteccionAlertas(SimpleTestCase):
+    """
+    Tests de la interpretación de planes de SQLite y MySQL.
+    """
+
+    def test_plan_sqlite(self):
+        """SCAN sin índice y TEMP B-TREE se reportan como alertas."""
+        sql = f'SELECT * FROM "{OBJETO}" WHERE "{OBJETO}"."nombre" = \'x\' ORDER BY "{OBJETO}"."fecha_ingreso" DESC'
+        plan = [
+            {'detail': f'SCAN {OBJETO}'},
+            {'detail': 'USE TEMP B-TREE FOR ORDER BY'},
+        ]
+
+        alertas = detectar_alertas('sqlite', plan, sql)
+
+        self.assertEqual(alertas, [(ESCANEO_COMPLETO, OBJETO), (ORDENAMIENTO_EXTERNO, OBJETO)])
+
+    def test_plan_sqlite_con_indice(self):
+        """Las búsquedas y recorridos por índice no generan alertas."""
+        plan = [
+            {'detail': f'SEARCH {OBJETO} USING INDEX objeto_cajon_tipo_activo (cajon_id=?)'},
+            {'detail': f'SCAN {OBJETO} USING COVERING INDEX objeto_nombre_idx'},
+        ]
+
+        self.assertEqual(detectar_alertas('sqlite', plan, f'SELECT 1 FROM "{OBJETO}"'), [])
+
+    def test_plan_mysql_con_alias(self):
+        """En MySQL se leen type/Extra y los alias del ORM se resuelven a tablas."""
+        sql = f'SELECT U0.`cajon_id` FROM `{OBJETO}` U0 GROUP BY U0.`cajon_id`'
+        plan = [{'table': 'U0', 'type': 'ALL', 'Extra': 'Using temporary; Using filesort'}]
+
+        alertas = detectar_alertas('mysql', plan, sql)
+
+        self.assertEqual(alertas, [
+            (ESCANEO_COMPLETO, OBJETO), (ORDENAMIENTO_EXTERNO, OBJETO), (TABLA_TEMPORAL, OBJETO)
+        ])
+
+
+class TestSugerenciaIndices(SimpleTestCase):
+    """
+    Tests de la propuesta de índices compuestos.
+    """
+
+    def test_igualdad_luego_orden(self):
+        """Las columnas de igualdad preceden a las de orden; is_active usa índice parcial."""
+        sql = (
+            f'SELECT * FROM "{HISTORIAL}" WHERE ("{HISTORIAL}"."is_active" AND '
+            f'"{HISTORIAL}"."tipo_accion" = \'CREAR\') ORDER BY "{HISTORIAL}"."created_at" DESC'
+        )
+
+        columnas, usa_activo = columnas_candidatas(sql, HISTORIAL)
+
+        self.assertEqual(columnas, ['tipo_accion', '-created_at'])
+        self.assertTrue(usa_activo)
+        self.assertTrue(definicion_indice(Historial, columnas, usa_activo).startswith(
+            "ActiveIndex(fields=['tipo_accion', '-created_at']"
+        ))
+
+    def test_busqueda_por_clave_primaria(self):
+        """Las búsquedas por clave primaria no necesitan sugerencias."""
+        sql = f'SELECT * FROM "{OBJETO}" WHERE "{OBJETO}"."id" = \'abc\''
+
+        self.assertEqual(columnas_candidatas(sql, OBJETO)[0], [])
+
+    def test_indice_existente_cubre_prefijo(self):
+        """Un índice existente que empieza por las columnas propuestas las cubre."""
+        self.assertTrue(esta_cubierto(['cajon_id'], [['cajon_id', 'tipo_objeto']]))
+        self.assertFalse(esta_cubierto(['tipo_objeto', '-fecha_ingreso'], [['cajon_id', 'tipo_objeto']]))
+
+    def test_nombre_de_indice_valido(self):
+        """Los nombres generados respetan el límite de 30 caracteres de Django."""
+        definicion = definicion_indice(Objeto, ['tipo_objeto', '-fecha_ingreso'], True)
+        nombre = definicion.split("name='")[1].rstrip("')")
+
+        self.assertLessEqual(len(nombre), 30)
+
+
+class TestComandoAnalizarConsultas(TestCase):
+    """
+    Tests del comando analizar_consultas.
+    """
+
+    def ejecutar(self, *args):
+        salida, errores = StringIO(), StringIO()
+        call_command('analizar_consultas', '--cajones', '3', '--objetos', '4', *args,
+                     stdout=salida, stderr=errores)
+        return salida.getvalue(), errores.getvalue()
+
+    def test_reporte_json(self):
+        """Se ejercitan las acciones del router y se reportan sus planes."""
+        salida, _ = self.ejecutar()
+        reporte = json.loads(salida)
+        origenes = {accion['origen'] for accion in reporte['acciones']}
+
+        self.assertEqual(reporte['motor'], 'sqlite')
+        self.assertTrue({'cajon.list', 'objeto.create', 'historial.retrieve', 'dashboard.list'} <= origenes)
+        self.assertGreater(reporte['resumen']['consultas'], 0)
+        self.assertTrue(all('plan' in plan for accion in reporte['acciones'] for plan in accion['planes']))
+
+    def test_revierte_los_cambios(self):
+        """Los datos de prueba y las escrituras de las acciones no persisten."""
+        self.ejecutar()
+
+        self.assertFalse(Objeto.all_objects.exists())
+        self.assertFalse(Historial.all_objects.exists())
+
+    def test_comparar_con_reporte_anterior(self):
+        """Se informan las acciones que emiten más consultas que en el reporte anterior."""
+        salida, _ = self.ejecutar()
+        reporte = json.loads(salida)
+        for accion in reporte['acciones']:
+            if accion['origen'] == 'cajon.list':
+                accion['consultas'] = 0
+
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as archivo:
+            json.dump(reporte, archivo)
+        try:
+            _, errores = self.ejecutar('--comparar', archivo.name)
+        finally:
+            os.unlink(archivo.name)
+
+        self.assertIn('cajon.list: 0 ->', errores)
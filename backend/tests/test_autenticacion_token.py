@@ -0,0 +1,150 @@
+"""
+Tests de la autenticación por token con caché (core.authentication).
+"""
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from core.authentication import CACHE_PREFIX, TokenCache, token_cache
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class TestTokenCache(SimpleTestCase):
+    """
+    Tests del LRU en proceso.
+    """
+
+    @override_settings(AUTH_TOKEN_CACHE_SIZE=2)
+    def test_acotado_descarta_el_menos_reciente(self):
+        cache = TokenCache()
+        for clave in ('a', 'b'):
+            cache.set(cache.digest(clave), User(username=clave))
+        cache.get(cache.digest('a'))
+        cache.set(cache.digest('c'), User(username='c'))
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(cache.digest('b')))
+        self.assertEqual(cache.get(cache.digest('a')).username, 'a')
+
+    def test_entrega_copias(self):
+        """Peticiones concurrentes no comparten la instancia del usuario."""
+        cache = TokenCache()
+        cache.set(cache.digest('a'), User(username='a'))
+        cache.get(cache.digest('a')).username = 'modificado'
+        self.assertEqual(cache.get(cache.digest('a')).username, 'a')
+
+
+class TestAutenticacionToken(APITestCase):
+    """
+    Tests de inicio de sesión, revocación e invalidación.
+    """
+    url = '/api/v1/configuracion/tipos_objeto/'
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(username='token', password='clave-segura-123')
+        self.token = Token.objects.create(user=self.user)
+
+    def autorizar(self, clave=None, palabra='Bearer'):
+        self.client.credentials(HTTP_AUTHORIZATION=f'{palabra} {clave or self.token.key}')
+
+    def test_login_retorna_token(self):
+        response = self.client.post('/api/v1/auth/login/', {
+            'username': 'token', 'password': 'clave-segura-123'
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['token'], self.token.key)
+        # Forma que guarda el frontend (authService.login)
+        self.assertEqual(
+            set(response.json()['user']), {'id', 'username', 'email', 'first_name', 'last_name'}
+        )
+
+    def test_login_crea_token(self):
+        self.token.delete()
+        response = self.client.post('/api/v1/auth/login/', {
+            'username': 'token', 'password': 'clave-segura-123'
+        }, format='json')
+
+        self.assertEqual(response.json()['token'], Token.objects.get(user=self.user).key)
+        self.autorizar(response.json()['token'])
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_login_credenciales_invalidas(self):
+        response = self.client.post('/api/v1/auth/login/', {'username': 'token', 'password': 'x'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_solo_la_primera_peticion_consulta(self):
+        self.autorizar()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        # La sesión no se carga para una petición con token
+        self.assertNotIn('Cookie', response.get('Vary', ''))
+
+    def test_palabra_token(self):
+        self.autorizar(palabra='Token')
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_token_invalido(self):
+        self.autorizar('no-existe')
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    @override_settings(CACHES=LOCMEM, AUTH_TOKEN_LOCAL_TIMEOUT=0)
+    def test_respaldo_en_cache_compartida(self):
+        """Al expirar la entrada local se carga el usuario por pk, sin la tabla de tokens."""
+        self.autorizar()
+        self.client.get(self.url)
+        # Solo una proyección mínima del usuario: nunca el hash de la contraseña
+        self.assertEqual(cache.get(CACHE_PREFIX + token_cache.digest(self.token.key)), (self.user.pk, True))
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(len(consultas), 1)
+        self.assertNotIn('authtoken_token', consultas[0]['sql'])
+
+    @override_settings(CACHES=LOCMEM, AUTH_TOKEN_LOCAL_TIMEOUT=0)
+    def test_respaldo_revalida_usuario(self):
+        """Un usuario desactivado sin pasar por save() no se acepta desde la caché compartida."""
+        self.autorizar()
+        self.client.get(self.url)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    @override_settings(CACHES=LOCMEM)
+    def test_logout_revoca(self):
+        self.autorizar()
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post('/api/v1/auth/logout/').status_code, 204)
+
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    @override_settings(CACHES=LOCMEM)
+    def test_usuario_desactivado(self):
+        self.autorizar()
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_logout_sin_autenticar(self):
+        self.assertEqual(self.client.post('/api/v1/auth/logout/').status_code, 403)
+
+    def test_logout_con_sesion_conserva_token(self):
+        """Sin token en la petición no hay nada que revocar."""
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.post('/api/v1/auth/logout/').status_code, 204)
+        self.assertTrue(Token.objects.filter(key=self.token.key).exists())
@@ -2,10 +2,42 @@
 Tests base para el proyecto.
 """
 import pytest
+from contextlib import contextmanager
 from django.test import TestCase
 from django.contrib.auth.models import User
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
+from core.queries import get_query_budget, record_queries
+
+
+class QueryBudgetTestMixin:
+    """
+    Helper para verificar el presupuesto de consultas de una acción.
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, view, action):
+        """
+        Falla si el bloque excede el `query_budget` de la acción o repite
+        una consulta (N+1), indicando el frame que la originó.
+        """
+        presupuesto = get_query_budget(view, action)
+        if presupuesto is None:
+            self.fail(f'{view.__name__} no declara query_budget para {action!r}')
+        with record_queries() as recorder:
+            yield recorder
+
+        origen = f'{view.__name__}.{action}'
+        repetidas = recorder.repeated()
+        if repetidas:
+            detalle = '\n'.join(
+                f"  {r['count']} veces desde {r['origin']}: {r['fingerprint']}" for r in repetidas
+            )
+            self.fail(f'{origen}: consultas repetidas (N+1)\n{detalle}')
+        self.assertLessEqual(
+            recorder.count, presupuesto,
+            f'{origen}: {recorder.count} consultas, presupuesto {presupuesto}'
+        )
 
 
 class BaseTestCase(TestCase):
@@ -24,7 +56,7 @@ class BaseTestCase(TestCase):
         )
 
 
-class BaseAPITestCase(APITestCase):
+class BaseAPITestCase(QueryBudgetTestMixin, APITestCase):
     """
     Clase base para tests de API.
     """
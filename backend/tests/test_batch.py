@@ -0,0 +1,114 @@
+"""
+Tests para el endpoint de peticiones agrupadas (batch).
+"""
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from cajones_inteligentes.models import Cajon
+from cajones_inteligentes.views import CajonViewSet
+from tests.test_base import BaseAPITestCase
+
+
+class TestBatchView(BaseAPITestCase):
+    """
+    Tests para POST /api/v1/batch/.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate_user()
+        self.cajon = Cajon.objects.create(
+            nombre='Cajon Oficina',
+            capacidad_maxima=5,
+            usuario=self.user
+        )
+
+    def test_batch_ejecuta_lecturas(self):
+        """Las sub-peticiones de lectura retornan sus resultados en orden."""
+        response = self.client.post('/api/v1/batch/', {
+            'requests': [
+                {'method': 'GET', 'url': '/api/v1/cajones/'},
+                {'method': 'GET', 'url': f'/api/v1/cajones/{self.cajon.id}/'},
+                {'method': 'GET', 'url': '/api/v1/no-existe/'},
+            ]
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual([r['status'] for r in results], [200, 200, 404])
+        self.assertEqual(results[0]['body']['count'], 1)
+        self.assertEqual(results[1]['body']['nombre'], 'Cajon Oficina')
+
+    def test_batch_repite_lecturas_y_comparte_entidades(self):
+        """Una lectura repetida se ejecuta cada vez, pero la entidad se carga una sola vez."""
+        url = f'/api/v1/cajones/{self.cajon.id}/'
+        with CaptureQueriesContext(connection) as queries:
+            with mock.patch.object(CajonViewSet, 'retrieve', autospec=True,
+                                   side_effect=CajonViewSet.retrieve) as retrieve:
+                response = self.client.post('/api/v1/batch/', {
+                    'requests': [{'method': 'GET', 'url': url}] * 3
+                }, format='json')
+
+        self.assertEqual([r['status'] for r in response.data['results']], [200] * 3)
+        self.assertEqual(retrieve.call_count, 3)
+        tabla = Cajon._meta.db_table
+        self.assertEqual(len([q for q in queries if q['sql'].startswith(f'SELECT "{tabla}"')]), 1)
+
+    def test_batch_error_en_subpeticion(self):
+        """Una excepción en una sub-petición produce un 500 solo para esa entrada."""
+        with mock.patch.object(CajonViewSet, 'retrieve', side_effect=RuntimeError('fallo')):
+            response = self.client.post('/api/v1/batch/', {
+                'requests': [
+                    {'method': 'GET', 'url': f'/api/v1/cajones/{self.cajon.id}/'},
+                    {'method': 'GET', 'url': '/api/v1/cajones/'},
+                ]
+            }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['status'] for r in response.data['results']], [500, 200])
+
+    def test_batch_atomico_revierte_escrituras(self):
+        """En modo atómico, un error revierte las escrituras previas."""
+        response = self.client.post('/api/v1/batch/', {
+            'atomic': True,
+            'requests': [
+                {
+                    'method': 'PATCH',
+                    'url': f'/api/v1/cajones/{self.cajon.id}/',
+                    'body': {'nombre': 'Cajon Renombrado'}
+                },
+                {'method': 'GET', 'url': '/api/v1/cajones/00000000-0000-0000-0000-000000000000/'},
+            ]
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['status'] for r in response.data['results']], [200, 404])
+        self.cajon.refresh_from_db()
+        self.assertEqual(self.cajon.nombre, 'Cajon Oficina')
+
+    def test_batch_no_permite_anidar(self):
+        """No se permite invocar el propio endpoint batch como sub-petición."""
+        response = self.client.post('/api/v1/batch/', {
+            'requests': [{'method': 'POST', 'url': '/api/v1/batch/', 'body': {}}]
+        }, format='json')
+
+        self.assertEqual(response.data['results'][0]['status'], 400)
+
+    @override_settings(BATCH_MAX_SUBREQUESTS=2)
+    def test_batch_limite_de_subpeticiones(self):
+        """Se rechazan las llamadas que superan el límite configurado."""
+        response = self.client.post('/api/v1/batch/', {
+            'requests': [{'method': 'GET', 'url': '/api/v1/cajones/'}] * 3
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_requiere_autenticacion(self):
+        """El endpoint batch requiere un usuario autenticado."""
+        self.client.force_authenticate(user=None)
+        response = self.client.post('/api/v1/batch/', {
+            'requests': [{'method': 'GET', 'url': '/api/v1/cajones/'}]
+        }, format='json')
+
+        self.assertIn(response.status_code, (401, 403))
@@ -0,0 +1,170 @@
+"""
+Tests del feed de cambios (core.changefeed, GET /api/v1/cambios/).
+"""
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from cajones_inteligentes.models import Cajon, Objeto, Recomendacion, Tamanio, TipoObjeto
+from core.changefeed import InvalidCursor, decode_cursor, encode_cursor
+from tests.test_base import BaseAPITestCase
+
+
+class TestCursor(SimpleTestCase):
+    """
+    Tests de la codificación del cursor.
+    """
+
+    def test_ida_y_vuelta_sin_perder_microsegundos(self):
+        momento = timezone.now().replace(microsecond=123457)
+        pk = uuid.uuid4()
+        self.assertEqual(decode_cursor(encode_cursor(momento, pk)), (momento, pk))
+
+    def test_cursor_invalido(self):
+        for cursor in ('', 'no-es-un-cursor', 'MTIz'):
+            with self.subTest(cursor=cursor), self.assertRaises(InvalidCursor):
+                decode_cursor(cursor)
+
+
+@override_settings(CHANGE_FEED_SETTLE_SECONDS=0)
+class TestFeedCambios(BaseAPITestCase):
+    """
+    Tests del endpoint de sincronización por deltas.
+    """
+    url = '/api/v1/cambios/'
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate_user()
+        self.cajon = Cajon.objects.create(nombre='Cajon A', capacidad_maxima=5, usuario=self.user)
+        self.objeto = Objeto.objects.create(
+            nombre='Libro', cajon=self.cajon, tipo_objeto=TipoObjeto.LIBROS, tamanio=Tamanio.MEDIANO
+        )
+        self.recomendacion = Recomendacion.objects.create(
+            nombre='Ordenar', descripcion='Ordenar el cajón A', usuario=self.user
+        )
+        otro = User.objects.create_user(username='ajeno')
+        Cajon.objects.create(nombre='Cajon Ajeno', capacidad_maxima=5, usuario=otro)
+
+    def pedir(self, **parametros):
+        response = self.client.get(self.url, parametros)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_feed_completo_en_orden(self):
+        datos = self.pedir()
+
+        self.assertEqual(
+            [(c['tipo'], c['id']) for c in datos['cambios']],
+            [('cajon', str(self.cajon.pk)), ('objeto', str(self.objeto.pk)),
+             ('recomendacion', str(self.recomendacion.pk))],
+        )
+        self.assertFalse(datos['hay_mas'])
+        self.assertEqual(datos['cambios'][1]['datos']['cajon'], str(self.cajon.pk))
+
+    def test_delta_con_lapidas(self):
+        cursor = self.pedir()['cursor']
+        self.assertEqual(self.pedir(desde=cursor), {'cambios': [], 'cursor': cursor, 'hay_mas': False})
+
+        self.objeto.soft_delete()
+        self.cajon.descripcion = 'Actualizado'
+        self.cajon.save()
+
+        datos = self.pedir(desde=cursor)
+        self.assertEqual(
+            [(c['tipo'], c['eliminado'], c['datos'] is None) for c in datos['cambios']],
+            [('objeto', True, True), ('cajon', False, False)],
+        )
+        self.assertEqual(datos['cambios'][1]['datos']['descripcion'], 'Actualizado')
+        self.assertEqual(self.pedir(desde=datos['cursor'])['cambios'], [])
+
+    def test_cajon_se_reenvia_al_cambiar_ocupacion(self):
+        """Crear, mover o eliminar un objeto reenvía los cajones con la ocupación nueva."""
+        otro = Cajon.objects.create(nombre='Cajon B', capacidad_maxima=5, usuario=self.user)
+        cursor = self.pedir()['cursor']
+        pasado = timezone.now() - timedelta(seconds=1)
+        Cajon.all_objects.update(updated_at=pasado)
+        Objeto.all_objects.update(updated_at=pasado)
+
+        nuevo = Objeto.objects.create(
+            nombre='Cable', cajon=self.cajon, tipo_objeto=TipoObjeto.CABLES, tamanio=Tamanio.PEQUENO
+        )
+        datos = self.pedir(desde=cursor)
+        self.assertEqual(
+            [(c['tipo'], c['id']) for c in datos['cambios']],
+            [('cajon', str(self.cajon.pk)), ('objeto', str(nuevo.pk))],
+        )
+        self.assertEqual(datos['cambios'][0]['datos']['capacidad_disponible'], 3)
+
+        cursor = datos['cursor']
+        Objeto.mover_objetos({nuevo.pk: otro.pk}, self.user)
+        cajones = {c['id']: c['datos'] for c in self.pedir(desde=cursor)['cambios'] if c['tipo'] == 'cajon'}
+        self.assertEqual(
+            (cajones[str(self.cajon.pk)]['capacidad_disponible'], cajones[str(otro.pk)]['capacidad_disponible']),
+            (4, 4),
+        )
+
+    def test_recalcular_solo_toca_los_desajustados(self):
+        pasado = timezone.now() - timedelta(seconds=1)
+        Cajon.all_objects.update(updated_at=pasado)
+        Cajon.all_objects.filter(pk=self.cajon.pk).update(ocupados=0)
+
+        self.assertEqual(Cajon.recalcular_ocupacion(), 1)
+        self.assertEqual(Cajon.all_objects.exclude(updated_at=pasado).get().pk, self.cajon.pk)
+
+    def test_paginas(self):
+        """Las páginas recorren todos los cambios una sola vez, incluso con marcas de tiempo iguales."""
+        momento = timezone.now()
+        Objeto.all_objects.update(updated_at=momento)
+        Cajon.all_objects.update(updated_at=momento)
+        vistos, cursor = [], None
+        while True:
+            datos = self.pedir(limite=1, **({'desde': cursor} if cursor else {}))
+            vistos += [c['id'] for c in datos['cambios']]
+            cursor = datos['cursor']
+            if not datos['hay_mas']:
+                break
+
+        self.assertEqual(len(vistos), 3)
+        self.assertEqual(set(vistos), {str(self.cajon.pk), str(self.objeto.pk), str(self.recomendacion.pk)})
+
+    @override_settings(CHANGE_FEED_SETTLE_SECONDS=60)
+    def test_espera_a_que_se_asienten(self):
+        """Los cambios recientes aún no se entregan (pueden quedar transacciones por confirmar)."""
+        self.assertEqual(self.pedir()['cambios'], [])
+
+    def test_cursor_antiguo_requiere_snapshot(self):
+        antiguo = encode_cursor(timezone.now() - timedelta(days=31), uuid.UUID(int=0))
+
+        response = self.client.get(self.url, {'desde': antiguo})
+
+        self.assertEqual(response.status_code, 410)
+        self.assertTrue(response.json()['snapshot_requerido'])
+        # El cursor devuelto sirve para seguir tras el snapshot
+        self.assertEqual(self.pedir(desde=response.json()['cursor'])['cambios'], [])
+
+    def test_parametros_invalidos(self):
+        for parametros in ({'desde': 'xyz'}, {'limite': '0'}, {'limite': 'abc'}):
+            with self.subTest(parametros=parametros):
+                self.assertEqual(self.client.get(self.url, parametros).status_code, 400)
+
+    def test_recorrido_de_indice(self):
+        """Cada consulta del feed usa el índice (propietario, updated_at, id) de su tabla."""
+        if connection.vendor != 'sqlite':
+            self.skipTest('Plan de ejecución específico de SQLite')
+        with CaptureQueriesContext(connection) as consultas:
+            self.pedir()
+
+        self.assertEqual(len(consultas), 3)
+        with connection.cursor() as cursor:
+            planes = []
+            for consulta in consultas:
+                cursor.execute(f"EXPLAIN QUERY PLAN {consulta['sql']}")
+                planes.append(str(cursor.fetchall()))
+        for indice in ('cajon_usuario_cambios', 'objeto_cajon_cambios', 'recomendacion_usuario_cambios'):
+            self.assertTrue(any(indice in plan for plan in planes), (indice, planes))
@@ -0,0 +1,264 @@
+"""
+Tests para la reserva atómica de capacidad de los cajones.
+"""
+import random
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase
+from cajones_inteligentes.models import Cajon, Objeto
+from tests.test_base import BaseAPITestCase
+
+
+class TestReservaCapacidad(BaseAPITestCase):
+    """
+    Tests del contador de ocupación y de su uso desde la API.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate_user()
+        self.cajon = Cajon.objects.create(nombre='Cajon Chico', capacidad_maxima=2, usuario=self.user)
+
+    def test_reserva_y_liberacion(self):
+        """El contador sigue a las altas, bajas y movimientos de objetos."""
+        otro = Cajon.objects.create(nombre='Cajon Grande', capacidad_maxima=5, usuario=self.user)
+        objeto = Objeto.objects.create(nombre='Linterna', cajon=self.cajon)
+        self.cajon.refresh_from_db()
+        self.assertEqual(self.cajon.ocupados, 1)
+
+        objeto.cajon = otro
+        objeto.save()
+        self.cajon.refresh_from_db()
+        otro.refresh_from_db()
+        self.assertEqual((self.cajon.ocupados, otro.ocupados), (0, 1))
+
+        objeto.soft_delete()
+        otro.refresh_from_db()
+        self.assertEqual(otro.ocupados, 0)
+
+        objeto.restore()
+        objeto.delete()
+        otro.refresh_from_db()
+        self.assertEqual(otro.ocupados, 0)
+
+    def test_reserva_rechazada_si_no_hay_espacio(self):
+        """La reserva condicional falla sin modificar el contador."""
+        Cajon.reservar_espacio(self.cajon.pk, 2)
+
+        with self.assertRaises(ValidationError):
+            Cajon.reservar_espacio(self.cajon.pk)
+        self.cajon.refresh_from_db()
+        self.assertEqual(self.cajon.ocupados, 2)
+
+    def test_crear_objeto_en_cajon_lleno(self):
+        """La API responde 400 cuando el cajón ya no tiene espacio."""
+        for i in range(2):
+            response = self.client.post('/api/v1/objetos/', {
+                'nombre': f'Objeto {i}', 'cajon': str(self.cajon.id)
+            }, format='json')
+            self.assertEqual(response.status_code, 201)
+
+        response = self.client.post('/api/v1/objetos/nuevo_objeto/', {
+            'nombre': 'Sobrante', 'cajon': str(self.cajon.id)
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.cajon.refresh_from_db()
+        self.assertEqual(self.cajon.ocupados, 2)
+
+    def test_guardar_cajon_no_pisa_el_contador(self):
+        """Guardar una copia desactualizada del cajón conserva las reservas."""
+        copia = Cajon.objects.get(pk=self.cajon.pk)
+        Objeto.objects.create(nombre='Linterna', cajon=self.cajon)
+
+        copia.descripcion = 'Actualizado'
+        copia.save()
+
+        self.cajon.refresh_from_db()
+        self.assertEqual(self.cajon.ocupados, 1)
+
+    def test_copias_desactualizadas_mueven_el_mismo_objeto(self):
+        """Dos copias del mismo objeto movido A→B y A→C no desajustan los contadores."""
+        otro = Cajon.objects.create(nombre='Cajon B', capacidad_maxima=2, usuario=self.user)
+        tercero = Cajon.objects.create(nombre='Cajon C', capacidad_maxima=2, usuario=self.user)
+        objeto = Objeto.objects.create(nombre='Linterna', cajon=self.cajon)
+        primera, segunda = Objeto.objects.get(pk=objeto.pk), Objeto.objects.get(pk=objeto.pk)
+
+        primera.cajon = otro
+        primera.save()
+        segunda.cajon = tercero
+        segunda.save()
+
+        ocupados = dict(Cajon.objects.values_list('pk', 'ocupados'))
+        self.assertEqual((ocupados[self.cajon.pk], ocupados[otro.pk], ocupados[tercero.pk]), (0, 0, 1))
+        self.assertEqual(Objeto.objects.get(pk=objeto.pk).cajon_id, tercero.pk)
+
+    def test_copia_desactualizada_no_deshace_movimiento(self):
+        """Guardar otros campos de una copia vieja no devuelve el objeto a su cajón anterior."""
+        otro = Cajon.objects.create(nombre='Cajon B', capacidad_maxima=2, usuario=self.user)
+        objeto = Objeto.objects.create(nombre='Linterna', cajon=self.cajon)
+        copia = Objeto.objects.get(pk=objeto.pk)
+        Objeto.mover_objetos({objeto.pk: otro.pk}, self.user)
+
+        copia.descripcion = 'Actualizado'
+        copia.save()
+
+        objeto.refresh_from_db()
+        self.assertEqual((objeto.cajon_id, objeto.descripcion), (otro.pk, 'Actualizado'))
+        ocupados = dict(Cajon.objects.values_list('pk', 'ocupados'))
+        self.assertEqual((ocupados[self.cajon.pk], ocupados[otro.pk]), (0, 1))
+
+    def test_recalcular_ocupacion(self):
+        """El contador se puede reconstruir desde los objetos activos."""
+        Objeto.objects.create(nombre='Linterna', cajon=self.cajon)
+        Cajon.objects.filter(pk=self.cajon.pk).update(ocupados=0)
+
+        Cajon.recalcular_ocupacion()
+
+        self.cajon.refresh_from_db()
+        self.assertEqual(self.cajon.ocupados, 1)
+
+
+class TestCapacidadConcurrente(TransactionTestCase):
+    """
+    Prueba de estrés: varios hilos llenan el mismo cajón a la vez.
+    """
+    hilos = 8
+    intentos_por_hilo = 5
+    capacidad = 10
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='concurrente', password='x')
+        self.cajon = Cajon.objects.create(
+            nombre='Cajon Compartido', capacidad_maxima=self.capacidad, usuario=self.user
+        )
+
+    def crear_objetos(self, indice, resultados, lock):
+        """Intenta crear objetos en el cajón compartido."""
+        try:
+            for intento in range(self.intentos_por_hilo):
+                while True:
+                    try:
+                        Objeto.objects.create(nombre=f'Objeto {indice} {intento}', cajon_id=self.cajon.pk)
+                        resultado = 'creados'
+                    except ValidationError:
+                        resultado = 'rechazados'
+                    except OperationalError:
+                        # SQLite bloquea la base completa; se reintenta la escritura
+                        time.sleep(0.001)
+                        continue
+                    with lock:
+                        resultados[resultado] += 1
+                    break
+        finally:
+            connection.close()
+
+    def test_invariante_bajo_concurrencia(self):
+        """Nunca hay más objetos activos que la capacidad del cajón."""
+        resultados = {'creados': 0, 'rechazados': 0}
+        lock = threading.Lock()
+        hilos = [
+            threading.Thread(target=self.crear_objetos, args=(i, resultados, lock))
+            for i in range(self.hilos)
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.cajon.refresh_from_db()
+        activos = Objeto.objects.filter(cajon=self.cajon, is_active=True).count()
+        self.assertEqual(self.cajon.ocupados, activos)
+        self.assertLessEqual(activos, self.capacidad)
+        self.assertEqual(resultados['creados'], activos)
+        self.assertEqual(
+            resultados['creados'] + resultados['rechazados'],
+            self.hilos * self.intentos_por_hilo
+        )
+
+
+class TestMovimientosConcurrentes(TransactionTestCase):
+    """
+    Prueba de estrés: varios hilos mueven los mismos objetos entre cajones a
+    la vez. Al terminar, el contador de cada cajón coincide con sus objetos.
+    """
+    hilos = 6
+    movimientos_por_hilo = 15
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='concurrente', password='x')
+        self.cajones = [
+            Cajon.objects.create(nombre=f'Cajon {i}', capacidad_maxima=4, usuario=self.user)
+            for i in range(3)
+        ]
+        self.objetos = [
+            Objeto.objects.create(nombre=f'Objeto {i}', cajon=self.cajones[i % 3]) for i in range(9)
+        ]
+
+    def en_hilos(self, objetivo):
+        """Ejecuta `objetivo(indice, azar)` en varios hilos con semillas fijas."""
+        def ejecutar(indice):
+            azar = random.Random(indice)
+            try:
+                for _ in range(self.movimientos_por_hilo):
+                    try:
+                        objetivo(indice, azar)
+                    except (ValidationError, OperationalError):
+                        # Cajón lleno, objeto movido por otro hilo o base bloqueada (SQLite)
+                        time.sleep(0.001)
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=ejecutar, args=(i,)) for i in range(self.hilos)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+    def assertInvariante(self):
+        for cajon in Cajon.objects.all():
+            activos = Objeto.objects.filter(cajon=cajon).count()
+            self.assertEqual(cajon.ocupados, activos, cajon.nombre)
+            self.assertLessEqual(activos, cajon.capacidad_maxima)
+        self.assertEqual(Objeto.objects.count(), len(self.objetos))
+
+    def test_mover_objetos(self):
+        """Movimientos masivos concurrentes que comparten objetos y cajones."""
+        def mover(indice, azar):
+            elegidos = azar.sample(self.objetos, 3)
+            Objeto.mover_objetos({obj.pk: azar.choice(self.cajones).pk for obj in elegidos}, self.user)
+
+        self.en_hilos(mover)
+        self.assertInvariante()
+
+    def test_save(self):
+        """Cada hilo carga el objeto y lo guarda en otro cajón."""
+        def mover(indice, azar):
+            objeto = Objeto.objects.get(pk=azar.choice(self.objetos).pk)
+            objeto.cajon = azar.choice(self.cajones)
+            objeto.save()
+
+        self.en_hilos(mover)
+        self.assertInvariante()
+
+    def test_copias_desactualizadas(self):
+        """Los hilos guardan copias cargadas al inicio, mezcladas con movimientos masivos."""
+        copias = [
+            [Objeto.objects.get(pk=obj.pk) for obj in self.objetos] for _ in range(self.hilos)
+        ]
+
+        def mover(indice, azar):
+            if azar.random() < 0.5:
+                copia = azar.choice(copias[indice])
+                copia.cajon = azar.choice(self.cajones)
+                copia.save()
+            else:
+                objeto = azar.choice(self.objetos)
+                Objeto.mover_objetos({objeto.pk: azar.choice(self.cajones).pk}, self.user)
+
+        self.en_hilos(mover)
+        self.assertInvariante()
@@ -0,0 +1,133 @@
+"""
+Tests para las claves primarias ordenadas por tiempo (UUIDv7) y su
+almacenamiento compacto.
+"""
+import uuid
+from types import SimpleNamespace
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from cajones_inteligentes.models import Cajon, Historial
+from core.fields import CompactUUIDField, generate_primary_key, uuid7
+from core.management.commands.migrar_claves_binarias import PlanConversion, columnas_uuid
+from tests.test_base import BaseTestCase
+
+MYSQL = SimpleNamespace(
+    vendor='mysql',
+    data_types={'UUIDField': 'char(32)'},
+    features=SimpleNamespace(has_native_uuid_field=False),
+    ops=SimpleNamespace(quote_name=lambda name: f'`{name}`'),
+)
+
+
+class TestUUID7(TestCase):
+    """
+    Tests del generador de UUIDv7.
+    """
+
+    def test_version_y_variante(self):
+        """Los identificadores cumplen el formato UUIDv7."""
+        valor = uuid7()
+
+        self.assertEqual(valor.version, 7)
+        self.assertEqual(valor.variant, uuid.RFC_4122)
+
+    def test_orden_creciente(self):
+        """Los identificadores generados seguidos son estrictamente crecientes."""
+        valores = [uuid7() for _ in range(5000)]
+
+        self.assertEqual(valores, sorted(valores))
+        self.assertEqual(len(set(valores)), len(valores))
+
+    @override_settings(PRIMARY_KEY_STRATEGY='uuid4')
+    def test_estrategia_configurable(self):
+        """La estrategia de generación se toma de la configuración."""
+        self.assertEqual(generate_primary_key().version, 4)
+
+    @override_settings(PRIMARY_KEY_STRATEGY='desconocida')
+    def test_estrategia_invalida(self):
+        """Una estrategia desconocida produce un error claro."""
+        with self.assertRaises(ValueError):
+            generate_primary_key()
+
+
+class TestCompactUUIDField(BaseTestCase):
+    """
+    Tests del campo UUID compacto.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.field = CompactUUIDField()
+        self.valor = uuid7()
+
+    def test_modelos_usan_uuid7(self):
+        """BaseModel genera claves UUIDv7 y el ORM las devuelve como uuid.UUID."""
+        cajon = Cajon.objects.create(nombre='Cajon Uno', capacidad_maxima=3, usuario=self.user)
+
+        self.assertEqual(cajon.pk.version, 7)
+        self.assertEqual(Cajon.objects.values_list('pk', flat=True).get(), cajon.pk)
+
+    @override_settings(UUID_BINARY_STORAGE=True)
+    def test_binario_en_mysql(self):
+        """En MySQL con almacenamiento binario se usan 16 bytes."""
+        self.assertEqual(self.field.db_type(MYSQL), 'binary(16)')
+        self.assertEqual(self.field.get_db_prep_value(self.valor, MYSQL), self.valor.bytes)
+        self.assertEqual(self.field.from_db_value(self.valor.bytes, None, MYSQL), self.valor)
+
+    @override_settings(UUID_BINARY_STORAGE=True)
+    def test_otros_motores_no_cambian(self):
+        """El almacenamiento binario solo aplica a MySQL."""
+        self.assertEqual(self.field.db_type(connection), connection.data_types['UUIDField'])
+        self.assertEqual(self.field.get_db_prep_value(self.valor, connection), self.valor.hex)
+
+    def test_char_por_defecto(self):
+        """Sin la opción activa se mantiene el tipo char(32) en MySQL."""
+        self.assertEqual(self.field.db_type(MYSQL), 'char(32)')
+        self.assertEqual(self.field.get_db_prep_value(self.valor, MYSQL), self.valor.hex)
+
+
+class TestMigrarClavesBinarias(TestCase):
+    """
+    Tests del plan de conversión en línea a BINARY(16).
+    """
+
+    def setUp(self):
+        self.tablas = columnas_uuid()
+        self.plan = PlanConversion(MYSQL, self.tablas)
+
+    def test_detecta_claves_y_referencias(self):
+        """Se incluyen las claves primarias y las claves foráneas que las referencian."""
+        columnas = dict(self.tablas[Historial._meta.db_table]['columnas'])
+
+        self.assertEqual(set(columnas), {'id', 'objeto_id', 'cajon_id'})
+        self.assertFalse(columnas['id'])
+        self.assertTrue(columnas['cajon_id'])
+
+    def test_preparar_es_en_linea(self):
+        """La fase preparar agrega columnas sin bloqueo y triggers de sincronización."""
+        sentencias = self.plan.preparar()
+
+        alter = [s for s in sentencias if s.startswith('ALTER TABLE')]
+        triggers = [s for s in sentencias if s.startswith('CREATE TRIGGER')]
+        self.assertEqual(len(alter), len(self.tablas))
+        self.assertEqual(len(triggers), 2 * len(self.tablas))
+        self.assertTrue(all('LOCK=NONE' in s for s in alter))
+
+    def test_copiar_por_rangos(self):
+        """La copia se hace por rangos de clave primaria."""
+        sql, parametros = self.plan.copiar_lote(Cajon._meta.db_table, 'a', 'b')
+
+        self.assertIn('`id__bin` = UNHEX(`id`)', sql)
+        self.assertIn('`id` > %s AND `id` <= %s', sql)
+        self.assertEqual(parametros, ['a', 'b'])
+
+    def test_intercambiar_recrea_claves_foraneas(self):
+        """El intercambio elimina y recrea las claves foráneas afectadas."""
+        tabla = Historial._meta.db_table
+        fk = (tabla, 'fk_cajon', 'cajon_id', Cajon._meta.db_table, 'id')
+        sentencias = self.plan.intercambiar([fk], {tabla: [('idx_cajon', False, ['cajon_id'])]})
+
+        self.assertTrue(sentencias[0].endswith('DROP FOREIGN KEY `fk_cajon`'))
+        self.assertIn('ADD CONSTRAINT `fk_cajon`', sentencias[-1])
+        self.assertTrue(any('ADD INDEX `idx_cajon` (`cajon_id`)' in s for s in sentencias))
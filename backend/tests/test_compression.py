@@ -0,0 +1,119 @@
+"""
+Tests para el middleware de compresión de respuestas.
+"""
+import gzip
+import json
+from unittest import skipUnless
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from cajones_inteligentes.models import Cajon
+from core.middleware import CompressionMiddleware, brotli, compression_stats
+from tests.test_base import BaseAPITestCase
+
+
+def build_middleware(response):
+    """Construye el middleware sobre una vista que retorna la respuesta dada."""
+    return CompressionMiddleware(lambda request: response)
+
+
+class TestCompressionMiddleware(TestCase):
+    """
+    Tests unitarios del middleware de compresión.
+    """
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.payload = json.dumps([
+            {'tipo_objeto_display': 'Electrónica', 'tamanio_display': 'Mediano', 'n': i}
+            for i in range(200)
+        ]).encode()
+        compression_stats.reset()
+
+    def get(self, response, accept_encoding='gzip, deflate, br'):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return build_middleware(response)(request)
+
+    def test_comprime_json_con_gzip(self):
+        """Las respuestas JSON grandes se comprimen con gzip."""
+        response = self.get(HttpResponse(self.payload, content_type='application/json'), 'gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), self.payload)
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+
+    @skipUnless(brotli, 'brotli no está instalado')
+    def test_prioriza_brotli(self):
+        """Si el cliente acepta brotli, se prefiere sobre gzip."""
+        response = self.get(HttpResponse(self.payload, content_type='application/json'))
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), self.payload)
+
+    def test_respeta_calidad_cero(self):
+        """Una codificación con q=0 no se utiliza."""
+        response = self.get(
+            HttpResponse(self.payload, content_type='application/json'), 'br;q=0, gzip;q=0'
+        )
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_no_comprime_respuestas_pequenas(self):
+        """Las respuestas por debajo del umbral se envían sin comprimir."""
+        response = self.get(HttpResponse(b'{"ok": true}', content_type='application/json'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_omite_contenido_ya_comprimido(self):
+        """Los tipos de contenido ya comprimidos no se recomprimen."""
+        response = self.get(HttpResponse(b'\x89PNG' * 1000, content_type='image/png'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_comprime_streaming_por_fragmentos(self):
+        """Las respuestas en streaming se comprimen fragmento a fragmento."""
+        chunks = [self.payload[i:i + 500] for i in range(0, len(self.payload), 500)]
+        response = self.get(
+            StreamingHttpResponse(iter(chunks), content_type='application/json'), 'gzip'
+        )
+
+        compressed = list(response.streaming_content)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(compressed), len(chunks) + 1)
+        self.assertEqual(gzip.decompress(b''.join(compressed)), self.payload)
+
+    @override_settings(COMPRESSION={'LEVELS': {'application/json': {'gzip': 1}}})
+    def test_nivel_configurable_por_content_type(self):
+        """El nivel de compresión se toma de la configuración por content type."""
+        middleware = build_middleware(HttpResponse())
+
+        self.assertEqual(middleware.level_for('application/json', 'gzip'), 1)
+        self.assertEqual(middleware.level_for('text/html', 'gzip'), 5)
+
+    def test_registra_metricas(self):
+        """Se registran bytes, ratio y tiempo de CPU por codificación."""
+        self.get(HttpResponse(self.payload, content_type='application/json'), 'gzip')
+
+        stats = compression_stats.snapshot()['gzip']
+        self.assertEqual(stats['responses'], 1)
+        self.assertEqual(stats['bytes_in'], len(self.payload))
+        self.assertLess(stats['ratio'], 1)
+        self.assertGreaterEqual(stats['cpu_seconds'], 0)
+
+
+class TestCompressionAPI(BaseAPITestCase):
+    """
+    Tests de integración de la compresión con la API.
+    """
+
+    def test_listado_comprimido(self):
+        """Los listados de la API se entregan comprimidos."""
+        self.authenticate_user()
+        for i in range(20):
+            Cajon.objects.create(nombre=f'Cajon {i}', capacidad_maxima=10, usuario=self.user)
+
+        response = self.client.get('/api/v1/cajones/', HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content))['count'], 20)
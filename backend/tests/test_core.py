@@ -1,7 +1,9 @@
 """
 Tests para el módulo core.
 """
-from django.test import TestCase
+from unittest import mock
+
+from django.test import TestCase, override_settings
 from django.contrib.auth.models import User
 from core.models import BaseModel, AuditableModel
 from tests.test_base import BaseAPITestCase
@@ -48,3 +50,15 @@ class TestCoreViews(BaseAPITestCase):
         self.assertEqual(response.data['status'], 'healthy')
         self.assertIn('message', response.data)
         self.assertIn('version', response.data)
+
+    @override_settings(METRICS_TOKEN='secreto')
+    def test_health_check_no_expone_pools(self):
+        """Las estadísticas de los pools solo están en /metrics, con token."""
+        pools = {'default': {'in_use': 1, 'idle': 2, 'checkouts': 3, 'waits': 0, 'timeouts': 0}}
+        with mock.patch('core.db.pool.pool_stats', return_value=pools):
+            response = self.client.get('/health/')
+            self.assertEqual(set(response.data), {'status', 'message', 'version'})
+
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+            metricas = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secreto')
+            self.assertIn(b'db_pool_checkouts_total{alias="default"} 3', metricas.content)
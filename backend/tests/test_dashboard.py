@@ -0,0 +1,98 @@
+"""
+Tests para el endpoint de dashboard.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from cajones_inteligentes.models import Cajon, Objeto, Historial, Recomendacion
+from tests.test_base import BaseAPITestCase
+
+LOCMEM_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'test-dashboard',
+    }
+}
+
+
+class TestDashboardView(BaseAPITestCase):
+    """
+    Tests para GET /api/v1/dashboard/.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate_user()
+
+    def crear_datos(self, cantidad_cajones):
+        """Crea cajones con objetos, historial y recomendaciones."""
+        inicio = Cajon.objects.count()
+        for i in range(inicio, inicio + cantidad_cajones):
+            cajon = Cajon.objects.create(
+                nombre=f'Cajon {i}',
+                capacidad_maxima=2,
+                usuario=self.user
+            )
+            objeto = Objeto.objects.create(nombre=f'Objeto {i}', cajon=cajon)
+            Historial.objects.create(
+                nombre=f'Objeto creado: {objeto.nombre}',
+                motivo='Creación de prueba',
+                usuario=self.user,
+                objeto=objeto,
+                cajon=cajon
+            )
+            Recomendacion.objects.create(
+                nombre=f'Recomendación {i}',
+                descripcion='Reorganizar el cajón de prueba',
+                usuario=self.user
+            )
+
+    def obtener_dashboard(self):
+        """Obtiene el dashboard registrando las consultas ejecutadas."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_dashboard_contenido(self):
+        """El dashboard incluye cajones, historial, recomendaciones y estadísticas."""
+        self.crear_datos(2)
+
+        response, _ = self.obtener_dashboard()
+
+        self.assertEqual(len(response.data['cajones']), 2)
+        self.assertEqual(response.data['cajones'][0]['objetos_count'], 1)
+        self.assertEqual(len(response.data['historial_reciente']), 2)
+        self.assertEqual(len(response.data['recomendaciones_pendientes']), 2)
+        self.assertEqual(response.data['estadisticas']['total_objetos'], 2)
+        self.assertEqual(response.data['estadisticas']['capacidad_total'], 4)
+
+    def test_dashboard_presupuesto_fijo_de_consultas(self):
+        """El número de consultas no depende de la cantidad de cajones."""
+        self.crear_datos(1)
+        _, consultas_pocos = self.obtener_dashboard()
+
+        self.crear_datos(10)
+        _, consultas_muchos = self.obtener_dashboard()
+
+        self.assertLessEqual(consultas_muchos, 4)
+        self.assertEqual(consultas_pocos, consultas_muchos)
+
+    @override_settings(CACHES=LOCMEM_CACHE)
+    def test_dashboard_cache_versionada(self):
+        """El dashboard se cachea y se invalida cuando el usuario escribe."""
+        self.crear_datos(1)
+        self.obtener_dashboard()
+
+        _, consultas_cacheadas = self.obtener_dashboard()
+        self.assertEqual(consultas_cacheadas, 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Recomendacion.objects.create(
+                nombre='Nueva recomendación',
+                descripcion='Recomendación creada después de cachear',
+                usuario=self.user
+            )
+
+        response, consultas = self.obtener_dashboard()
+        self.assertGreater(consultas, 0)
+        self.assertEqual(len(response.data['recomendaciones_pendientes']), 2)
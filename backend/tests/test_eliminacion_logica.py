@@ -0,0 +1,106 @@
+"""
+Tests para los managers de eliminación lógica y los índices parciales.
+"""
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase
+from cajones_inteligentes.models import Cajon, Objeto
+from tests.test_base import BaseAPITestCase
+
+
+class TestManagersEliminacionLogica(BaseAPITestCase):
+    """
+    Tests de ActiveManager / AllObjectsManager y de la restauración.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate_user()
+        self.cajon = Cajon.objects.create(nombre='Cajon Viejo', capacidad_maxima=5, usuario=self.user)
+        self.cajon.soft_delete()
+
+    def test_manager_por_defecto_excluye_inactivos(self):
+        """`objects` oculta los registros eliminados lógicamente; `all_objects` no."""
+        self.assertFalse(Cajon.objects.filter(pk=self.cajon.pk).exists())
+        self.assertTrue(Cajon.all_objects.filter(pk=self.cajon.pk).exists())
+
+    def test_restaurar_registro_inactivo(self):
+        """El endpoint de restauración accede explícitamente a los inactivos."""
+        response = self.client.post(f'/api/v1/cajones/{self.cajon.id}/restore/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Cajon.objects.filter(pk=self.cajon.pk).exists())
+
+    def test_restaurar_solo_registros_propios(self):
+        """No se pueden restaurar registros de otro usuario."""
+        ajeno = self.user.__class__.objects.create_user(username='ajeno', password='x')
+        cajon_ajeno = Cajon.objects.create(nombre='Cajon Ajeno', capacidad_maxima=5, usuario=ajeno)
+        cajon_ajeno.soft_delete()
+
+        response = self.client.post(f'/api/v1/cajones/{cajon_ajeno.id}/restore/')
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_nombre_unico_incluye_inactivos(self):
+        """El nombre de un cajón eliminado sigue reservado y se valida como 400."""
+        response = self.client.post('/api/v1/cajones/', {
+            'nombre': 'Cajon Viejo', 'capacidad_maxima': 3
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('nombre', response.data)
+
+    def test_full_clean_incluye_inactivos(self):
+        """La validación del modelo (admin, ModelForm) también ve los nombres de cajones eliminados."""
+        with self.assertRaises(ValidationError) as contexto:
+            Cajon(nombre='Cajon Viejo', capacidad_maxima=3, usuario=self.user).full_clean()
+        self.assertIn('nombre', contexto.exception.message_dict)
+
+        # El propio registro no entra en conflicto consigo mismo
+        Cajon.all_objects.get(pk=self.cajon.pk).full_clean()
+
+    def test_sin_advertencia_de_indices_parciales(self):
+        """ActiveIndex no emite models.W037 aunque el motor no soporte índices parciales."""
+        with mock.patch.object(connection.features, 'supports_partial_indexes', False):
+            errores = Cajon.check(databases=['default'])
+        self.assertNotIn('models.W037', [error.id for error in errores])
+
+    def test_restaurar_objeto_en_cajon_lleno(self):
+        """Restaurar un objeto en un cajón sin espacio responde 400."""
+        cajon = Cajon.objects.create(nombre='Cajon Lleno', capacidad_maxima=1, usuario=self.user)
+        objeto = Objeto.objects.create(nombre='Primero', cajon=cajon)
+        objeto.soft_delete()
+        Objeto.objects.create(nombre='Segundo', cajon=cajon)
+
+        response = self.client.post(f'/api/v1/objetos/{objeto.id}/restore/')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Objeto.objects.filter(pk=objeto.pk).exists())
+
+
+class TestActiveIndex(TestCase):
+    """
+    Tests de los índices parciales sobre registros activos.
+    """
+
+    def index(self, model, name):
+        return next(index for index in model._meta.indexes if index.name == name)
+
+    def test_indice_parcial(self):
+        """En motores con soporte el índice se crea con WHERE is_active."""
+        index = self.index(Cajon, 'cajon_usuario_nombre_activo')
+        sql = str(index.create_sql(Cajon, connection.schema_editor()))
+
+        self.assertIn('WHERE', sql)
+        self.assertIn('"usuario_id", "nombre"', sql)
+
+    def test_fallback_sin_indices_parciales(self):
+        """Sin soporte de índices parciales se agrega is_active como columna."""
+        index = self.index(Objeto, 'objeto_cajon_tipo_activo')
+        with mock.patch.object(connection.features, 'supports_partial_indexes', False):
+            sql = str(index.create_sql(Objeto, connection.schema_editor()))
+
+        self.assertNotIn('WHERE', sql)
+        self.assertIn('"cajon_id", "is_active", "tipo_objeto"', sql)
@@ -0,0 +1,221 @@
+"""
+Tests de los eventos en tiempo real (core.events) y del stream SSE.
+"""
+import asyncio
+import json
+import logging
+import threading
+
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from cajones_inteligentes.models import Cajon, Objeto, Tamanio, TipoObjeto
+from core import events
+from core.events import EventBus, event_bus
+from tests.test_base import BaseAPITestCase
+from tests.test_vistas_async import Handler
+
+
+def leer(suscripcion):
+    """Eventos pendientes como (nombre, datos)."""
+    pendientes, _ = suscripcion.drain()
+    return [(evento, json.loads(datos)) for evento, datos in pendientes]
+
+
+class TestEventBus(SimpleTestCase):
+    """
+    Tests del pub/sub en proceso.
+    """
+
+    def test_entrega_solo_al_usuario(self):
+        bus = EventBus()
+        propia, ajena = bus.subscribe(1), bus.subscribe(2)
+
+        bus.dispatch(1, ('objeto_creado', '{}'))
+
+        self.assertEqual(propia.drain(), ([('objeto_creado', '{}')], 0))
+        self.assertEqual(ajena.drain(), ([], 0))
+        bus.unsubscribe(propia)
+        bus.unsubscribe(ajena)
+        self.assertEqual(bus.stats()['subscriptions'], 0)
+
+    def test_descarta_los_mas_antiguos(self):
+        """Un cliente lento pierde los eventos más antiguos y recibe `resync`."""
+        bus = EventBus()
+        suscripcion = bus.subscribe(1, maxsize=2)
+        for i in range(3):
+            bus.dispatch(1, ('objeto_creado', str(i)))
+
+        pendientes, descartados = suscripcion.drain()
+
+        self.assertEqual([datos for _, datos in pendientes], ['1', '2'])
+        self.assertEqual(bus.stats()['dropped'], 1)
+        self.assertEqual(
+            events.encode(pendientes, descartados),
+            b'event: resync\ndata: {"dropped": 1}\n\n'
+            b'event: objeto_creado\ndata: 1\n\nevent: objeto_creado\ndata: 2\n\n',
+        )
+        self.assertEqual(events.encode([]), events.KEEPALIVE)
+
+    def test_redis_descarta_mensajes_invalidos(self):
+        """Un mensaje ajeno en el canal no detiene la escucha de los siguientes."""
+        bus = EventBus()
+        suscripcion = bus.subscribe(1)
+        # Sin __init__: no requiere el paquete redis ni inicia el hilo de escucha
+        backend = events.RedisBackend.__new__(events.RedisBackend)
+        backend.bus, backend.channel = bus, 'eventos'
+
+        with self.assertLogs('core.events', level=logging.ERROR) as logs:
+            for datos in [b'no es json', b'7', b'[1, "objeto_creado", "{}"]']:
+                backend.recibir({'type': 'message', 'data': datos})
+
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(suscripcion.drain(), ([('objeto_creado', '{}')], 0))
+        bus.unsubscribe(suscripcion)
+
+    async def test_stream_async(self):
+        """Los eventos publicados desde otro hilo despiertan al stream; sin eventos, keepalive."""
+        abiertas = event_bus.stats()['subscriptions']
+        stream = events.astream(7, keepalive=0.05)
+        self.assertTrue((await anext(stream)).startswith(b'retry:'))
+        self.assertEqual(await anext(stream), events.KEEPALIVE)
+
+        threading.Timer(0.01, events.publish, args=(7, 'objeto_creado', {'objeto': 1})).start()
+        self.assertEqual(await anext(stream), b'event: objeto_creado\ndata: {"objeto": 1}\n\n')
+
+        await stream.aclose()
+        self.assertEqual(event_bus.stats()['subscriptions'], abiertas)
+
+
+class TestEventosDominio(BaseAPITestCase):
+    """
+    Las escrituras publican sus eventos al confirmarse la transacción.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate_user()
+        self.cajon = Cajon.objects.create(nombre='Cajon A', capacidad_maxima=5, usuario=self.user)
+        self.destino = Cajon.objects.create(nombre='Cajon B', capacidad_maxima=5, usuario=self.user)
+        self.objeto = Objeto.objects.create(
+            nombre='Libro', cajon=self.cajon, tipo_objeto=TipoObjeto.LIBROS, tamanio=Tamanio.MEDIANO
+        )
+        self.suscripcion = event_bus.subscribe(self.user.pk)
+        self.addCleanup(event_bus.unsubscribe, self.suscripcion)
+
+    def escribir(self, metodo, url, datos=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, metodo)(url, datos, format='json')
+        self.assertLess(response.status_code, 300, response.content)
+        return response
+
+    def test_alta_movimiento_y_baja(self):
+        response = self.escribir('post', '/api/v1/objetos/', {
+            'nombre': 'Cable', 'cajon': str(self.cajon.pk),
+            'tipo_objeto': TipoObjeto.CABLES, 'tamanio': Tamanio.PEQUENO,
+        })
+        nuevo = response.json()['id']
+        self.escribir('patch', f'/api/v1/objetos/{nuevo}/', {'cajon': str(self.destino.pk)})
+        self.escribir('delete', f'/api/v1/objetos/{nuevo}/eliminar_objeto/')
+
+        cajon, destino = str(self.cajon.pk), str(self.destino.pk)
+        self.assertEqual(leer(self.suscripcion), [
+            ('objeto_creado', {'objeto': nuevo, 'cajon': cajon}),
+            ('objeto_movido', {'objeto': nuevo, 'cajon': destino, 'cajon_anterior': cajon}),
+            ('objeto_eliminado', {'objeto': nuevo, 'cajon': destino}),
+        ])
+
+    def test_mover_varios(self):
+        self.escribir('post', '/api/v1/objetos/mover/', {
+            'objetos': [str(self.objeto.pk)], 'cajon_destino': str(self.destino.pk),
+        })
+
+        self.assertEqual(leer(self.suscripcion), [('objeto_movido', {
+            'objeto': str(self.objeto.pk), 'cajon': str(self.destino.pk), 'cajon_anterior': str(self.cajon.pk),
+        })])
+
+    def test_cambio_de_capacidad(self):
+        self.escribir('patch', f'/api/v1/cajones/{self.cajon.pk}/', {'descripcion': 'Sin cambio de capacidad'})
+        self.assertEqual(leer(self.suscripcion), [])
+
+        self.escribir('patch', f'/api/v1/cajones/{self.cajon.pk}/', {'capacidad_maxima': 8})
+        self.assertEqual(leer(self.suscripcion), [('cajon_capacidad_cambiada', {
+            'cajon': str(self.cajon.pk), 'capacidad_maxima': 8, 'capacidad_anterior': 5,
+        })])
+
+    def test_sin_eventos_si_se_revierte(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.objeto.cajon = self.destino
+                self.objeto.save()
+                raise RuntimeError
+
+        self.assertEqual(leer(self.suscripcion), [])
+
+    def test_otro_usuario_no_recibe(self):
+        ajena = event_bus.subscribe(self.user.pk + 1000)
+        self.addCleanup(event_bus.unsubscribe, ajena)
+
+        self.escribir('delete', f'/api/v1/objetos/{self.objeto.pk}/eliminar_objeto/')
+
+        self.assertEqual(leer(ajena), [])
+        self.assertEqual(len(leer(self.suscripcion)), 1)
+
+
+@override_settings(EVENTS_KEEPALIVE=0.05)
+class TestStreamEventos(TestCase):
+    """
+    Tests del endpoint /api/v1/eventos/stream/ bajo ASGI y WSGI.
+    """
+    url = '/api/v1/eventos/stream/'
+
+    @classmethod
+    def setUpTestData(cls):
+        from django.contrib.auth.models import User
+        cls.user = User.objects.create_user(username='eventos', password='x')
+
+    def setUp(self):
+        self.async_client.handler = Handler(enforce_csrf_checks=False)
+
+    async def test_stream_asgi(self):
+        abiertas = event_bus.stats()['subscriptions']
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(self.url, headers={'Accept': 'text/event-stream'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        contenido = response.streaming_content
+        self.assertTrue((await anext(contenido)).startswith(b'retry:'))
+        self.assertEqual(event_bus.stats()['subscriptions'], abiertas + 1)
+
+        threading.Timer(0.01, events.publish, args=(self.user.pk, 'objeto_creado', {'objeto': 'x'})).start()
+        fragmentos = [await anext(contenido) for _ in range(3)]
+        self.assertIn(b'event: objeto_creado\ndata: {"objeto": "x"}\n\n', fragmentos)
+
+        # El cliente se desconecta: Django cancela la petición mientras espera eventos
+        lectura = asyncio.ensure_future(anext(contenido))
+        await asyncio.sleep(0.01)
+        lectura.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await lectura
+        self.assertEqual(event_bus.stats()['subscriptions'], abiertas)
+
+    async def test_requiere_autenticacion(self):
+        response = await self.async_client.get(self.url, headers={'Accept': 'text/event-stream'})
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('detail', json.loads(response.content))
+
+    def test_stream_wsgi(self):
+        abiertas = event_bus.stats()['subscriptions']
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+        contenido = response.streaming_content
+
+        self.assertTrue(next(contenido).startswith(b'retry:'))
+        events.publish(self.user.pk, 'cajon_capacidad_cambiada', {'cajon': 'x'})
+        self.assertEqual(next(contenido), b'event: cajon_capacidad_cambiada\ndata: {"cajon": "x"}\n\n')
+        self.assertEqual(next(contenido), events.KEEPALIVE)
+
+        response.close()
+        self.assertEqual(event_bus.stats()['subscriptions'], abiertas)
@@ -0,0 +1,93 @@
+"""
+Tests del comando generar_datos.
+"""
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count, F, Q
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from cajones_inteligentes.management.commands.generar_datos import GeneradorUsuario
+from cajones_inteligentes.models import Cajon, Historial, Objeto
+
+OPCIONES = {'cajones_por_usuario': 4, 'objetos': 30, 'historial': 50, 'seed': 7, 'dias': 30, 'lote': 100}
+DESDE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def valores(instancias):
+    return [
+        {campo.attname: getattr(instancia, campo.attname) for campo in instancia._meta.concrete_fields}
+        for instancia in instancias
+    ]
+
+
+class TestGeneradorUsuario(SimpleTestCase):
+    """
+    Tests de la generación determinista de filas.
+    """
+
+    def test_misma_semilla_mismas_filas(self):
+        primera = GeneradorUsuario(OPCIONES, DESDE).filas(3, usuario_id=10)
+        segunda = GeneradorUsuario(OPCIONES, DESDE).filas(3, usuario_id=10)
+        for a, b in zip(primera, segunda):
+            self.assertEqual(valores(a), valores(b))
+
+    def test_semilla_o_usuario_distintos(self):
+        base = valores(GeneradorUsuario(OPCIONES, DESDE).filas(3, usuario_id=10)[1])
+        otra_semilla = valores(GeneradorUsuario({**OPCIONES, 'seed': 8}, DESDE).filas(3, usuario_id=10)[1])
+        otro_usuario = valores(GeneradorUsuario(OPCIONES, DESDE).filas(4, usuario_id=10)[1])
+        self.assertNotEqual(base, otra_semilla)
+        self.assertNotEqual(base, otro_usuario)
+
+    def test_claves_segun_estrategia(self):
+        for estrategia, version in (('uuid7', 7), ('uuid4', 4)):
+            with self.subTest(estrategia=estrategia), override_settings(PRIMARY_KEY_STRATEGY=estrategia):
+                filas = GeneradorUsuario(OPCIONES, DESDE).filas(3, usuario_id=10)
+                self.assertEqual({fila.pk.version for grupo in filas for fila in grupo}, {version})
+                self.assertEqual(valores(filas[0]), valores(GeneradorUsuario(OPCIONES, DESDE).filas(3, 10)[0]))
+
+    def test_respeta_capacidad(self):
+        """Con más objetos que la capacidad típica, ningún cajón se desborda."""
+        cajones, objetos, historial = GeneradorUsuario({**OPCIONES, 'objetos': 300}, DESDE).filas(0, 1)
+        self.assertEqual(len(objetos), 300)
+        self.assertEqual(sum(cajon.ocupados for cajon in cajones), 300)
+        for cajon in cajones:
+            self.assertLessEqual(cajon.ocupados, cajon.capacidad_maxima)
+        self.assertEqual(len(historial), 50)
+
+
+class TestComandoGenerarDatos(TestCase):
+    """
+    Tests del comando completo (en un solo proceso).
+    """
+
+    def test_genera_conjunto(self):
+        salida = StringIO()
+        call_command(
+            'generar_datos', usuarios=3, cajones_por_usuario=4, objetos=30, historial=50,
+            procesos=1, lote=40, stdout=salida,
+        )
+
+        self.assertIn('3 usuarios, 12 cajones, 90 objetos y 150 filas de historial', salida.getvalue())
+        self.assertEqual(User.objects.filter(username__startswith='usuario').count(), 3)
+        self.assertEqual(Historial.objects.count(), 150)
+        self.assertFalse(Cajon.objects.filter(ocupados__gt=F('capacidad_maxima')).exists())
+        # El contador desnormalizado coincide con los objetos
+        descuadrados = Cajon.objects.annotate(
+            total=Count('objetos', filter=Q(objetos__is_active=True))
+        ).exclude(ocupados=F('total'))
+        self.assertFalse(descuadrados.exists())
+        # Las fechas son las generadas, no la hora de inserción
+        self.assertEqual(Objeto.objects.filter(created_at__year=2024).count(), 90)
+
+    def test_rechaza_usuarios_existentes(self):
+        User.objects.create_user(username='usuario0')
+        with self.assertRaises(CommandError):
+            call_command('generar_datos', usuarios=1, procesos=1, stdout=StringIO())
+
+    def test_objetos_que_no_caben(self):
+        with self.assertRaises(CommandError):
+            call_command('generar_datos', usuarios=1, cajones_por_usuario=1, objetos=1001, stdout=StringIO())
@@ -0,0 +1,201 @@
+"""
+Tests del logging estructurado y de la cola de logging en segundo plano.
+"""
+import json
+import logging
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from cajones_inteligentes.models import Cajon
+from cajones_inteligentes.views import CajonViewSet
+from core.logs import BackgroundQueueHandler, JSONFormatter, RequestContextFilter, queue_stats
+from tests.test_base import BaseAPITestCase
+
+
+class Captura(logging.Handler):
+    """Handler que guarda los registros recibidos."""
+
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class Bloqueado(Captura):
+    """Handler que no escribe hasta que se libera `paso` (disco lento)."""
+
+    def __init__(self):
+        super().__init__()
+        self.paso = threading.Event()
+
+    def emit(self, record):
+        self.paso.wait(5)
+        super().emit(record)
+
+
+class TestJSONFormatter(SimpleTestCase):
+    """
+    Tests del formato JSON de una línea.
+    """
+
+    def test_campos(self):
+        logger = logging.getLogger('tests.logs.json')
+        record = logger.makeRecord(
+            logger.name, logging.WARNING, __file__, 1, 'Cajón %s lleno', ('A',), None,
+            extra={'request_id': 'abc', 'user': 'ana', 'action': 'CajonViewSet.list', 'ocupados': 5},
+        )
+
+        evento = json.loads(JSONFormatter().format(record))
+
+        self.assertEqual(evento['level'], 'warning')
+        self.assertEqual(evento['logger'], 'tests.logs.json')
+        self.assertEqual(evento['event'], 'Cajón A lleno')
+        self.assertEqual(evento['request_id'], 'abc')
+        self.assertEqual(evento['action'], 'CajonViewSet.list')
+        self.assertEqual(evento['ocupados'], 5)
+        self.assertIn('timestamp', evento)
+
+
+class TestBackgroundQueueHandler(SimpleTestCase):
+    """
+    Tests de la cola: entrega, descarte, muestreo y latencia de emit.
+    """
+
+    def crear_logger(self, handler):
+        logger = logging.getLogger(f'tests.logs.{self._testMethodName}')
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+        self.addCleanup(handler.close)
+        return logger
+
+    def test_entrega_a_los_targets(self):
+        """Los registros llegan a los targets con el mensaje ya interpolado y la traza."""
+        destino = Captura()
+        logger = self.crear_logger(BackgroundQueueHandler([destino]))
+
+        logger.info('hola %s', 'mundo')
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            logger.exception('fallo')
+        logger.handlers[0].stop()
+
+        self.assertEqual([record.msg for record in destino.records], ['hola mundo', 'fallo'])
+        self.assertIsNone(destino.records[1].exc_info)
+        self.assertIn('ZeroDivisionError', destino.records[1].exc_text)
+
+    def test_respeta_nivel_del_target(self):
+        destino = Captura(logging.WARNING)
+        logger = self.crear_logger(BackgroundQueueHandler([destino]))
+
+        logger.info('informativo')
+        logger.error('error')
+        logger.handlers[0].stop()
+
+        self.assertEqual([record.msg for record in destino.records], ['error'])
+
+    def test_target_por_nombre(self):
+        """Resuelve el target al configurarse y conserva la referencia."""
+        destino = Captura()
+        destino.set_name('tests_logs_destino')
+        handler = BackgroundQueueHandler(['tests_logs_destino'])
+        handler.close()
+
+        self.assertEqual(handler.targets, [destino])
+        with self.assertRaises(ValueError):
+            BackgroundQueueHandler(['tests_logs_inexistente'])
+
+    def test_no_bloquea_y_descarta_con_cola_llena(self):
+        """Con el target detenido, emit no espera y lo que no cabe se descarta."""
+        destino = Bloqueado()
+        handler = BackgroundQueueHandler([destino], maxsize=10, sampling_threshold=1)
+        logger = self.crear_logger(handler)
+
+        inicio = time.perf_counter()
+        for i in range(50):
+            logger.info('registro %s', i)
+        duracion = time.perf_counter() - inicio
+
+        self.assertLess(duracion, 1)
+        # Uno en manos del listener y diez en la cola; el resto se descarta
+        self.assertGreaterEqual(handler.dropped, 39)
+        self.assertGreaterEqual(queue_stats()['dropped'], handler.dropped)
+        destino.paso.set()
+        handler.stop()
+        self.assertEqual(len(destino.records) + handler.dropped, 50)
+
+    def test_muestrea_debug_bajo_carga(self):
+        """Por encima del umbral solo se conserva una fracción de los DEBUG; INFO nunca."""
+        destino = Bloqueado()
+        handler = BackgroundQueueHandler([destino], maxsize=1000, sampling_threshold=0.01, debug_sample_rate=0)
+        logger = self.crear_logger(handler)
+
+        for i in range(20):
+            logger.info('info %s', i)
+        for i in range(20):
+            logger.debug('debug %s', i)
+        logger.info('final')
+        destino.paso.set()
+        handler.stop()
+
+        mensajes = [record.msg for record in destino.records]
+        self.assertEqual(handler.sampled, 20)
+        self.assertEqual(handler.dropped, 0)
+        self.assertEqual(len([m for m in mensajes if m.startswith('info')]), 20)
+        self.assertIn('final', mensajes)
+
+
+class TestContextoDePeticion(BaseAPITestCase):
+    """
+    Tests del identificador de petición y del contexto en los registros.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate_user()
+        Cajon.objects.create(nombre='Cajon', capacidad_maxima=5, usuario=self.user)
+        self.captura = Captura()
+        self.captura.addFilter(RequestContextFilter())
+        logger = logging.getLogger('apps')
+        logger.addHandler(self.captura)
+        self.addCleanup(logger.removeHandler, self.captura)
+
+    def listar(self, **extra):
+        original = CajonViewSet.get_queryset
+
+        def get_queryset(vista):
+            logging.getLogger('apps').warning('listando cajones')
+            return original(vista)
+
+        with mock.patch.object(CajonViewSet, 'get_queryset', get_queryset):
+            return self.client.get('/api/v1/cajones/', **extra)
+
+    def test_contexto_en_los_registros(self):
+        response = self.listar()
+
+        record = self.captura.records[-1]
+        self.assertEqual(record.request_id, response['X-Request-ID'])
+        self.assertEqual(len(record.request_id), 32)
+        self.assertEqual(record.user, self.user.username)
+        self.assertEqual(record.action, 'CajonViewSet.list')
+
+    def test_respeta_request_id_entrante(self):
+        response = self.listar(HTTP_X_REQUEST_ID='balanceador-123')
+
+        self.assertEqual(response['X-Request-ID'], 'balanceador-123')
+        self.assertEqual(self.captura.records[-1].request_id, 'balanceador-123')
+
+    def test_ignora_request_id_invalido(self):
+        response = self.listar(HTTP_X_REQUEST_ID='no valido\n')
+        self.assertNotEqual(response['X-Request-ID'], 'no valido\n')
+
+    def test_fuera_de_peticion(self):
+        logging.getLogger('apps').warning('sin petición')
+        self.assertIsNone(self.captura.records[-1].request_id)
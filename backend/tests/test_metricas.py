@@ -0,0 +1,160 @@
+"""
+Tests del registro de métricas y del endpoint /metrics.
+"""
+import json
+import os
+import tempfile
+import timeit
+
+from django.test import SimpleTestCase, override_settings
+
+from cajones_inteligentes.models import Cajon
+from core import metrics
+from core.metrics import MetricsRegistry, merge, registry, render_prometheus
+from tests.test_base import BaseAPITestCase
+
+
+class TestMetricsRegistry(SimpleTestCase):
+    """
+    Tests del registro en memoria y del formato de exposición.
+    """
+
+    def setUp(self):
+        registry.reset()
+        self.addCleanup(registry.reset)
+
+    def test_histograma_acumulado(self):
+        """Los buckets se exponen acumulados, con +Inf, suma y total."""
+        registry.observe('http_request_duration_seconds', 0.003, (('view', 'V.list'),))
+        registry.observe('http_request_duration_seconds', 0.02, (('view', 'V.list'),))
+        registry.observe('http_request_duration_seconds', 30, (('view', 'V.list'),))
+
+        salida = render_prometheus()
+
+        self.assertIn('# TYPE http_request_duration_seconds histogram', salida)
+        self.assertIn('http_request_duration_seconds_bucket{view="V.list",le="0.005"} 1', salida)
+        self.assertIn('http_request_duration_seconds_bucket{view="V.list",le="0.025"} 2', salida)
+        self.assertIn('http_request_duration_seconds_bucket{view="V.list",le="10.0"} 2', salida)
+        self.assertIn('http_request_duration_seconds_bucket{view="V.list",le="+Inf"} 3', salida)
+        self.assertIn('http_request_duration_seconds_count{view="V.list"} 3', salida)
+
+    def test_observe_request(self):
+        """Una petición alimenta el contador y los cuatro histogramas de la acción."""
+        registry.observe_request('V.list', 'GET', 200, 0.01, 0.002, 0.001, 512)
+        registry.observe_request('V.list', 'GET', 200, 0.01, 0.002, 0.001, None)
+
+        salida = render_prometheus()
+
+        self.assertIn('http_requests_total{view="V.list",method="GET",status="200"} 2', salida)
+        self.assertIn('http_request_db_seconds_count{view="V.list"} 2', salida)
+        self.assertIn('http_request_serialization_seconds_count{view="V.list"} 2', salida)
+        self.assertIn('http_response_size_bytes_count{view="V.list"} 1', salida)
+
+    def test_escapa_etiquetas(self):
+        registry.inc('cache_requests_total', (('cache', 'a"b'), ('result', 'hit')))
+        self.assertIn('cache_requests_total{cache="a\\"b",result="hit"} 1', render_prometheus())
+
+    def test_merge_de_procesos(self):
+        """Contadores e histogramas de varios workers se suman."""
+        uno, otro = MetricsRegistry(), MetricsRegistry()
+        uno.observe_request('V.list', 'GET', 200, 0.01, 0.0, 0.0, 100)
+        otro.observe_request('V.list', 'GET', 200, 0.2, 0.0, 0.0, 100)
+        otro.observe_request('V.list', 'GET', 500, 0.2, 0.0, 0.0, 100)
+
+        contadores, histogramas = merge([uno.snapshot(), otro.snapshot()])
+
+        ok = ('http_requests_total', (('view', 'V.list'), ('method', 'GET'), ('status', '200')))
+        self.assertEqual(contadores[ok], 2)
+        duracion = histogramas[('http_request_duration_seconds', (('view', 'V.list'),))]
+        self.assertEqual(duracion[-1], 3)
+        self.assertAlmostEqual(duracion[-2], 0.41)
+
+    def test_directorio_compartido(self):
+        """En modo multiproceso /metrics agrega los volcados de todos los workers."""
+        with tempfile.TemporaryDirectory() as directorio:
+            otro = MetricsRegistry()
+            otro.inc('cache_requests_total', (('cache', 'dashboard'), ('result', 'hit')), 4)
+            with open(os.path.join(directorio, 'metrics_99999.json'), 'w') as archivo:
+                json.dump(otro.snapshot(), archivo)
+            registry.inc('cache_requests_total', (('cache', 'dashboard'), ('result', 'hit')))
+
+            with override_settings(METRICS_MULTIPROC_DIR=directorio):
+                salida = render_prometheus()
+
+            self.assertIn(f'metrics_{os.getpid()}.json', os.listdir(directorio))
+        self.assertIn('cache_requests_total{cache="dashboard",result="hit"} 5', salida)
+
+    def test_costo_de_registro(self):
+        """Registrar una petición cuesta unos pocos microsegundos."""
+        repeticiones = 20000
+        segundos = timeit.timeit(
+            lambda: registry.observe_request('V.list', 'GET', 200, 0.012, 0.003, 0.001, 2048),
+            number=repeticiones,
+        )
+        # Margen amplio para máquinas de CI lentas
+        self.assertLess(segundos / repeticiones, 50e-6)
+
+
+class TestMetricsEndpoint(BaseAPITestCase):
+    """
+    Tests del middleware y del endpoint /metrics.
+    """
+
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+        self.addCleanup(registry.reset)
+        self.user.is_staff = True
+        self.authenticate_user()
+
+    def test_latencia_por_accion(self):
+        """Las peticiones se etiquetan con `viewset.acción`."""
+        Cajon.objects.create(nombre='Cajon', capacidad_maxima=5, usuario=self.user)
+        self.client.get('/api/v1/cajones/')
+        self.client.get('/api/v1/cajones/')
+
+        response = self.client.get('/metrics')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        salida = response.content.decode()
+        self.assertIn('http_requests_total{view="CajonViewSet.list",method="GET",status="200"} 2', salida)
+        self.assertIn('http_request_duration_seconds_count{view="CajonViewSet.list"} 2', salida)
+        self.assertIn('http_response_size_bytes_count{view="CajonViewSet.list"} 2', salida)
+        db = metrics.collect()[1][('http_request_db_seconds', (('view', 'CajonViewSet.list'),))]
+        self.assertGreater(db[-2], 0)
+
+    def test_accesos_a_cache(self):
+        """El dashboard cuenta aciertos y fallos de su caché."""
+        self.client.get('/api/v1/dashboard/')
+        salida = self.client.get('/metrics').content.decode()
+        self.assertIn('cache_requests_total{cache="dashboard",result="miss"} 1', salida)
+
+    def test_rutas_sin_vista(self):
+        self.client.get('/no-existe/')
+        salida = self.client.get('/metrics').content.decode()
+        self.assertIn('http_requests_total{view="unmatched",method="GET",status="404"} 1', salida)
+
+    @override_settings(METRICS_TOKEN='secreto')
+    def test_token(self):
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secreto')
+        self.assertEqual(response.status_code, 200)
+
+    def test_sin_token_solo_staff(self):
+        self.user.is_staff = False
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='secreto')
+    def test_token_incorrecto(self):
+        """Con token, un usuario autenticado sin el token de métricas no accede."""
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer otro').status_code, 401)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_desactivado(self):
+        self.client.get('/api/v1/cajones/')
+        self.assertNotIn('CajonViewSet.list', self.client.get('/metrics').content.decode())
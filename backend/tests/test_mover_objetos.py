@@ -0,0 +1,118 @@
+"""
+Tests para el movimiento masivo de objetos entre cajones.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from cajones_inteligentes.models import Cajon, Objeto, Historial
+from tests.test_base import BaseAPITestCase
+
+
+class TestMoverObjetos(BaseAPITestCase):
+    """
+    Tests para POST /api/v1/objetos/mover/.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate_user()
+        self.origen = Cajon.objects.create(nombre='Origen', capacidad_maxima=50, usuario=self.user)
+        self.destino = Cajon.objects.create(nombre='Destino', capacidad_maxima=5, usuario=self.user)
+        self.otro = Cajon.objects.create(nombre='Otro', capacidad_maxima=5, usuario=self.user)
+        self.objetos = [
+            Objeto.objects.create(nombre=f'Objeto {i}', cajon=self.origen) for i in range(4)
+        ]
+
+    def mover(self, data):
+        return self.client.post('/api/v1/objetos/mover/', data, format='json')
+
+    def test_mover_a_destino_comun(self):
+        """Mueve varios objetos a un cajón y registra el historial."""
+        response = self.mover({
+            'objetos': [str(obj.id) for obj in self.objetos],
+            'cajon_destino': str(self.destino.id)
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['elementos_afectados'], 4)
+        self.assertEqual(Objeto.objects.filter(cajon=self.destino).count(), 4)
+        self.assertEqual(Historial.objects.filter(tipo_accion='MOVER').count(), 4)
+
+    def test_mover_con_destinos_por_objeto(self):
+        """Cada objeto puede tener su propio cajón destino."""
+        response = self.mover({'movimientos': [
+            {'objeto': str(self.objetos[0].id), 'cajon': str(self.destino.id)},
+            {'objeto': str(self.objetos[1].id), 'cajon': str(self.otro.id)},
+        ]})
+
+        self.assertEqual(response.status_code, 200)
+        self.objetos[0].refresh_from_db()
+        self.objetos[1].refresh_from_db()
+        self.assertEqual(self.objetos[0].cajon, self.destino)
+        self.assertEqual(self.objetos[1].cajon, self.otro)
+
+    def test_capacidad_agregada_insuficiente(self):
+        """Si el total no cabe en el destino no se mueve ningún objeto."""
+        Objeto.objects.create(nombre='Ocupante', cajon=self.destino)
+        Objeto.objects.create(nombre='Ocupante 2', cajon=self.destino)
+
+        response = self.mover({
+            'objetos': [str(obj.id) for obj in self.objetos],
+            'cajon_destino': str(self.destino.id)
+        })
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Objeto.objects.filter(cajon=self.origen).count(), 4)
+        self.assertFalse(Historial.objects.filter(tipo_accion='MOVER').exists())
+
+    def test_intercambio_entre_cajones_llenos(self):
+        """La capacidad se verifica sobre el saldo neto: un intercambio entre cajones llenos es válido."""
+        lleno_a = Cajon.objects.create(nombre='Lleno A', capacidad_maxima=1, usuario=self.user)
+        lleno_b = Cajon.objects.create(nombre='Lleno B', capacidad_maxima=1, usuario=self.user)
+        objeto_a = Objeto.objects.create(nombre='En A', cajon=lleno_a)
+        objeto_b = Objeto.objects.create(nombre='En B', cajon=lleno_b)
+
+        response = self.mover({'movimientos': [
+            {'objeto': str(objeto_a.id), 'cajon': str(lleno_b.id)},
+            {'objeto': str(objeto_b.id), 'cajon': str(lleno_a.id)},
+        ]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Objeto.objects.get(pk=objeto_a.pk).cajon_id, lleno_b.pk)
+        self.assertEqual(Objeto.objects.get(pk=objeto_b.pk).cajon_id, lleno_a.pk)
+        self.assertEqual(
+            list(Cajon.objects.filter(pk__in=[lleno_a.pk, lleno_b.pk]).values_list('ocupados', flat=True)),
+            [1, 1]
+        )
+
+    def test_no_mueve_objetos_de_otro_usuario(self):
+        """Los objetos ajenos no se pueden mover."""
+        ajeno = self.user.__class__.objects.create_user(username='ajeno', password='x')
+        cajon_ajeno = Cajon.objects.create(nombre='Ajeno', capacidad_maxima=5, usuario=ajeno)
+        objeto_ajeno = Objeto.objects.create(nombre='Ajeno', cajon=cajon_ajeno)
+
+        response = self.mover({
+            'objetos': [str(objeto_ajeno.id)],
+            'cajon_destino': str(self.destino.id)
+        })
+
+        self.assertEqual(response.status_code, 400)
+        objeto_ajeno.refresh_from_db()
+        self.assertEqual(objeto_ajeno.cajon, cajon_ajeno)
+
+    def test_consultas_constantes(self):
+        """El número de consultas no depende de la cantidad de objetos."""
+        with CaptureQueriesContext(connection) as pocos:
+            self.mover({'objetos': [str(self.objetos[0].id)], 'cajon_destino': str(self.otro.id)})
+        with CaptureQueriesContext(connection) as muchos:
+            self.mover({
+                'objetos': [str(obj.id) for obj in self.objetos[1:]],
+                'cajon_destino': str(self.destino.id)
+            })
+
+        self.assertEqual(len(pocos), len(muchos))
+
+    def test_validacion_de_formato(self):
+        """Se requiere una de las dos formas de la petición."""
+        response = self.mover({'objetos': [str(self.objetos[0].id)]})
+
+        self.assertEqual(response.status_code, 400)
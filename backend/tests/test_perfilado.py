@@ -0,0 +1,100 @@
+"""
+Tests del perfilado bajo demanda y de /api/v1/perfiles/.
+"""
+import os
+import pstats
+import shutil
+import tempfile
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+
+from cajones_inteligentes.models import Cajon
+from core.profiling import list_profiles, profile_path
+from tests.test_base import BaseAPITestCase
+
+
+class TestPerfilado(BaseAPITestCase):
+    """
+    Tests del middleware de perfilado y de la vista de perfiles.
+    """
+
+    def setUp(self):
+        super().setUp()
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        ajustes = override_settings(PROFILING_DIR=directorio)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.staff = User.objects.create_user(username='staff', password='x', is_staff=True)
+        Cajon.objects.create(nombre='Cajon', capacidad_maxima=5, usuario=self.staff)
+
+    def perfilar(self):
+        self.client.force_authenticate(user=self.staff)
+        return self.client.get('/api/v1/cajones/', HTTP_X_PROFILE='1')
+
+    def test_encabezado_de_staff(self):
+        """Un staff con X-Profile obtiene un perfil con metadatos y archivos."""
+        response = self.perfilar()
+
+        self.assertEqual(response.status_code, 200)
+        perfil_id = response['X-Profile-Id']
+        perfil = list_profiles()[0]
+        self.assertEqual(perfil['id'], perfil_id)
+        self.assertEqual(perfil['action'], 'CajonViewSet.list')
+        self.assertEqual(perfil['user'], 'staff')
+        self.assertEqual(perfil['trigger'], 'header')
+        self.assertEqual(perfil['queries'], 2)
+        self.assertGreater(perfil['duration_ms'], 0)
+        pstats.Stats(profile_path(perfil_id, 'cpu'))
+        tracemalloc.Snapshot.load(profile_path(perfil_id, 'memory'))
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_encabezado_sin_staff(self):
+        """El encabezado de un usuario normal se ignora."""
+        self.authenticate_user()
+        response = self.client.get('/api/v1/cajones/', HTTP_X_PROFILE='1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(list_profiles(), [])
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0)
+    def test_muestreo(self):
+        self.authenticate_user()
+        response = self.client.get('/api/v1/cajones/')
+
+        self.assertIn('X-Profile-Id', response)
+        self.assertEqual(list_profiles()[0]['trigger'], 'sample')
+
+    @override_settings(PROFILING_MAX_PROFILES=2)
+    def test_conserva_los_mas_recientes(self):
+        for _ in range(3):
+            self.perfilar()
+        self.assertEqual(len(list_profiles()), 2)
+
+    def test_listar_y_descargar(self):
+        """Staff lista, consulta y descarga perfiles."""
+        perfil_id = self.perfilar()['X-Profile-Id']
+
+        listado = self.client.get('/api/v1/perfiles/')
+        self.assertEqual([perfil['id'] for perfil in listado.data], [perfil_id])
+        self.assertNotIn('summary', listado.data[0])
+
+        detalle = self.client.get(f'/api/v1/perfiles/{perfil_id}/')
+        self.assertTrue(detalle.data['summary']['cpu'])
+        self.assertIn('memory', detalle.data['summary'])
+
+        descarga = self.client.get(f'/api/v1/perfiles/{perfil_id}/descargar/?tipo=memoria')
+        self.assertEqual(descarga.status_code, 200)
+        self.assertIn(f'{perfil_id}.tracemalloc', descarga['Content-Disposition'])
+        invalido = self.client.get(f'/api/v1/perfiles/{perfil_id}/descargar/?tipo=disco')
+        self.assertEqual(invalido.status_code, 400)
+
+        self.assertEqual(self.client.delete(f'/api/v1/perfiles/{perfil_id}/').status_code, 204)
+        self.assertEqual(os.listdir(os.path.dirname(profile_path(perfil_id, 'cpu'))), [])
+
+    def test_solo_staff(self):
+        self.authenticate_user()
+        self.assertEqual(self.client.get('/api/v1/perfiles/').status_code, 403)
@@ -0,0 +1,183 @@
+"""
+Tests para el pool de conexiones de base de datos.
+"""
+import os
+import tempfile
+import threading
+import time
+
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.test import SimpleTestCase, TestCase
+from core.db.pool import ConnectionPool, PooledDatabaseWrapperMixin, PoolTimeout, get_pool
+
+
+class ConexionFalsa:
+    """Conexión DB-API mínima para probar el pool."""
+
+    def __init__(self):
+        self.cerrada = False
+        self.sana = True
+
+    def close(self):
+        self.cerrada = True
+
+
+def ping(conexion):
+    if not conexion.sana:
+        raise ConnectionError('conexión caída')
+
+
+class TestConnectionPool(SimpleTestCase):
+    """
+    Tests del pool acotado con pre-ping y expulsión.
+    """
+
+    def crear_pool(self, **opciones):
+        self.creadas = []
+
+        def crear():
+            conexion = ConexionFalsa()
+            self.creadas.append(conexion)
+            return conexion
+
+        return ConnectionPool(crear, lambda c: c.close(), ping, **opciones)
+
+    def test_reutiliza_conexiones(self):
+        """Una conexión devuelta se entrega de nuevo sin abrir otra."""
+        pool = self.crear_pool()
+        conexion = pool.acquire()
+        pool.release(conexion)
+
+        self.assertIs(pool.acquire(), conexion)
+        self.assertEqual(pool.snapshot()['created'], 1)
+        self.assertEqual(pool.snapshot()['checkouts'], 2)
+
+    def test_limite_y_espera(self):
+        """Con el pool lleno se espera a que otra petición libere una conexión."""
+        pool = self.crear_pool(max_size=1, timeout=2)
+        conexion = pool.acquire()
+        threading.Timer(0.05, pool.release, args=[conexion]).start()
+
+        self.assertIs(pool.acquire(), conexion)
+        estadisticas = pool.snapshot()
+        self.assertEqual(estadisticas['waits'], 1)
+        self.assertGreater(estadisticas['wait_seconds_max'], 0)
+
+    def test_timeout_con_pool_lleno(self):
+        """Si nadie libera una conexión a tiempo se lanza PoolTimeout."""
+        pool = self.crear_pool(max_size=1, timeout=0.05)
+        pool.acquire()
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        self.assertEqual(pool.snapshot()['timeouts'], 1)
+
+    def test_pre_ping_reemplaza_conexiones_caidas(self):
+        """Una conexión que no responde al ping se cierra y se reemplaza."""
+        pool = self.crear_pool()
+        conexion = pool.acquire()
+        pool.release(conexion)
+        conexion.sana = False
+
+        nueva = pool.acquire()
+
+        self.assertIsNot(nueva, conexion)
+        self.assertTrue(conexion.cerrada)
+        self.assertEqual(pool.snapshot()['ping_failures'], 1)
+
+    def test_expulsion_por_inactividad(self):
+        """Las conexiones libres inactivas más de max_idle se cierran."""
+        pool = self.crear_pool(max_idle=0.01)
+        conexion = pool.acquire()
+        pool.release(conexion)
+        time.sleep(0.02)
+
+        self.assertIsNot(pool.acquire(), conexion)
+        self.assertTrue(conexion.cerrada)
+        self.assertEqual(pool.snapshot()['evicted'], 1)
+
+    def test_descartar_libera_cupo(self):
+        """Descartar una conexión la cierra y libera su cupo."""
+        pool = self.crear_pool(max_size=1, timeout=0.05)
+        conexion = pool.acquire()
+        pool.discard(conexion)
+
+        self.assertIsNot(pool.acquire(), conexion)
+        self.assertTrue(conexion.cerrada)
+
+    def test_concurrencia_respeta_el_maximo(self):
+        """Con muchos hilos nunca se abren más conexiones que max_size."""
+        pool = self.crear_pool(max_size=3, timeout=5)
+
+        def trabajar():
+            for _ in range(20):
+                conexion = pool.acquire()
+                time.sleep(0.0005)
+                pool.release(conexion)
+
+        hilos = [threading.Thread(target=trabajar) for _ in range(10)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertLessEqual(len(self.creadas), 3)
+        self.assertEqual(pool.snapshot()['checkouts'], 200)
+
+
+class PooledSQLiteWrapper(PooledDatabaseWrapperMixin, SQLiteDatabaseWrapper):
+    """Backend SQLite con pool, equivalente a core.db.backends.mysql_pool."""
+
+
+class TestPooledDatabaseWrapper(TestCase):
+    """
+    Tests del mixin de DatabaseWrapper con un backend real (SQLite).
+    """
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.ruta = os.path.join(directorio, 'pool.sqlite3')
+        self.alias = f'pool_test_{id(self)}'
+        self.settings = {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': self.ruta,
+            'POOL': {'MAX_SIZE': 2, 'TIMEOUT': 1},
+        }
+
+    def wrapper(self):
+        settings = {
+            'ATOMIC_REQUESTS': False, 'AUTOCOMMIT': True, 'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': False, 'OPTIONS': {}, 'TIME_ZONE': None,
+            'USER': '', 'PASSWORD': '', 'HOST': '', 'PORT': '', 'TEST': {},
+            **self.settings,
+        }
+        return PooledSQLiteWrapper(settings, alias=self.alias)
+
+    def test_close_devuelve_la_conexion_al_pool(self):
+        """Cerrar la conexión de Django la devuelve al pool para reutilizarla."""
+        primera = self.wrapper()
+        with primera.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        fisica = primera.connection
+        primera.close()
+
+        segunda = self.wrapper()
+        with segunda.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+        self.assertIs(segunda.connection, fisica)
+        estadisticas = get_pool(self.alias, None).snapshot()
+        self.assertEqual(estadisticas['created'], 1)
+        segunda.close()
+        self.assertEqual(get_pool(self.alias, None).snapshot()['idle'], 1)
+
+    def test_cierre_dentro_de_transaccion_descarta(self):
+        """Una conexión cerrada a mitad de transacción no vuelve al pool."""
+        wrapper = self.wrapper()
+        wrapper.ensure_connection()
+        wrapper.set_autocommit(False)
+        wrapper.in_atomic_block = True
+        wrapper.close()
+
+        estadisticas = get_pool(self.alias, None).snapshot()
+        self.assertEqual(estadisticas['idle'], 0)
+        self.assertEqual(estadisticas['closed'], 1)
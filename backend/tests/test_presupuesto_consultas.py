@@ -0,0 +1,169 @@
+"""
+Tests de la instrumentación de consultas y del presupuesto por acción.
+"""
+import logging
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from cajones_inteligentes.management.commands.analizar_consultas import escenarios, sembrar_datos
+from cajones_inteligentes.models import Cajon
+from cajones_inteligentes.urls import router
+from cajones_inteligentes.views import CajonViewSet
+from core.queries import fingerprint, record_queries
+from tests.test_base import BaseAPITestCase, QueryBudgetTestMixin
+
+
+def acciones_del_router():
+    """(viewset, ruta, método, acción, basename) de cada acción registrada."""
+    for prefijo, viewset, basename in router.registry:
+        for ruta in router.get_routes(viewset):
+            for metodo, accion in ruta.mapping.items():
+                if hasattr(viewset, accion):
+                    yield viewset, ruta, metodo, accion, basename
+
+
+class TestHuellas(SimpleTestCase):
+    """
+    Tests de la normalización de consultas.
+    """
+
+    def test_literales_y_parametros(self):
+        """Consultas que solo difieren en valores comparten huella."""
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id = %s AND nombre = \'a\' LIMIT 21'),
+            fingerprint('SELECT * FROM t WHERE id = %s AND nombre = \'b\'  LIMIT 5'),
+        )
+
+    def test_listas_in(self):
+        """Las listas IN de distinta longitud se colapsan."""
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+            'SELECT * FROM t WHERE id IN (...)',
+        )
+
+
+class TestQueryRecorder(TestCase):
+    """
+    Tests del registro de consultas y la detección de N+1.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='recorder')
+        for indice in range(4):
+            Cajon.objects.create(nombre=f'Cajon {indice}', capacidad_maxima=5, usuario=self.user)
+
+    def test_detecta_n_mas_uno_con_origen(self):
+        """Una consulta por fila se marca como N+1 con el frame que la originó."""
+        with record_queries() as recorder:
+            for cajon in Cajon.objects.all():
+                cajon.usuario.username
+
+        self.assertEqual(recorder.count, 5)
+        repetidas = recorder.repeated()
+        self.assertEqual(len(repetidas), 1)
+        self.assertEqual(repetidas[0]['count'], 4)
+        self.assertIn('tests/test_presupuesto_consultas.py', repetidas[0]['origin'])
+        self.assertIn('test_detecta_n_mas_uno_con_origen', repetidas[0]['origin'])
+
+    def test_select_related_sin_repeticiones(self):
+        """Con select_related no hay consultas repetidas."""
+        with record_queries() as recorder:
+            for cajon in Cajon.objects.select_related('usuario'):
+                cajon.usuario.username
+
+        self.assertEqual(recorder.count, 1)
+        self.assertEqual(recorder.repeated(), [])
+        self.assertGreater(recorder.duration, 0)
+
+    def test_ignora_sentencias_de_control(self):
+        """Los savepoints no cuentan ni se marcan como repetidos."""
+        with record_queries() as recorder:
+            for _ in range(3):
+                with transaction.atomic():
+                    Cajon.objects.exists()
+
+        self.assertEqual(recorder.count, 3)
+        self.assertEqual(len(recorder.repeated()), 1)
+        self.assertTrue(recorder.repeated()[0]['fingerprint'].startswith('SELECT'))
+
+
+@override_settings(QUERY_INSTRUMENTATION=True)
+class TestQueryInstrumentationMiddleware(BaseAPITestCase):
+    """
+    Tests del middleware de instrumentación.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate_user()
+        Cajon.objects.create(nombre='Cajon', capacidad_maxima=5, usuario=self.user)
+
+    def test_encabezados(self):
+        """La respuesta incluye el número de consultas y el tiempo en base de datos."""
+        response = self.client.get('/api/v1/cajones/')
+
+        self.assertEqual(response['X-Query-Count'], '2')
+        self.assertTrue(response['Server-Timing'].startswith('db;dur='))
+
+    def test_presupuesto_excedido(self):
+        """Superar el presupuesto de la acción genera una advertencia."""
+        with mock.patch.object(CajonViewSet, 'query_budget', {'list': 1}):
+            with self.assertLogs('core.middleware', level=logging.WARNING) as logs:
+                self.client.get('/api/v1/cajones/')
+
+        self.assertIn('CajonViewSet.list: 2 consultas (presupuesto 1)', logs.output[0])
+
+    @override_settings(QUERY_INSTRUMENTATION=False)
+    def test_desactivado(self):
+        response = self.client.get('/api/v1/cajones/')
+        self.assertNotIn('X-Query-Count', response)
+
+
+class TestPresupuestoConsultas(QueryBudgetTestMixin, TestCase):
+    """
+    Cada acción del router declara su presupuesto de consultas y lo respeta,
+    sin consultas por fila (los datos tienen varios cajones y objetos para
+    que un N+1 se repita).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = sembrar_datos(cajones=4, objetos_por_cajon=4)
+
+    def test_todas_las_acciones_declaran_presupuesto(self):
+        sin_presupuesto = [
+            f'{viewset.__name__}.{accion}'
+            for viewset, ruta, metodo, accion, basename in acciones_del_router()
+            if accion not in (getattr(viewset, 'query_budget', None) or {})
+        ]
+        self.assertEqual(sin_presupuesto, [])
+
+    def test_acciones_respetan_presupuesto(self):
+        factory = APIRequestFactory()
+        for viewset, ruta, metodo, accion, basename in acciones_del_router():
+            for escenario in escenarios(basename, accion, self.datos):
+                if ruta.detail and escenario['pk'] is None:
+                    continue
+                if metodo == 'get':
+                    request = factory.get('/', escenario['parametros'])
+                else:
+                    request = getattr(factory, metodo)('/', escenario['cuerpo'], format='json')
+                force_authenticate(request, user=self.datos['usuario'])
+                vista = viewset.as_view({metodo: accion}, **ruta.initkwargs)
+                kwargs = {'pk': str(escenario['pk'])} if ruta.detail else {}
+
+                with self.subTest(accion=f'{basename}.{accion}', parametros=escenario['parametros']):
+                    with transaction.atomic():
+                        try:
+                            with self.assertQueryBudget(viewset, accion):
+                                vista(request, **kwargs)
+                        except self.failureException:
+                            raise
+                        except Exception:
+                            # Acciones con errores conocidos no se miden
+                            pass
+                        transaction.set_rollback(True)
@@ -0,0 +1,101 @@
+"""
+Tests para POST /api/v1/recomendaciones/bulk/.
+"""
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from cajones_inteligentes.models import Recomendacion
+from cajones_inteligentes.views import RecomendacionViewSet
+from tests.test_base import BaseAPITestCase
+
+
+class TestRecomendacionesLote(BaseAPITestCase):
+    """
+    Transiciones en lote por ids o por filtros.
+    """
+    url = '/api/v1/recomendaciones/bulk/'
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate_user()
+        self.alta = [
+            Recomendacion.objects.create(
+                nombre=f'Alta {i}', descripcion='Recomendación de prueba', usuario=self.user, prioridad='ALTA'
+            )
+            for i in range(3)
+        ]
+        self.baja = Recomendacion.objects.create(
+            nombre='Baja', descripcion='Recomendación de prueba', usuario=self.user, prioridad='BAJA'
+        )
+        otro = User.objects.create_user('otro')
+        self.ajena = Recomendacion.objects.create(
+            nombre='Ajena', descripcion='Recomendación de prueba', usuario=otro, prioridad='ALTA'
+        )
+
+    def post(self, datos):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, datos, format='json')
+        return response, [q['sql'] for q in queries if q['sql'].startswith('UPDATE')]
+
+    def test_implementar_por_filtros(self):
+        with self.assertQueryBudget(RecomendacionViewSet, 'lote'):
+            response, updates = self.post({'accion': 'implementar', 'filtros': {'prioridad': 'ALTA'}})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['elementos_afectados'], 3)
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            set(Recomendacion.objects.filter(implementada=True).values_list('pk', flat=True)),
+            {r.pk for r in self.alta}
+        )
+        self.assertIsNotNone(Recomendacion.objects.get(pk=self.alta[0].pk).fecha_implementacion)
+
+    def test_implementar_por_ids_no_toca_ajenas(self):
+        response, _ = self.post({'accion': 'implementar', 'ids': [str(self.baja.pk), str(self.ajena.pk)]})
+
+        self.assertEqual(response.data['elementos_afectados'], 1)
+        self.assertFalse(Recomendacion.objects.get(pk=self.ajena.pk).implementada)
+
+    def test_desmarcar_solo_implementadas(self):
+        self.alta[0].marcar_como_implementada()
+        response, _ = self.post({'accion': 'desmarcar', 'filtros': {}})
+
+        self.assertEqual(response.data['elementos_afectados'], 1)
+        self.assertFalse(Recomendacion.objects.filter(usuario=self.user, implementada=True).exists())
+
+    def test_archivar_y_restaurar(self):
+        anterior = self.baja.updated_at
+        response, _ = self.post({'accion': 'archivar', 'filtros': {'prioridad': 'BAJA'}})
+
+        self.assertEqual(response.data['elementos_afectados'], 1)
+        self.assertFalse(Recomendacion.objects.filter(pk=self.baja.pk).exists())
+        # updated_at avanza: el feed de cambios entrega la lápida
+        self.assertGreater(Recomendacion.all_objects.get(pk=self.baja.pk).updated_at, anterior)
+
+        response, _ = self.post({'accion': 'restaurar', 'ids': [str(self.baja.pk)]})
+        self.assertEqual(response.data['elementos_afectados'], 1)
+        self.assertTrue(Recomendacion.objects.filter(pk=self.baja.pk).exists())
+
+    def test_invalida_dashboard(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.post({'accion': 'implementar', 'filtros': {'prioridad': 'ALTA'}})
+        self.assertEqual(len(callbacks), 1)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response, _ = self.post({'accion': 'implementar', 'filtros': {'prioridad': 'ALTA'}})
+        self.assertEqual(response.data['elementos_afectados'], 0)
+        self.assertEqual(callbacks, [])
+
+    def test_validacion(self):
+        casos = [
+            {'accion': 'implementar'},
+            {'accion': 'implementar', 'ids': [str(self.baja.pk)], 'filtros': {}},
+            {'accion': 'borrar', 'filtros': {}},
+            {'accion': 'implementar', 'filtros': {'prioridad': 'URGENTE'}},
+        ]
+        for datos in casos:
+            with self.subTest(datos=datos):
+                response, updates = self.post(datos)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(updates, [])
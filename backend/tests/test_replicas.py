@@ -0,0 +1,95 @@
+"""
+Tests para el enrutamiento de lecturas a réplicas.
+
+Usa dos bases SQLite independientes ('default' y 'replica') sin replicación,
+de modo que el resultado de cada lectura indica a qué base se envió.
+"""
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from cajones_inteligentes.models import Cajon, Objeto
+from core.db.routers import PrimaryReplicaRouter, pin_to_primary, read_from_replica
+from tests.test_vistas_async import Handler
+
+CACHE_LOCAL = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], CACHES=CACHE_LOCAL, REPLICA_PIN_SECONDS=5)
+class TestPrimaryReplicaRouter(TransactionTestCase):
+    """
+    Tests del router primaria/réplica y de ReplicaReadMixin.
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.cajon = Cajon.objects.create(nombre='Cajon Primaria', capacidad_maxima=5, usuario=self.user)
+        Objeto.objects.create(nombre='Objeto Primaria', cajon=self.cajon)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_listado_desde_replica(self):
+        """Las acciones list/retrieve leen de la réplica."""
+        response = self.client.get('/api/v1/cajones/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 0)
+        self.assertEqual(self.client.get(f'/api/v1/cajones/{self.cajon.id}/').status_code, 404)
+
+    def test_solo_lectura_y_estadisticas_desde_replica(self):
+        """ReadOnlyBaseViewSet y los endpoints de estadísticas usan la réplica."""
+        self.assertEqual(self.client.get('/api/v1/historial/').data['count'], 0)
+        self.assertEqual(self.client.get(f'/api/v1/cajones/{self.cajon.id}/estadisticas/').status_code, 404)
+
+    async def test_vista_async_desde_replica(self):
+        """La réplica elegida en `initial` (en un hilo) se aplica a la acción async."""
+        self.async_client.handler = Handler(enforce_csrf_checks=False)
+        await self.async_client.aforce_login(self.user)
+
+        respuesta = await self.async_client.get('/api/v1/cajones/')
+
+        self.assertTrue(iscoroutinefunction(respuesta.asgi_request.resolver_match.func))
+        self.assertEqual(respuesta.json()['count'], 0)
+        await sync_to_async(pin_to_primary)(self.user.pk)
+        self.assertEqual((await self.async_client.get('/api/v1/cajones/')).json()['count'], 1)
+
+    def test_otras_acciones_usan_primaria(self):
+        """Las acciones no marcadas leen de la primaria."""
+        response = self.client.get('/api/v1/objetos/ordenar_por_tipo/')
+
+        self.assertEqual([objeto['nombre'] for objeto in response.data], ['Objeto Primaria'])
+
+    def test_lectura_de_las_propias_escrituras(self):
+        """Tras escribir, el usuario queda fijado a la primaria."""
+        response = self.client.post('/api/v1/cajones/', {
+            'nombre': 'Cajon Nuevo', 'capacidad_maxima': 3
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Cajon.objects.using('default').filter(nombre='Cajon Nuevo').exists())
+
+        self.assertEqual(self.client.get('/api/v1/cajones/').data['count'], 2)
+
+    def test_escrituras_fallidas_no_fijan(self):
+        """Una escritura rechazada no fija al usuario a la primaria."""
+        self.client.post('/api/v1/cajones/', {'nombre': ''}, format='json')
+
+        self.assertEqual(self.client.get('/api/v1/cajones/').data['count'], 0)
+
+    def test_transacciones_leen_de_primaria(self):
+        """Dentro de una transacción de la primaria no se usa la réplica."""
+        router = PrimaryReplicaRouter()
+        with read_from_replica():
+            self.assertEqual(router.db_for_read(Cajon), 'replica')
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(Cajon), 'default')
+            self.assertEqual(router.db_for_write(Cajon), 'default')
+        self.assertEqual(router.db_for_read(Cajon), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_sin_replicas_todo_en_primaria(self):
+        """Sin réplicas configuradas todas las lecturas van a la primaria."""
+        self.assertEqual(self.client.get('/api/v1/cajones/').data['count'], 1)
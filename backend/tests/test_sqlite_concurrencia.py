@@ -0,0 +1,252 @@
+"""
+Tests para el perfil de SQLite de alta concurrencia.
+"""
+import os
+import tempfile
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from cajones_inteligentes.models import Cajon
+from core.db.sqlite import WriteQueue, WriteQueueTimeout, write_queue
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 268435456,
+    'cache_size': -65536,
+}
+
+
+class TestWriteQueue(SimpleTestCase):
+    """
+    Tests de la cola de escrituras del proceso.
+    """
+
+    def test_turnos_en_orden_de_llegada(self):
+        """Los hilos en espera obtienen el turno en el orden en que llegaron."""
+        cola = WriteQueue()
+        cola.acquire()
+        orden = []
+
+        def escribir(numero):
+            with cola.turn(timeout=5):
+                orden.append(numero)
+
+        hilos = []
+        for numero in range(5):
+            hilo = threading.Thread(target=escribir, args=(numero,))
+            hilo.start()
+            hilos.append(hilo)
+            # Se espera a que el hilo quede encolado antes de lanzar el siguiente
+            while cola.snapshot()['queued'] <= numero:
+                time.sleep(0.001)
+        cola.release()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(orden, [0, 1, 2, 3, 4])
+        self.assertEqual(cola.snapshot()['waits'], 5)
+
+    def test_reentrante_en_el_mismo_hilo(self):
+        """Un bloque anidado del mismo hilo no se bloquea a sí mismo."""
+        cola = WriteQueue()
+        with cola.turn(timeout=0.05):
+            with cola.turn(timeout=0.05):
+                pass
+            self.assertRaises(WriteQueueTimeout, self._esperar_en_otro_hilo, cola)
+        self.assertIsNone(self._esperar_en_otro_hilo(cola))
+
+    def _esperar_en_otro_hilo(self, cola):
+        errores = []
+
+        def esperar():
+            try:
+                with cola.turn(timeout=0.05):
+                    pass
+            except WriteQueueTimeout as exc:
+                errores.append(exc)
+
+        hilo = threading.Thread(target=esperar)
+        hilo.start()
+        hilo.join()
+        if errores:
+            raise errores[0]
+
+    def test_timeout_sale_de_la_cola(self):
+        """Quien agota la espera deja la cola y no recibe el turno después."""
+        cola = WriteQueue()
+        cola.acquire()
+        with self.assertRaises(WriteQueueTimeout):
+            self._esperar_en_otro_hilo(cola)
+        cola.release()
+
+        estadisticas = cola.snapshot()
+        self.assertEqual(estadisticas['timeouts'], 1)
+        self.assertEqual(estadisticas['queued'], 0)
+        # El turno quedó libre
+        with cola.turn(timeout=0.05):
+            pass
+
+    def test_liberar_sin_turno(self):
+        """Liberar un turno que no se tiene es un error."""
+        with self.assertRaises(RuntimeError):
+            WriteQueue().release()
+
+
+class TestSQLitePragmas(TestCase):
+    """
+    Tests de los pragmas aplicados en connection_created.
+    """
+
+    def wrapper(self, nombre):
+        settings = {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': nombre,
+            'ATOMIC_REQUESTS': False, 'AUTOCOMMIT': True, 'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': False, 'OPTIONS': {}, 'TIME_ZONE': None,
+            'USER': '', 'PASSWORD': '', 'HOST': '', 'PORT': '', 'TEST': {},
+        }
+        return SQLiteDatabaseWrapper(settings, alias=f'pragmas_{id(self)}')
+
+    def pragma(self, wrapper, nombre):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {nombre}')
+            return cursor.fetchone()[0]
+
+    @override_settings(SQLITE_PRAGMAS=PRAGMAS)
+    def test_aplica_pragmas_a_conexiones_nuevas(self):
+        """Cada conexión SQLite nueva recibe los pragmas configurados."""
+        wrapper = self.wrapper(os.path.join(tempfile.mkdtemp(), 'pragmas.sqlite3'))
+        try:
+            self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+            self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)
+            self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 5000)
+            self.assertEqual(self.pragma(wrapper, 'cache_size'), -65536)
+        finally:
+            wrapper.close()
+
+    @override_settings(SQLITE_PRAGMAS=PRAGMAS)
+    def test_base_en_memoria_omite_wal(self):
+        """En una base en memoria se omiten WAL y mmap sin fallar."""
+        wrapper = self.wrapper(':memory:')
+        try:
+            self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'memory')
+            self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 5000)
+        finally:
+            wrapper.close()
+
+    @override_settings(SQLITE_PRAGMAS={})
+    def test_sin_pragmas_no_modifica_la_conexion(self):
+        """Sin SQLITE_PRAGMAS la conexión conserva los valores de SQLite."""
+        wrapper = self.wrapper(os.path.join(tempfile.mkdtemp(), 'defecto.sqlite3'))
+        try:
+            self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'delete')
+        finally:
+            wrapper.close()
+
+
+@override_settings(SQLITE_SERIALIZE_WRITES=True, SQLITE_WRITE_TIMEOUT=0.05)
+class TestColaEnLaConexion(TransactionTestCase):
+    """
+    Tests de la serialización en el backend core.db.backends.sqlite_queue:
+    el turno depende de las sentencias, no del método HTTP.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='cola', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def turno_libre(self):
+        """Si otro hilo obtiene el turno sin esperar más que el timeout."""
+        libre = []
+
+        def intentar():
+            try:
+                with write_queue.turn(timeout=0.05):
+                    libre.append(True)
+            except WriteQueueTimeout:
+                libre.append(False)
+
+        hilo = threading.Thread(target=intentar)
+        hilo.start()
+        hilo.join()
+        return libre[0]
+
+    def test_lectura_no_toma_turno(self):
+        antes = write_queue.snapshot()['writes']
+        response = self.client.get('/api/v1/cajones/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(write_queue.snapshot()['writes'], antes)
+
+    def test_escritura_en_autocommit(self):
+        """Una escritura fuera de una transacción toma turno y lo libera al terminar."""
+        antes = write_queue.snapshot()['writes']
+        Cajon.objects.create(nombre='Cajon suelto', capacidad_maxima=5, usuario=self.user)
+
+        self.assertEqual(write_queue.snapshot()['writes'], antes + 1)
+        self.assertTrue(self.turno_libre())
+
+    def test_transaccion_conserva_el_turno(self):
+        """El turno se toma en la primera escritura y se libera al confirmar o revertir."""
+        with transaction.atomic():
+            Cajon.objects.count()
+            self.assertTrue(self.turno_libre())
+            Cajon.objects.create(nombre='Cajon atomico', capacidad_maxima=5, usuario=self.user)
+            self.assertFalse(self.turno_libre())
+        self.assertTrue(self.turno_libre())
+
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                Cajon.objects.create(nombre='Cajon revertido', capacidad_maxima=5, usuario=self.user)
+                raise RuntimeError
+        self.assertTrue(self.turno_libre())
+
+    def test_escrituras_pasan_por_la_cola(self):
+        antes = write_queue.snapshot()['writes']
+        response = self.client.post(
+            '/api/v1/cajones/', {'nombre': 'Cajon cola', 'capacidad_maxima': 5}, format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertGreater(write_queue.snapshot()['writes'], antes)
+        self.assertTrue(self.turno_libre())
+
+    def test_sin_turno_responde_503(self):
+        """Si la cola no da turno a tiempo se responde 503 con Retry-After."""
+        tomado, liberar = threading.Event(), threading.Event()
+
+        def ocupar():
+            with write_queue.turn():
+                tomado.set()
+                liberar.wait(5)
+
+        hilo = threading.Thread(target=ocupar)
+        hilo.start()
+        tomado.wait(5)
+        try:
+            response = self.client.post(
+                '/api/v1/cajones/', {'nombre': 'Cajon ocupado', 'capacidad_maxima': 5}, format='json'
+            )
+        finally:
+            liberar.set()
+            hilo.join()
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(Cajon.objects.filter(nombre='Cajon ocupado').exists())
+
+    @override_settings(SQLITE_SERIALIZE_WRITES=False)
+    def test_desactivado(self):
+        """Con SQLITE_SERIALIZE_WRITES=False no se toma turno."""
+        antes = write_queue.snapshot()['writes']
+        self.client.post('/api/v1/cajones/', {'nombre': 'Cajon libre', 'capacidad_maxima': 5}, format='json')
+        self.assertEqual(write_queue.snapshot()['writes'], antes)
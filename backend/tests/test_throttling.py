@@ -0,0 +1,117 @@
+"""
+Tests del throttling por costo (core.throttling).
+"""
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APIClient
+
+from core.metrics import registry
+from core.throttling import TokenBucket
+from tests.test_base import BaseAPITestCase
+
+def rechazadas(vista):
+    return sum(
+        valor for nombre, etiquetas, valor in registry.snapshot()['counters']
+        if nombre == 'throttled_requests_total' and ['view', vista] in etiquetas
+    )
+
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'throttling'}}
+
+
+@override_settings(CACHES=LOCMEM)
+class TestTokenBucket(SimpleTestCase):
+    """
+    Tests del bucket GCRA sobre la caché local.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rafaga_y_recarga(self):
+        bucket = TokenBucket()
+        self.assertEqual(bucket.consume('a', 8, capacity=10, refill_rate=1), 0)
+        self.assertEqual(bucket.consume('a', 2, capacity=10, refill_rate=1), 0)
+
+        espera = bucket.consume('a', 3, capacity=10, refill_rate=1)
+        self.assertAlmostEqual(espera, 3, delta=0.1)
+        # El rechazo no consume: una acción de costo 1 espera solo por su token
+        self.assertAlmostEqual(bucket.consume('a', 1, capacity=10, refill_rate=1), 1, delta=0.1)
+        self.assertEqual(bucket.consume('b', 1, capacity=10, refill_rate=1), 0)
+
+    def test_costo_mayor_que_la_capacidad(self):
+        """Se limita a la capacidad para que la acción sea admisible con el bucket lleno."""
+        bucket = TokenBucket()
+        self.assertEqual(bucket.consume('a', 50, capacity=10, refill_rate=1), 0)
+        self.assertGreater(bucket.consume('a', 1, capacity=10, refill_rate=1), 0)
+
+    def test_redis_con_cliente_propio(self):
+        """El script corre en un cliente creado desde LOCATION (el primer servidor escribe)."""
+        caches = {'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': 'redis://primaria:6379/1,redis://replica:6379/1',
+        }}
+        bucket = TokenBucket()
+        with override_settings(CACHES=caches), mock.patch('core.throttling.redis') as redis:
+            script = redis.Redis.from_url.return_value.register_script.return_value
+            script.side_effect = ['0', '2.5']
+
+            self.assertEqual(bucket.consume('a', 1, capacity=10, refill_rate=2), 0)
+            self.assertEqual(bucket.consume('a', 1, capacity=10, refill_rate=2), 2.5)
+
+        redis.Redis.from_url.assert_called_once_with('redis://primaria:6379/1')
+        script.assert_called_with(keys=[':1:throttle:a'], args=[0.5, 5.0, 1])
+
+    def test_rechaza_caches_compartidas_sin_atomicidad(self):
+        with tempfile.TemporaryDirectory() as directorio, override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directorio,
+        }}):
+            with self.assertRaises(ImproperlyConfigured):
+                TokenBucket().consume('a', 1, capacity=10, refill_rate=1)
+
+
+@override_settings(CACHES=LOCMEM, THROTTLE_BUCKET={'CAPACITY': 20, 'REFILL_RATE': 0.1})
+class TestThrottlingPorCosto(BaseAPITestCase):
+    """
+    Las acciones caras agotan el bucket del usuario y el resto responde 429.
+    """
+    cara = '/api/v1/estadisticas/generales/'
+    barata = '/api/v1/configuracion/tipos_objeto/'
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.authenticate_user()
+
+    def test_costo_por_accion(self):
+        for _ in range(20):
+            self.assertEqual(self.client.get(self.barata).status_code, 200)
+        self.assertEqual(self.client.get(self.barata).status_code, 429)
+
+    def test_accion_cara_agota_el_bucket(self):
+        antes = rechazadas('ConfiguracionViewSet')
+        self.assertEqual(self.client.get(self.cara).status_code, 200)
+        self.assertEqual(self.client.get(self.cara).status_code, 200)
+
+        response = self.client.get(self.barata)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '10')
+        self.assertEqual(rechazadas('ConfiguracionViewSet'), antes + 1)
+
+    def test_buckets_por_usuario(self):
+        self.client.get(self.cara)
+        self.client.get(self.cara)
+
+        otro = APIClient()
+        otro.force_authenticate(user=User.objects.create_user(username='otro'))
+        self.assertEqual(otro.get(self.cara).status_code, 200)
+
+    def test_health_check_sin_throttling(self):
+        for _ in range(25):
+            self.assertEqual(self.client.get('/health/').status_code, 200)
@@ -0,0 +1,248 @@
+"""
+Tests de la cola de trabajos en segundo plano (apps/trabajos).
+"""
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from cajones_inteligentes.models import Cajon, Historial, Objeto, Tamanio, TipoObjeto
+from core.events import event_bus
+from tests.test_base import BaseAPITestCase
+from tests.test_eventos import leer
+from trabajos.models import EstadoTrabajo, Trabajo
+from trabajos.tareas import tarea
+from trabajos.worker import procesar_pendientes
+
+
+@tarea('prueba_suma')
+def prueba_suma(trabajo, a, b):
+    trabajo.reportar_progreso(50)
+    return {'suma': a + b}
+
+
+@tarea('prueba_falla')
+def prueba_falla(trabajo):
+    raise RuntimeError('sin conexión')
+
+
+@tarea('prueba_lenta')
+def prueba_lenta(trabajo):
+    # Sin reportar progreso: solo el hilo de latido lo mantiene en proceso
+    time.sleep(0.5)
+    return {'recuperados': Trabajo.recuperar_abandonados()}
+
+
+@override_settings(JOBS_MAX_ATTEMPTS=2, JOBS_RETRY_DELAY=30, JOBS_STALE_TIMEOUT=60, JOBS_RETENTION_DAYS=7)
+class TestCola(TestCase):
+    """
+    Tests de la toma, ejecución, reintento y recuperación de trabajos.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='trabajos')
+
+    def test_encolar_tarea_desconocida(self):
+        with self.assertRaises(LookupError):
+            Trabajo.encolar('no_existe', self.user)
+
+    def test_tomar_es_exclusivo(self):
+        trabajo = Trabajo.encolar('prueba_suma', self.user, a=1, b=2)
+
+        tomado = Trabajo.tomar('worker-1')
+        self.assertEqual(tomado.pk, trabajo.pk)
+        self.assertEqual((tomado.estado, tomado.intentos, tomado.worker), (EstadoTrabajo.EN_PROCESO, 1, 'worker-1'))
+        self.assertIsNone(Trabajo.tomar('worker-2'))
+
+    def test_tomar_respeta_orden_y_espera(self):
+        diferido = Trabajo.encolar('prueba_suma', self.user, a=1, b=1)
+        Trabajo.objects.filter(pk=diferido.pk).update(disponible_desde=timezone.now() + timedelta(minutes=1))
+        primero = Trabajo.encolar('prueba_suma', self.user, a=1, b=2)
+        Trabajo.encolar('prueba_suma', self.user, a=1, b=3)
+
+        self.assertEqual(Trabajo.tomar('worker').pk, primero.pk)
+
+    def test_ejecuta_y_guarda_resultado(self):
+        trabajo = Trabajo.encolar('prueba_suma', self.user, a=1, b=2)
+
+        self.assertEqual(procesar_pendientes('worker'), 1)
+
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, EstadoTrabajo.COMPLETADO)
+        self.assertEqual((trabajo.progreso, trabajo.resultado), (100, {'suma': 3}))
+        self.assertIsNotNone(trabajo.finalizado_en)
+
+    def test_reintenta_y_falla(self):
+        trabajo = Trabajo.encolar('prueba_falla', self.user)
+
+        procesar_pendientes('worker')
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, EstadoTrabajo.PENDIENTE)
+        self.assertEqual(trabajo.error, 'RuntimeError: sin conexión')
+        self.assertGreater(trabajo.disponible_desde, timezone.now() + timedelta(seconds=25))
+        # Diferido: no se vuelve a tomar antes de tiempo
+        self.assertIsNone(Trabajo.tomar('worker'))
+
+        Trabajo.objects.filter(pk=trabajo.pk).update(disponible_desde=timezone.now())
+        procesar_pendientes('worker')
+        trabajo.refresh_from_db()
+        self.assertEqual((trabajo.estado, trabajo.intentos), (EstadoTrabajo.FALLIDO, 2))
+
+    def test_recupera_abandonados(self):
+        trabajo = Trabajo.encolar('prueba_suma', self.user, a=1, b=2)
+        tomado = Trabajo.tomar('caido')
+        Trabajo.objects.filter(pk=trabajo.pk).update(latido=timezone.now() - timedelta(minutes=5))
+
+        self.assertEqual(Trabajo.recuperar_abandonados(), 1)
+        self.assertEqual(Trabajo.objects.get(pk=trabajo.pk).estado, EstadoTrabajo.PENDIENTE)
+
+        # Otro worker lo toma: el worker anterior ya no puede modificarlo
+        Trabajo.tomar('nuevo')
+        self.assertFalse(tomado.completar({'suma': 0}))
+        self.assertEqual(Trabajo.objects.get(pk=trabajo.pk).worker, 'nuevo')
+
+    def test_abandonado_sin_intentos_falla(self):
+        trabajo = Trabajo.encolar('prueba_suma', self.user, a=1, b=2)
+        Trabajo.tomar('caido')
+        Trabajo.objects.filter(pk=trabajo.pk).update(intentos=2, latido=timezone.now() - timedelta(minutes=5))
+
+        Trabajo.recuperar_abandonados()
+        self.assertEqual(Trabajo.objects.get(pk=trabajo.pk).estado, EstadoTrabajo.FALLIDO)
+
+    def test_purga_finalizados(self):
+        antiguo = Trabajo.encolar('prueba_suma', self.user, a=1, b=2)
+        reciente = Trabajo.encolar('prueba_suma', self.user, a=1, b=2)
+        procesar_pendientes('worker')
+        Trabajo.objects.filter(pk=antiguo.pk).update(finalizado_en=timezone.now() - timedelta(days=8))
+
+        self.assertEqual(Trabajo.purgar_finalizados(), 1)
+        self.assertEqual(list(Trabajo.objects.values_list('pk', flat=True)), [reciente.pk])
+
+    def test_comando_una_vez(self):
+        Trabajo.encolar('prueba_suma', self.user, a=1, b=2)
+        salida = StringIO()
+
+        call_command('worker', '--una-vez', stdout=salida)
+
+        self.assertIn('1 trabajos ejecutados', salida.getvalue())
+        self.assertFalse(Trabajo.objects.exclude(estado=EstadoTrabajo.COMPLETADO).exists())
+
+
+@override_settings(JOBS_STALE_TIMEOUT=0.3, JOBS_HEARTBEAT_INTERVAL=0.05)
+class TestLatido(TransactionTestCase):
+    """
+    El latido se renueva aunque la tarea no reporte progreso.
+    """
+
+    def test_tarea_larga_no_se_recupera(self):
+        trabajo = Trabajo.encolar('prueba_lenta', User.objects.create_user(username='latido'))
+
+        procesar_pendientes('worker')
+
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, EstadoTrabajo.COMPLETADO)
+        self.assertEqual((trabajo.intentos, trabajo.resultado), (1, {'recuperados': 0}))
+
+
+class TestTrabajosAPI(BaseAPITestCase):
+    """
+    Encolado desde /api/v1/gestion-cajones/ y consulta en /api/v1/jobs/.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate_user()
+        self.cajon = Cajon.objects.create(nombre='Cajon Duplicados', capacidad_maxima=10, usuario=self.user)
+        for nombre, tamanio in [('Cable', Tamanio.PEQUENO), ('cable ', Tamanio.PEQUENO),
+                                ('Cable', Tamanio.GRANDE), ('Libro', Tamanio.MEDIANO),
+                                ('CABLE', Tamanio.PEQUENO)]:
+            Objeto.objects.create(nombre=nombre, tamanio=tamanio, tipo_objeto=TipoObjeto.CABLES, cajon=self.cajon)
+
+    def encolar(self, accion, datos=None):
+        response = self.client.post(f'/api/v1/gestion-cajones/{accion}/', datos or {}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['estado'], EstadoTrabajo.PENDIENTE)
+        self.assertEqual(response['Location'], response.data['url'])
+        return response.data['url']
+
+    def test_eliminar_duplicados(self):
+        url = self.encolar('eliminar_duplicados', {'cajon_id': str(self.cajon.pk)})
+        # Nada se ejecuta dentro de la petición
+        self.assertEqual(Objeto.objects.filter(cajon=self.cajon).count(), 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            procesar_pendientes('worker')
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['estado'], EstadoTrabajo.COMPLETADO)
+        self.assertEqual(response.data['progreso'], 100)
+        self.assertEqual(response.data['resultado']['elementos_afectados'], 2)
+        self.assertEqual(Objeto.objects.filter(cajon=self.cajon).count(), 3)
+        self.assertEqual(Cajon.objects.get(pk=self.cajon.pk).ocupados, 3)
+        self.assertEqual(Historial.objects.filter(cajon=self.cajon, tipo_accion='ELIMINAR').count(), 2)
+
+    def test_eliminar_duplicados_movido_entretanto(self):
+        """Un duplicado movido tras la lectura no se elimina ni aparece en el historial."""
+        otro = Cajon.objects.create(nombre='Cajon Destino', capacidad_maxima=10, usuario=self.user)
+        cable = Objeto.objects.filter(cajon=self.cajon, nombre='CABLE').get()
+
+        suscripcion = event_bus.subscribe(self.user.pk)
+        self.addCleanup(event_bus.unsubscribe, suscripcion)
+
+        def progreso(porcentaje):
+            # Tras el primer lote otra operación mueve el segundo duplicado
+            Objeto.mover_objetos({cable.pk: otro.pk}, self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            eliminados = Objeto.eliminar_duplicados_cajon(self.cajon, self.user, progreso=progreso, lote=1)
+
+        self.assertEqual(eliminados, 1)
+        self.assertEqual(
+            [evento for evento, _ in leer(suscripcion)], ['objeto_eliminado', 'objeto_movido']
+        )
+        self.assertEqual(Objeto.objects.get(pk=cable.pk).cajon_id, otro.pk)
+        self.assertFalse(Historial.objects.filter(objeto=cable, tipo_accion='ELIMINAR').exists())
+        self.assertEqual(Historial.objects.filter(cajon=self.cajon, tipo_accion='ELIMINAR').count(), 1)
+        self.assertEqual(Cajon.objects.get(pk=self.cajon.pk).ocupados, 3)
+
+    def test_ordenar_objetos(self):
+        url = self.encolar('ordenar_objetos', {'cajon_id': str(self.cajon.pk), 'criterio': 'tamanio'})
+        procesar_pendientes('worker')
+
+        detalles = self.client.get(url).data['resultado']['detalles']
+        self.assertEqual(
+            [objeto['tamanio'] for objeto in detalles['objetos_ordenados']],
+            [Tamanio.PEQUENO] * 3 + [Tamanio.MEDIANO, Tamanio.GRANDE]
+        )
+
+    def test_recalcular_ocupacion(self):
+        Cajon.objects.filter(pk=self.cajon.pk).update(ocupados=0)
+        url = self.encolar('recalcular_ocupacion')
+        procesar_pendientes('worker')
+
+        self.assertEqual(self.client.get(url).data['estado'], EstadoTrabajo.COMPLETADO)
+        self.assertEqual(Cajon.objects.get(pk=self.cajon.pk).ocupados, 5)
+
+    def test_cajon_ajeno(self):
+        otro = User.objects.create_user(username='otro')
+        ajeno = Cajon.objects.create(nombre='Cajon Ajeno', usuario=otro)
+
+        response = self.client.post('/api/v1/gestion-cajones/eliminar_duplicados/', {
+            'cajon_id': str(ajeno.pk)
+        }, format='json')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Trabajo.objects.exists())
+
+    def test_solo_trabajos_propios(self):
+        otro = User.objects.create_user(username='otro')
+        ajeno = Trabajo.encolar('recalcular_ocupacion', otro)
+        Trabajo.encolar('recalcular_ocupacion', self.user)
+
+        self.assertEqual(self.client.get(f'/api/v1/jobs/{ajeno.pk}/').status_code, 404)
+        self.assertEqual(self.client.get('/api/v1/jobs/').data['count'], 1)
@@ -0,0 +1,138 @@
+"""
+Tests de las vistas async bajo ASGI (core.asgi, core.views.AsyncActionsMixin).
+"""
+import threading
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.test.client import AsyncClientHandler
+from django.utils.module_loading import import_string
+
+from cajones_inteligentes.models import Cajon, Historial, Objeto, Recomendacion, Tamanio, TipoObjeto
+from core.asgi import AsyncViewsMixin
+from core.throttling import CostBasedThrottle
+
+
+class Handler(AsyncViewsMixin, AsyncClientHandler):
+    """Handler del cliente async de tests con las vistas async de core.asgi."""
+
+
+class TestVistasAsync(TestCase):
+    """
+    Las versiones async responden lo mismo que las síncronas.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='async', password='x')
+        cls.otro = User.objects.create_user(username='otro', password='x')
+        cls.cajones = [
+            Cajon.objects.create(nombre=f'Cajon {i}', capacidad_maxima=5 + i, usuario=cls.user)
+            for i in range(3)
+        ]
+        Cajon.objects.create(nombre='Ajeno', capacidad_maxima=5, usuario=cls.otro)
+        for i in range(25):
+            objeto = Objeto.objects.create(
+                nombre=f'Objeto {i}', cajon=cls.cajones[i % 3],
+                tipo_objeto=TipoObjeto.ROPA if i % 2 else TipoObjeto.LIBROS,
+                tamanio=Tamanio.PEQUENO,
+            ) if i < 15 else None
+            Historial.objects.create(
+                nombre=f'Accion {i}', motivo='Prueba', usuario=cls.user, objeto=objeto,
+                cajon=cls.cajones[i % 3], tipo_accion='CREAR',
+            )
+        Recomendacion.objects.create(nombre='Ordenar', descripcion='Ordenar el cajón', usuario=cls.user)
+        Cajon.recalcular_ocupacion()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.async_client.handler = Handler(enforce_csrf_checks=False)
+
+    async def comparar(self, url, **params):
+        await self.async_client.aforce_login(self.user)
+        asincrona = await self.async_client.get(url, params)
+        self.assertTrue(
+            iscoroutinefunction(asincrona.asgi_request.resolver_match.func), f'{url} no usó la vista async'
+        )
+        sincrona = await sync_to_async(self.client.get)(url, params)
+        self.assertEqual(asincrona.status_code, sincrona.status_code)
+        self.assertEqual(asincrona.json(), sincrona.json())
+        return asincrona
+
+    async def test_listados(self):
+        respuesta = await self.comparar('/api/v1/cajones/')
+        self.assertEqual(respuesta.json()['count'], 3)
+        await self.comparar('/api/v1/objetos/', page=2)
+        await self.comparar('/api/v1/objetos/', cajon=str(self.cajones[0].pk), ordering='nombre')
+        await self.comparar('/api/v1/objetos/', search='Objeto 1')
+        await self.comparar('/api/v1/historial/', page='last')
+        await self.comparar('/api/v1/historial/', page=9)
+
+    async def test_estadisticas(self):
+        generales = await self.comparar('/api/v1/estadisticas/generales/')
+        self.assertEqual(generales.json()['total_objetos'], 15)
+        self.assertIsNotNone(generales.json()['ultimo_historial'])
+        await self.comparar('/api/v1/historial/estadisticas/')
+        await self.comparar(f'/api/v1/cajones/{self.cajones[0].pk}/estadisticas/')
+
+    async def test_errores(self):
+        ajeno = await Cajon.objects.aget(nombre='Ajeno')
+        no_encontrado = await self.comparar(f'/api/v1/cajones/{ajeno.pk}/estadisticas/')
+        self.assertEqual(no_encontrado.status_code, 404)
+        await self.comparar('/api/v1/objetos/', cajon='no-es-un-id')
+
+        await self.async_client.alogout()
+        respuesta = await self.async_client.get('/api/v1/cajones/')
+        self.assertEqual(respuesta.status_code, 403)
+
+    async def test_otros_metodos_usan_la_vista_sincrona(self):
+        await self.async_client.aforce_login(self.user)
+        respuesta = await self.async_client.post(
+            '/api/v1/cajones/', {'nombre': 'Nuevo', 'capacidad_maxima': 3}, content_type='application/json'
+        )
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertTrue(await Cajon.objects.filter(nombre='Nuevo').aexists())
+
+    async def test_initial_fuera_del_event_loop(self):
+        """Throttles y fijación a la primaria consultan la caché: no corren en el event loop."""
+        hilos = []
+
+        def registrar(*args):
+            hilos.append(threading.get_ident())
+            return True
+
+        await self.async_client.aforce_login(self.user)
+        with mock.patch.object(CostBasedThrottle, 'allow_request', side_effect=registrar, autospec=True), \
+                mock.patch('core.views.is_pinned_to_primary', side_effect=registrar):
+            respuesta = await self.async_client.get('/api/v1/cajones/')
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(hilos), 2)
+        self.assertNotIn(threading.get_ident(), hilos)
+
+    @override_settings(QUERY_INSTRUMENTATION=True)
+    async def test_middlewares_en_modo_async(self):
+        """Los middlewares del core no pasan por un hilo y ven las consultas del ORM async."""
+        await self.async_client.aforce_login(self.user)
+        respuesta = await self.async_client.get('/api/v1/historial/estadisticas/', headers={'X-Request-ID': 'abc'})
+
+        self.assertEqual(respuesta['X-Request-ID'], 'abc')
+        self.assertEqual(int(respuesta['X-Query-Count']), 6)
+
+        async def get_response(request):
+            return None
+
+        for nombre in settings.MIDDLEWARE:
+            if nombre.startswith('core.'):
+                middleware = import_string(nombre)(get_response)
+                self.assertTrue(iscoroutinefunction(middleware), nombre)
+
+    @override_settings(ASYNC_VIEWS=False)
+    async def test_desactivadas(self):
+        await self.async_client.aforce_login(self.user)
+        respuesta = await self.async_client.get('/api/v1/cajones/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertFalse(iscoroutinefunction(respuesta.asgi_request.resolver_match.func))
@@ -4,6 +4,7 @@ Utilidades generales del sistema.
 import uuid
 import hashlib
 from datetime import datetime, timedelta
+from django.core.cache import cache
 from django.utils import timezone
 from typing import Optional, Dict, Any
 
@@ -126,6 +127,52 @@ def chunks(lst: list, n: int):
         yield lst[i:i + n]
 
 
+def get_cache_version(namespace: str, scope: Any) -> int:
+    """
+    Obtiene la versión vigente de un espacio de caché.
+    
+    Args:
+        namespace: Espacio de caché (p. ej. 'dashboard')
+        scope: Ámbito de la versión (p. ej. el id del usuario)
+    
+    Returns:
+        Versión actual (1 si aún no existe)
+    """
+    return cache.get(f"{namespace}:version:{scope}") or 1
+
+
+def bump_cache_version(namespace: str, scope: Any) -> None:
+    """
+    Incrementa la versión de un espacio de caché, invalidando sus entradas.
+    
+    Args:
+        namespace: Espacio de caché (p. ej. 'dashboard')
+        scope: Ámbito de la versión (p. ej. el id del usuario)
+    """
+    key = f"{namespace}:version:{scope}"
+    if cache.add(key, 2, timeout=None):
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        # La clave expiró entre add e incr (o el backend no la conserva)
+        cache.set(key, 2, timeout=None)
+
+
+def versioned_cache_key(namespace: str, scope: Any) -> str:
+    """
+    Construye la clave de caché usando la versión vigente del espacio.
+    
+    Args:
+        namespace: Espacio de caché (p. ej. 'dashboard')
+        scope: Ámbito de la versión (p. ej. el id del usuario)
+    
+    Returns:
+        Clave de caché versionada
+    """
+    return f"{namespace}:{scope}:v{get_cache_version(namespace, scope)}"
+
+
 class SingletonMeta(type):
     """
     Metaclass para implementar el patrón Singleton.
@@ -88,7 +88,9 @@ class UniqueFieldValidator:
         self.message = message or _('Este valor ya existe.')
 
     def __call__(self, value):
-        queryset = self.model.objects.filter(**{self.field: value})
+        # La unicidad en base de datos también incluye los registros inactivos
+        manager = getattr(self.model, 'all_objects', self.model._default_manager)
+        queryset = manager.filter(**{self.field: value})
         
         if self.exclude_pk:
             queryset = queryset.exclude(pk=self.exclude_pk)